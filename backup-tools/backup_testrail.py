@@ -1,95 +1,187 @@
-import sys
+import argparse
+import contextlib
 import json
 import csv
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from testrail import TestRail
+from snapshot_store import SnapshotStore
 from pathvalidate import sanitize_filename
 
-def create_csv(project_id, project_name, suite_id, suite_name):
-    print("Fetching {project}: {suite}".format(project=project_name, suite=suite_name))
-    
-    now = datetime.now()
-    testrail = TestRail()
-    
+# Overlap with the high-water mark, so cases saved in the same second as
+# the last fetch are not missed; re-fetched cases are deduplicated.
+UPDATED_AFTER_OVERLAP = 60  # seconds
+
+# Suites backed up at a time. TestRail limits API requests per minute;
+# beyond the limit it answers 429 and the client waits as told.
+DEFAULT_WORKERS = 4
+
+
+def fetch_cases(testrail, project_id, suite_id, updated_after=None):
     # TestRail API limits 250 test cases to be fetched at a time.
-    # We repeatedly fetch test cases until there's no more left.
-    offset_count = 0
+    # The client follows the pages until there's no more left.
     cases = []
-    more_cases = [{}]
-    while len(more_cases) > 0:
-        response = testrail.test_cases(project_id, suite_id, offset_count)
-        more_cases = response['cases']
-        cases += more_cases
-        offset_count = len(cases)
-    print("TOTAL: {0} cases fetched".format(len(cases)))
-    
-    # Do not create backup for empty suites
-    if len(cases) == 0:
-        print("No backup file is created because the test suite is empty.")
-        return
+    for page in testrail.test_case_pages(project_id, suite_id, updated_after):
+        cases += page
+    return cases
+
+
+def create_csv(testrail, project_id, project_name, suite_id, suite_name):
+    print("Fetching {project}: {suite}".format(project=project_name, suite=suite_name))
+
+    now = datetime.now()
+    # Each page of 250 cases is written out as soon as it arrives, so the
+    # suite is never held in memory as a whole.
+    total = write_backup(testrail.test_case_pages(project_id, suite_id),
+                         project_name, suite_name, now)
+    print("{project}: {suite}: TOTAL: {0} cases fetched".format(
+        total, project=project_name, suite=suite_name))
+
+
+def create_csv_incremental(testrail, store, project_id, project_name, suite_id, suite_name,
+                           full_every, now=None):
+    """Fetch only the cases changed since the last run (or every case, once
+    every *full_every* days), merge them into *store* and write today's
+    full backup from the merged snapshot."""
+    now = now or datetime.now()
+    today = now.date().isoformat()
+    state = store.suite_state(project_id, suite_id)
+    full = (state['full_day'] is None or state['high_water'] is None
+            or date.fromisoformat(state['full_day']) <= now.date() - timedelta(days=full_every))
+    print("Fetching {project}: {suite} ({mode})".format(
+        project=project_name, suite=suite_name, mode="full" if full else "incremental"))
 
-    output_json_file = "backup_{project}_{suite}_{year}-{month}-{day}.json".format(
-        project=project_name, 
+    updated_after = None if full else state['high_water'] - UPDATED_AFTER_OVERLAP
+    # Both the fetched pages and the snapshot written out go a page at a
+    # time, so the suite is never held in memory as a whole.
+    fetched, total = store.update(project_id, suite_id, today,
+                                  testrail.test_case_pages(project_id, suite_id, updated_after), full)
+    print("{project}: {suite}: TOTAL: {0} cases fetched, {1} in the backup".format(
+        fetched, total, project=project_name, suite=suite_name))
+    write_backup(store.snapshot_pages(project_id, suite_id, today), project_name, suite_name, now)
+
+
+def write_backup(pages, project_name, suite_name, now):
+    """Write the cases of *pages* (an iterable of lists of cases) to the
+    JSON-lines and CSV backup files, a page at a time. Returns the number
+    of cases written."""
+    output_file = sanitize_filename("backup_{project}_{suite}_{year}-{month}-{day}".format(
+        project=project_name,
         suite=suite_name,
         year=now.year,
         month=now.month,
         day=now.day
-    )
-    output_json_file = sanitize_filename(output_json_file)
-    
-    # Write test cases to json file (For debugging)
-    with open(output_json_file, 'w') as output:
-        json.dump(cases, output, indent=2)
-   
-    # write test cases to CSV file
-    output_csv_file = output_json_file.replace(".json", ".csv")
-    with open(output_csv_file, 'w') as csv_file:
-        csv_writer = csv.writer(csv_file)
-        csv.writer(csv_file)
-
-        # Print header
-        # Rearrange the multi-line steps and expected result to be at the rightmost
-        backup_fields = [*cases[0].keys()]
-        backup_fields.remove('custom_steps_separated')
-        backup_fields.append('Steps')
-        backup_fields.append('Expected Result')
-        csv_writer.writerow(backup_fields) 
-
-        # Print rows (including unravel the Steps and Expected Results)
-        for case in cases:
-            first_row = [case.get(field, '') for field in backup_fields[:-2]] # need treatment for steps
-            steps = case['custom_steps_separated']
-            if steps:
-                first_row.append(steps[0].get('content', ''))
-                first_row.append(steps[0].get('expected', ''))
-            else:
-                first_row.append('')
-                first_row.append('')
-                steps = []
-            csv_writer.writerow(first_row)
-            
-            for step in steps[1:]:
-                row = ["" for field in backup_fields[:-2]]
-                row.append(step['content'])
-                row.append(step['expected'])
-                csv_writer.writerow(row)
+    ))
+    total = 0
 
-if __name__ == "__main__":
-    testrail = TestRail()
-    
-    if len(sys.argv) == 1:
-        print("Usage: python backup_testrail.py <project id...>")
-        sys.exit(1)
-        
-    project_ids = sys.argv[1:]
+    with contextlib.ExitStack() as files:
+        for page in pages:
+            if not page:
+                continue
+            if total == 0:
+                # The files are only created once there is a case to write
+                # Write test cases to json lines file (For debugging)
+                json_file = files.enter_context(open(output_file + ".jsonl", 'w'))
+                # write test cases to CSV file
+                csv_writer = csv.writer(files.enter_context(open(output_file + ".csv", 'w')))
+
+                # Print header
+                # Rearrange the multi-line steps and expected result to be at the rightmost
+                backup_fields = [*page[0].keys()]
+                backup_fields.remove('custom_steps_separated')
+                backup_fields.append('Steps')
+                backup_fields.append('Expected Result')
+                csv_writer.writerow(backup_fields)
+
+            # Print rows (including unravel the Steps and Expected Results)
+            for case in page:
+                json_file.write(json.dumps(case) + "\n")
+                first_row = [case.get(field, '') for field in backup_fields[:-2]] # need treatment for steps
+                steps = case['custom_steps_separated']
+                if steps:
+                    first_row.append(steps[0].get('content', ''))
+                    first_row.append(steps[0].get('expected', ''))
+                else:
+                    first_row.append('')
+                    first_row.append('')
+                    steps = []
+                csv_writer.writerow(first_row)
+
+                for step in steps[1:]:
+                    row = ["" for field in backup_fields[:-2]]
+                    row.append(step['content'])
+                    row.append(step['expected'])
+                    csv_writer.writerow(row)
+            total += len(page)
+
+    # Do not create backup for empty suites
+    if total == 0:
+        print("No backup file is created because the test suite is empty.")
+    return total
+
+
+def list_suites(testrail, project_ids):
+    """(project id, project name, suite id, suite name) of every suite of the projects."""
+    suites = []
     for project_id in project_ids:
         project = testrail.project(project_id)
         project_name = project.get('name')
         # Starting v9.3.2, get_suites returns a pagination containing a list of
         # suites instead of just a list of suites.
-        suites = testrail.test_suites(project_id).get('suites')
-        
-        for suite in suites:
-            suite_id = suite.get('id')
-            suite_name = suite.get('name')
-            create_csv(project_id, project_name, suite_id, suite_name)
\ No newline at end of file
+        for suite in testrail.test_suites(project_id).get('suites'):
+            suites.append((project_id, project_name, suite.get('id'), suite.get('name')))
+    return suites
+
+
+def backup_suites(suites, backup, workers=DEFAULT_WORKERS):
+    """Call backup(project_id, project_name, suite_id, suite_name) for every
+    suite, *workers* suites at a time. The TestRail client is shared, so a
+    rate-limited request pauses every worker until TestRail's Retry-After
+    has passed. On an error the suites not yet started are skipped and the
+    error is raised once the running ones finish."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(backup, *suite) for suite in suites]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Back up TestRail test suites to JSON and CSV files")
+    parser.add_argument("project_ids", nargs="+", metavar="project id")
+    parser.add_argument("--store", help="Snapshot store directory; enables incremental "
+                        "backups (only cases updated since the last run are fetched)")
+    parser.add_argument("--full-every", type=int, default=7,
+                        help="With --store, fetch every case once every N days, "
+                        "which also drops deleted cases (default: 7)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Suites backed up in parallel (default: {0})".format(DEFAULT_WORKERS))
+    args = parser.parse_args()
+
+    testrail = TestRail(pool_size=max(args.workers, 10))
+    store = SnapshotStore(args.store) if args.store else None
+    started = time.monotonic()
+
+    if store is None:
+        def backup(project_id, project_name, suite_id, suite_name):
+            create_csv(testrail, project_id, project_name, suite_id, suite_name)
+    else:
+        def backup(project_id, project_name, suite_id, suite_name):
+            create_csv_incremental(testrail, store, project_id, project_name,
+                                   suite_id, suite_name, args.full_every)
+    backup_suites(list_suites(testrail, args.project_ids), backup, args.workers)
+
+    print("Transferred {0:,} bytes in {1} requests, {2:.1f}s".format(
+        testrail.bytes_received, testrail.requests, time.monotonic() - started))
+    if store is not None:
+        print("Store: {0:,} new bytes in {1} objects, {2:,} bytes in total".format(
+            store.bytes_written, store.objects_written, store.size()))
+
+
+if __name__ == "__main__":
+    main()
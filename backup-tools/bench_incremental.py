@@ -0,0 +1,139 @@
+"""
+Benchmark daily incremental backups against full backups on a local fake TestRail.
+
+Simulates --days daily runs over --suites suites of --cases cases. Each
+day --churn of the cases are edited and a few are added. Every day is
+backed up twice: the full way (every case fetched, a full JSON-lines and
+CSV written) and the incremental way (--store mode). The bytes transferred,
+requests, run time and bytes kept on disk are reported for the first day
+and for the average later day. The full backup's on-disk figure is the
+JSON-lines snapshots it writes; the tgz of CSVs that the workflow uploads comes
+on top of that.
+
+  python bench_incremental.py --suites 4 --cases 5000 --days 15 --churn 0.01
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_directory, '..', 'testrail', 'tests'))
+
+import backup_testrail  # noqa: E402
+from fake_testrail import FakeTestRail  # noqa: E402
+from snapshot_store import SnapshotStore  # noqa: E402
+from testrail import TestRail  # noqa: E402
+
+DAY = 24 * 60 * 60
+START = 1_790_000_000  # UNIX time of the first backup; cases were written the year before
+
+
+def make_case(rng, case_id, suite_id, updated_on):
+    return {
+        'id': case_id, 'suite_id': suite_id, 'section_id': rng.randrange(100),
+        'title': 'Verify behaviour {0}'.format(case_id), 'updated_on': updated_on,
+        'priority_id': rng.choice([1, 2, 3, 4]), 'custom_automation_status': rng.choice([1, 4]),
+        'custom_preconds': 'Fresh profile',
+        'custom_steps_separated': [
+            {'content': 'Step {0} of case {1}'.format(i, case_id),
+             'expected': 'Result {0} of case {1}'.format(i, case_id)}
+            for i in range(rng.randrange(2, 8))
+        ],
+    }
+
+
+def simulate_day(rng, cases, suites, churn, now):
+    """Edit *churn* of the cases and add a few new ones during the day before *now*."""
+    for case in rng.sample(cases, int(len(cases) * churn)):
+        case['title'] += ' (edited)'
+        case['updated_on'] = now - rng.randrange(DAY)
+    for _ in range(max(1, int(len(cases) * churn / 5))):
+        cases.append(make_case(rng, len(cases) + 1, rng.choice(suites), now - rng.randrange(DAY)))
+
+
+def run(backup, testrail):
+    """Bytes received, requests and seconds for one backup of every suite."""
+    bytes_before, requests_before = testrail.bytes_received, testrail.requests
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backup()
+    return (testrail.bytes_received - bytes_before, testrail.requests - requests_before,
+            time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suites', type=int, default=4)
+    parser.add_argument('--cases', type=int, default=5000, help='Cases per suite')
+    parser.add_argument('--days', type=int, default=15)
+    parser.add_argument('--churn', type=float, default=0.01,
+                        help='Share of cases edited per day (default: 0.01)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Server time per request in seconds (default: 0.05)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    suites = list(range(1, args.suites + 1))
+    cases = [make_case(rng, i + 1, suites[i % len(suites)], START - rng.randrange(365 * DAY))
+             for i in range(args.suites * args.cases)]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeTestRail({'cases': cases}, latency=args.latency) as server:
+        os.environ.update(TESTRAIL_HOST=server.url, TESTRAIL_USERNAME='bench',
+                          TESTRAIL_PASSWORD='key')
+        testrail = TestRail()
+        store = SnapshotStore(os.path.join(tmp, 'store'))
+        full_dir, incremental_dir = os.path.join(tmp, 'full'), os.path.join(tmp, 'incremental')
+        os.makedirs(full_dir)
+        os.makedirs(incremental_dir)
+
+        results = {'full': [], 'incremental': []}
+        full_bytes_on_disk = 0
+        for day in range(args.days):
+            now = START + day * DAY
+            if day:
+                simulate_day(rng, cases, suites, args.churn, now)
+            os.chdir(full_dir)
+            results['full'].append(run(lambda: [
+                backup_testrail.create_csv(testrail, 1, 'Project', s, 'Suite {0}'.format(s))
+                for s in suites], testrail))
+            full_bytes_on_disk += sum(os.path.getsize(n) for n in os.listdir('.')
+                                      if n.endswith('.jsonl'))
+            for name in os.listdir('.'):
+                os.remove(name)
+
+            os.chdir(incremental_dir)
+            results['incremental'].append(run(lambda: [
+                backup_testrail.create_csv_incremental(
+                    testrail, store, 1, 'Project', s, 'Suite {0}'.format(s), full_every=7,
+                    now=datetime.fromtimestamp(now))
+                for s in suites], testrail))
+            for name in os.listdir('.'):
+                os.remove(name)
+        os.chdir(script_directory)
+        store_size = store.size()
+
+    print('{0} suites x {1:,} cases, {2} days, {3:.0%} edited per day, {4:.0f} ms per request'
+          .format(args.suites, args.cases, args.days, args.churn, args.latency * 1000))
+    for name, runs in results.items():
+        first, later = runs[0], runs[1:]
+        # Days 7, 14, ... are the weekly full fetches of the incremental mode
+        daily = [r for i, r in enumerate(later, 1) if name == 'full' or i % 7]
+        print('  {0:12} first day {1:>12,} B {2:4} req {3:6.2f} s | later days (avg) '
+              '{4:>12,.0f} B {5:6.1f} req {6:6.2f} s'.format(
+                  name, first[0], first[1], first[2],
+                  sum(r[0] for r in daily) / len(daily), sum(r[1] for r in daily) / len(daily),
+                  sum(r[2] for r in daily) / len(daily)))
+    print('  on disk after {0} days: full JSON snapshots {1:,} B, snapshot store {2:,} B'
+          .format(args.days, full_bytes_on_disk, store_size))
+
+
+if __name__ == '__main__':
+    main()
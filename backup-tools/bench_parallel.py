@@ -0,0 +1,119 @@
+"""
+Benchmark the parallel, streaming suite backup against a local fake TestRail.
+
+Backs up --suites suites of --cases cases each, served by the fake in
+fake_testrail.py (run in its own process, so serving does not compete with
+the backup for the GIL) with --latency seconds per request:
+
+- sequential, whole suite: the previous flow, one suite after another,
+  every page of a suite collected before the suite is written;
+- streamed, N workers: backup_suites() with create_csv, which writes every
+  page to the JSON-lines and CSV files as it arrives.
+
+Each mode is timed once, then run again under tracemalloc for the peak
+memory it allocates.
+
+  python bench_parallel.py --suites 50 --cases 5000 --latency 0.1 --workers 1 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_directory, '..', 'testrail', 'tests'))
+
+import backup_testrail  # noqa: E402
+from bench_incremental import START, make_case  # noqa: E402
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail import TestRail  # noqa: E402
+
+
+def serve(suites, cases_per_suite, latency, urls, stop):
+    rng = random.Random(0)
+    cases = [make_case(rng, i + 1, i // cases_per_suite + 1, START)
+             for i in range(suites * cases_per_suite)]
+    with FakeTestRail({'cases': cases}, latency=latency) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+def whole_suites(testrail, suites):
+    """The previous flow: suites one by one, each fetched completely, then written."""
+    for project_id, project_name, suite_id, suite_name in suites:
+        cases = backup_testrail.fetch_cases(testrail, project_id, suite_id)
+        backup_testrail.write_backup([cases], project_name, suite_name, datetime.now())
+
+
+def streamed(workers):
+    def backup(testrail, suites):
+        backup_testrail.backup_suites(
+            suites, lambda *suite: backup_testrail.create_csv(testrail, *suite), workers)
+    return backup
+
+
+def run(backup, suites, directory, traced):
+    """(seconds, requests, peak bytes allocated or None) of one backup of *suites*."""
+    testrail = TestRail(pool_size=10)
+    os.chdir(directory)
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backup(testrail, suites)
+    seconds = time.perf_counter() - started
+    peak = None
+    if traced:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    for name in os.listdir(directory):
+        os.remove(name)
+    os.chdir(script_directory)
+    return seconds, testrail.requests, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suites', type=int, default=50)
+    parser.add_argument('--cases', type=int, default=5000, help='Cases per suite')
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help='Server time per request in seconds (default: 0.1)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8],
+                        help='Worker counts of the streamed runs (default: 1 4 8)')
+    args = parser.parse_args()
+
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(args.suites, args.cases, args.latency, urls, stop), daemon=True)
+    server.start()
+    os.environ.update(TESTRAIL_HOST=urls.get(), TESTRAIL_USERNAME='bench',
+                      TESTRAIL_PASSWORD='key')
+    suites = [(1, 'Project', s, 'Suite {0}'.format(s)) for s in range(1, args.suites + 1)]
+
+    print('{0} suites x {1:,} cases, {2:.0f} ms per request'.format(
+        args.suites, args.cases, args.latency * 1000))
+    modes = [('sequential, whole suite', whole_suites)]
+    modes += [('streamed, {0} worker{1}'.format(n, 's' if n > 1 else ''), streamed(n))
+              for n in args.workers]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, backup in modes:
+                seconds, requests, _ = run(backup, suites, directory, traced=False)
+                _, _, peak = run(backup, suites, directory, traced=True)
+                print('  {0:24} {1:7.1f} s {2:6} req  peak {3:6.1f} MiB allocated'.format(
+                    name, seconds, requests, peak / 2**20))
+    finally:
+        stop.set()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
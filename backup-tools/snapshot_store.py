@@ -0,0 +1,219 @@
+"""
+Compressed, content-deduplicated store of TestRail suite snapshots.
+
+Every distinct case body is stored once, gzipped, under the SHA-256 of its
+canonical JSON (objects/ab/abcd....json.gz). The canonical form is only
+hashed: what is stored keeps TestRail's field order, so a backup written
+from the store has the same columns as one written from TestRail. A snapshot of a suite on a
+given day is a manifest, the list of [case id, case digest] in suite
+order, stored the same way, so a day on which nothing changed costs no new
+objects. suites/<project>_<suite>.json records, per suite, the manifest of
+every backed-up day, the newest `updated_on` seen (the high-water mark for
+the next incremental fetch) and the day of the last full fetch.
+latest/<project>_<suite>_<manifest>.jsonl.gz keeps the newest snapshot's
+cases, one per line, so a daily run neither rebuilds nor re-hashes the
+whole suite; it is a cache, and every snapshot can be rebuilt from the
+objects alone.
+
+A full fetch replaces the manifest. An incremental fetch merges the changed
+cases into the previous day's manifest: changed cases keep their place and
+new ones are appended. Cases deleted in TestRail are only noticed by the
+next full fetch. Cases go in and come out a page at a time, so only the
+manifest (and an incremental fetch's changed cases) is held in memory, not
+the suite.
+
+A store can be shared by threads updating different suites.
+
+  store = SnapshotStore('testrail-store')
+  store.update(59, 1234, '2026-10-19', pages, full=True)
+  for page in store.snapshot_pages(59, 1234, '2026-10-19'):
+      ...
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = root
+        self.bytes_written = 0
+        self.objects_written = 0
+        self._counter_lock = threading.Lock()
+
+    # Objects
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest + '.json.gz')
+
+    def put(self, value):
+        """Store *value* (unless an identical one is stored) and return its digest."""
+        digest = hashlib.sha256(_canonical(value)).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = gzip.compress(json.dumps(value).encode('utf-8'), mtime=0)
+            self._write(path, compressed)
+            with self._counter_lock:
+                self.bytes_written += len(compressed)
+                self.objects_written += 1
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self._object_path(digest)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write(path, data):
+        # Per thread, as two suites can store the same object at once
+        temporary = '{0}.{1}.tmp'.format(path, threading.get_ident())
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    # Suites
+
+    def _suite_path(self, project_id, suite_id):
+        return os.path.join(self.root, 'suites', '{0}_{1}.json'.format(project_id, suite_id))
+
+    def suite_state(self, project_id, suite_id):
+        """{'high_water': newest updated_on or None, 'full_day': day of the
+        last full fetch or None, 'snapshots': [[day, manifest digest], ...]}"""
+        try:
+            with open(self._suite_path(project_id, suite_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'high_water': None, 'full_day': None, 'snapshots': []}
+
+    def _save_suite_state(self, project_id, suite_id, state):
+        path = self._suite_path(project_id, suite_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, json.dumps(state, indent=1).encode('utf-8'))
+
+    def _latest_path(self, project_id, suite_id, manifest):
+        return os.path.join(self.root, 'latest', '{0}_{1}_{2}.jsonl.gz'.format(
+            project_id, suite_id, manifest))
+
+    def _cases(self, project_id, suite_id, manifest):
+        """The cases of *manifest* one at a time, from the latest cache if
+        it is the one cached, else from the objects."""
+        try:
+            f = gzip.open(self._latest_path(project_id, suite_id, manifest))
+        except FileNotFoundError:
+            for _, digest in self.get(manifest):
+                yield self.get(digest)
+            return
+        with f:
+            for line in f:
+                yield json.loads(line)
+
+    def _replace_latest(self, project_id, suite_id, temporary, manifest):
+        """Make *temporary* the latest cache, as the cases of *manifest*."""
+        path = self._latest_path(project_id, suite_id, manifest)
+        os.replace(temporary, path)
+        directory, name = os.path.split(path)
+        prefix = '{0}_{1}_'.format(project_id, suite_id)
+        for stale in os.listdir(directory):
+            if stale.startswith(prefix) and stale.endswith('.jsonl.gz') and stale != name:
+                os.remove(os.path.join(directory, stale))
+
+    def _manifest(self, state, day=None):
+        """The manifest digest of the newest snapshot on or before *day*."""
+        for snapshot_day, digest in reversed(state['snapshots']):
+            if day is None or snapshot_day <= day:
+                return digest
+        return None
+
+    def update(self, project_id, suite_id, day, pages, full):
+        """Record the suite's snapshot for *day* (an ISO date) from a full
+        fetch of its cases, or from the cases changed since the previous
+        snapshot. *pages* is an iterable of lists of cases, consumed a page
+        at a time. Returns the number of cases fetched and the number of
+        cases in the snapshot."""
+        state = self.suite_state(project_id, suite_id)
+        previous = self._manifest(state)
+        manifest, fetched, high_water = [], 0, state['high_water']
+        temporary = '{0}.{1}.tmp'.format(
+            self._latest_path(project_id, suite_id, 'new'), threading.get_ident())
+        os.makedirs(os.path.dirname(temporary), exist_ok=True)
+        try:
+            with open(temporary, 'wb') as f, \
+                    gzip.GzipFile(fileobj=f, mode='wb', compresslevel=1, mtime=0) as latest:
+                def add(case, digest=None):
+                    manifest.append([case['id'], digest or self.put(case)])
+                    latest.write(json.dumps(case).encode('utf-8') + b'\n')
+
+                def fetch():
+                    nonlocal fetched, high_water
+                    for page in pages:
+                        for case in page:
+                            fetched += 1
+                            if case.get('updated_on'):
+                                high_water = max(case['updated_on'], high_water or 0)
+                            yield case
+
+                if full or previous is None:
+                    for case in fetch():
+                        add(case)
+                    state['full_day'] = day
+                else:
+                    # Changed cases keep their place, new ones are appended
+                    changed = {case['id']: case for case in fetch()}
+                    for (case_id, digest), case in zip(self.get(previous),
+                                                       self._cases(project_id, suite_id, previous)):
+                        if case_id in changed:
+                            add(changed.pop(case_id))
+                        else:
+                            add(case, digest)
+                    for case in changed.values():
+                        add(case)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+        state['high_water'] = high_water
+        digest = self.put(manifest)
+        self._replace_latest(project_id, suite_id, temporary, digest)
+        snapshots = [s for s in state['snapshots'] if s[0] != day]
+        snapshots.append([day, digest])
+        state['snapshots'] = sorted(snapshots)
+        self._save_suite_state(project_id, suite_id, state)
+        return fetched, len(manifest)
+
+    def snapshot(self, project_id, suite_id, day=None):
+        """The suite's cases as of *day* (default: the latest snapshot),
+        or None if nothing was backed up by then."""
+        digest = self._manifest(self.suite_state(project_id, suite_id), day)
+        if digest is None:
+            return None
+        return list(self._cases(project_id, suite_id, digest))
+
+    def snapshot_pages(self, project_id, suite_id, day=None, size=250):
+        """snapshot() in lists of up to *size* cases, read a page at a time;
+        no pages if nothing was backed up by then."""
+        digest = self._manifest(self.suite_state(project_id, suite_id), day)
+        if digest is None:
+            return
+        page = []
+        for case in self._cases(project_id, suite_id, digest):
+            page.append(case)
+            if len(page) == size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def size(self):
+        """Bytes used by the store on disk."""
+        return sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(self.root)
+            for name in names
+        )
@@ -1,16 +1,34 @@
 import os
+import sys
+import threading
+
+# The TestRail client (testrail_conn.py) is shared with the tools in the repo's testrail/ directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testrail'))
+
 from testrail_conn import APIClient
 
 class TestRail():
     
-    def __init__(self):
+    def __init__(self, pool_size=10):
+        # pool_size: connections kept open, at least one per backup worker
         try:
             TESTRAIL_HOST = os.environ['TESTRAIL_HOST']
-            self.client = APIClient(TESTRAIL_HOST)
+            self.client = APIClient(TESTRAIL_HOST, pool_size=pool_size)
             self.client.user = os.environ['TESTRAIL_USERNAME']
             self.client.password = os.environ['TESTRAIL_PASSWORD']
         except KeyError as e:
             raise ValueError(f"ERROR: Missing Testrail Env Var: {e}")
+        # Transfer statistics, for reporting backup cost
+        self.requests = 0
+        self.bytes_received = 0
+        self._counter_lock = threading.Lock()
+        self.client.session.hooks['response'].append(self._count_response)
+
+    def _count_response(self, response, *args, **kwargs):
+        size = int(response.headers.get('Content-Length') or len(response.content))
+        with self._counter_lock:
+            self.requests += 1
+            self.bytes_received += size
     
     # Public Methods
 
@@ -29,6 +47,14 @@ class TestRail():
             'get_cases/{0}&suite_id={1}&offset={2}'
             .format(testrail_project_id, testrail_test_suite_id, offset))
 
+    def test_case_pages(self, testrail_project_id, testrail_test_suite_id,
+                        updated_after=None):
+        uri = 'get_cases/{0}&suite_id={1}'.format(
+            testrail_project_id, testrail_test_suite_id)
+        if updated_after is not None:
+            uri += '&updated_after={0}'.format(updated_after)
+        return self.client.iter_pages(uri, 'cases')
+
     def test_case(self, testrail_test_case_id):
         return self.client.send_get(
             'get_case/{0}'.format(testrail_test_case_id))
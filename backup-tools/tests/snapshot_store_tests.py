@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Offline tests for incremental backups into the snapshot store
+(backup-tools/snapshot_store.py and backup_testrail.create_csv_incremental),
+run against the local fake server in testrail/tests/fake_testrail.py.
+
+Each test backs a suite up day after day while editing, adding and deleting
+cases on the fake server in between, and checks the backup written and the
+store's snapshots against what the suite held on each day.
+
+    python -m unittest discover -s backup-tools/tests -p '*tests.py'
+"""
+
+import contextlib
+import copy
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', '..', 'testrail', 'tests'))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+import backup_testrail  # noqa: E402
+from fake_testrail import FakeTestRail  # noqa: E402
+from snapshot_store import SnapshotStore  # noqa: E402
+from testrail import TestRail  # noqa: E402
+
+DAY = 24 * 60 * 60
+START = datetime(2026, 10, 1)
+PROJECT, SUITE = 59, 1234
+
+
+def make_case(case_id, updated_on):
+    return {
+        # In TestRail's field order, which is not alphabetical
+        'id': case_id, 'title': 'Verify behaviour {0}'.format(case_id), 'suite_id': SUITE,
+        'section_id': case_id % 7, 'updated_on': updated_on,
+        'custom_steps_separated': [{'content': 'Step of {0}'.format(case_id),
+                                    'expected': 'Result of {0}'.format(case_id)}],
+    }
+
+
+class IncrementalBackupTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory(prefix='snapshot-store-test-')
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        # More than one page of 250, all written before the first backup
+        self.cases = [make_case(i, int(START.timestamp()) - i * 60) for i in range(1, 601)]
+        self.server = FakeTestRail({'cases': self.cases})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        environment = mock.patch.dict(os.environ, TESTRAIL_HOST=self.server.url,
+                                      TESTRAIL_USERNAME='user', TESTRAIL_PASSWORD='key')
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.testrail = TestRail()
+        self.store = SnapshotStore(os.path.join(directory.name, 'store'))
+
+    def backup(self, day, full_every=7):
+        """Back the suite up on *day* (0 = START); returns the cases in the
+        JSON-lines backup and whether the cases were fetched incrementally."""
+        now = datetime.fromtimestamp(START.timestamp() + day * DAY)
+        fetched = len(self.server.requests)
+        with contextlib.redirect_stdout(io.StringIO()):
+            backup_testrail.create_csv_incremental(
+                self.testrail, self.store, PROJECT, 'Project', SUITE, 'Suite', full_every, now)
+        incremental = any('updated_after=' in uri for _, uri, *_ in self.server.requests[fetched:])
+        name = 'backup_Project_Suite_{0}-{1}-{2}.jsonl'.format(now.year, now.month, now.day)
+        with open(name) as f:
+            return [json.loads(line) for line in f], incremental
+
+    def edit(self, case_id, updated_on):
+        case = next(c for c in self.cases if c['id'] == case_id)
+        case['title'] += ' (edited)'
+        case['updated_on'] = updated_on
+
+    def delete(self, case_id):
+        self.cases[:] = [c for c in self.cases if c['id'] != case_id]
+
+    def test_incremental_run_merges_changed_and_new_cases(self):
+        first, incremental = self.backup(0)
+        self.assertFalse(incremental)
+        self.assertEqual(first, self.cases)
+
+        high_water = self.store.suite_state(PROJECT, SUITE)['high_water']
+        self.edit(300, high_water + DAY)
+        self.cases.append(make_case(601, high_water + DAY))
+        backup, incremental = self.backup(1)
+        self.assertTrue(incremental)
+        # Only the changed cases crossed the wire, one page
+        self.assertEqual(len(self.server.requests), 3 + 1)
+        # Changed cases keep their place, new ones are appended
+        self.assertEqual(backup, self.cases)
+        self.assertEqual(backup[299]['title'], 'Verify behaviour 300 (edited)')
+        self.assertEqual(self.store.snapshot(PROJECT, SUITE), self.cases)
+
+    def test_updates_past_the_high_water_mark_are_fetched_deletes_are_not(self):
+        self.backup(0)
+        high_water = self.store.suite_state(PROJECT, SUITE)['high_water']
+        self.edit(5, high_water + 10)
+        # Saved in the same minute as the newest case the last run saw
+        self.edit(6, high_water - backup_testrail.UPDATED_AFTER_OVERLAP + 1)
+        deleted = copy.deepcopy(self.cases[2])
+        self.delete(3)
+
+        backup, incremental = self.backup(1)
+        self.assertTrue(incremental)
+        self.assertEqual([c['title'] for c in backup[4:6]],
+                         ['Verify behaviour 5 (edited)', 'Verify behaviour 6 (edited)'])
+        self.assertEqual(self.store.suite_state(PROJECT, SUITE)['high_water'], high_water + 10)
+        # An incremental fetch cannot see a deletion
+        self.assertEqual(backup[2], deleted)
+        self.assertEqual(len(backup), 600)
+
+    def test_full_fetch_every_n_days_drops_deleted_cases(self):
+        self.backup(0)
+        self.delete(3)
+        modes = [self.backup(day, full_every=3)[1] for day in range(1, 4)]
+        self.assertEqual(modes, [True, True, False])
+        state = self.store.suite_state(PROJECT, SUITE)
+        self.assertEqual(state['full_day'], '2026-10-04')
+        self.assertEqual(self.backup(4, full_every=3)[0], self.cases)
+        self.assertNotIn(3, [c['id'] for c in self.store.snapshot(PROJECT, SUITE)])
+        self.assertEqual(len(state['snapshots']), 4)
+
+    def test_snapshot_rebuilds_an_older_day(self):
+        days = [self.backup(0)[0]]
+        for day in (1, 2):
+            high_water = self.store.suite_state(PROJECT, SUITE)['high_water']
+            self.edit(day, high_water + 60)
+            self.cases.append(make_case(600 + day, high_water + 60))
+            days.append(self.backup(day)[0])
+        self.assertNotEqual(days[0], days[1])
+
+        # From the objects alone, without the cache of the newest snapshot
+        shutil.rmtree(os.path.join(self.store.root, 'latest'))
+        for day, cases in enumerate(days):
+            self.assertEqual(self.store.snapshot(PROJECT, SUITE, '2026-10-0{0}'.format(day + 1)),
+                             cases)
+        # A day without a backup is the one before it
+        self.assertEqual(self.store.snapshot(PROJECT, SUITE, '2026-10-05'), days[2])
+        self.assertIsNone(self.store.snapshot(PROJECT, SUITE, '2026-09-30'))
+
+    def test_snapshot_pages_are_read_a_page_at_a_time(self):
+        self.assertEqual(list(self.store.snapshot_pages(PROJECT, SUITE)), [])
+        self.backup(0)
+        pages = self.store.snapshot_pages(PROJECT, SUITE, size=250)
+        self.assertEqual([c['id'] for c in next(pages)], list(range(1, 251)))
+        self.assertEqual([len(page) for page in pages], [250, 100])
+
+    def test_store_backup_matches_a_plain_backup(self):
+        def csv_of(backup):
+            os.mkdir(backup)
+            os.chdir(backup)
+            with contextlib.redirect_stdout(io.StringIO()):
+                if backup.startswith('store'):
+                    backup_testrail.create_csv_incremental(
+                        self.testrail, self.store, PROJECT, 'Project', SUITE, 'Suite', 7)
+                else:
+                    backup_testrail.create_csv(self.testrail, PROJECT, 'Project', SUITE, 'Suite')
+            os.chdir('..')
+            [name] = [n for n in os.listdir(backup) if n.endswith('.csv')]
+            with open(os.path.join(backup, name)) as f:
+                return f.read().splitlines()
+
+        for day in ('full', 'incremental'):
+            with self.subTest(day=day):
+                plain, store = csv_of('plain-' + day), csv_of('store-' + day)
+                self.assertEqual(plain[0], 'id,title,suite_id,section_id,updated_on,Steps,Expected Result')
+                self.assertEqual(store[0], plain[0])
+                # Row by row: a diff of every row would take minutes
+                for row, (got, expected) in enumerate(zip(store, plain, strict=True)):
+                    self.assertEqual(got, expected, 'row {0}'.format(row))
+            high_water = self.store.suite_state(PROJECT, SUITE)['high_water']
+            self.edit(7, high_water + 60)
+            self.cases.append(make_case(601, high_water + 60))
+
+    def test_an_unchanged_day_stores_no_new_objects(self):
+        self.backup(0)
+        written = self.store.objects_written
+        backup, incremental = self.backup(1)
+        self.assertTrue(incremental)
+        self.assertEqual(backup, self.cases)
+        self.assertEqual(self.store.objects_written, written)
+
+
+if __name__ == '__main__':
+    unittest.main()
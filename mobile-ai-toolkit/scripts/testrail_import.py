@@ -44,22 +44,23 @@ import csv
 import os
 import re
 import sys
-import time
 import unicodedata
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
-from urllib.parse import urlencode
 
 import requests
-from requests.auth import HTTPBasicAuth
 
 try:
     from dotenv import load_dotenv
 except ImportError:
     load_dotenv = None
 
+# The TestRail client (testrail_conn.py) is shared with the tools in the repo's testrail/ directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "testrail"))
+
+from testrail_conn import APIClient, APIError  # noqa: E402
 
 # --------------------------------------------------------------------------- #
 # Constants
@@ -99,9 +100,6 @@ NUMBERED_ITEM = re.compile(
     re.IGNORECASE,
 )
 
-TEMPORARY_HTTP_CODES = {409, 429, 500, 502, 503, 504}
-
-
 class ImporterError(Exception):
     """Base error for the importer."""
 
@@ -396,70 +394,40 @@ def parse_csv(csv_path: Path) -> list[TestCase]:
 # --------------------------------------------------------------------------- #
 
 class TestRailClient:
+    """The importer's view of the shared TestRail client (testrail/testrail_conn.py),
+    which pools connections and retries rate-limited and transient failures."""
+
     def __init__(self, config: Config) -> None:
         self.config = config
-        self.base_url = f"{config.url}/index.php?/api/v2/"
-        self.session = requests.Session()
-        self.session.auth = HTTPBasicAuth(config.user, config.api_key)
-        self.session.headers.update(
-            {"Content-Type": "application/json", "Accept": "application/json"}
+        self.api = APIClient(
+            config.url, timeout=config.request_timeout, max_retries=config.max_retries
         )
+        self.api.user = config.user
+        self.api.password = config.api_key
 
-    def _request(self, method: str, endpoint: str, payload: dict | None = None) -> Any:
-        url = self.base_url + endpoint
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = self.session.request(
-                    method, url, json=payload, timeout=self.config.request_timeout
-                )
-            except requests.RequestException as exc:
-                if attempt >= self.config.max_retries:
-                    raise ImporterError(f"Network error calling TestRail: {exc}") from exc
-                time.sleep(min(2 ** attempt, 10))
-                continue
-
-            if response.status_code in {200, 201}:
-                return response.json() if response.content else {}
-            if response.status_code in {401, 403}:
+    def _request(self, call, endpoint: str, *args: Any) -> Any:
+        try:
+            return call(endpoint, *args)
+        except requests.RequestException as exc:
+            raise ImporterError(f"Network error calling TestRail: {exc}") from exc
+        except APIError as exc:
+            if exc.status_code in {401, 403}:
                 raise ImporterError(
-                    f"TestRail authentication failed (HTTP {response.status_code})."
-                )
-            if response.status_code in TEMPORARY_HTTP_CODES and attempt < self.config.max_retries:
-                retry_after = response.headers.get("Retry-After")
-                delay = int(float(retry_after)) if retry_after else min(2 ** attempt, 30)
-                time.sleep(max(1, delay))
-                continue
-
-            raise ImporterError(
-                f"TestRail API error (HTTP {response.status_code}) on {endpoint}: "
-                f"{response.text[:500]}"
-            )
-        raise ImporterError(f"TestRail request failed: {endpoint}")
+                    f"TestRail authentication failed (HTTP {exc.status_code})."
+                ) from exc
+            raise ImporterError(f"TestRail API error on {endpoint}: {str(exc)[:500]}") from exc
 
     def get(self, endpoint: str) -> Any:
-        return self._request("GET", endpoint)
+        return self._request(self.api.send_get, endpoint)
 
     def post(self, endpoint: str, payload: dict) -> Any:
-        return self._request("POST", endpoint, payload)
+        return self._request(self.api.send_post, endpoint, payload)
 
     def _paginated(self, endpoint: str, collection: str) -> list[dict]:
-        items: list[dict] = []
-        offset = 0
-        sep = "&" if ("&" in endpoint or "?" in endpoint) else "?"
-        while True:
-            page = self.get(f"{endpoint}{sep}{urlencode({'limit': 250, 'offset': offset})}")
-            if isinstance(page, list):
-                items.extend(page)
-                break
-            batch = page.get(collection, [])
-            items.extend(batch)
-            if (page.get("_links") or {}).get("next"):
-                offset += len(batch)
-                continue
-            if page.get("size", len(batch)) < page.get("limit", 250) or not batch:
-                break
-            offset += len(batch)
-        return items
+        pages = self._request(
+            lambda uri: list(self.api.iter_pages(uri, collection)), endpoint
+        )
+        return [item for page in pages for item in page]
 
     def get_project(self, pid: int) -> dict:
         return self.get(f"get_project/{pid}")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Benchmark the regression detector on a year of synthetic daily vitals.
+
+Fills a temporary VitalsStore with 365 days of versionCode rows for every
+(package, metric set) in the manifest. Each package follows a channel-like
+release cadence: four architecture version codes per build, and builds
+that ramp up and fade out. Three regressions are planted:
+
+- a jump in crash rate on the newest nightly build;
+- a smaller ANR jump on the newest beta build;
+- a slow LMK drift across all release builds over the last 40 days.
+
+Loading the history and running the detector are timed separately. The
+script prints where the planted regressions rank, how many other series
+were flagged, and how many series the fixed ±10% rule used by
+run_queries.py would have flagged on the same data.
+
+    uv run python scripts/bench_regressions.py --manifest src/queries.toml
+"""
+
+import argparse
+import math
+import random
+import sys
+import tempfile
+import time
+import tomllib
+from datetime import date, timedelta
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+import fetch_metrics  # noqa: E402
+import regressions  # noqa: E402
+from vitals_store import VitalsStore  # noqa: E402
+
+# package -> (days between builds, days a build stays in use, total users)
+CHANNELS = {
+    "org.mozilla.firefox": (7, 35, 5_000_000),
+    "org.mozilla.firefox_beta": (2, 14, 300_000),
+    "org.mozilla.fenix": (1, 10, 50_000),
+    "org.mozilla.focus": (7, 35, 500_000),
+}
+DEFAULT_CHANNEL = (7, 35, 200_000)
+ARCH_SHARES = (0.70, 0.20, 0.05, 0.05)
+BASE_RATES = {
+    "crashRate": 0.003, "userPerceivedCrashRate": 0.0015,
+    "anrRate": 0.002, "userPerceivedAnrRate": 0.001,
+    "userPerceivedLmkRate": 0.01,
+}
+
+
+def planted(package: str, metric: str, build: int, newest: int, day: int, days: int) -> float:
+    """Multiplier for the planted regressions (*newest* is the newest
+    build on the last day)."""
+    if package == "org.mozilla.fenix" and metric == "crashRate" and build == newest:
+        return 1.6
+    if package == "org.mozilla.firefox_beta" and metric == "anrRate" and build == newest:
+        return 1.3
+    if package == "org.mozilla.firefox" and metric == "userPerceivedLmkRate":
+        return 1 + 0.005 * max(0, day - (days - 40))
+    return 1.0
+
+
+def synthetic_rows(package: str, metric_set: str, first_day: date, days: int) -> list[dict]:
+    rng = random.Random(f"{package}/{metric_set}")
+    cadence, lifetime, total_users = CHANNELS.get(package, DEFAULT_CHANNEL)
+    metrics = fetch_metrics.METRIC_SETS[metric_set]["metrics"]
+    rate_metrics = regressions.daily_rate_metrics(fetch_metrics.METRIC_SETS[metric_set])
+    builds = range(-lifetime // cadence, days // cadence + 1)
+    build_factor = {b: math.exp(rng.gauss(0, 0.1)) for b in builds}
+    newest = (days - 1) // cadence
+    rows = []
+    for day in range(days):
+        when = first_day + timedelta(days=day)
+        live = [b for b in builds if 0 <= day - b * cadence < lifetime]
+        # Newer builds take over: weight by how recently they shipped
+        weights = [1 / (1 + (day - b * cadence) / cadence) ** 2 for b in live]
+        scale = total_users / sum(weights)
+        noise = math.exp(rng.gauss(0, 0.05))
+        for b, weight in zip(live, weights, strict=True):
+            for arch, share in enumerate(ARCH_SHARES):
+                users = max(1, int(weight * scale * share))
+                values = {}
+                for m in rate_metrics:
+                    p = (BASE_RATES.get(m, 0.005) * build_factor[b] * noise
+                         * planted(package, m, b, newest, day, days))
+                    sd = math.sqrt(p * (1 - p) / users)
+                    values[m] = max(0.0, rng.gauss(p, sd))
+                rows.append({
+                    "startTime": {"year": when.year, "month": when.month, "day": when.day},
+                    "dimensions": [{
+                        "dimension": "versionCode",
+                        "stringValue": str(fetch_metrics.MIN_VERSION_CODE
+                                           + 8 * 24 * (b * cadence) + 2 * arch),
+                    }],
+                    "metrics": [
+                        {"metric": m, "decimalValue": {"value": str(
+                            users if m == "distinctUsers" else values.get(m, 0.0))}}
+                        for m in metrics
+                    ],
+                })
+    return rows
+
+
+def fixed_threshold_flags(history: regressions.VitalsHistory) -> int:
+    """Series whose last-day rate is >10% above their own 28-day mean
+    (the run_queries.py ↑ rule)."""
+    sums: dict[int, list[float]] = {}
+    last = history.n_days - 1
+    for t in range(history.n_days - 29, last):
+        for s, u, e in zip(history.index[t], history.users[t], history.events[t], strict=True):
+            cell = sums.setdefault(s, [0.0, 0.0])
+            cell[0] += u
+            cell[1] += e
+    flagged = 0
+    for s, u, e in zip(history.index[last], history.users[last], history.events[last],
+                       strict=True):
+        if s in sums and sums[s][1] > 0:
+            baseline = sums[s][1] / sums[s][0]
+            flagged += (e / u - baseline) / baseline > 0.10
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manifest", default=str(SRC / "queries.toml"))
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    args = parser.parse_args()
+
+    queries = tomllib.load(Path(args.manifest).open("rb"))["queries"]
+    metric_sets = regressions.manifest_metric_sets(queries)
+    end = date(2026, 10, 18)
+    first_day = end - timedelta(days=args.days)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VitalsStore(Path(tmp) / "vitals.sqlite")
+        n_rows = 0
+        for package, metric_set in metric_sets:
+            rows = synthetic_rows(package, metric_set, first_day, args.days)
+            n_rows += store.add_rows(
+                package, fetch_metrics.METRIC_SETS[metric_set]["metric_set_suffix"],
+                ["versionCode"], rows,
+            )
+
+        load_best = detect_best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            history = regressions.load_history(store, metric_sets, end, args.days)
+            load_best = min(load_best, time.perf_counter() - started)
+            started = time.perf_counter()
+            found = regressions.detect_regressions(history)
+            detect_best = min(detect_best, time.perf_counter() - started)
+        store.close()
+
+    cells = sum(len(day) for day in history.index)
+    print(f"{len(metric_sets)} package/metric sets, {args.days} days, {n_rows:,} stored rows, "
+          f"{len(history.series):,} series, {cells:,} series-days; best of {args.repeat}")
+    print(f"  load_history       {load_best * 1000:9.1f} ms")
+    print(f"  detect_regressions {detect_best * 1000:9.1f} ms")
+
+    expected = {
+        ("org.mozilla.fenix", "crashRate"),
+        ("org.mozilla.firefox_beta", "anrRate"),
+        ("org.mozilla.firefox", "userPerceivedLmkRate"),
+    }
+    print(f"  flagged: {len(found)} series")
+    for rank, regression in enumerate(found, 1):
+        if (regression["package"], regression["metric"]) in expected:
+            print(f"    #{rank:<3} {regressions.format_regression(regression)}")
+    others = [r for r in found if (r["package"], r["metric"]) not in expected]
+    print(f"  flagged outside the planted regressions: {len(others)}")
+    print(f"  fixed ±10% rule, series flagged ↑ on the last day: "
+          f"{fixed_threshold_flags(history)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark fetch_metrics' row processing on a large synthetic response.
+
+Builds a vitals response shaped like a versionCode × deviceModel × day
+query (200k rows by default), then times filtering, sorting, weighted
+aggregation and each output format. No API access is needed: the
+response is generated locally and version resolution uses a fixed
+release list.
+
+    uv run python scripts/bench_row_model.py --rows 200000
+
+Only public fetch_metrics entry points are used, so the same script can
+be pointed at an older checkout (PYTHONPATH=<old>/src) for a before /
+after comparison.
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+import fetch_metrics  # noqa: E402
+
+DEVICE_MODELS = [f"vendor{v}/model{m}" for v in range(25) for m in range(40)]
+
+
+def synthetic_response(n_rows: int, seed: int = 0) -> dict:
+    """A crash-rate response with *n_rows* rows over 28 days."""
+    rng = random.Random(seed)
+    metric_set = fetch_metrics.METRIC_SETS["crashrate"]
+    version_codes = [
+        fetch_metrics.MIN_VERSION_CODE + 8 * rng.randint(0, 24 * 300) + rng.choice((0, 2, 4, 6))
+        for _ in range(200)
+    ]
+    first_day = date(2026, 9, 20)
+    rows = []
+    for i in range(n_rows):
+        day = first_day + timedelta(days=i % 28)
+        users = rng.randint(0, 50_000)
+        rows.append({
+            "startTime": {"year": day.year, "month": day.month, "day": day.day,
+                          "timeZone": {"id": "America/Los_Angeles"}},
+            "dimensions": [
+                {"dimension": "versionCode", "stringValue": str(rng.choice(version_codes))},
+                {"dimension": "deviceModel", "stringValue": rng.choice(DEVICE_MODELS)},
+            ],
+            "metrics": [
+                {"metric": name,
+                 "decimalValue": {"value": str(users if name == "distinctUsers"
+                                               else round(rng.random() * 0.02, 6))}}
+                for name in metric_set["metrics"]
+            ],
+        })
+    return {"name": "apps/org.mozilla.firefox/crashRateMetricSet", "rows": rows}
+
+
+def releases() -> list[tuple[date, str]]:
+    return [(date(2025, 1, 7) + timedelta(days=28 * i), f"{134 + i}.0") for i in range(30)]
+
+
+def timed(label: str, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<44} {best * 1000:9.1f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    args = parser.parse_args()
+
+    fetch_metrics.fetch_release_versions = lambda include_betas=False: releases()
+    config = fetch_metrics.METRIC_SETS["crashrate"]
+    response = synthetic_response(args.rows)
+    compare = synthetic_response(args.rows, seed=1)
+
+    def resolver():
+        return fetch_metrics.VersionResolver(package="org.mozilla.firefox")
+
+    print(f"{args.rows:,} rows, {len(config['metrics'])} metrics, best of {args.repeat}")
+    total = 0.0
+    total += timed("filter_and_sort_rows (min_users, distinctUsers)",
+                   lambda: fetch_metrics.filter_and_sort_rows(
+                       response["rows"], min_users=100, sort_by="distinctUsers"),
+                   args.repeat)
+    total += timed("filter_and_sort_rows (versionCode)",
+                   lambda: fetch_metrics.filter_and_sort_rows(response["rows"]),
+                   args.repeat)
+    total += timed("json: build_json_output + compare",
+                   lambda: fetch_metrics.build_json_output(
+                       response, config, None, 100, True, None, resolver(), compare),
+                   args.repeat)
+    total += timed("csv: output_csv",
+                   lambda: fetch_metrics.output_csv(
+                       response, config, "org.mozilla.firefox", None, 100, False, None,
+                       resolver()),
+                   args.repeat)
+    total += timed("pretty: output_pretty (top 50) + compare",
+                   lambda: fetch_metrics.output_pretty(
+                       response, config, "org.mozilla.firefox", 28, 50, 100, False, None,
+                       resolver(), compare),
+                   args.repeat)
+    print(f"  {'total':<44} {total * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
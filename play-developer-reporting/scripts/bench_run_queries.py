@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Wall-time benchmark for run_queries.py against a local stub of the API.
+
+Compares the old execution model — one ``fetch_metrics.py`` process per
+``[[queries]]`` entry, run one after another — with the in-process
+QueryRunner. Both sides talk to the same stub: every vitals / anomalies
+request sleeps ``--api-latency`` seconds and returns synthetic rows, and
+each product-details download sleeps ``--details-latency`` seconds. The
+real discovery-based ``build()`` is still called, so client construction
+costs what it costs in production. Authentication is not simulated
+(ADC / service-account token exchange would add to every process on the
+"before" side).
+
+    uv run python scripts/bench_run_queries.py --manifest src/queries.toml
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import tomllib
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+
+import fetch_metrics  # noqa: E402
+import run_queries  # noqa: E402
+
+
+def _rows(n: int = 40) -> list[dict]:
+    base = fetch_metrics.MIN_VERSION_CODE
+    return [
+        {
+            "startTime": {"year": 2026, "month": 10, "day": 18},
+            "dimensions": [{"dimension": "versionCode", "stringValue": str(base + i * 8)}],
+            "metrics": [
+                {
+                    "metric": m,
+                    "decimalValue": {
+                        "value": str(1000 + i if m == "distinctUsers" else 0.001 * (i % 7))
+                    },
+                }
+                for m in (
+                    "crashRate", "crashRate28dUserWeighted", "userPerceivedCrashRate",
+                    "userPerceivedCrashRate28dUserWeighted", "anrRate", "anrRate28dUserWeighted",
+                    "userPerceivedAnrRate", "userPerceivedAnrRate28dUserWeighted",
+                    "userPerceivedLmkRate", "userPerceivedLmkRate7dUserWeighted",
+                    "userPerceivedLmkRate28dUserWeighted", "distinctUsers",
+                )
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+class _Request:
+    def __init__(self, latency: float, payload: dict):
+        self._latency = latency
+        self._payload = payload
+
+    def execute(self, **_kwargs):
+        time.sleep(self._latency)
+        return self._payload
+
+
+class _Endpoint:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def query(self, name, body):
+        return _Request(self._latency, {"rows": _rows()})
+
+    def list(self, **_kwargs):
+        return _Request(self._latency, {"anomalies": []})
+
+
+class StubService:
+    """Just enough of the playdeveloperreporting client for fetch_metrics."""
+
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def vitals(self):
+        endpoint = _Endpoint(self._latency)
+        return type("Vitals", (), {name: (lambda self, e=endpoint: e) for name in
+                                   (c["endpoint"] for c in fetch_metrics.METRIC_SETS.values())})()
+
+    def anomalies(self):
+        return _Endpoint(self._latency)
+
+
+def install_stubs(api_latency: float, details_latency: float):
+    """Patch fetch_metrics so it talks to the stub instead of Google."""
+    real_build = fetch_metrics.build
+
+    def build_service(creds=None):
+        # Pay the real client construction cost, then hand back the stub.
+        real_build("playdeveloperreporting", "v1beta1", credentials=AnonymousCredentials())
+        return StubService(api_latency)
+
+    def fetch_json(url):
+        time.sleep(details_latency)
+        if url == fetch_metrics.MOBILE_DETAILS_URL:
+            return {"nightly_version": "146.0a1"}
+        return {"releases": {
+            f"fenix-{v}.0": {"product": "firefox-android", "version": f"{v}.0",
+                             "category": "major", "date": f"2026-{(v - 133) % 12 + 1:02d}-01"}
+            for v in range(134, 146)
+        }}
+
+    fetch_metrics.build_service = build_service
+    fetch_metrics._fetch_json = fetch_json
+    fetch_metrics.authenticate = lambda: AnonymousCredentials()
+
+
+def child_main(argv: list[str], api_latency: float, details_latency: float):
+    """Entry point for one "before" subprocess: fetch_metrics.main with stubs."""
+    install_stubs(api_latency, details_latency)
+    sys.argv = ["fetch_metrics.py", *argv]
+    fetch_metrics.main()
+
+
+def query_argv(query: dict) -> list[str]:
+    """The argument list the old run_queries.py passed to fetch_metrics.py."""
+    argv = ["--package", query["package"], "--output-format", "json"]
+    if query.get("anomalies"):
+        argv.append("--anomalies")
+    else:
+        argv.extend(["--metric-set", query["metric_set"]])
+    for key, flag in (("days", "--days"), ("top", "--top"), ("min_users", "--min-users"),
+                      ("compare_days", "--compare-days"), ("sort_by", "--sort-by")):
+        if query.get(key):
+            argv.extend([flag, str(query[key])])
+    if query.get("resolve_versions"):
+        argv.append("--resolve-versions")
+    return argv
+
+
+def bench_subprocess(queries: list[dict], api_latency: float, details_latency: float) -> float:
+    started = time.monotonic()
+    for query in queries:
+        subprocess.run(
+            [sys.executable, __file__, "--child", str(api_latency), str(details_latency),
+             "--", *query_argv(query)],
+            check=True, capture_output=True, text=True,
+        )
+    return time.monotonic() - started
+
+
+def bench_in_process(queries: list[dict], workers: int) -> float:
+    from concurrent.futures import ThreadPoolExecutor
+
+    started = time.monotonic()
+    runner = run_queries.QueryRunner(creds=AnonymousCredentials())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(runner.run, queries))
+    return time.monotonic() - started
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        api_latency, details_latency = float(sys.argv[2]), float(sys.argv[3])
+        child_main(sys.argv[5:], api_latency, details_latency)
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manifest", default=str(SRC / "queries.toml"))
+    parser.add_argument("--api-latency", type=float, default=0.25,
+                        help="Seconds per stubbed API request (default: 0.25)")
+    parser.add_argument("--details-latency", type=float, default=0.3,
+                        help="Seconds per stubbed product-details download (default: 0.3)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = tomllib.load(Path(args.manifest).open("rb"))["queries"]
+
+    before = bench_subprocess(queries, args.api_latency, args.details_latency)
+    install_stubs(args.api_latency, args.details_latency)
+    after = bench_in_process(queries, args.workers)
+
+    print(f"{len(queries)} queries, API latency {args.api_latency}s, "
+          f"product-details latency {args.details_latency}s")
+    print(f"  subprocess per query (before): {before:6.2f}s")
+    print(f"  in-process, {args.workers} workers (after): {after:6.2f}s  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
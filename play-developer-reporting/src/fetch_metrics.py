@@ -7,22 +7,35 @@ Requires authentication:
 """
 
 import argparse
+import bisect
 import calendar
+import contextlib
 import csv
+import functools
 import json
 import os
 import sys
+import threading
 import time
+import urllib.error
 import urllib.request
+from array import array
 from datetime import date, datetime, timedelta, timezone
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import google.auth
+import google_auth_httplib2
+import httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 from tabulate import tabulate
 
+from vitals_store import VitalsStore, row_day
+
 
 # ---------------------------------------------------------------------------
 # Version code resolution
@@ -51,12 +64,16 @@ _V1_CUTOFF_EPOCH: int = calendar.timegm(
 )
 
 
+@functools.lru_cache(maxsize=65536)
 def reverse_version_code(version_code: int) -> tuple[str, str, datetime]:
     """Reverse a Fenix v1 android:versionCode to build info.
 
     Format: 0111 1000 0010 tttt tttt tttt tttt txpg
     t = hours since V1_CUTOFF, x = x86, p = 64-bit, g = AAB/universal flag.
     Returns (build_id, cpu_arch, build_datetime).
+
+    Memoised: the same version codes show up in the main, comparison and
+    anomaly results and in every output mode.
     """
     stripped = version_code - V1_BASE
 
@@ -83,6 +100,110 @@ def reverse_version_code(version_code: int) -> tuple[str, str, datetime]:
     return build_id, arch, build_dt
 
 
+# Product-details documents are cached on disk so that separate runs (cron
+# jobs, local iterations, every query of a batch) do not each download them.
+# Entries are revalidated with the server's ETag / Last-Modified once their
+# Cache-Control max-age (or PRODUCT_DETAILS_DEFAULT_MAX_AGE) has passed.
+# VITALS_CACHE_DIR overrides the location; "none" disables the disk cache.
+PRODUCT_DETAILS_DEFAULT_MAX_AGE = 15 * 60  # seconds
+
+
+def _cache_dir() -> str | None:
+    configured = os.environ.get("VITALS_CACHE_DIR")
+    if configured:
+        return None if configured.lower() == "none" else configured
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "play-vitals")
+
+
+def _max_age(headers) -> int:
+    """Parse ``max-age`` from a Cache-Control header, with a default."""
+    for directive in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age":
+            try:
+                return int(value)
+            except ValueError:
+                break
+    return PRODUCT_DETAILS_DEFAULT_MAX_AGE
+
+
+def _read_cache_entry(path: str) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) and "body" in entry else None
+
+
+def _write_cache_entry(path: str, entry: dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Warning: could not write cache entry {path} ({e})", file=sys.stderr)
+
+
+@functools.cache
+def _fetch_json(url: str) -> dict[str, Any]:
+    """Download and parse a product-details document.
+
+    Memoised per process: a batch run resolves versions for several
+    packages, and they all read the same two documents. Failures are not
+    cached (the exception propagates), so a later caller retries.
+
+    Backed by the disk cache described above. A fresh entry is returned
+    without touching the network; a stale one is revalidated with a
+    conditional request, and is still used (with a warning) if the
+    server cannot be reached."""
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        with urllib.request.urlopen(url, timeout=15) as resp:
+            return json.loads(resp.read())
+
+    path = os.path.join(cache_dir, "product-details", os.path.basename(url))
+    entry = _read_cache_entry(path)
+    now = time.time()
+    if entry and now - entry.get("fetched_at", 0) < entry.get("max_age", 0):
+        return entry["body"]
+
+    request = urllib.request.Request(url)
+    if entry and entry.get("etag"):
+        request.add_header("If-None-Match", entry["etag"])
+    if entry and entry.get("last_modified"):
+        request.add_header("If-Modified-Since", entry["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=15) as resp:
+            body = json.loads(resp.read())
+            headers = resp.headers
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not entry:
+            raise
+        # Not modified: keep the body, restart the freshness clock
+        entry.update(fetched_at=now, max_age=_max_age(e.headers))
+        _write_cache_entry(path, entry)
+        return entry["body"]
+    except (urllib.error.URLError, OSError) as e:
+        if not entry:
+            raise
+        print(f"Warning: using cached {os.path.basename(url)} ({e})", file=sys.stderr)
+        return entry["body"]
+
+    _write_cache_entry(path, {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "fetched_at": now,
+        "max_age": _max_age(headers),
+        "body": body,
+    })
+    return body
+
+
 def fetch_release_versions(
     include_betas: bool = False,
 ) -> list[tuple[date, str]]:
@@ -96,8 +217,7 @@ def fetch_release_versions(
     included alongside stable releases.
     """
     try:
-        with urllib.request.urlopen(PRODUCT_DETAILS_URL, timeout=15) as resp:
-            data = json.loads(resp.read())
+        data = _fetch_json(PRODUCT_DETAILS_URL)
     except Exception as e:
         print(
             f"Warning: Could not fetch product-details ({e}), "
@@ -145,6 +265,7 @@ def resolve_version_name(
     build_dt: datetime,
     releases: list[tuple[date, str]],
     nightly_version: str | None = None,
+    release_dates: list[date] | None = None,
 ) -> str:
     """Find the Firefox version that a build belongs to.
 
@@ -156,13 +277,18 @@ def resolve_version_name(
     and return its major version.  If the build date falls between a
     major release and a dot-release of that same major, prefer the
     dot-release.  Fall back to the previous release for very old builds.
+
+    *release_dates* is the date column of *releases*; callers resolving
+    many codes against the same list pass it in so it is built once.
     """
     build_d = build_dt.date()
+    if release_dates is None:
+        release_dates = [rel_date for rel_date, _ in releases]
 
     # Find the first release on or after the build date
-    for rel_date, version in releases:
-        if rel_date >= build_d:
-            return version
+    i = bisect.bisect_left(release_dates, build_d)
+    if i < len(releases):
+        return releases[i][1]
 
     # Build is newer than all known releases — use nightly version if
     # available (for org.mozilla.fenix), otherwise infer next major.
@@ -181,8 +307,7 @@ def resolve_version_name(
 def fetch_nightly_version() -> str | None:
     """Fetch the current Firefox nightly version from mobile_details.json."""
     try:
-        with urllib.request.urlopen(MOBILE_DETAILS_URL, timeout=15) as resp:
-            data = json.loads(resp.read())
+        data = _fetch_json(MOBILE_DETAILS_URL)
         return data.get("nightly_version") or data.get("alpha_version")
     except Exception:
         return None
@@ -239,47 +364,73 @@ def resolve_nightly_version(
     build_dt: datetime,
     timeline: list[tuple[date, str]],
     current_nightly: str | None,
+    timeline_dates: list[date] | None = None,
 ) -> str:
     """Resolve a nightly build timestamp to its nightly version.
 
-    Walks the timeline backwards to find which nightly cycle the build
-    belongs to.
+    Finds the last merge on or before the build date, i.e. the nightly
+    cycle the build belongs to. *timeline_dates* is the date column of
+    *timeline*, as for resolve_version_name.
     """
     build_d = build_dt.date()
+    if timeline_dates is None:
+        timeline_dates = [merge_date for merge_date, _ in timeline]
 
-    # Walk backwards through timeline to find the matching cycle
-    for merge_date, nightly_version in reversed(timeline):
-        if build_d >= merge_date:
-            return nightly_version
+    i = bisect.bisect_right(timeline_dates, build_d)
+    if i:
+        return timeline[i - 1][1]
 
     # Build is older than our timeline — fall back to current or unknown
     return current_nightly or "unknown"
 
 
 class VersionResolver:
-    """Lazily resolves version codes to human-readable Firefox versions."""
+    """Lazily resolves version codes to human-readable Firefox versions.
+
+    Safe to share between the worker threads of a batch run: the first
+    caller loads the release list, the others wait for it. The release
+    and nightly dates are indexed once for bisection, and each version
+    code is resolved at most once per resolver."""
 
     def __init__(self, include_betas: bool = False, package: str = ""):
         self._releases: list[tuple[date, str]] | None = None
+        self._release_dates: list[date] = []
         self._include_betas = include_betas
         self._package = package
         self._nightly_version: str | None = None
         self._nightly_timeline: list[tuple[date, str]] | None = None
+        self._nightly_dates: list[date] = []
+        self._resolved: dict[int, tuple[str, str]] = {}
+        self._lock = threading.Lock()
 
     def _ensure_releases(self):
-        if self._releases is None:
+        if self._releases is not None:
+            return
+        with self._lock:
+            if self._releases is not None:
+                return
             # For nightly, always fetch betas too (needed for merge dates)
             include_betas = self._include_betas or self._package == "org.mozilla.fenix"
-            self._releases = fetch_release_versions(include_betas=include_betas)
+            releases = fetch_release_versions(include_betas=include_betas)
 
             if self._package == "org.mozilla.fenix":
                 self._nightly_version = fetch_nightly_version()
                 self._nightly_timeline = build_nightly_timeline(
-                    self._releases, self._nightly_version
+                    releases, self._nightly_version
                 )
+                self._nightly_dates = [d for d, _ in self._nightly_timeline]
+            self._release_dates = [d for d, _ in releases]
+            # Published last so other threads never see a half-built resolver
+            self._releases = releases
 
     def resolve(self, version_code: int) -> tuple[str, str]:
         """Return (version_name, cpu_arch) for a version code."""
+        resolved = self._resolved.get(version_code)
+        if resolved is None:
+            resolved = self._resolved[version_code] = self._resolve(version_code)
+        return resolved
+
+    def _resolve(self, version_code: int) -> tuple[str, str]:
         self._ensure_releases()
         try:
             _build_id, arch, build_dt = reverse_version_code(version_code)
@@ -287,12 +438,13 @@ class VersionResolver:
             # For nightly, use the merge-date timeline
             if self._package == "org.mozilla.fenix" and self._nightly_timeline:
                 version = resolve_nightly_version(
-                    build_dt, self._nightly_timeline, self._nightly_version
+                    build_dt, self._nightly_timeline, self._nightly_version,
+                    self._nightly_dates,
                 )
                 return version, arch
 
             version = resolve_version_name(
-                build_dt, self._releases, self._nightly_version
+                build_dt, self._releases, self._nightly_version, self._release_dates
             )
             return version, arch
         except Exception:
@@ -407,6 +559,8 @@ Examples:
   %(prog)s --package org.mozilla.firefox --metric-set crashrate --resolve-versions --top 10
   %(prog)s --package org.mozilla.firefox --anomalies --days 28
   %(prog)s --package org.mozilla.firefox --anomalies --resolve-versions
+  %(prog)s --package org.mozilla.fenix --days 28 -d versionCode deviceModel --output-format jsonl --stream
+  %(prog)s --package org.mozilla.firefox --metric-set crashrate --compare-days 28 --concurrent
         """,
     )
 
@@ -456,9 +610,17 @@ Examples:
 
     parser.add_argument(
         "--output-format",
-        choices=["pretty", "csv", "json"],
+        choices=["pretty", "csv", "json", "jsonl"],
         default="pretty",
-        help="Output format (default: pretty)",
+        help="Output format (default: pretty). jsonl writes one API row per line",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write csv/jsonl rows as each page arrives instead of after the "
+        "last one, fetching the next page in the background. Memory stays "
+        "bounded; rows keep API order (no --top, --sort-by or aggregate)",
     )
 
     parser.add_argument(
@@ -506,6 +668,14 @@ Examples:
         "(e.g., --compare-days 28 shows delta vs. previous 28-day period)",
     )
 
+    parser.add_argument(
+        "--store",
+        metavar="PATH",
+        help="Local SQLite history (see vitals_store.py). Only days not yet "
+        "stored are fetched; the current and --compare-days windows are read "
+        "from it",
+    )
+
     parser.add_argument(
         "--anomalies",
         action="store_true",
@@ -513,7 +683,36 @@ Examples:
         "querying a metric set. Supports --days to limit the lookback window.",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="Send the current window, the --compare-days window and the "
+        "package's anomalies (over --days) in parallel, then print the "
+        "anomalies after the metric set. Per-query latency and total wall "
+        "time go to stderr. pretty and json output only",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=3,
+        help="Concurrent requests with --concurrent (default: 3)",
+    )
+
+    args = parser.parse_args()
+    if args.concurrent:
+        if args.output_format not in ("pretty", "json"):
+            parser.error("--concurrent requires --output-format pretty or json")
+        if args.stream or args.anomalies or args.store:
+            parser.error("--concurrent cannot be combined with --stream, --anomalies or --store")
+    if args.stream:
+        if args.output_format not in ("csv", "jsonl"):
+            parser.error("--stream requires --output-format csv or jsonl")
+        if args.top or args.compare_days or args.anomalies or args.store:
+            parser.error(
+                "--stream cannot be combined with --top, --compare-days, --anomalies or --store"
+            )
+    return args
 
 
 def authenticate():
@@ -532,17 +731,49 @@ def authenticate():
     return creds
 
 
-def build_query_body(
+def build_service(creds=None):
+    """Build the Play Developer Reporting client, authenticating first
+    unless *creds* are given.
+
+    The client is not thread-safe (it sits on an httplib2 connection), so
+    concurrent callers build one per thread from the same credentials."""
+    if creds is None:
+        creds = authenticate()
+    return build("playdeveloperreporting", "v1beta1", credentials=creds)
+
+
+def build_shared_service(creds=None):
+    """Build one client that several threads can use at once.
+
+    Every request is built on an authorised transport belonging to the
+    calling thread, and all of them share the same credentials, so the
+    token is fetched (and refreshed) once for the whole pool while no
+    httplib2 connection is used by two threads."""
+    if creds is None:
+        creds = authenticate()
+    local = threading.local()
+
+    def request_builder(_http, *args, **kwargs):
+        http = getattr(local, "http", None)
+        if http is None:
+            http = local.http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        return HttpRequest(http, *args, **kwargs)
+
+    return build(
+        "playdeveloperreporting", "v1beta1",
+        http=google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http()),
+        requestBuilder=request_builder,
+    )
+
+
+def _timeline_body(
     metrics: list[str],
     dimensions: list[str],
-    days: int,
+    start_date: date,
+    end_date: date,
     page_size: int,
 ) -> dict[str, Any]:
-    """Build the query request body."""
-    # Try to get the most recent data, will auto-retry with older dates if needed
-    end_date = date.today()
-    start_date = end_date - timedelta(days=days)
-
+    """A DAILY query body for [start_date, end_date)."""
     return {
         "timelineSpec": {
             "aggregationPeriod": "DAILY",
@@ -563,6 +794,19 @@ def build_query_body(
     }
 
 
+def build_query_body(
+    metrics: list[str],
+    dimensions: list[str],
+    days: int,
+    page_size: int,
+) -> dict[str, Any]:
+    """Build the query request body."""
+    # Try to get the most recent data, will auto-retry with older dates if needed
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    return _timeline_body(metrics, dimensions, start_date, end_date, page_size)
+
+
 def build_compare_query_body(
     metrics: list[str],
     dimensions: list[str],
@@ -579,38 +823,143 @@ def build_compare_query_body(
     """
     end_date = date.today() - timedelta(days=compare_days)
     start_date = end_date - timedelta(days=window_days)
+    return _timeline_body(metrics, dimensions, start_date, end_date, page_size)
 
-    return {
-        "timelineSpec": {
-            "aggregationPeriod": "DAILY",
-            "startTime": {
-                "year": start_date.year,
-                "month": start_date.month,
-                "day": start_date.day,
-            },
-            "endTime": {
-                "year": end_date.year,
-                "month": end_date.month,
-                "day": end_date.day,
-            },
-        },
-        "metrics": metrics,
-        "dimensions": dimensions,
-        "pageSize": page_size,
-    }
 
+class PoolBackoff:
+    """Backoff shared by the workers of one concurrent run.
 
-def query_vitals(
+    A worker that gets a 429 (or 500 / 503) pauses the whole pool: every
+    worker waits for the pause to end before its next request, instead of
+    each one backing off on its own while the others keep hitting the
+    quota."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def wait(self) -> None:
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _query_page(
+    endpoint,
+    metric_set_name: str,
+    body: dict[str, Any],
+    page_token: str | None,
+    max_retries: int,
+    backoff: PoolBackoff | None = None,
+) -> dict[str, Any]:
+    """Fetch one page, retrying transient HTTP errors and stepping the
+    timeline back a day on freshness errors (the adjustment is written
+    back into *body* so later pages use the same dates).
+
+    With a *backoff*, transient errors pause the whole pool instead of
+    just this caller."""
+    request_body = dict(body)
+    if page_token:
+        request_body["pageToken"] = page_token
+
+    # Try querying with progressively older dates if we hit freshness errors
+    response = None
+    for retry in range(max_retries):
+        if backoff is not None:
+            backoff.wait()
+        try:
+            response = endpoint.query(
+                name=metric_set_name, body=request_body
+            ).execute()
+            break
+        except Exception as e:
+            # Transient HTTP errors — exponential backoff, no date adjustment
+            if isinstance(e, HttpError) and e.resp.status in (429, 500, 503):
+                if retry < max_retries - 1:
+                    wait = 2 ** retry
+                    print(
+                        f"HTTP {e.resp.status}, retrying in {wait}s...",
+                        file=sys.stderr,
+                    )
+                    if backoff is not None:
+                        backoff.pause(wait)
+                    else:
+                        time.sleep(wait)
+                    continue
+                raise
+
+            error_str = str(e)
+            if (
+                "timeline_spec.start_date" in error_str
+                or "timeline_spec.end_date" in error_str
+                or "freshness" in error_str
+            ):
+                if "startTime" in request_body["timelineSpec"]:
+                    start = request_body["timelineSpec"]["startTime"]
+                    start_date = date(
+                        start["year"], start["month"], start["day"]
+                    )
+                    new_start = start_date - timedelta(days=1)
+                    request_body["timelineSpec"]["startTime"] = {
+                        "year": new_start.year,
+                        "month": new_start.month,
+                        "day": new_start.day,
+                    }
+                    # Update the original body too so subsequent pages
+                    # use the same adjusted dates
+                    body["timelineSpec"]["startTime"] = request_body[
+                        "timelineSpec"
+                    ]["startTime"]
+
+                if "endTime" in request_body["timelineSpec"]:
+                    end = request_body["timelineSpec"]["endTime"]
+                    end_date = date(
+                        end["year"], end["month"], end["day"]
+                    )
+                    new_end = end_date - timedelta(days=1)
+                    request_body["timelineSpec"]["endTime"] = {
+                        "year": new_end.year,
+                        "month": new_end.month,
+                        "day": new_end.day,
+                    }
+                    body["timelineSpec"]["endTime"] = request_body[
+                        "timelineSpec"
+                    ]["endTime"]
+
+                if retry < max_retries - 1:
+                    print(
+                        "Data not yet available, trying 1 day earlier...",
+                        file=sys.stderr,
+                    )
+                    continue
+
+            raise
+
+    if response is None:
+        raise Exception("Failed to query after multiple retries")
+    return response
+
+
+def iter_vitals_pages(
     service,
     package_name: str,
     metric_set_config: dict[str, Any],
     body: dict[str, Any],
     max_retries: int = 10,
-) -> dict[str, Any]:
-    """Query the vitals API with automatic retry for freshness errors.
-
-    Handles pagination via ``nextPageToken`` so that all rows are returned
-    regardless of ``pageSize``.
+    prefetch: bool = False,
+    backoff: PoolBackoff | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield each page of a vitals query as it arrives.
+
+    With *prefetch*, the next page is requested on a background thread
+    while the caller processes the current one; at most two pages are
+    held at a time. All requests still go out one after another, so the
+    (not thread-safe) client is never used concurrently.
     """
     metric_set_name = f"apps/{package_name}/{metric_set_config['metric_set_suffix']}"
     endpoint_name = metric_set_config["endpoint"]
@@ -618,95 +967,56 @@ def query_vitals(
     # Get the endpoint dynamically
     endpoint = getattr(service.vitals(), endpoint_name)()
 
-    all_rows: list[dict[str, Any]] = []
-    page_token: str | None = None
-    first_response: dict[str, Any] | None = None
-
-    while True:
-        request_body = dict(body)
-        if page_token:
-            request_body["pageToken"] = page_token
-
-        # Try querying with progressively older dates if we hit freshness errors
-        response = None
-        for retry in range(max_retries):
-            try:
-                response = endpoint.query(
-                    name=metric_set_name, body=request_body
-                ).execute()
-                break
-            except Exception as e:
-                # Transient HTTP errors — exponential backoff, no date adjustment
-                if isinstance(e, HttpError) and e.resp.status in (429, 500, 503):
-                    if retry < max_retries - 1:
-                        wait = 2 ** retry
-                        print(
-                            f"HTTP {e.resp.status}, retrying in {wait}s...",
-                            file=sys.stderr,
-                        )
-                        time.sleep(wait)
-                        continue
-                    raise
+    if not prefetch:
+        page_token: str | None = None
+        while True:
+            response = _query_page(
+                endpoint, metric_set_name, body, page_token, max_retries, backoff
+            )
+            yield response
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(
+            _query_page, endpoint, metric_set_name, body, None, max_retries, backoff
+        )
+        while future is not None:
+            response = future.result()
+            page_token = response.get("nextPageToken")
+            future = None
+            if page_token:
+                future = pool.submit(
+                    _query_page, endpoint, metric_set_name, body, page_token, max_retries,
+                    backoff,
+                )
+            yield response
 
-                error_str = str(e)
-                if (
-                    "timeline_spec.start_date" in error_str
-                    or "timeline_spec.end_date" in error_str
-                    or "freshness" in error_str
-                ):
-                    if "startTime" in request_body["timelineSpec"]:
-                        start = request_body["timelineSpec"]["startTime"]
-                        start_date = date(
-                            start["year"], start["month"], start["day"]
-                        )
-                        new_start = start_date - timedelta(days=1)
-                        request_body["timelineSpec"]["startTime"] = {
-                            "year": new_start.year,
-                            "month": new_start.month,
-                            "day": new_start.day,
-                        }
-                        # Update the original body too so subsequent pages
-                        # use the same adjusted dates
-                        body["timelineSpec"]["startTime"] = request_body[
-                            "timelineSpec"
-                        ]["startTime"]
-
-                    if "endTime" in request_body["timelineSpec"]:
-                        end = request_body["timelineSpec"]["endTime"]
-                        end_date = date(
-                            end["year"], end["month"], end["day"]
-                        )
-                        new_end = end_date - timedelta(days=1)
-                        request_body["timelineSpec"]["endTime"] = {
-                            "year": new_end.year,
-                            "month": new_end.month,
-                            "day": new_end.day,
-                        }
-                        body["timelineSpec"]["endTime"] = request_body[
-                            "timelineSpec"
-                        ]["endTime"]
-
-                    if retry < max_retries - 1:
-                        print(
-                            "Data not yet available, trying 1 day earlier...",
-                            file=sys.stderr,
-                        )
-                        continue
 
-                raise
+def query_vitals(
+    service,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    body: dict[str, Any],
+    max_retries: int = 10,
+    backoff: PoolBackoff | None = None,
+) -> dict[str, Any]:
+    """Query the vitals API with automatic retry for freshness errors.
 
-        if response is None:
-            raise Exception("Failed to query after multiple retries")
+    Handles pagination via ``nextPageToken`` so that all rows are returned
+    regardless of ``pageSize``.
+    """
+    all_rows: list[dict[str, Any]] = []
+    first_response: dict[str, Any] | None = None
 
+    for response in iter_vitals_pages(
+        service, package_name, metric_set_config, body, max_retries, backoff=backoff
+    ):
         if first_response is None:
             first_response = response
-
         all_rows.extend(response.get("rows", []))
 
-        page_token = response.get("nextPageToken")
-        if not page_token:
-            break
-
     # Return the first response structure with all rows merged
     if first_response is not None:
         first_response["rows"] = all_rows
@@ -715,124 +1025,336 @@ def query_vitals(
     return first_response
 
 
-def filter_and_sort_rows(
-    rows: list[dict[str, Any]],
+# ---------------------------------------------------------------------------
+# Columnar row model
+# ---------------------------------------------------------------------------
+# The API returns one dict per row, each holding "dimensions" and "metrics"
+# lists that have to be searched by name. VitalsTable wraps the rows of a
+# response and extracts each dimension / metric into a column the first time
+# it is needed (a list per dimension, a float array per metric). Filtering,
+# sorting, weighted aggregation and every output format work on those
+# columns. Selections are index lists: taking a subset keeps the columns
+# extracted so far, and the original row dicts, which the JSON output
+# passes through unchanged, are never copied.
+
+_NAN = float("nan")
+_MISMATCH = object()
+
+
+def _format_date(start_time: dict[str, Any] | None) -> str:
+    if not start_time:
+        return ""
+    return (
+        f"{start_time.get('year', '')}-{start_time.get('month', 0):02d}"
+        f"-{start_time.get('day', 0):02d}"
+    )
+
+
+def _find_entry(entries: list[dict[str, Any]], key: str, name: str):
+    """The entry of a row's dimensions/metrics list called *name*."""
+    for entry in entries:
+        if entry[key] == name:
+            return entry
+    return None
+
+
+def _select(column, indices: list[int]):
+    values = [column[i] for i in indices]
+    return array("d", values) if isinstance(column, array) else values
+
+
+class VitalsTable:
+    """The rows of a vitals response, with lazily built columns.
+
+    dimension() returns the raw per-row value (``stringValue`` or
+    ``int64Value``, None where absent). metric() returns a float array
+    holding NaN where the row has no ``decimalValue``. version_codes()
+    is the parsed versionCode column (None where absent or unparseable).
+    Column names and their order come from the first row, as in the
+    API's own layout."""
+
+    def __init__(
+        self,
+        rows: list[dict[str, Any]],
+        parent: "VitalsTable | None" = None,
+        indices: list[int] | None = None,
+    ):
+        self.rows = rows
+        self._columns: dict[tuple[str, str], Any] = {}
+        self._parent = parent
+        self._indices = indices
+        first = rows[0] if rows else {}
+        self.dimension_names = [d["dimension"] for d in first.get("dimensions", [])]
+        self.metric_names = [m["metric"] for m in first.get("metrics", [])]
+
+    @classmethod
+    def from_response(cls, response: dict[str, Any] | None) -> "VitalsTable":
+        return cls((response or {}).get("rows", []))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def take(self, indices: list[int]) -> "VitalsTable":
+        """A new table holding the rows at *indices*, in that order."""
+        subset = VitalsTable([self.rows[i] for i in indices], self, indices)
+        for key, column in self._columns.items():
+            subset._columns[key] = _select(column, indices)
+        return subset
+
+    def _column(self, key: tuple[str, str], extract):
+        """The column for *key*, calling ``extract(table)`` on first use.
+
+        A large selection extracts from its parent instead and subsets
+        the result: walking the rows in their original order is much
+        faster than following a sorted index through them."""
+        column = self._columns.get(key)
+        if column is None:
+            parent = self._parent
+            if parent is not None and len(self) * 4 >= len(parent):
+                column = _select(parent._column(key, extract), self._indices)
+            else:
+                column = extract(self)
+            self._columns[key] = column
+        return column
+
+    def _entries(self, key: str, name: str):
+        """Yield each row's dimensions/metrics entry called *name* (or None)."""
+        field = f"{key}s"
+        for row in self.rows:
+            yield _find_entry(row.get(field, ()), key, name)
+
+    def dates(self) -> list[str]:
+        return self._column(("date", ""), lambda t: [
+            _format_date(row.get("startTime")) for row in t.rows
+        ])
+
+    def dimension(self, name: str) -> list[Any]:
+        return self._column(("dimension", name), lambda t: t._extract_dimension(name))
+
+    def _extract_dimension(self, name: str) -> list[Any]:
+        if name in self.dimension_names:
+            # Fast path: rows of one response list their entries in the
+            # same order as the first row. Any row that does not falls
+            # back to searching by name.
+            pos = self.dimension_names.index(name)
+            try:
+                values = [
+                    d.get("stringValue", d.get("int64Value"))
+                    if (d := row["dimensions"][pos])["dimension"] == name else _MISMATCH
+                    for row in self.rows
+                ]
+                if _MISMATCH not in values:
+                    return values
+            except (KeyError, IndexError, TypeError):
+                pass
+        return [
+            None if d is None else d.get("stringValue", d.get("int64Value"))
+            for d in self._entries("dimension", name)
+        ]
+
+    def version_codes(self) -> list[int | None]:
+        return self._column(("versionCode", ""), VitalsTable._extract_version_codes)
+
+    def _extract_version_codes(self) -> list[int | None]:
+        raw_column = self.dimension("versionCode")
+        by_raw: dict[Any, int | None] = {}
+        for raw in set(raw_column):
+            try:
+                by_raw[raw] = int(raw)
+            except (ValueError, TypeError):
+                by_raw[raw] = None
+        return [by_raw[raw] for raw in raw_column]
+
+    def metric(self, name: str) -> array:
+        return self._column(("metric", name), lambda t: t._extract_metric(name))
+
+    def _extract_metric(self, name: str) -> array:
+        if name in self.metric_names:
+            # Fast path as in _extract_dimension; a row without a
+            # decimalValue also drops to the slow path
+            pos = self.metric_names.index(name)
+            try:
+                values = [
+                    float(m["decimalValue"]["value"])
+                    if (m := row["metrics"][pos])["metric"] == name else None
+                    for row in self.rows
+                ]
+                if None not in values:
+                    return array("d", values)
+            except (KeyError, IndexError, ValueError, TypeError):
+                pass
+        column = array("d")
+        for m in self._entries("metric", name):
+            try:
+                column.append(float(m["decimalValue"]["value"]))
+            except (KeyError, ValueError, TypeError):
+                column.append(_NAN)
+        return column
+
+    def user_weights(self) -> list[float]:
+        """distinctUsers per row, 0 where the row does not report it."""
+        return [0 if u != u else u for u in self.metric("distinctUsers")]
+
+    def weighted_totals(self) -> tuple[float, dict[str, float]]:
+        """Return (total users, {metric: sum of value × users}).
+
+        Only metrics with at least one value are included; rows without a
+        value for a metric contribute nothing to its sum."""
+        weights = self.user_weights()
+        totals: dict[str, float] = {}
+        for name in self.metric_names:
+            if name == "distinctUsers":
+                continue
+            weighted = 0.0
+            seen = False
+            for value, users in zip(self.metric(name), weights, strict=True):
+                if value == value:
+                    weighted += value * users
+                    seen = True
+            if seen:
+                totals[name] = weighted
+        return sum(weights, 0), totals
+
+    def weighted_aggregate(self) -> dict[str, Any]:
+        """distinctUsers plus the user-weighted mean of every other metric."""
+        total_users, totals = self.weighted_totals()
+        aggregate: dict[str, Any] = {"distinctUsers": total_users}
+        for name, weighted in totals.items():
+            aggregate[name] = weighted / total_users if total_users > 0 else 0.0
+        return aggregate
+
+    def formatted(self, metric_name: str) -> list[str | None]:
+        """Display values for one metric; None where a row lacks it."""
+        column = self.metric(metric_name)
+        lowered = metric_name.lower()
+        cells: list[str | None]
+        if "rate" in lowered:
+            cells = [f"{v * 100:.2f}%" if v == v else None for v in column]
+        elif "users" in lowered:
+            cells = [f"{int(v):,}" if v == v else None for v in column]
+        else:
+            cells = [f"{v:.4f}" if v == v else None for v in column]
+        if None in cells:
+            # No decimalValue: fall back to the raw metric (int64Value / N/A)
+            for i, cell in enumerate(cells):
+                if cell is None:
+                    m = _find_entry(self.rows[i].get("metrics", []), "metric", metric_name)
+                    cells[i] = None if m is None else format_metric_value(m, metric_name)
+        return cells
+
+    def resolve_versions(self, resolver: "VersionResolver") -> list[tuple[str, str] | None]:
+        """(version_name, cpu_arch) per row; None where there is no versionCode."""
+        column = self.dimension("versionCode")
+        by_code: dict[Any, tuple[str, str] | None] = {None: None}
+        for raw in set(column):
+            if raw is None:
+                continue
+            try:
+                by_code[raw] = resolver.resolve(int(raw))
+            except (ValueError, TypeError):
+                by_code[raw] = ("unknown", "unknown")
+        return [by_code[raw] for raw in column]
+
+
+def filter_and_sort_table(
+    table: VitalsTable,
     top_n: int | None = None,
     min_users: int | None = None,
     exclude_zero: bool = False,
     version_codes: list[str] | None = None,
-    sort_by: str = "versionCode",
-) -> list[dict[str, Any]]:
-    """Filter and sort result rows."""
-
-    # Helper to extract the integer versionCode from a row
-    def _get_vc(row):
-        for dim in row.get("dimensions", []):
-            if dim["dimension"] == "versionCode":
-                try:
-                    return int(
-                        dim.get("stringValue") or dim.get("int64Value", 0)
-                    )
-                except (ValueError, TypeError):
-                    pass
-        return 0
-
+    sort_by: str | None = "versionCode",
+) -> VitalsTable:
+    """Filter and sort a table; see filter_and_sort_rows. A *sort_by* of
+    None keeps the API's row order (used when streaming pages)."""
     # Drop Fenix v1 builds older than MIN_VERSION_CODE (pre-2026).
     # Non-Fenix packages (e.g. Focus) use smaller version codes and are kept.
-    filtered_rows = [
-        row for row in rows
-        if _get_vc(row) < V1_BASE or _get_vc(row) >= MIN_VERSION_CODE
+    vcs = table.version_codes()
+    indices = [
+        i for i, vc in enumerate(vcs)
+        if vc is None or vc < V1_BASE or vc >= MIN_VERSION_CODE
     ]
 
     # Filter by specific version codes
     if version_codes:
         version_codes_set = set(version_codes)
-        filtered_rows = [
-            row
-            for row in filtered_rows
-            if any(
-                d["dimension"] == "versionCode"
-                and (
-                    d.get("stringValue") in version_codes_set
-                    or str(d.get("int64Value")) in version_codes_set
-                )
-                for d in row.get("dimensions", [])
-            )
+        column = table.dimension("versionCode")
+        indices = [
+            i for i in indices
+            if column[i] is not None and str(column[i]) in version_codes_set
         ]
 
-    # Filter by minimum users
+    # Filter by minimum users (NaN never compares >=, so rows without
+    # distinctUsers are dropped)
     if min_users is not None:
-        filtered_rows = [
-            row
-            for row in filtered_rows
-            if any(
-                m["metric"] == "distinctUsers"
-                and "decimalValue" in m
-                and float(m["decimalValue"]["value"]) >= min_users
-                for m in row.get("metrics", [])
-            )
-        ]
+        users = table.metric("distinctUsers")
+        indices = [i for i in indices if users[i] >= min_users]
 
     # Exclude rows where all rate metrics are zero
     if exclude_zero:
-        filtered_rows = [
-            row
-            for row in filtered_rows
-            if any(
-                "rate" in m["metric"].lower()
-                and "decimalValue" in m
-                and float(m["decimalValue"]["value"]) > 0
-                for m in row.get("metrics", [])
-            )
+        positive = [
+            any(flags) for flags in zip(*(
+                [v > 0 for v in table.metric(n)]
+                for n in table.metric_names if "rate" in n.lower()
+            ), strict=True)
         ]
+        indices = [i for i in indices if positive and positive[i]]
 
     if sort_by == "distinctUsers":
-        def get_distinct_users(row):
-            for m in row.get("metrics", []):
-                if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                    try:
-                        return float(m["decimalValue"]["value"])
-                    except (ValueError, TypeError):
-                        pass
-            return 0.0
-        filtered_rows.sort(key=get_distinct_users, reverse=True)
-    else:
+        users = table.user_weights()
+        indices.sort(key=users.__getitem__, reverse=True)
+    elif sort_by is not None:
         # Sort by build date (descending) decoded from version code.
         # This ensures correct ordering across both the v1 and Gradle
         # version code schemes.
-        def get_build_timestamp(row):
-            for dim in row.get("dimensions", []):
-                if dim["dimension"] == "versionCode":
-                    try:
-                        vc = int(
-                            dim.get("stringValue") or dim.get("int64Value", 0)
-                        )
-                        _bid, _arch, build_dt = reverse_version_code(vc)
-                        return build_dt.timestamp()
-                    except (ValueError, TypeError):
-                        return 0.0
-            return 0.0
-        filtered_rows.sort(key=get_build_timestamp, reverse=True)
+        def build_timestamp(vc):
+            if vc is None:
+                return 0.0
+            try:
+                return reverse_version_code(vc)[2].timestamp()
+            except (ValueError, TypeError):
+                return 0.0
+
+        by_code = {vc: build_timestamp(vc) for vc in set(vcs)}
+        timestamps = [by_code[vc] for vc in vcs]
+        indices.sort(key=timestamps.__getitem__, reverse=True)
 
     # Limit to top N
     if top_n is not None and top_n > 0:
-        filtered_rows = filtered_rows[:top_n]
+        indices = indices[:top_n]
+
+    return table.take(indices)
 
-    return filtered_rows
+
+def filter_and_sort_rows(
+    rows: list[dict[str, Any]],
+    top_n: int | None = None,
+    min_users: int | None = None,
+    exclude_zero: bool = False,
+    version_codes: list[str] | None = None,
+    sort_by: str = "versionCode",
+) -> list[dict[str, Any]]:
+    """Filter and sort result rows."""
+    table = VitalsTable(rows)
+    return filter_and_sort_table(
+        table, top_n, min_users, exclude_zero, version_codes, sort_by
+    ).rows
+
+
+def _format_decimal(value: float, metric_name: str) -> str:
+    # If it's a rate metric (not distinctUsers), format as percentage
+    if "rate" in metric_name.lower():
+        return f"{value * 100:.2f}%"
+    # For user counts, format as integer with commas
+    elif "users" in metric_name.lower():
+        return f"{int(value):,}"
+    else:
+        return f"{value:.4f}"
 
 
 def format_metric_value(metric: dict[str, Any], metric_name: str) -> str:
     """Format a metric value for display."""
     if "decimalValue" in metric:
-        value = float(metric["decimalValue"]["value"])
-        # If it's a rate metric (not distinctUsers), format as percentage
-        if "rate" in metric_name.lower():
-            return f"{value * 100:.2f}%"
-        # For user counts, format as integer with commas
-        elif "users" in metric_name.lower():
-            return f"{int(value):,}"
-        else:
-            return f"{value:.4f}"
+        return _format_decimal(float(metric["decimalValue"]["value"]), metric_name)
     elif "int64Value" in metric:
         return str(metric["int64Value"])
     return "N/A"
@@ -857,123 +1379,73 @@ def output_pretty(
         f"\n{metric_set_config['display_name']} — {package_name} (last {days} day(s))\n"
     )
 
-    rows = response.get("rows", [])
-    if not rows:
+    table = VitalsTable.from_response(response)
+    if not len(table):
         print("No data available for the specified time period.\n")
         return
 
     # Apply filters and sorting
-    rows = filter_and_sort_rows(rows, top_n, min_users, exclude_zero, version_codes, sort_by)
+    table = filter_and_sort_table(table, top_n, min_users, exclude_zero, version_codes, sort_by)
 
-    if not rows:
+    if not len(table):
         print("No data matches the specified filters.\n")
         return
 
-    # Compute total distinct users for userShare calculation
-    total_users = 0
-    for row in rows:
-        for m in row.get("metrics", []):
-            if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                total_users += float(m["decimalValue"]["value"])
+    # Compute total distinct users for userShare calculation, and the
+    # weighted sums for the aggregate summary row
+    total_users, rate_totals = table.weighted_totals()
+    row_users = table.user_weights()
+
+    dim_names = sorted(table.dimension_names)
+    dates = table.dates()
+    has_dates = bool(dates[0])
+    resolve = resolver is not None and "versionCode" in table.dimension_names
+    versions = table.resolve_versions(resolver) if resolve else None
+    shown_metrics = [m for m in metric_set_config["metrics"] if m in table.metric_names]
+    dim_columns = [table.dimension(name) for name in dim_names]
+    metric_cells = [table.formatted(name) for name in shown_metrics]
 
     # Build table rows
     table_rows = []
-    for row in rows:
-        # Extract date from startTime if available
-        start_time = row.get("startTime", {})
-        row_date = ""
-        if start_time:
-            row_date = f"{start_time.get('year', '')}-{start_time.get('month', ''):02d}-{start_time.get('day', ''):02d}"
-
-        # Extract dimensions
-        dim_values = {}
-        for d in row.get("dimensions", []):
-            dim_values[d["dimension"]] = d.get(
-                "stringValue", d.get("int64Value", "unknown")
-            )
-
-        # Extract metrics
-        metric_values = {}
-        for m in row.get("metrics", []):
-            metric_values[m["metric"]] = format_metric_value(m, m["metric"])
-
-        # Compute user share
-        row_users = 0
-        for m in row.get("metrics", []):
-            if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                row_users = float(m["decimalValue"]["value"])
-        user_share = f"{row_users / total_users * 100:.1f}%" if total_users > 0 else "N/A"
-
-        # Build the table row
+    for i in range(len(table)):
         table_row = []
-        if row_date:
-            table_row.append(row_date)
-        for dim_name in sorted(dim_values.keys()):
-            table_row.append(dim_values[dim_name])
+        if dates[i]:
+            table_row.append(dates[i])
+        for column in dim_columns:
+            table_row.append("unknown" if column[i] is None else column[i])
 
         # Insert resolved version columns after dimensions
-        if resolver and "versionCode" in dim_values:
-            try:
-                vc = int(dim_values["versionCode"])
-                version_name, arch = resolver.resolve(vc)
-                table_row.append(version_name)
-                table_row.append(arch)
-            except (ValueError, TypeError):
-                table_row.extend(["unknown", "unknown"])
+        if versions is not None:
+            table_row.extend(versions[i] or ("unknown", "unknown"))
 
-        for metric_name in metric_set_config["metrics"]:
-            if metric_name in metric_values:
-                table_row.append(metric_values[metric_name])
+        for cells in metric_cells:
+            if cells[i] is not None:
+                table_row.append(cells[i])
 
+        user_share = f"{row_users[i] / total_users * 100:.1f}%" if total_users > 0 else "N/A"
         table_row.append(user_share)
         table_rows.append(table_row)
 
     # Build headers
     headers = []
-    # Check if we have dates
-    first_row = rows[0]
-    if first_row.get("startTime"):
+    if has_dates:
         headers.append("date")
-    dim_names = sorted(
-        d["dimension"] for d in first_row.get("dimensions", [])
-    )
     headers.extend(dim_names)
-    if resolver and "versionCode" in dim_names:
+    if resolve:
         headers.extend(["firefoxVersion", "cpuArch"])
-    headers.extend(
-        m for m in metric_set_config["metrics"]
-        if any(
-            met["metric"] == m for met in first_row.get("metrics", [])
-        )
-    )
+    headers.extend(shown_metrics)
     headers.append("userShare")
 
-    # Compute weighted aggregate summary row
-    # Weighted average of rate metrics across all displayed versions
-    rate_totals = {}  # metric_name -> weighted sum
-    for row in rows:
-        row_users = 0
-        row_metrics = {}
-        for m in row.get("metrics", []):
-            if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                row_users = float(m["decimalValue"]["value"])
-            elif "decimalValue" in m:
-                row_metrics[m["metric"]] = float(m["decimalValue"]["value"])
-        for mname, mval in row_metrics.items():
-            rate_totals.setdefault(mname, 0.0)
-            rate_totals[mname] += mval * row_users
-
-    # Build summary row
+    # Build summary row: weighted average of rate metrics across all
+    # displayed versions
     num_dim_cols = len(dim_names)
-    if first_row.get("startTime"):
+    if has_dates:
         num_dim_cols += 1  # date column
-    if resolver and "versionCode" in dim_names:
+    if resolve:
         num_dim_cols += 2  # firefoxVersion, cpuArch
 
     summary_row = [""] * (num_dim_cols - 1) + ["AGGREGATE"]
-    for metric_name in metric_set_config["metrics"]:
-        if not any(met["metric"] == metric_name for met in first_row.get("metrics", [])):
-            continue
+    for metric_name in shown_metrics:
         if metric_name == "distinctUsers":
             summary_row.append(f"{int(total_users):,}")
         elif total_users > 0 and metric_name in rate_totals:
@@ -988,32 +1460,16 @@ def output_pretty(
 
     # Comparison rows: PRIOR PERIOD and Δ
     if compare_response:
-        compare_rows = compare_response.get("rows", [])
-        if metric_set_config and compare_rows:
-            compare_rows = filter_and_sort_rows(
-                compare_rows, top_n, min_users, exclude_zero, version_codes, sort_by
+        compare_table = VitalsTable.from_response(compare_response)
+        if metric_set_config and len(compare_table):
+            compare_table = filter_and_sort_table(
+                compare_table, top_n, min_users, exclude_zero, version_codes, sort_by
             )
-
-        comp_total_users = 0.0
-        comp_rate_totals: dict[str, float] = {}
-        for row in compare_rows:
-            row_users = 0.0
-            row_metrics: dict[str, float] = {}
-            for m in row.get("metrics", []):
-                if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                    row_users = float(m["decimalValue"]["value"])
-                elif "decimalValue" in m:
-                    row_metrics[m["metric"]] = float(m["decimalValue"]["value"])
-            comp_total_users += row_users
-            for mname, mval in row_metrics.items():
-                comp_rate_totals.setdefault(mname, 0.0)
-                comp_rate_totals[mname] += mval * row_users
+        comp_total_users, comp_rate_totals = compare_table.weighted_totals()
 
         prior_row = [""] * (num_dim_cols - 1) + ["PRIOR"]
         delta_row  = [""] * (num_dim_cols - 1) + ["Δ"]
-        for metric_name in metric_set_config["metrics"]:
-            if not any(met["metric"] == metric_name for met in first_row.get("metrics", [])):
-                continue
+        for metric_name in shown_metrics:
             if metric_name == "distinctUsers":
                 prior_row.append(f"{int(comp_total_users):,}")
                 delta_row.append("")
@@ -1049,56 +1505,47 @@ def output_csv(
 ):
     """Output results in CSV format."""
 
-    rows = response.get("rows", [])
-    if not rows:
+    table = VitalsTable.from_response(response)
+    if not len(table):
         print("No data available.", file=sys.stderr)
         return
 
     # Apply filters and sorting
-    rows = filter_and_sort_rows(rows, top_n, min_users, exclude_zero, version_codes, sort_by)
+    table = filter_and_sort_table(table, top_n, min_users, exclude_zero, version_codes, sort_by)
 
-    if not rows:
+    if not len(table):
         print("No data matches the specified filters.", file=sys.stderr)
         return
 
-    # Collect all dimension and metric names
-    first_row = rows[0]
-    dimension_names = [d["dimension"] for d in first_row.get("dimensions", [])]
-    metric_names = [m["metric"] for m in first_row.get("metrics", [])]
-
-    # Build header — insert version/arch columns after dimensions if resolving
-    extra_headers = ["firefoxVersion", "cpuArch"] if resolver else []
     writer = csv.writer(sys.stdout)
-    writer.writerow(dimension_names + extra_headers + metric_names)
+    writer.writerow(_csv_header(table, resolver))
+    _write_csv_rows(writer, table, resolver)
 
-    # Write data rows
-    for row in rows:
-        dim_values = [
-            d.get("stringValue", d.get("int64Value", ""))
-            for d in row.get("dimensions", [])
-        ]
 
-        extra_values = []
-        if resolver:
-            # Try to resolve the versionCode dimension
-            vc_str = None
-            for d in row.get("dimensions", []):
-                if d["dimension"] == "versionCode":
-                    vc_str = d.get("stringValue", d.get("int64Value"))
-                    break
-            if vc_str is not None:
-                try:
-                    version_name, arch = resolver.resolve(int(vc_str))
-                    extra_values = [version_name, arch]
-                except (ValueError, TypeError):
-                    extra_values = ["unknown", "unknown"]
-            else:
-                extra_values = ["", ""]
+def _csv_header(table: VitalsTable, resolver: VersionResolver | None) -> list[str]:
+    # Insert version/arch columns after dimensions if resolving
+    extra_headers = ["firefoxVersion", "cpuArch"] if resolver else []
+    return table.dimension_names + extra_headers + table.metric_names
 
-        metric_values = [
-            format_metric_value(m, m["metric"]) for m in row.get("metrics", [])
-        ]
-        writer.writerow(dim_values + extra_values + metric_values)
+
+def _write_csv_rows(writer, table: VitalsTable, resolver: VersionResolver | None):
+    columns: list[list[Any]] = [
+        ["" if value is None else value for value in table.dimension(name)]
+        for name in table.dimension_names
+    ]
+    if resolver:
+        versions = table.resolve_versions(resolver)
+        columns.append([v[0] if v else "" for v in versions])
+        columns.append([v[1] if v else "" for v in versions])
+    metric_cells = [table.formatted(name) for name in table.metric_names]
+
+    # Write data rows. A row missing a metric is written without that cell,
+    # like the API row it came from.
+    if any(None in cells for cells in metric_cells):
+        for row in zip(*columns, *metric_cells, strict=True):
+            writer.writerow([cell for cell in row if cell is not None])
+    else:
+        writer.writerows(zip(*columns, *metric_cells, strict=True))
 
 
 def output_json(
@@ -1113,83 +1560,434 @@ def output_json(
     sort_by: str = "versionCode",
 ):
     """Output results in JSON format, with an aggregate summary."""
+    output = build_json_output(
+        response, metric_set_config, top_n, min_users, exclude_zero,
+        version_codes, resolver, compare_response, sort_by,
+    )
+    print(json.dumps(output, indent=2))
+
+
+def build_json_output(
+    response: dict[str, Any],
+    metric_set_config: dict[str, Any] | None = None,
+    top_n: int | None = None,
+    min_users: int | None = None,
+    exclude_zero: bool = False,
+    version_codes: list[str] | None = None,
+    resolver: VersionResolver | None = None,
+    compare_response: dict[str, Any] | None = None,
+    sort_by: str = "versionCode",
+) -> dict[str, Any]:
+    """Build the JSON output document (rows, aggregate, compare_aggregate)."""
 
-    rows = response.get("rows", [])
-    if metric_set_config and rows:
-        rows = filter_and_sort_rows(rows, top_n, min_users, exclude_zero, version_codes, sort_by)
+    table = VitalsTable.from_response(response)
+    if metric_set_config and len(table):
+        table = filter_and_sort_table(
+            table, top_n, min_users, exclude_zero, version_codes, sort_by
+        )
 
     # Inject resolved version info into each row
     if resolver:
-        for row in rows:
-            for d in row.get("dimensions", []):
-                if d["dimension"] == "versionCode":
-                    try:
-                        vc = int(d.get("stringValue", d.get("int64Value", "0")))
-                        version_name, arch = resolver.resolve(vc)
-                        row["firefoxVersion"] = version_name
-                        row["cpuArch"] = arch
-                    except (ValueError, TypeError):
-                        row["firefoxVersion"] = "unknown"
-                        row["cpuArch"] = "unknown"
-
-    # Compute aggregate weighted metrics
-    total_users = 0
-    rate_totals = {}  # metric_name -> weighted sum
-    for row in rows:
-        row_users = 0
-        row_metrics = {}
-        for m in row.get("metrics", []):
-            if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                row_users = float(m["decimalValue"]["value"])
-            elif "decimalValue" in m:
-                row_metrics[m["metric"]] = float(m["decimalValue"]["value"])
-        total_users += row_users
-        for mname, mval in row_metrics.items():
-            rate_totals.setdefault(mname, 0.0)
-            rate_totals[mname] += mval * row_users
-
-    aggregate = {"distinctUsers": total_users}
-    for mname, weighted_sum in rate_totals.items():
-        aggregate[mname] = weighted_sum / total_users if total_users > 0 else 0.0
+        _inject_versions(table, resolver)
+
+    aggregate = table.weighted_aggregate()
 
     # Compute comparison aggregate if provided
     compare_aggregate = None
     if compare_response:
-        compare_rows = compare_response.get("rows", [])
-        if metric_set_config and compare_rows:
-            compare_rows = filter_and_sort_rows(compare_rows, top_n, min_users, exclude_zero, version_codes, sort_by)
-        comp_total_users = 0
-        comp_rate_totals = {}
-        for row in compare_rows:
-            row_users = 0
-            row_metrics = {}
-            for m in row.get("metrics", []):
-                if m["metric"] == "distinctUsers" and "decimalValue" in m:
-                    row_users = float(m["decimalValue"]["value"])
-                elif "decimalValue" in m:
-                    row_metrics[m["metric"]] = float(m["decimalValue"]["value"])
-            comp_total_users += row_users
-            for mname, mval in row_metrics.items():
-                comp_rate_totals.setdefault(mname, 0.0)
-                comp_rate_totals[mname] += mval * row_users
-
-        compare_aggregate = {"distinctUsers": comp_total_users}
-        for mname, weighted_sum in comp_rate_totals.items():
-            compare_aggregate[mname] = weighted_sum / comp_total_users if comp_total_users > 0 else 0.0
+        compare_table = VitalsTable.from_response(compare_response)
+        if metric_set_config and len(compare_table):
+            compare_table = filter_and_sort_table(
+                compare_table, top_n, min_users, exclude_zero, version_codes, sort_by
+            )
+        compare_aggregate = compare_table.weighted_aggregate()
 
         # Extract comparison date
-        if compare_rows:
-            st = compare_rows[0].get("startTime", {})
-            if st:
-                compare_aggregate["date"] = f"{st.get('year', '')}-{st.get('month', 0):02d}-{st.get('day', 0):02d}"
+        if len(compare_table):
+            compare_date = _format_date(compare_table.rows[0].get("startTime"))
+            if compare_date:
+                compare_aggregate["date"] = compare_date
 
     output = dict(response)
-    output["rows"] = rows
+    output["rows"] = table.rows
     output["aggregate"] = aggregate
     if compare_aggregate:
         output["compare_aggregate"] = compare_aggregate
 
-    print(json.dumps(output, indent=2))
+    return output
+
+
+def _inject_versions(table: VitalsTable, resolver: VersionResolver):
+    """Add firefoxVersion / cpuArch to each row that has a versionCode."""
+    for row, resolved in zip(table.rows, table.resolve_versions(resolver), strict=True):
+        if resolved is not None:
+            row["firefoxVersion"], row["cpuArch"] = resolved
+
+
+def _write_jsonl_rows(table: VitalsTable, resolver: VersionResolver | None):
+    if resolver:
+        _inject_versions(table, resolver)
+    sys.stdout.writelines(json.dumps(row) + "\n" for row in table.rows)
+
+
+def output_jsonl(
+    response: dict[str, Any],
+    top_n: int | None = None,
+    min_users: int | None = None,
+    exclude_zero: bool = False,
+    version_codes: list[str] | None = None,
+    resolver: VersionResolver | None = None,
+    sort_by: str = "versionCode",
+):
+    """Output results as JSON lines, one API row per line."""
+    table = filter_and_sort_table(
+        VitalsTable.from_response(response),
+        top_n, min_users, exclude_zero, version_codes, sort_by,
+    )
+    if not len(table):
+        print("No data matches the specified filters.", file=sys.stderr)
+        return
+    _write_jsonl_rows(table, resolver)
+
+
+def output_stream(
+    pages: Iterable[dict[str, Any]],
+    output_format: str,
+    min_users: int | None = None,
+    exclude_zero: bool = False,
+    version_codes: list[str] | None = None,
+    resolver: VersionResolver | None = None,
+) -> int:
+    """Write CSV or JSON-lines rows page by page as *pages* arrive.
+
+    Only one page is held at a time, so memory stays bounded however
+    large the result. Per-row filters apply; rows keep the API's order
+    (there is no global sort, --top or aggregate). Returns the number
+    of rows written."""
+    writer = csv.writer(sys.stdout) if output_format == "csv" else None
+    written = 0
+    for page in pages:
+        table = VitalsTable(page.get("rows", []))
+        if len(table):
+            table = filter_and_sort_table(
+                table, None, min_users, exclude_zero, version_codes, sort_by=None
+            )
+        if not len(table):
+            continue
+        if writer is None:
+            _write_jsonl_rows(table, resolver)
+        else:
+            if not written:
+                writer.writerow(_csv_header(table, resolver))
+            _write_csv_rows(writer, table, resolver)
+        sys.stdout.flush()
+        written += len(table)
+
+    if not written:
+        print("No data matches the specified filters.", file=sys.stderr)
+    return written
+
+
+def fetch_metric_set(
+    service,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    metrics: list[str],
+    dimensions: list[str],
+    days: int,
+    page_size: int,
+    compare_days: int | None = None,
+    store: VitalsStore | None = None,
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """Run the main query and, if *compare_days* is set, the comparison
+    query. Returns (response, compare_response); a failed comparison
+    query is reported and skipped rather than failing the whole run.
+
+    With a *store*, missing days are synced into it first and both
+    windows are read from it (see read_windows)."""
+    if store is not None:
+        today = date.today()
+        sync_vitals(
+            service, store, package_name, metric_set_config, dimensions,
+            today - timedelta(days=days + (compare_days or 0) + STORE_FRESHNESS_SLACK),
+            today, page_size,
+        )
+        return read_windows(store, package_name, metric_set_config, metrics,
+                            dimensions, days, compare_days)
+
+    body = build_query_body(metrics, dimensions, days, page_size)
+    response = query_vitals(service, package_name, metric_set_config, body)
+
+    compare_response = None
+    if compare_days:
+        compare_body = build_compare_query_body(
+            metrics, dimensions, compare_days, days, page_size
+        )
+        try:
+            compare_response = query_vitals(
+                service, package_name, metric_set_config, compare_body
+            )
+        except Exception as e:
+            print(
+                f"Warning: comparison query failed ({e}), skipping.",
+                file=sys.stderr,
+            )
+    return response, compare_response
+
+
+# ---------------------------------------------------------------------------
+# Concurrent fetch
+# ---------------------------------------------------------------------------
+# fetch_metric_set issues the current and comparison queries one after the
+# other, and anomalies are a separate invocation. fetch_concurrently sends
+# all three at once through a small thread pool; *service* must be safe to
+# share between threads (build_shared_service).
+
+def _timed(fn, *args, **kwargs) -> tuple[Any, float]:
+    started = time.monotonic()
+    result = fn(*args, **kwargs)
+    return result, time.monotonic() - started
+
+
+def fetch_concurrently(
+    service,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    metrics: list[str],
+    dimensions: list[str],
+    days: int,
+    page_size: int,
+    compare_days: int | None = None,
+    anomaly_days: int | None = None,
+    max_workers: int = 3,
+) -> tuple[dict[str, Any], dict[str, Any] | None, list[dict[str, Any]] | None, dict[str, float]]:
+    """Run the current window, the *compare_days* window and (with
+    *anomaly_days*) the anomalies listing in parallel.
+
+    Returns (response, compare_response, anomalies, timings), where
+    *timings* maps each query ("current", "compare", "anomalies") to its
+    latency in seconds and "total" to the wall time of the whole batch.
+    As in fetch_metric_set, a failed comparison query is reported and
+    skipped; any other failure is raised."""
+    backoff = PoolBackoff()
+    jobs: dict[str, tuple] = {
+        "current": (
+            query_vitals, service, package_name, metric_set_config,
+            build_query_body(metrics, dimensions, days, page_size),
+        ),
+    }
+    if compare_days:
+        jobs["compare"] = (
+            query_vitals, service, package_name, metric_set_config,
+            build_compare_query_body(metrics, dimensions, compare_days, days, page_size),
+        )
+    if anomaly_days:
+        jobs["anomalies"] = (query_anomalies, service, package_name, anomaly_days)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(_timed, *job, backoff=backoff) for name, job in jobs.items()
+        }
+        results: dict[str, Any] = {}
+        timings: dict[str, float] = {}
+        for name, future in futures.items():
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as e:
+                if name != "compare":
+                    raise
+                print(f"Warning: comparison query failed ({e}), skipping.", file=sys.stderr)
+    timings["total"] = time.monotonic() - started
+    return (results["current"], results.get("compare"), results.get("anomalies"), timings)
+
+
+def report_timings(timings: dict[str, float], file=None):
+    """Print per-query latency and the total wall time of a concurrent run
+    (to stderr unless *file* is given)."""
+    file = file or sys.stderr
+    queries = {name: seconds for name, seconds in timings.items() if name != "total"}
+    for name, seconds in queries.items():
+        print(f"  {name:<10} {seconds:7.2f}s", file=file)
+    print(
+        f"  {'wall time':<10} {timings['total']:7.2f}s "
+        f"(queries add up to {sum(queries.values()):.2f}s)",
+        file=file,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Local history store
+# ---------------------------------------------------------------------------
+# fetch_metric_set(store=...) keeps a VitalsStore up to date and answers the
+# current and comparison windows from it, so after the first run each query
+# only asks the API for days it has not seen.
+
+# Extra days synced behind the requested windows, so a window that the
+# API's freshness lag pushes back still finds its data locally.
+STORE_FRESHNESS_SLACK = 2
+
+
+def sync_vitals(
+    service,
+    store: VitalsStore,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    dimensions: list[str],
+    start: date,
+    end: date,
+    page_size: int = 5000,
+) -> int:
+    """Fetch the days in [start, end) the store does not have yet.
+
+    One query covers the span from the oldest to the newest missing day,
+    always with the metric set's full metric list. A day counts as synced
+    once it returned rows, or once a later day did (the API has moved
+    past it, so an empty day stays empty). The newest days that are not
+    available yet are left for the next sync. Returns the number of days
+    marked synced."""
+    metric_set = metric_set_config["metric_set_suffix"]
+    missing = store.missing_days(package_name, metric_set, dimensions, start, end)
+    if not missing:
+        return 0
+
+    body = _timeline_body(
+        metric_set_config["metrics"], dimensions,
+        missing[0], missing[-1] + timedelta(days=1), page_size,
+    )
+    rows: list[dict[str, Any]] = []
+    for page in iter_vitals_pages(
+        service, package_name, metric_set_config, body, prefetch=True
+    ):
+        rows.extend(page.get("rows", []))
+
+    days_with_rows = {row_day(row) for row in rows} - {None}
+    newest = max(days_with_rows, default=None)
+    complete = [
+        day for day in missing
+        if day in days_with_rows or (newest is not None and day < newest)
+    ]
+    store.add_rows(package_name, metric_set, dimensions, rows, complete)
+    return len(complete)
+
+
+def _only_metrics(rows: list[dict[str, Any]], metrics: list[str]) -> list[dict[str, Any]]:
+    """Rows restricted to *metrics* (the store always holds the full set)."""
+    wanted = set(metrics)
+    return [
+        {**row, "metrics": [m for m in row.get("metrics", []) if m["metric"] in wanted]}
+        for row in rows
+    ]
+
+
+def read_windows(
+    store: VitalsStore,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    metrics: list[str],
+    dimensions: list[str],
+    days: int,
+    compare_days: int | None = None,
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """The (response, compare_response) pair fetch_metric_set would get
+    from the API, answered from the store.
+
+    Both windows end where the API queries would (today, and today minus
+    *compare_days*), stepped back to the newest stored day the same way the
+    API steps back over days that are not available yet."""
+    metric_set = metric_set_config["metric_set_suffix"]
+    latest = store.latest_day(package_name, metric_set, dimensions)
+    if latest is None:
+        return {"rows": []}, ({"rows": []} if compare_days else None)
+
+    def window(end: date) -> dict[str, Any]:
+        rows = store.rows(
+            package_name, metric_set, dimensions, end - timedelta(days=days), end
+        )
+        if set(metrics) != set(metric_set_config["metrics"]):
+            rows = _only_metrics(rows, metrics)
+        return {"rows": rows}
+
+    available_end = latest + timedelta(days=1)
+    today = date.today()
+    response = window(min(today, available_end))
+    compare_response = None
+    if compare_days:
+        compare_response = window(min(today - timedelta(days=compare_days), available_end))
+    return response, compare_response
+
+
+def daily_history(
+    store: VitalsStore,
+    package_name: str,
+    metric_set_config: dict[str, Any],
+    dimensions: list[str],
+    days: int,
+) -> list[dict[str, Any]]:
+    """User-weighted aggregates per day for the newest *days* stored days,
+    oldest first: ``[{"date": "YYYY-MM-DD", "distinctUsers": ..., metric: rate}]``."""
+    metric_set = metric_set_config["metric_set_suffix"]
+    latest = store.latest_day(package_name, metric_set, dimensions)
+    if latest is None:
+        return []
+    end = latest + timedelta(days=1)
+    by_day: dict[date, list[dict[str, Any]]] = {}
+    for row in store.rows(package_name, metric_set, dimensions, end - timedelta(days=days), end):
+        by_day.setdefault(row_day(row), []).append(row)
+    return [
+        {"date": day.isoformat(), **VitalsTable(rows).weighted_aggregate()}
+        for day, rows in sorted(by_day.items())
+    ]
+
+
+def run_json_query(
+    service,
+    package: str,
+    metric_set: str = "crashrate",
+    anomalies: bool = False,
+    days: int = 1,
+    top: int | None = None,
+    min_users: int | None = None,
+    compare_days: int | None = None,
+    sort_by: str = "versionCode",
+    resolver: VersionResolver | None = None,
+    dimensions: list[str] | None = None,
+    page_size: int = 5000,
+    store: VitalsStore | None = None,
+    history_days: int = 0,
+) -> dict[str, Any]:
+    """Run one query and return the document ``--output-format json`` prints.
+
+    This is the in-process equivalent of a ``fetch_metrics.py`` invocation,
+    used by run_queries.py so a whole manifest shares one process, one set
+    of credentials and one version resolver per package.
+
+    With a *store*, the windows come from local history (see
+    fetch_metric_set) and *history_days* > 0 adds a ``history`` list of
+    daily aggregates (see daily_history), synced first if needed."""
+    if anomalies:
+        return build_json_output({"anomalies": query_anomalies(service, package, days)})
+
+    metric_set_config = METRIC_SETS[metric_set]
+    dimensions = dimensions or ["versionCode"]
+    if store is not None and history_days:
+        today = date.today()
+        sync_vitals(service, store, package, metric_set_config, dimensions,
+                    today - timedelta(days=history_days + STORE_FRESHNESS_SLACK), today,
+                    page_size)
+    response, compare_response = fetch_metric_set(
+        service, package, metric_set_config, metric_set_config["metrics"],
+        dimensions, days, page_size, compare_days, store,
+    )
+    output = build_json_output(
+        response, metric_set_config, top, min_users, False, None,
+        resolver, compare_response, sort_by,
+    )
+    if store is not None and history_days:
+        output["history"] = daily_history(
+            store, package, metric_set_config, dimensions, history_days
+        )
+    return output
 
 
 # ---------------------------------------------------------------------------
@@ -1208,8 +2006,12 @@ def query_anomalies(
     service,
     package_name: str,
     days: int,
+    backoff: PoolBackoff | None = None,
 ) -> list[dict[str, Any]]:
-    """List anomalies for a package, filtered to the last *days* days."""
+    """List anomalies for a package, filtered to the last *days* days.
+
+    With a *backoff*, transient errors are retried through it (see
+    _query_page) rather than by the client's own per-request retries."""
     start_dt = datetime.now(timezone.utc) - timedelta(days=days)
     start_rfc = start_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
     filter_str = f'activeBetween("{start_rfc}", UNBOUNDED)'
@@ -1225,7 +2027,7 @@ def query_anomalies(
             pageSize=100,
             **({"pageToken": page_token} if page_token else {}),
         )
-        resp = req.execute(num_retries=3)
+        resp = _execute(req, backoff) if backoff is not None else req.execute(num_retries=3)
         all_anomalies.extend(resp.get("anomalies", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
@@ -1234,6 +2036,21 @@ def query_anomalies(
     return all_anomalies
 
 
+def _execute(request, backoff: PoolBackoff, max_retries: int = 4) -> dict[str, Any]:
+    """Execute *request*, pausing the pool on transient HTTP errors."""
+    for retry in range(max_retries):
+        backoff.wait()
+        try:
+            return request.execute()
+        except HttpError as e:
+            if e.resp.status not in (429, 500, 503) or retry == max_retries - 1:
+                raise
+            wait = 2 ** retry
+            print(f"HTTP {e.resp.status}, retrying in {wait}s...", file=sys.stderr)
+            backoff.pause(wait)
+    raise Exception("Failed to query after multiple retries")
+
+
 def output_anomalies(
     anomalies: list[dict[str, Any]],
     package_name: str,
@@ -1305,8 +2122,7 @@ def main():
 
     try:
         # Authenticate and build service
-        creds = authenticate()
-        service = build("playdeveloperreporting", "v1beta1", credentials=creds)
+        service = build_shared_service() if args.concurrent else build_service()
 
         # Set up version resolver if requested
         if args.resolve_versions:
@@ -1320,6 +2136,8 @@ def main():
             anomalies = query_anomalies(service, args.package, args.days)
             if args.output_format == "json":
                 output_json({"anomalies": anomalies})
+            elif args.output_format == "jsonl":
+                sys.stdout.writelines(json.dumps(a) + "\n" for a in anomalies)
             else:
                 output_anomalies(
                     anomalies, args.package, args.days, resolver
@@ -1348,35 +2166,54 @@ def main():
             )
             sys.exit(1)
 
-        # Build query
-        body = build_query_body(
-            metrics, args.dimensions, args.days, args.page_size
-        )
-
-        # Execute query
-        response = query_vitals(service, args.package, metric_set_config, body)
-
-        # Execute comparison query if requested
-        compare_response = None
-        if args.compare_days:
-            compare_body = build_compare_query_body(
-                metrics, args.dimensions, args.compare_days, args.days, args.page_size
-            )
-            try:
-                compare_response = query_vitals(
-                    service, args.package, metric_set_config, compare_body
-                )
-            except Exception as e:
-                print(
-                    f"Warning: comparison query failed ({e}), skipping.",
-                    file=sys.stderr,
-                )
-
         # Parse version codes if provided
         version_codes = None
         if args.version_code:
             version_codes = [vc.strip() for vc in args.version_code.split(",")]
 
+        # Streamed output: write each page as it arrives
+        if args.stream:
+            body = build_query_body(metrics, args.dimensions, args.days, args.page_size)
+            pages = iter_vitals_pages(
+                service, args.package, metric_set_config, body, prefetch=True
+            )
+            output_stream(
+                pages, args.output_format, args.min_users, args.exclude_zero,
+                version_codes, resolver,
+            )
+            return
+
+        # Execute query (and the comparison query if requested)
+        anomalies = None
+        if args.concurrent:
+            response, compare_response, anomalies, timings = fetch_concurrently(
+                service,
+                args.package,
+                metric_set_config,
+                metrics,
+                args.dimensions,
+                args.days,
+                args.page_size,
+                args.compare_days,
+                args.days,
+                args.workers,
+            )
+            print("Query timings:", file=sys.stderr)
+            report_timings(timings)
+        else:
+            with VitalsStore(args.store) if args.store else contextlib.nullcontext() as store:
+                response, compare_response = fetch_metric_set(
+                    service,
+                    args.package,
+                    metric_set_config,
+                    metrics,
+                    args.dimensions,
+                    args.days,
+                    args.page_size,
+                    args.compare_days,
+                    store,
+                )
+
         # Output results
         if args.output_format == "pretty":
             output_pretty(
@@ -1392,6 +2229,8 @@ def main():
                 compare_response,
                 args.sort_by,
             )
+            if anomalies is not None:
+                output_anomalies(anomalies, args.package, args.days, resolver)
         elif args.output_format == "csv":
             output_csv(
                 response,
@@ -1404,6 +2243,20 @@ def main():
                 resolver,
                 args.sort_by,
             )
+        elif args.output_format == "json" and anomalies is not None:
+            output = build_json_output(
+                response,
+                metric_set_config,
+                args.top,
+                args.min_users,
+                args.exclude_zero,
+                version_codes,
+                resolver,
+                compare_response,
+                args.sort_by,
+            )
+            output["anomalies"] = anomalies
+            print(json.dumps(output, indent=2))
         elif args.output_format == "json":
             output_json(
                 response,
@@ -1416,6 +2269,16 @@ def main():
                 compare_response,
                 args.sort_by,
             )
+        elif args.output_format == "jsonl":
+            output_jsonl(
+                response,
+                args.top,
+                args.min_users,
+                args.exclude_zero,
+                version_codes,
+                resolver,
+                args.sort_by,
+            )
 
     except google.auth.exceptions.DefaultCredentialsError:
         print(
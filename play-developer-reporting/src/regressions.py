@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Statistical regression detection over stored Play vitals history.
+
+run_queries.py flags a rate as up or down when it is more than 10% off its
+28-day baseline. That is noisy for builds with few users (a handful of
+crashes moves the rate a lot) and blind to slow drifts that never cross
+10% on a single day. This module instead tests each daily rate against
+what its own history predicts:
+
+- The baseline is a user-weighted EWMA of the series' past rate. A build
+  with fewer than ``warmup`` days of history is measured against its
+  package's all-versions baseline instead, so a new build that is worse
+  than the fleet shows up on its first day.
+- The expected spread of a day's rate combines binomial noise,
+  p(1 - p) / users, with the variance seen beyond that (also an EWMA):
+  the series' own day-to-day variance, or, while a build is still
+  measured against the fleet, how far new builds of that package
+  usually land from it. Low-user builds therefore need a large change
+  to look significant, and large ones need more than the normal wobble.
+- The latest ``window`` days are tested as one block (one-sided z test,
+  reported as a confidence), and a CUSUM over the whole history picks up
+  sustained small increases.
+
+All series (every package, metric set, metric, and every version still
+shipping) sit in one day-major array (VitalsHistory) that is walked once,
+oldest day first.
+
+  python src/regressions.py --store vitals.sqlite --manifest src/queries.toml
+"""
+
+import argparse
+import json
+import math
+import sys
+import tomllib
+from array import array
+from collections.abc import Iterable
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import fetch_metrics
+from vitals_store import VitalsStore
+
+# (package, metric set name, metric, versionCode); versionCode None is the
+# all-versions series of that package / metric
+Series = tuple[str, str, str, int | None]
+
+
+def daily_rate_metrics(metric_set_config: dict[str, Any]) -> list[str]:
+    """The per-day rate metrics of a metric set (not the 7d / 28d
+    user-weighted ones, which are already smoothed)."""
+    return [m for m in metric_set_config["metrics"] if m.endswith("Rate")]
+
+
+class VitalsHistory:
+    """Daily users and affected users (rate × users) for many series.
+
+    Stored day-major and sparse: for day *t*, ``index[t]`` lists the
+    series with users that day and ``users[t]`` / ``events[t]`` hold
+    their values. ``fleet[s]`` is the all-versions series of series *s*
+    (itself for an all-versions series)."""
+
+    def __init__(self, start: date, n_days: int):
+        self.start = start
+        self.n_days = n_days
+        self.series: list[Series] = []
+        self.fleet = array("l")
+        self.index = [array("l") for _ in range(n_days)]
+        self.users = [array("d") for _ in range(n_days)]
+        self.events = [array("d") for _ in range(n_days)]
+        self._ids: dict[Series, int] = {}
+
+    def series_id(self, series: Series) -> int:
+        s = self._ids.get(series)
+        if s is None:
+            s = self._ids[series] = len(self.series)
+            self.series.append(series)
+            fleet = series if series[3] is None else (*series[:3], None)
+            self.fleet.append(s if fleet == series else self.series_id(fleet))
+        return s
+
+    def add_day(self, t: int, cells: dict[int, list[float]]) -> None:
+        """Set day *t* from {series id: [users, events]}."""
+        ordered = sorted(cells.items())
+        self.index[t] = array("l", (s for s, _ in ordered))
+        self.users[t] = array("d", (c[0] for _, c in ordered))
+        self.events[t] = array("d", (c[1] for _, c in ordered))
+
+
+def load_history(
+    store: VitalsStore,
+    metric_sets: Iterable[tuple[str, str]],
+    end: date,
+    days: int = 365,
+    active_days: int = 7,
+) -> VitalsHistory:
+    """Build a VitalsHistory from the store's versionCode rows for each
+    (package, metric set name) over [end - days, end).
+
+    Per-version series are kept only for versions with users in the last
+    *active_days* days; older builds still count towards their package's
+    all-versions series."""
+    start = end - timedelta(days=days)
+    active_from = (end - timedelta(days=active_days)).isoformat()
+    history = VitalsHistory(start, days)
+    by_day: list[dict[int, list[float]]] = [{} for _ in range(days)]
+
+    for package, metric_set in metric_sets:
+        config = fetch_metrics.METRIC_SETS[metric_set]
+        rows = store.rows(package, config["metric_set_suffix"], ["versionCode"], start, end)
+        if not rows:
+            continue
+        table = fetch_metrics.VitalsTable(rows)
+        dates = table.dates()
+        version_codes = table.version_codes()
+        weights = table.user_weights()
+        offsets = {d: (date.fromisoformat(d) - start).days for d in set(dates)}
+        active = {
+            vc for d, vc, u in zip(dates, version_codes, weights, strict=True)
+            if u > 0 and d >= active_from
+        }
+        for metric in daily_rate_metrics(config):
+            fleet_id = history.series_id((package, metric_set, metric, None))
+            ids = {vc: history.series_id((package, metric_set, metric, vc))
+                   for vc in active if vc is not None}
+            for d, vc, users, rate in zip(
+                dates, version_codes, weights, table.metric(metric), strict=True
+            ):
+                if users <= 0 or rate != rate:
+                    continue
+                cells = by_day[offsets[d]]
+                for s in (fleet_id, ids.get(vc)):
+                    if s is None:
+                        continue
+                    cell = cells.get(s)
+                    if cell is None:
+                        cells[s] = [users, rate * users]
+                    else:
+                        cell[0] += users
+                        cell[1] += rate * users
+
+    for t, cells in enumerate(by_day):
+        history.add_day(t, cells)
+    return history
+
+
+def _ewma_variance(var: list[float], weight: list[float], i: int) -> float:
+    """EWMA variance beyond binomial of series *i*; 0 until it has any weight."""
+    return max(0.0, var[i] / weight[i]) if weight[i] > 0 else 0.0
+
+
+def _confidence(z: float) -> float:
+    """One-sided P(rate really increased) for a z score."""
+    return 0.5 * math.erfc(-z / math.sqrt(2))
+
+
+def detect_regressions(
+    history: VitalsHistory,
+    half_life: float = 14.0,
+    warmup: int = 7,
+    window: int = 1,
+    min_confidence: float = 0.99,
+    cusum_slack: float = 0.5,
+    cusum_limit: float = 8.0,
+    min_users: float = 100,
+) -> list[dict[str, Any]]:
+    """Rank the series whose rate went up over the last *window* days.
+
+    Walks *history* once, oldest day first, keeping per series the EWMA
+    baseline (*half_life* in observed days), its excess daily variance and
+    a CUSUM of the daily z scores (less *cusum_slack* per day). A series
+    is reported when the window's one-sided confidence reaches
+    *min_confidence* or its CUSUM reaches *cusum_limit*, and the window
+    rate is above the baseline. Sorted by confidence, then by CUSUM."""
+    n_series = len(history.series)
+    decay = 0.5 ** (1 / half_life)
+    eval_from = history.n_days - window
+
+    base_events = [0.0] * n_series    # EWMA sums: rate = events / users
+    base_users = [0.0] * n_series
+    excess_var = [0.0] * n_series     # EWMA of residual² beyond binomial
+    var_weight = [0.0] * n_series
+    new_build_var = [0.0] * n_series  # the same for builds in warmup, per fleet series
+    new_build_weight = [0.0] * n_series
+    days_seen = [0] * n_series
+    cusum = [0.0] * n_series
+    fleet = history.fleet
+
+    # Baseline frozen at the start of the window, and the window totals
+    window_p = [math.nan] * n_series
+    window_var = [0.0] * n_series
+    window_users = [0.0] * n_series
+    window_events = [0.0] * n_series
+    window_days = [0] * n_series
+
+    def extra_variance(s: int, b: int) -> float:
+        """Day-to-day variance beyond binomial for series *s* against baseline *b*.
+
+        A series on its own baseline uses its own; a build in warmup uses
+        what new builds of its fleet series have shown, or failing that the
+        fleet series' own."""
+        if b == s:
+            return _ewma_variance(excess_var, var_weight, s)
+        elif new_build_weight[b] > 0:
+            return _ewma_variance(new_build_var, new_build_weight, b)
+        else:
+            return _ewma_variance(excess_var, var_weight, b)
+
+    for t in range(history.n_days):
+        index = history.index[t]
+        if not index:
+            continue
+        # Baselines from the days before t: the series' own once it has
+        # warmup days, otherwise its all-versions series'
+        sources = [s if days_seen[s] >= warmup else fleet[s] for s in index]
+        p0 = [base_events[b] / base_users[b] if base_users[b] > 0 else math.nan
+              for b in sources]
+        tau = [extra_variance(s, b) for s, b in zip(index, sources, strict=True)]
+
+        for s, b, users, events, p, extra in zip(
+            index, sources, history.users[t], history.events[t], p0, tau, strict=True
+        ):
+            if p == p and 0 < p < 1:
+                binomial = p * (1 - p) / users
+                residual = events / users - p
+                z = residual / math.sqrt(binomial + extra)
+                cusum[s] = max(0.0, cusum[s] + z - cusum_slack)
+                # Not clipped per day: for low-user series most days fall
+                # below the binomial variance and the average would be biased
+                excess = residual * residual - binomial
+                if b == s:
+                    excess_var[s] = decay * excess_var[s] + excess
+                    var_weight[s] = decay * var_weight[s] + 1
+                else:
+                    new_build_var[b] = decay * new_build_var[b] + excess
+                    new_build_weight[b] = decay * new_build_weight[b] + 1
+            if t >= eval_from:
+                if window_days[s] == 0:
+                    window_p[s], window_var[s] = p, extra
+                window_users[s] += users
+                window_events[s] += events
+                window_days[s] += 1
+            base_events[s] = decay * base_events[s] + events
+            base_users[s] = decay * base_users[s] + users
+            days_seen[s] += 1
+
+    regressions = []
+    for s, (package, metric_set, metric, version_code) in enumerate(history.series):
+        users, p = window_users[s], window_p[s]
+        if users < min_users or not (p == p and 0 < p < 1):
+            continue
+        rate = window_events[s] / users
+        if rate <= p:
+            continue
+        z = (rate - p) / math.sqrt(p * (1 - p) / users + window_var[s] / window_days[s])
+        confidence = _confidence(z)
+        if confidence < min_confidence and cusum[s] < cusum_limit:
+            continue
+        regressions.append({
+            "package": package,
+            "metric_set": metric_set,
+            "metric": metric,
+            "versionCode": version_code,
+            "rate": rate,
+            "baseline": p,
+            "change": (rate - p) / p,
+            "confidence": confidence,
+            "z": z,
+            "cusum": cusum[s],
+            "distinctUsers": users,
+            "excess_users": (rate - p) * users,
+            "baseline_from": "version" if days_seen[s] - window_days[s] >= warmup else "fleet",
+        })
+    regressions.sort(key=lambda r: (-r["confidence"], -r["cusum"]))
+    return regressions
+
+
+def manifest_metric_sets(queries: list[dict[str, Any]]) -> list[tuple[str, str]]:
+    """Unique (package, metric set name) pairs of a manifest, in order."""
+    return list(dict.fromkeys(
+        (q["package"], q["metric_set"]) for q in queries if not q.get("anomalies")
+    ))
+
+
+def history_end(store: VitalsStore, metric_sets: Iterable[tuple[str, str]]) -> date | None:
+    """The day after the newest stored versionCode day of any of
+    *metric_sets*, or None if none has history."""
+    latest = [
+        store.latest_day(package, fetch_metrics.METRIC_SETS[m]["metric_set_suffix"],
+                         ["versionCode"])
+        for package, m in metric_sets
+    ]
+    latest = [day for day in latest if day is not None]
+    return max(latest) + timedelta(days=1) if latest else None
+
+
+def format_regression(regression: dict[str, Any]) -> str:
+    """One line: where, how much, how sure."""
+    version = regression["versionCode"] or "all versions"
+    return (
+        f"{regression['package']} {regression['metric']} ({version}): "
+        f"{regression['rate'] * 100:.3f}% vs. {regression['baseline'] * 100:.3f}% baseline "
+        f"({regression['change']:+.0%}), {regression['confidence']:.1%} confidence, "
+        f"CUSUM {regression['cusum']:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank vitals regressions from local history")
+    parser.add_argument("--store", required=True, help="SQLite file (see vitals_store.py)")
+    parser.add_argument("--manifest", default="queries.toml")
+    parser.add_argument("--days", type=int, default=365, help="History to use (default: 365)")
+    parser.add_argument("--window", type=int, default=1,
+                        help="Latest days tested as one block (default: 1)")
+    parser.add_argument("--min-confidence", type=float, default=0.99)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print the ranked list as JSON")
+    args = parser.parse_args()
+
+    metric_sets = manifest_metric_sets(
+        tomllib.load(Path(args.manifest).open("rb"))["queries"]
+    )
+    with VitalsStore(args.store) as store:
+        end = history_end(store, metric_sets)
+        if end is None:
+            print("Error: the store has no versionCode history", file=sys.stderr)
+            sys.exit(1)
+        history = load_history(store, metric_sets, end, args.days)
+    regressions = detect_regressions(
+        history, window=args.window, min_confidence=args.min_confidence
+    )[:args.top]
+    if args.json:
+        print(json.dumps(regressions, indent=2))
+    else:
+        for regression in regressions:
+            print(format_regression(regression))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 # src/run_queries.py
 """Execute queries from a TOML manifest."""
 import argparse
+import contextlib
 import json
-import subprocess
 import sys
+import threading
+import time
 import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import fetch_metrics
+import regressions
+
 PRODUCT_GROUPS = [
     {
         "label": "Firefox Release",
@@ -145,7 +151,78 @@ def _find_version_row(result: dict, version_code: str) -> dict:
     return _top_version_row(result)
 
 
-def generate_markdown(results: dict) -> str:
+def _window_rate(history: list[dict], metric: str, end: int, length: int) -> float | None:
+    """User-weighted rate over history[end - length:end] (daily aggregates)."""
+    window = history[max(0, end - length):end] if end > 0 else []
+    users = sum(day.get("distinctUsers") or 0 for day in window if day.get(metric) is not None)
+    if not users:
+        return None
+    weighted = sum(
+        day[metric] * (day.get("distinctUsers") or 0)
+        for day in window if day.get(metric) is not None
+    )
+    return weighted / users
+
+
+def _week_over_week_lines(results: dict, history_days: int = 90) -> list[str]:
+    """Markdown for the week-over-week table, computed from the daily
+    ``history`` that run_queries.py --store attaches, the long comparison
+    over its last *history_days* days. Empty without it."""
+    checks = [
+        ("crashrate", "userPerceivedCrashRate"),
+        ("anrrate",   "userPerceivedAnrRate"),
+        ("lmkrate",   "userPerceivedLmkRate"),
+    ]
+    if not any((results.get(g[key]) or {}).get("history")
+               for g in PRODUCT_GROUPS for key, _ in checks):
+        return []
+
+    long = f"vs. {history_days}d"
+    lines = [
+        "",
+        "### Week over week (all versions, from local history)",
+        "",
+        "> Last 7 days vs. the 7 days before, and vs. the whole stored history "
+        f"(up to {history_days} days)",
+        "",
+        f"| Product | Crash 7d | vs. prev 7d | {long} | ANR 7d | vs. prev 7d | {long} "
+        f"| LMK 7d | vs. prev 7d | {long} |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for group in PRODUCT_GROUPS:
+        cells = []
+        for key, metric in checks:
+            history = (results.get(group[key]) or {}).get("history") or []
+            n = len(history)
+            week = _window_rate(history, metric, n, 7)
+            cells += [
+                _pct(week),
+                _delta(week, _window_rate(history, metric, n - 7, 7)),
+                _delta(week, _window_rate(history, metric, n, history_days)),
+            ]
+        lines.append(f"| {group['label']} | " + " | ".join(cells) + " |")
+    return lines
+
+
+def _regression_lines(found: list[dict], labels: dict[str, str], limit: int = 10) -> list[str]:
+    """Markdown for the ranked regressions from regressions.py."""
+    lines = ["", "### Regressions (from local history)", ""]
+    if not found:
+        return lines + ["No statistically significant regressions."]
+    for r in found[:limit]:
+        version = r["versionCode"] or "all versions"
+        lines.append(
+            f"- **{labels.get(r['package'], r['package'])}** {r['metric']} ({version}): "
+            f"{_pct(r['rate'])} vs. {_pct(r['baseline'])} expected "
+            f"({r['change']:+.0%}, {r['confidence']:.1%} confidence)"
+        )
+    if len(found) > limit:
+        lines.append(f"- …and {len(found) - limit} more (see regressions.json)")
+    return lines
+
+
+def generate_markdown(results: dict, found_regressions: list[dict] | None = None,
+                      labels: dict[str, str] | None = None, history_days: int = 90) -> str:
     # Determine data date from the first successful crashrate result
     date_str = next(
         (results[g["crashrate"]]["date"] for g in PRODUCT_GROUPS
@@ -211,6 +288,10 @@ def generate_markdown(results: dict) -> str:
 
         lines.append(f"| {group['label']} | {version} | {crash} | {crash_delta} | {anr} | {anr_delta} | {lmk} | {lmk_delta} | {users} |")
 
+    lines += _week_over_week_lines(results, history_days)
+    if found_regressions is not None:
+        lines += _regression_lines(found_regressions, labels or {})
+
     lines += ["", "### Anomalies (last 7 days)", ""]
 
     any_anomalies = False
@@ -361,87 +442,175 @@ def generate_slack_payload(results: dict) -> dict:
     }
 
 
+def run_query(service, query: dict, resolver, store=None, history_days: int = 0) -> dict:
+    """Run one manifest entry in-process; returns fetch_metrics' JSON document."""
+    return fetch_metrics.run_json_query(
+        service,
+        query["package"],
+        metric_set=query.get("metric_set", "crashrate"),
+        anomalies=bool(query.get("anomalies")),
+        days=query.get("days") or 1,
+        top=query.get("top"),
+        min_users=query.get("min_users"),
+        compare_days=query.get("compare_days"),
+        sort_by=query.get("sort_by") or "versionCode",
+        resolver=resolver,
+        store=store,
+        history_days=history_days,
+    )
+
+
+def summarize_result(query: dict, data: dict) -> dict:
+    """Reduce a query's JSON document to the summary.json entry."""
+    # Extract date from first row
+    raw_rows = data.get("rows", data.get("anomalies", []))
+    first_row = raw_rows[0] if raw_rows else {}
+    start_time = first_row.get("startTime", {})
+    date_str = ""
+    if start_time:
+        date_str = f"{start_time.get('year', '')}-{start_time.get('month', 0):02d}-{start_time.get('day', 0):02d}"
+
+    summary = {
+        "status": "ok",
+        "date": date_str,
+        "package": query["package"],
+        "metric_set": query.get("metric_set", "anomalies"),
+        "row_count": len(raw_rows),
+        "aggregate": data.get("aggregate"),
+        "compare_aggregate": data.get("compare_aggregate"),
+        "rows": [simplify_row(r) for r in raw_rows],
+    }
+    if data.get("history"):
+        summary["history"] = data["history"]
+    return summary
+
+
+class QueryRunner:
+    """Runs manifest queries in one process.
+
+    Credentials are obtained once. The API client is built once per worker
+    thread (it is not thread-safe), and version resolvers are shared per
+    package so product-details is downloaded once for the whole manifest.
+    An optional VitalsStore is shared too (it serialises its own access)."""
+
+    def __init__(self, creds=None, service_factory=None, store=None, history_days: int = 0):
+        self._creds = creds
+        self._store = store
+        self._history_days = history_days
+        self._service_factory = service_factory or fetch_metrics.build_service
+        self._local = threading.local()
+        self._resolvers: dict[str, fetch_metrics.VersionResolver] = {}
+        self._lock = threading.Lock()
+
+    def _credentials(self):
+        with self._lock:
+            if self._creds is None:
+                self._creds = fetch_metrics.authenticate()
+            return self._creds
+
+    def service(self):
+        if not hasattr(self._local, "service"):
+            self._local.service = self._service_factory(self._credentials())
+        return self._local.service
+
+    def resolver(self, package: str) -> fetch_metrics.VersionResolver:
+        with self._lock:
+            if package not in self._resolvers:
+                self._resolvers[package] = fetch_metrics.VersionResolver(
+                    include_betas="beta" in package, package=package
+                )
+            return self._resolvers[package]
+
+    def run(self, query: dict) -> tuple[dict, float]:
+        started = time.monotonic()
+        resolver = self.resolver(query["package"]) if query.get("resolve_versions") else None
+        data = run_query(self.service(), query, resolver, self._store, self._history_days)
+        return data, time.monotonic() - started
+
+
+def _package_labels(queries: list[dict]) -> dict[str, str]:
+    """Package name -> product label, from the PRODUCT_GROUPS queries."""
+    packages = {q["name"]: q["package"] for q in queries}
+    return {
+        packages[g["crashrate"]]: g["label"] for g in PRODUCT_GROUPS if g["crashrate"] in packages
+    }
+
+
+def detect_stored_regressions(store, queries: list[dict], days: int) -> list[dict]:
+    """Ranked regressions (see regressions.py) over the store's history for
+    the manifest's metric sets, ending at the newest stored day."""
+    metric_sets = regressions.manifest_metric_sets(queries)
+    end = regressions.history_end(store, metric_sets)
+    if end is None:
+        return []
+    return regressions.detect_regressions(regressions.load_history(store, metric_sets, end, days))
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--manifest", default="queries.toml")
     parser.add_argument("--output-dir", default="/tmp/vitals-output")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Queries to run concurrently (default: 4)")
+    parser.add_argument("--store", metavar="PATH",
+                        help="Local vitals history (SQLite); only days not yet stored "
+                             "are fetched and comparisons are computed from it")
+    parser.add_argument("--history-days", type=int, default=90,
+                        help="Days of daily history to keep and report with --store "
+                             "(default: 90)")
     args = parser.parse_args()
 
     manifest = tomllib.load(Path(args.manifest).open("rb"))
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    results = {}
-    any_failed = False
-    for query in manifest["queries"]:
-        name = query["name"]
-        cmd = ["uv", "run", "python", "src/fetch_metrics.py",
-               "--package", query["package"],
-               "--output-format", "json"]
-
-        if query.get("anomalies"):
-            cmd.append("--anomalies")
-        else:
-            cmd.extend(["--metric-set", query["metric_set"]])
-
-        if query.get("days"):
-            cmd.extend(["--days", str(query["days"])])
-        if query.get("top"):
-            cmd.extend(["--top", str(query["top"])])
-        if query.get("resolve_versions"):
-            cmd.append("--resolve-versions")
-        if query.get("min_users"):
-            cmd.extend(["--min-users", str(query["min_users"])])
-        if query.get("compare_days"):
-            cmd.extend(["--compare-days", str(query["compare_days"])])
-        if query.get("sort_by"):
-            cmd.extend(["--sort-by", query["sort_by"]])
-
-        print(f"Running: {name}", file=sys.stderr)
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            print(f"  FAILED: {result.stderr}", file=sys.stderr)
-            results[name] = {"error": result.stderr}
-            any_failed = True
-            continue
-
-        try:
-            data = json.loads(result.stdout)
-        except json.JSONDecodeError:
-            print("  FAILED: invalid JSON", file=sys.stderr)
-            results[name] = {"error": "invalid JSON output"}
-            any_failed = True
-            continue
-
-        # Write individual result
-        (output_dir / f"{name}.json").write_text(
-            json.dumps(data, indent=2)
-        )
-
-        # Extract date from first row
-        raw_rows = data.get("rows", data.get("anomalies", []))
-        first_row = raw_rows[0] if raw_rows else {}
-        start_time = first_row.get("startTime", {})
-        date_str = ""
-        if start_time:
-            date_str = f"{start_time.get('year', '')}-{start_time.get('month', 0):02d}-{start_time.get('day', 0):02d}"
-
-        results[name] = {
-            "status": "ok",
-            "date": date_str,
-            "package": query["package"],
-            "metric_set": query.get("metric_set", "anomalies"),
-            "row_count": len(raw_rows),
-            "aggregate": data.get("aggregate"),
-            "compare_aggregate": data.get("compare_aggregate"),
-            "rows": [simplify_row(r) for r in raw_rows],
-        }
-        print(f"  OK ({len(raw_rows)} rows)", file=sys.stderr)
+    started = time.monotonic()
+    with (fetch_metrics.VitalsStore(args.store) if args.store
+          else contextlib.nullcontext()) as store:
+        runner = QueryRunner(store=store, history_days=args.history_days if store else 0)
+        queries = manifest["queries"]
+
+        results = {}
+        any_failed = False
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {}
+            for query in queries:
+                print(f"Running: {query['name']}", file=sys.stderr)
+                futures[query["name"]] = pool.submit(runner.run, query)
+
+            # Collected in manifest order so summary.json is stable run to run
+            for query in queries:
+                name = query["name"]
+                try:
+                    data, elapsed = futures[name].result()
+                except Exception as e:
+                    print(f"  {name} FAILED: {e}", file=sys.stderr)
+                    results[name] = {"error": str(e)}
+                    any_failed = True
+                    continue
+
+                # Write individual result
+                (output_dir / f"{name}.json").write_text(
+                    json.dumps(data, indent=2)
+                )
+
+                results[name] = summarize_result(query, data)
+                rows = results[name]["row_count"]
+                print(f"  {name} OK ({rows} rows, {elapsed:.1f}s)", file=sys.stderr)
+
+        print(f"Ran {len(queries)} queries in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+        # With local history, rank regressions across every package and metric set
+        found_regressions = None
+        if store is not None:
+            found_regressions = detect_stored_regressions(store, queries, args.history_days)
+            (output_dir / "regressions.json").write_text(json.dumps(found_regressions, indent=2))
 
     # Write summary manifest, markdown, and Slack payload
     (output_dir / "summary.json").write_text(json.dumps(results, indent=2))
-    (output_dir / "summary.md").write_text(generate_markdown(results))
+    (output_dir / "summary.md").write_text(
+        generate_markdown(results, found_regressions, _package_labels(queries), args.history_days)
+    )
     (output_dir / "slack_payload.json").write_text(json.dumps(generate_slack_payload(results), indent=2))
 
     print(json.dumps(results, indent=2))
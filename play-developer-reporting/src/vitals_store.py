@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Local SQLite store of daily Play vitals rows.
+
+Each run_queries.py run used to ask the API for the current day and again
+for a comparison day 28 days back, so every trend and delta cost fresh API
+calls. With a store, fetch_metrics syncs only the days it does not have
+yet and reads both windows (and longer histories) locally.
+
+Rows are kept exactly as the API returns them, one per
+(package, metric set, dimensions, day, dimension values), so anything that
+consumes API responses (VitalsTable, build_json_output) works unchanged on
+stored data. A separate table records which days are complete, which lets
+days with no rows count as synced too.
+
+This module only stores and retrieves; fetching lives in fetch_metrics
+(sync_vitals). Backfill from the command line:
+
+  python src/vitals_store.py backfill --store vitals.sqlite --manifest src/queries.toml --days 90
+  python src/vitals_store.py stats --store vitals.sqlite
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vitals_rows (
+    package     TEXT NOT NULL,
+    metric_set  TEXT NOT NULL,
+    dimensions  TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    row_key     TEXT NOT NULL,
+    row_json    TEXT NOT NULL,
+    PRIMARY KEY (package, metric_set, dimensions, day, row_key)
+);
+CREATE TABLE IF NOT EXISTS synced_days (
+    package     TEXT NOT NULL,
+    metric_set  TEXT NOT NULL,
+    dimensions  TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    synced_at   REAL NOT NULL,
+    PRIMARY KEY (package, metric_set, dimensions, day)
+);
+"""
+
+
+def row_day(row: dict[str, Any]) -> date | None:
+    """The day a DAILY row belongs to, from its startTime."""
+    start = row.get("startTime") or {}
+    try:
+        return date(start["year"], start["month"], start["day"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _row_key(row: dict[str, Any]) -> str:
+    return "|".join(
+        f"{d['dimension']}={d.get('stringValue', d.get('int64Value', ''))}"
+        for d in row.get("dimensions", [])
+    )
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+class VitalsStore:
+    """SQLite-backed history, keyed by package, metric set suffix (e.g.
+    ``crashRateMetricSet``) and the query's dimension list. Day ranges are
+    half-open, [start, end), like the API's timelineSpec.
+
+    Safe to share between the worker threads of a batch run: one
+    connection, serialised by a lock."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "VitalsStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def synced_days(
+        self, package: str, metric_set: str, dimensions: list[str], start: date, end: date
+    ) -> set[date]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT day FROM synced_days WHERE package = ? AND metric_set = ? "
+                "AND dimensions = ? AND day >= ? AND day < ?",
+                (package, metric_set, ",".join(dimensions), start.isoformat(), end.isoformat()),
+            )
+            return {date.fromisoformat(day) for (day,) in cur}
+
+    def missing_days(
+        self, package: str, metric_set: str, dimensions: list[str], start: date, end: date
+    ) -> list[date]:
+        """Days in [start, end) that have not been synced yet, oldest first."""
+        have = self.synced_days(package, metric_set, dimensions, start, end)
+        return [day for day in _days(start, end) if day not in have]
+
+    def add_rows(
+        self,
+        package: str,
+        metric_set: str,
+        dimensions: list[str],
+        rows: Iterable[dict[str, Any]],
+        complete_days: Iterable[date] = (),
+    ) -> int:
+        """Store API rows (replacing any stored for the same key) and mark
+        *complete_days* as synced. Returns the number of rows written."""
+        dims = ",".join(dimensions)
+        records = []
+        for row in rows:
+            day = row_day(row)
+            if day is None:
+                continue
+            records.append((package, metric_set, dims, day.isoformat(), _row_key(row),
+                            json.dumps(row, separators=(",", ":"))))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vitals_rows VALUES (?, ?, ?, ?, ?, ?)", records
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO synced_days VALUES (?, ?, ?, ?, ?)",
+                [(package, metric_set, dims, day.isoformat(), now) for day in complete_days],
+            )
+        return len(records)
+
+    def rows(
+        self, package: str, metric_set: str, dimensions: list[str], start: date, end: date
+    ) -> list[dict[str, Any]]:
+        """Stored API rows for days in [start, end), oldest day first."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row_json FROM vitals_rows WHERE package = ? AND metric_set = ? "
+                "AND dimensions = ? AND day >= ? AND day < ? ORDER BY day, row_key",
+                (package, metric_set, ",".join(dimensions), start.isoformat(), end.isoformat()),
+            )
+            # One decode for the whole result is cheaper than one per row
+            return json.loads("[" + ",".join(row_json for (row_json,) in cur) + "]")
+
+    def latest_day(self, package: str, metric_set: str, dimensions: list[str]) -> date | None:
+        """The newest day with stored rows."""
+        with self._lock:
+            (day,) = self._conn.execute(
+                "SELECT MAX(day) FROM vitals_rows WHERE package = ? AND metric_set = ? "
+                "AND dimensions = ?",
+                (package, metric_set, ",".join(dimensions)),
+            ).fetchone()
+        return date.fromisoformat(day) if day else None
+
+    def summary(self) -> list[tuple[str, str, str, int, str, str, int]]:
+        """(package, metric_set, dimensions, days, first, last, rows) per series."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT package, metric_set, dimensions, COUNT(DISTINCT day), MIN(day), "
+                "MAX(day), COUNT(*) FROM vitals_rows "
+                "GROUP BY package, metric_set, dimensions ORDER BY package, metric_set"
+            ).fetchall()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def backfill(store: VitalsStore, manifest: Path, days: int) -> None:
+    """Sync the last *days* days for every metric-set query in *manifest*."""
+    import tomllib
+
+    import fetch_metrics  # only needed here; keeps the store importable on its own
+
+    queries = tomllib.load(manifest.open("rb"))["queries"]
+    service = fetch_metrics.build_service()
+    end = date.today()
+    start = end - timedelta(days=days)
+    seen = set()
+    for query in queries:
+        if query.get("anomalies"):
+            continue
+        key = (query["package"], query["metric_set"])
+        if key in seen:
+            continue
+        seen.add(key)
+        started = time.monotonic()
+        synced = fetch_metrics.sync_vitals(
+            service, store, query["package"], fetch_metrics.METRIC_SETS[query["metric_set"]],
+            ["versionCode"], start, end,
+        )
+        print(f"{query['package']} {query['metric_set']}: {synced} day(s) synced "
+              f"({time.monotonic() - started:.1f}s)", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Play vitals history store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_backfill = sub.add_parser("backfill", help="Fetch days missing from the store")
+    p_backfill.add_argument("--store", required=True, help="SQLite file")
+    p_backfill.add_argument("--manifest", default="queries.toml")
+    p_backfill.add_argument("--days", type=int, default=90,
+                            help="How many days back to fill (default: 90)")
+
+    p_stats = sub.add_parser("stats", help="Summarise what the store holds")
+    p_stats.add_argument("--store", required=True, help="SQLite file")
+
+    args = parser.parse_args()
+    with VitalsStore(args.store) as store:
+        if args.command == "backfill":
+            backfill(store, Path(args.manifest), args.days)
+        else:
+            for package, metric_set, dims, n_days, first, last, n_rows in store.summary():
+                print(f"{package:28} {metric_set:28} {dims:20} {n_days:4} days "
+                      f"{first}..{last} {n_rows:7} rows")
+
+
+if __name__ == "__main__":
+    main()
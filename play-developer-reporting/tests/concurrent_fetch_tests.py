@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for fetch_metrics' concurrent current / compare / anomalies fetch.
+
+Uses a fake reporting service whose requests sleep for a fixed latency and
+log when they ran, so overlap and the pool-wide backoff can be checked
+without credentials or network.
+
+    python -m unittest discover -s play-developer-reporting/tests -p '*tests.py'
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "src"))
+
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+from googleapiclient.errors import HttpError  # noqa: E402
+from httplib2 import Response  # noqa: E402
+
+import fetch_metrics  # noqa: E402
+
+CRASH = fetch_metrics.METRIC_SETS["crashrate"]
+
+
+def _http_error(status):
+    return HttpError(Response({"status": status}), b"")
+
+
+class FakeService:
+    """Vitals and anomalies endpoints that sleep *latency* per request
+    (seconds, or a dict of seconds per query).
+
+    *failures* maps "current" / "compare" / "anomalies" to a list of
+    exceptions raised by that query's first requests, in order."""
+
+    def __init__(self, latency=0.2, failures=None):
+        self.latency = latency
+        self.failures = failures or {}
+        self.log = []   # (query, started, ended, ok)
+        self.lock = threading.Lock()
+
+    def vitals(self):
+        return self
+
+    def crashrate(self):
+        return self
+
+    def anomalies(self):
+        return self
+
+    def query(self, name, body):
+        start = body["timelineSpec"]["startTime"]
+        rows = [{"startTime": start, "metrics": [
+            {"metric": "distinctUsers", "decimalValue": {"value": "10"}},
+        ]}]
+        end = body["timelineSpec"]["endTime"]
+        today = fetch_metrics.date.today()
+        is_current = (end["year"], end["month"], end["day"]) == (today.year, today.month, today.day)
+        return _FakeRequest(self, "current" if is_current else "compare", {"rows": rows})
+
+    def list(self, **_kwargs):
+        return _FakeRequest(self, "anomalies", {"anomalies": [{"name": "a1"}]})
+
+
+class _FakeRequest:
+    def __init__(self, service, query, payload):
+        self.service = service
+        self.query = query
+        self.payload = payload
+
+    def execute(self, **_kwargs):
+        started = time.monotonic()
+        latency = self.service.latency
+        time.sleep(latency[self.query] if isinstance(latency, dict) else latency)
+        with self.service.lock:
+            pending = self.service.failures.get(self.query)
+            error = pending.pop(0) if pending else None
+            self.service.log.append((self.query, started, time.monotonic(), error is None))
+        if error is not None:
+            raise error
+        return self.payload
+
+
+def fetch(service, compare_days=28, anomaly_days=7):
+    return fetch_metrics.fetch_concurrently(
+        service, "org.example", CRASH, CRASH["metrics"], ["versionCode"],
+        1, 5000, compare_days, anomaly_days,
+    )
+
+
+class ConcurrentFetchTests(unittest.TestCase):
+    def test_queries_overlap(self):
+        service = FakeService(latency=0.3)
+        response, compare, anomalies, timings = fetch(service)
+        self.assertEqual(len(response["rows"]), 1)
+        self.assertEqual(len(compare["rows"]), 1)
+        self.assertEqual(anomalies, [{"name": "a1"}])
+        self.assertEqual(set(timings), {"current", "compare", "anomalies", "total"})
+        # Three 0.3s requests in parallel finish well before 0.9s
+        self.assertLess(timings["total"], 0.75)
+        self.assertGreaterEqual(min(timings[q] for q in ("current", "compare", "anomalies")), 0.3)
+
+    def test_optional_queries_are_skipped(self):
+        response, compare, anomalies, timings = fetch(FakeService(latency=0), None, None)
+        self.assertIsNone(compare)
+        self.assertIsNone(anomalies)
+        self.assertEqual(set(timings), {"current", "total"})
+
+    def test_failed_comparison_is_skipped(self):
+        service = FakeService(latency=0, failures={"compare": [ValueError("boom")]})
+        response, compare, anomalies, timings = fetch(service)
+        self.assertIsNone(compare)
+        self.assertEqual(len(response["rows"]), 1)
+        self.assertNotIn("compare", timings)
+
+    def test_failed_current_query_is_raised(self):
+        service = FakeService(latency=0, failures={"current": [ValueError("boom")]})
+        with self.assertRaises(ValueError):
+            fetch(service)
+
+    def test_rate_limit_pauses_the_whole_pool(self):
+        # compare gets a 429 after 0.05s and the pool pauses for 1s. The
+        # anomalies request, queued until current frees its worker at 0.2s,
+        # must not start before that pause ends.
+        service = FakeService(
+            latency={"current": 0.2, "compare": 0.05, "anomalies": 0.05},
+            failures={"compare": [_http_error(429)]},
+        )
+        fetch_metrics.fetch_concurrently(
+            service, "org.example", CRASH, CRASH["metrics"], ["versionCode"],
+            1, 5000, 28, 7, max_workers=2,
+        )
+        rejected_at = next(end for q, _, end, ok in service.log if not ok)
+        anomalies_at = next(started for q, started, *_ in service.log if q == "anomalies")
+        self.assertGreaterEqual(anomalies_at, rejected_at + 0.95)
+        self.assertEqual(sum(ok for *_, ok in service.log), 3)
+
+
+class PoolBackoffTests(unittest.TestCase):
+    def test_pause_delays_other_threads(self):
+        backoff = fetch_metrics.PoolBackoff()
+        backoff.pause(0.2)
+        waited = []
+
+        def worker():
+            started = time.monotonic()
+            backoff.wait()
+            waited.append(time.monotonic() - started)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(all(w >= 0.15 for w in waited))
+
+    def test_pause_never_shortens(self):
+        backoff = fetch_metrics.PoolBackoff()
+        backoff.pause(0.2)
+        backoff.pause(0.01)
+        started = time.monotonic()
+        backoff.wait()
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+
+class SharedServiceTests(unittest.TestCase):
+    def test_each_thread_gets_its_own_transport(self):
+        service = fetch_metrics.build_shared_service(AnonymousCredentials())
+        transports = {}
+
+        def build_request(key):
+            request = service.vitals().crashrate().query(
+                name="apps/org.example/crashRateMetricSet", body={})
+            transports.setdefault(key, []).append(request.http)
+
+        threads = [threading.Thread(target=build_request, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        build_request("main")
+        build_request("main")
+
+        per_thread = [https[0] for https in transports.values()]
+        self.assertEqual(len({id(h) for h in per_thread}), 4)
+        self.assertIs(transports["main"][0], transports["main"][1])
+        self.assertTrue(all(h.credentials is per_thread[0].credentials for h in per_thread))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the statistical regression detector (src/regressions.py).
+
+Histories are built by hand with a fixed-seed RNG, so every expectation
+is about a known underlying rate rather than a tuned threshold.
+
+    python -m unittest discover -s play-developer-reporting/tests -p '*tests.py'
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "src"))
+
+import fetch_metrics  # noqa: E402
+import regressions  # noqa: E402
+import run_queries  # noqa: E402
+from vitals_store import VitalsStore  # noqa: E402
+
+PACKAGE = "org.example"
+FLEET = (PACKAGE, "crashrate", "crashRate", None)
+
+
+def observed(rng, rate, users):
+    """A binomially noisy daily rate (normal approximation)."""
+    return max(0.0, rng.gauss(rate, math.sqrt(rate * (1 - rate) / users)))
+
+
+def build_history(days, series_rates, seed=0):
+    """*series_rates* maps versionCode -> function(day) -> (rate, users) or
+    None; the fleet series is the sum of all of them."""
+    rng = random.Random(seed)
+    history = regressions.VitalsHistory(date(2026, 1, 1), days)
+    fleet = history.series_id(FLEET)
+    for t in range(days):
+        cells = {}
+        for vc, fn in series_rates.items():
+            value = fn(t)
+            if value is None:
+                continue
+            rate, users = value
+            events = observed(rng, rate, users) * users
+            cells[history.series_id((*FLEET[:3], vc))] = [users, events]
+            total = cells.setdefault(fleet, [0.0, 0.0])
+            total[0] += users
+            total[1] += events
+        history.add_day(t, cells)
+    return history
+
+
+def flagged(found, vc):
+    return [r for r in found if r["versionCode"] == vc]
+
+
+class DetectorTests(unittest.TestCase):
+    def test_stable_history_flags_nothing(self):
+        history = build_history(120, {1: lambda t: (0.003, 200_000)})
+        self.assertEqual(regressions.detect_regressions(history), [])
+
+    def test_jump_on_large_build_is_flagged(self):
+        history = build_history(120, {
+            1: lambda t: (0.003 * (1.3 if t == 119 else 1), 200_000),
+        })
+        found = regressions.detect_regressions(history)
+        (regression,) = flagged(found, 1)
+        self.assertGreater(regression["confidence"], 0.999)
+        self.assertAlmostEqual(regression["baseline"], 0.003, delta=0.0002)
+        self.assertEqual(regression["baseline_from"], "version")
+
+    def test_same_jump_on_tiny_build_is_not_significant(self):
+        history = build_history(120, {
+            1: lambda t: (0.003, 200_000),
+            2: lambda t: (0.003 * (1.3 if t == 119 else 1), 300),
+        })
+        found = regressions.detect_regressions(history)
+        self.assertEqual(flagged(found, 2), [])
+
+    def test_new_build_is_compared_with_the_fleet(self):
+        history = build_history(120, {
+            1: lambda t: (0.003, 200_000),
+            2: lambda t: (0.006, 50_000) if t == 119 else None,
+        })
+        found = regressions.detect_regressions(history)
+        (regression,) = flagged(found, 2)
+        self.assertEqual(regression["baseline_from"], "fleet")
+        self.assertGreater(regression["change"], 0.5)
+        # Ranked first: the new build is the clearest regression
+        self.assertEqual(found[0]["versionCode"], 2)
+
+    def test_slow_drift_is_caught_by_cusum(self):
+        # +0.3% a day for 60 days: never a significant single-day jump
+        history = build_history(180, {
+            1: lambda t: (0.003 * (1 + 0.003 * max(0, t - 120)), 200_000),
+        })
+        found = regressions.detect_regressions(history)
+        (regression,) = flagged(found, 1)
+        self.assertLess(regression["confidence"], 0.99)
+        self.assertGreaterEqual(regression["cusum"], 8.0)
+
+    def test_improvements_are_not_reported(self):
+        history = build_history(120, {
+            1: lambda t: (0.003 * (0.5 if t == 119 else 1), 200_000),
+        })
+        self.assertEqual(regressions.detect_regressions(history), [])
+
+
+class LoadHistoryTests(unittest.TestCase):
+    def test_only_active_versions_get_series(self):
+        store = VitalsStore(os.path.join(tempfile.mkdtemp(), "vitals.sqlite"))
+        self.addCleanup(store.close)
+        end = date(2026, 10, 18)
+        rows = []
+        for day in range(30):
+            when = end - timedelta(days=30 - day)
+            # version 100 stops 20 days before the end; 200 is current
+            for vc, users in ((100, 500 if day < 10 else 0), (200, 1000)):
+                if not users:
+                    continue
+                rows.append({
+                    "startTime": {"year": when.year, "month": when.month, "day": when.day},
+                    "dimensions": [{"dimension": "versionCode", "stringValue": str(vc)}],
+                    "metrics": [
+                        {"metric": m, "decimalValue": {"value": str(
+                            users if m == "distinctUsers" else 0.01)}}
+                        for m in fetch_metrics.METRIC_SETS["crashrate"]["metrics"]
+                    ],
+                })
+        store.add_rows(PACKAGE, "crashRateMetricSet", ["versionCode"], rows)
+
+        metric_sets = [(PACKAGE, "crashrate")]
+        self.assertEqual(regressions.history_end(store, metric_sets), end)
+        history = regressions.load_history(store, metric_sets, end, days=30)
+        versions = {s[3] for s in history.series}
+        self.assertEqual(versions, {None, 200})
+        self.assertEqual({s[2] for s in history.series},
+                         {"crashRate", "userPerceivedCrashRate"})
+        fleet = history.series.index(FLEET)
+        first = dict(zip(history.index[0], history.users[0], strict=True))
+        self.assertEqual(first[fleet], 1500)
+
+
+class ReportTests(unittest.TestCase):
+    def test_regression_lines(self):
+        found = [{
+            "package": PACKAGE, "metric": "crashRate", "versionCode": 200,
+            "rate": 0.006, "baseline": 0.003, "change": 1.0, "confidence": 0.9995,
+        }]
+        lines = run_queries._regression_lines(found, {PACKAGE: "Example"})
+        self.assertIn(
+            "- **Example** crashRate (200): 0.60% vs. 0.30% expected (+100%, 100.0% confidence)",
+            lines,
+        )
+        self.assertIn("No statistically significant regressions.",
+                      run_queries._regression_lines([], {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
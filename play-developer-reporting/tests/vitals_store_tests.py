@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the local vitals history store and its incremental sync.
+
+Runs against a fake reporting service that serves deterministic DAILY rows
+for whatever window it is asked for, so no credentials or network are
+needed. The point is to pin down that a store-backed run asks the API only
+for days it has not seen and still produces the same windows (and
+therefore the same aggregates) as querying the API directly.
+
+    python -m unittest discover -s play-developer-reporting/tests -p '*tests.py'
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "src"))
+
+import fetch_metrics  # noqa: E402
+import run_queries  # noqa: E402
+from vitals_store import VitalsStore  # noqa: E402
+
+CRASH = fetch_metrics.METRIC_SETS["crashrate"]
+VERSION_CODES = [fetch_metrics.MIN_VERSION_CODE + 8 * i for i in range(1, 6)]
+
+
+def _day(spec):
+    return date(spec["year"], spec["month"], spec["day"])
+
+
+class FakeReportingService:
+    """Serves DAILY rows for [startTime, endTime), up to *latest* inclusive.
+
+    A window ending after *latest* fails with a freshness error, like the
+    real API does for days that are not processed yet."""
+
+    def __init__(self, latest, page_size=4):
+        self.latest = latest
+        self.page_size = page_size
+        self.requests = []   # (start, end) of every query that returned data
+
+    def vitals(self):
+        return self
+
+    def crashrate(self):
+        return self
+
+    def query(self, name, body):
+        return _FakeRequest(self, body)
+
+    def rows_for(self, day):
+        rows = []
+        for i, vc in enumerate(VERSION_CODES):
+            users = 1000 * (i + 1) + day.toordinal() % 97
+            rate = 0.001 * (i + 1) + (day.toordinal() % 7) * 0.0001
+            rows.append({
+                "startTime": {"year": day.year, "month": day.month, "day": day.day},
+                "dimensions": [{"dimension": "versionCode", "stringValue": str(vc)}],
+                "metrics": [
+                    {"metric": m,
+                     "decimalValue": {"value": str(users if m == "distinctUsers" else rate)}}
+                    for m in CRASH["metrics"]
+                ],
+            })
+        return rows
+
+
+class _FakeRequest:
+    def __init__(self, service, body):
+        self.service = service
+        self.body = body
+
+    def execute(self):
+        spec = self.body["timelineSpec"]
+        start, end = _day(spec["startTime"]), _day(spec["endTime"])
+        if end - timedelta(days=1) > self.service.latest:
+            raise Exception("Requested timeline_spec.end_date is after data freshness")
+        rows = []
+        day = start
+        while day < end:
+            rows.extend(self.service.rows_for(day))
+            day += timedelta(days=1)
+        offset = int(self.body.get("pageToken") or 0)
+        page = {"rows": rows[offset:offset + self.service.page_size]}
+        if offset + self.service.page_size < len(rows):
+            page["nextPageToken"] = str(offset + self.service.page_size)
+        else:
+            self.service.requests.append((start, end))
+        return page
+
+
+class VitalsStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = VitalsStore(os.path.join(self.tmp, "vitals.sqlite"))
+        self.today = date.today()
+        self.service = FakeReportingService(latest=self.today - timedelta(days=1))
+
+    def tearDown(self):
+        self.store.close()
+
+    def sync(self, start_days_ago, end=None):
+        end = end or self.today
+        return fetch_metrics.sync_vitals(
+            self.service, self.store, "org.example", CRASH, ["versionCode"],
+            end - timedelta(days=start_days_ago), end,
+        )
+
+    def test_second_sync_fetches_nothing(self):
+        self.assertEqual(self.sync(30), 30)
+        self.assertEqual(len(self.service.requests), 1)
+        self.assertEqual(self.sync(30), 0)
+        self.assertEqual(len(self.service.requests), 1)
+
+    def test_only_new_days_are_fetched(self):
+        self.sync(30)
+        self.service.latest += timedelta(days=1)
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(self.sync(30, end=tomorrow), 1)
+        self.assertEqual(self.service.requests[-1], (self.today, tomorrow))
+
+    def test_unavailable_newest_day_is_retried_later(self):
+        self.service.latest = self.today - timedelta(days=2)
+        # Freshness retry steps the window back a day; yesterday is not stored
+        self.assertEqual(self.sync(10), 9)
+        self.assertIn(self.today - timedelta(days=1), self.store.missing_days(
+            "org.example", CRASH["metric_set_suffix"], ["versionCode"],
+            self.today - timedelta(days=10), self.today))
+        self.service.latest = self.today - timedelta(days=1)
+        self.assertEqual(self.sync(10), 1)
+
+    def test_with_block_closes_the_store(self):
+        with VitalsStore(os.path.join(self.tmp, "scoped.sqlite")) as store:
+            self.assertEqual(store.summary(), [])
+        with self.assertRaises(sqlite3.ProgrammingError):
+            store.summary()
+
+    def test_store_windows_match_api(self):
+        for latest_lag in (1, 2):
+            self.service.latest = self.today - timedelta(days=latest_lag)
+            store = VitalsStore(os.path.join(self.tmp, f"lag{latest_lag}.sqlite"))
+            self.addCleanup(store.close)
+            for days, compare_days in ((1, 28), (7, 7)):
+                with self.subTest(lag=latest_lag, days=days, compare=compare_days):
+                    api = fetch_metrics.fetch_metric_set(
+                        self.service, "org.example", CRASH, CRASH["metrics"],
+                        ["versionCode"], days, 5000, compare_days,
+                    )
+                    stored = fetch_metrics.fetch_metric_set(
+                        self.service, "org.example", CRASH, CRASH["metrics"],
+                        ["versionCode"], days, 5000, compare_days, store,
+                    )
+                    self.assertEqual(api[0]["rows"], stored[0]["rows"])
+                    self.assertEqual(api[1]["rows"], stored[1]["rows"])
+                    api_json = fetch_metrics.build_json_output(
+                        api[0], CRASH, compare_response=api[1])
+                    stored_json = fetch_metrics.build_json_output(
+                        stored[0], CRASH, compare_response=stored[1])
+                    for key in ("aggregate", "compare_aggregate"):
+                        self.assertEqual(api_json[key], stored_json[key])
+
+    def test_repeat_run_reads_comparison_locally(self):
+        args = (self.service, "org.example", CRASH, CRASH["metrics"], ["versionCode"], 1, 5000, 28)
+        fetch_metrics.fetch_metric_set(*args, self.store)
+        before = len(self.service.requests)
+        fetch_metrics.fetch_metric_set(*args, self.store)
+        self.assertEqual(len(self.service.requests), before)
+
+    def test_metric_subset_is_applied_to_stored_rows(self):
+        response, _ = fetch_metrics.fetch_metric_set(
+            self.service, "org.example", CRASH, ["crashRate", "distinctUsers"],
+            ["versionCode"], 1, 5000, None, self.store,
+        )
+        self.assertTrue(response["rows"])
+        for row in response["rows"]:
+            self.assertEqual({m["metric"] for m in row["metrics"]}, {"crashRate", "distinctUsers"})
+
+    def test_daily_history(self):
+        self.sync(14)
+        history = fetch_metrics.daily_history(
+            self.store, "org.example", CRASH, ["versionCode"], 7)
+        self.assertEqual(len(history), 7)
+        self.assertEqual(history[-1]["date"], (self.today - timedelta(days=1)).isoformat())
+        day = self.today - timedelta(days=1)
+        rows = self.service.rows_for(day)
+        expected = fetch_metrics.VitalsTable(rows).weighted_aggregate()
+        self.assertEqual(history[-1]["distinctUsers"], expected["distinctUsers"])
+        self.assertAlmostEqual(history[-1]["crashRate"], expected["crashRate"])
+
+
+
+class WeekOverWeekTests(unittest.TestCase):
+    def history(self, rates):
+        return [{"date": f"d{i}", "userPerceivedCrashRate": rate, "distinctUsers": 100.0}
+                for i, rate in enumerate(rates)]
+
+    def test_no_history_no_section(self):
+        self.assertEqual(run_queries._week_over_week_lines({}), [])
+
+    def test_week_over_week_row(self):
+        results = {"firefox-release-crashrate": {
+            "history": self.history([0.01] * 14 + [0.02] * 7),
+        }}
+        lines = run_queries._week_over_week_lines(results)
+        row = next(line for line in lines if line.startswith("| Firefox Release"))
+        # Last 7 days 2.00%, +1.00% vs. the week before, +0.67% vs. all 21 days
+        self.assertIn("| 2.00% | +1.00% | +0.67% |", row)
+
+    def test_long_comparison_follows_history_days(self):
+        results = {"firefox-release-crashrate": {
+            "history": self.history([0.04] * 7 + [0.01] * 7 + [0.02] * 7),
+        }}
+        lines = run_queries._week_over_week_lines(results, history_days=14)
+        self.assertIn("| vs. 14d |", next(line for line in lines if line.startswith("| Product")))
+        row = next(line for line in lines if line.startswith("| Firefox Release"))
+        # vs. the last 14 days only (1.50%), not all 21
+        self.assertIn("| 2.00% | +1.00% | +0.50% |", row)
+
+    def test_window_rate_is_user_weighted(self):
+        history = [
+            {"userPerceivedCrashRate": 0.01, "distinctUsers": 300.0},
+            {"userPerceivedCrashRate": 0.03, "distinctUsers": 100.0},
+        ]
+        self.assertAlmostEqual(
+            run_queries._window_rate(history, "userPerceivedCrashRate", 2, 7), 0.015)
+        self.assertIsNone(run_queries._window_rate(history, "userPerceivedCrashRate", 0, 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
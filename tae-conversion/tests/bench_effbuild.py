@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark effbuild on a synthetic --info log (fake_gradle.py), before and
+after the streaming reader: wall time, throughput and peak RSS of one
+`effbuild.py LOG --scope efficiency --warnings --json` process each.
+
+- before: effbuild.py as of the commit before BuildLog was added (from git),
+  which reads the whole log into a list;
+- after: the working tree's effbuild.py, from the file and from a pipe.
+
+Diagnostics come in kotlinc-like bursts; --spread scatters them over the whole
+log instead, so no stretch can be skipped (the streaming reader's worst case).
+The JSON report of every run is compared with the before run.
+
+    python tae-conversion/tests/bench_effbuild.py --size 500
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+from fake_gradle import gradle_log  # noqa: E402
+
+# Runs one command and reports its peak RSS (KiB on Linux) on stderr's last line.
+MEASURE = ("import resource, subprocess, sys; "
+           "rc = subprocess.run(sys.argv[2:], stdin=open(sys.argv[1], 'rb') if sys.argv[1] else None).returncode; "
+           "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, file=sys.stderr); sys.exit(rc)")
+
+
+def old_script(dest):
+    """effbuild.py as it was before BuildLog existed."""
+    added = subprocess.run(["git", "-C", ROOT, "log", "-S", "class BuildLog", "--format=%H", "--",
+                            "tools/effbuild.py"], capture_output=True, text=True, check=True).stdout.split()
+    rev = f"{added[-1]}^" if added else "HEAD"
+    text = subprocess.run(["git", "-C", ROOT, "show", f"{rev}:./tools/effbuild.py"],
+                          capture_output=True, text=True, check=True).stdout
+    path = os.path.join(dest, "effbuild.py")
+    with open(path, "w") as fh:
+        fh.write(text)
+    # its _tae_version() looks for VERSION next to tools/
+    return path
+
+
+def measure(script, log, piped):
+    args = ["--scope", "efficiency", "--warnings", "--json"]
+    command = [sys.executable, script, *args] if piped else [sys.executable, script, log, *args]
+    started = time.perf_counter()
+    done = subprocess.run([sys.executable, "-c", MEASURE, log if piped else "", *command],
+                          capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    return done.stdout, seconds, int(done.stderr.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=500, help="Log size in MB (default: 500)")
+    parser.add_argument("--warnings", type=int, default=20000, help="Kotlin warnings in the log (default: 20000)")
+    parser.add_argument("--spread", action="store_true", help="Scatter diagnostics instead of bursts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="effbuild-bench-") as root:
+        log = os.path.join(root, "build.log")
+        with open(log, "wb") as fh:
+            for chunk in gradle_log(args.size << 20, errors=40, warnings=args.warnings, bursts=0 if args.spread else 8):
+                fh.write(chunk)
+        size = os.path.getsize(log)
+        print(f"{size / (1 << 20):.0f} MB log, 40 errors, {args.warnings} warnings "
+              f"({'spread' if args.spread else 'in 8 bursts'})")
+
+        old = old_script(root)
+        new = os.path.join(ROOT, "tools", "effbuild.py")
+        expected = None
+        for name, script, piped in (("before (file)", old, False), ("after (file)", new, False),
+                                    ("after (pipe)", new, True)):
+            report, seconds, rss = measure(script, log, piped)
+            expected = expected if expected is not None else report
+            assert report == expected, f"{name}: report differs from before"
+            print(f"  {name:16} {seconds:7.2f} s  {size / (1 << 20) / seconds:7.0f} MB/s  peak RSS {rss / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark effcheck over a batch of converted tests on a synthetic app tree
+(fake_fenix.py), before and after the app source index.
+
+- before: load_string_names + grep_app re-reading the tree per ID/TAG needle;
+- index, cold: AppIndex built from scratch and written to an empty cache dir;
+- index, warm: AppIndex loaded from that cache, nothing changed (stats only);
+- index, warm, --touched changed: the same after editing a few sources.
+
+The verdicts of every mode are compared with the before run.
+
+Then a sweep of --sweep converted tests through the command line, with the
+index cache warm: one effcheck process per file (what a per-class loop
+does), and one process over the whole directory in --jsonl batch mode with
+-j 1 and -j 8.
+
+    python tae-conversion/tests/bench_effcheck.py --files 5000 --tests 20 --sweep 50
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+
+import effcheck  # noqa: E402
+
+EFFCHECK = os.path.join(os.path.dirname(TESTS_DIR), "tools", "effcheck.py")
+from fake_fenix import write_app, write_efficiency  # noqa: E402
+
+
+def run(app, eff, paths, index=None):
+    strings = effcheck.load_string_names(app, index)
+    verbs = effcheck.basepage_verbs(eff)
+    tag_cache = {}
+    return [effcheck.check_file(p, strings, app, eff, verbs, tag_cache, index) for p in paths]
+
+
+def verdicts_of(outputs):
+    """{path: verdict} from --json documents and --jsonl lines alike."""
+    verdicts = {}
+    for doc in (json.loads(line) for out in outputs for line in out.splitlines()):
+        for fo in [doc] if "verdict" in doc else doc["files"] if not doc.get("done") else []:
+            verdicts[fo["path"]] = fo["verdict"]
+    return verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000, help="Kotlin sources in the app (default: 5000)")
+    parser.add_argument("--tests", type=int, default=20, help="Converted tests checked (default: 20)")
+    parser.add_argument("--sweep", type=int, default=50, help="Converted tests in the CLI sweep (default: 50)")
+    parser.add_argument("--touched", type=int, default=10, help="Sources edited before the last run (default: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="effcheck-bench-") as root:
+        app, ids, tags = write_app(root, args.files)
+        eff, paths = write_efficiency(root, ids, tags, args.tests)
+        cache = os.path.join(root, "cache")
+        sources = sorted(os.path.join(d, f) for d, _, fs in os.walk(app) for f in fs if f.endswith(".kt"))
+        findings = sum(len(r) for r in run(app, eff, paths[:1], effcheck.AppIndex(app)))
+
+        def touch():
+            for path in sources[:args.touched]:
+                with open(path, "a", encoding="utf-8") as fh:
+                    fh.write("// edited\n")
+                st = os.stat(path)
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        modes = [
+            ("before (grep_app)", None, lambda: run(app, eff, paths)),
+            ("index, cold", None, lambda: run(app, eff, paths, effcheck.AppIndex(app, cache))),
+            ("index, warm", None, lambda: run(app, eff, paths, effcheck.AppIndex(app, cache))),
+            (f"index, warm, {args.touched} changed", touch,
+             lambda: run(app, eff, paths, effcheck.AppIndex(app, cache))),
+        ]
+        print(f"{args.files} app sources, {args.tests} converted tests ({findings} findings in the first)")
+        expected = None
+        for name, prepare, check in modes:
+            if prepare:
+                prepare()
+            started = time.perf_counter()
+            verdicts = check()
+            seconds = time.perf_counter() - started
+            expected = expected or verdicts
+            assert verdicts == expected, f"{name}: verdicts differ from grep_app"
+            print(f"  {name:28} {seconds:8.2f} s")
+
+        sweep_root = os.path.join(root, "sweep")
+        eff, paths = write_efficiency(sweep_root, ids, tags, args.sweep, seed=1)
+        common = [sys.executable, EFFCHECK, "--app-root", app, "--eff-root", eff, "--cache-dir", cache]
+        sweeps = [
+            (f"{args.sweep} processes, 1 file each", [[*common, "--json", p] for p in paths]),
+            ("1 process, --jsonl -j 1", [[*common, "--jsonl", "-j", "1", os.path.join(eff, "tests")]]),
+            ("1 process, --jsonl -j 8", [[*common, "--jsonl", "-j", "8", os.path.join(eff, "tests")]]),
+        ]
+        print(f"sweep of {args.sweep} converted tests, index cache warm")
+        expected = None
+        for name, commands in sweeps:
+            started = time.perf_counter()
+            outputs = [subprocess.run(c, capture_output=True, text=True).stdout for c in commands]
+            seconds = time.perf_counter() - started
+            verdicts = verdicts_of(outputs)
+            expected = expected or verdicts
+            assert verdicts == expected and len(verdicts) == args.sweep, f"{name}: verdicts differ"
+            print(f"  {name:28} {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark effnext's other-branch check on a synthetic repo (fake_branches.py),
+or on a real checkout with --repo, before and after the object-store scan.
+
+- before: grep_other_branches, one `git grep <ref>` per local branch;
+- scan, cold: converted_on_other_branches with an empty cache dir;
+- scan, warm: the same again, every tree answered from the cache.
+
+The advisory of every mode is compared with the before run.
+
+    python tae-conversion/tests/bench_effnext.py --branches 40 --files 300
+    python tae-conversion/tests/bench_effnext.py --repo ~/Workspace/firefox
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+
+import effnext  # noqa: E402
+from fake_branches import write_branches  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--branches", type=int, default=40, help="Local branches (default: 40)")
+    parser.add_argument("--files", type=int, default=300, help="Converted test files on main (default: 300)")
+    parser.add_argument("--repo", help="Measure this checkout's branches instead of a synthetic repo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="effnext-bench-") as root:
+        if args.repo:
+            repo = args.repo
+            methods = effnext.converted_in_tree(repo) or set()
+            methods |= {"neverWrittenTest"}
+        else:
+            repo = os.path.join(root, "repo")
+            methods = write_branches(repo, branches=args.branches, files=args.files)
+        cache = os.path.join(root, "cache")
+        refs = effnext._local_branches(repo)
+        scanner = effnext.BranchScanner(repo)
+        trees = scanner.tree_ids(refs)
+        print(f"{len(refs)} branches, {len({t for t in trees.values() if t})} distinct efficiency tests trees, "
+              f"{len(methods)} methods asked about")
+
+        modes = [
+            ("before (git grep per ref)", lambda: effnext.grep_other_branches(repo, methods)),
+            ("scan, cold", lambda: effnext.converted_on_other_branches(repo, methods, cache)),
+            ("scan, warm", lambda: effnext.converted_on_other_branches(repo, methods, cache)),
+        ]
+        expected = None
+        for name, check in modes:
+            started = time.perf_counter()
+            hits = check()
+            seconds = time.perf_counter() - started
+            expected = expected if expected is not None else hits
+            assert hits == expected, f"{name}: advisory differs from git grep"
+            print(f"  {name:28} {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
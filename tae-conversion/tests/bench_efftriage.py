@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark efftriage's window rules on synthetic logcat-sized runs (fake_runs.py).
+
+- before: failure_windows() builds the 85-line text of every [ERR] window and
+  every rule is re-run on it until one matches;
+- after: RuleEngine.windows(), one scan of the attempt with the compiled
+  alternation, windows answered from the recorded match lines.
+
+Both are timed on the first attempt of every run (what triage() reads), and
+their findings are compared.
+
+    python tae-conversion/tests/bench_efftriage.py --size 3000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+
+import efftriage  # noqa: E402
+from fake_runs import write_runs  # noqa: E402
+
+
+def before(attempt):
+    return [(lineno, next((r[0] for r in efftriage.RULES if r[4](window)), None))
+            for lineno, window in efftriage.failure_windows(attempt)]
+
+
+def after(attempt):
+    return [(lineno, rule and rule[0]) for lineno, rule in efftriage.ENGINE.windows(attempt)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=3_000_000, help="Bytes per run-report.txt (default: 3000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="efftriage-bench-") as d:
+        runs = write_runs(d, size=args.size)
+        attempts = []
+        for batch in runs.values():
+            with open(os.path.join(batch, "run-report.txt"), encoding="utf-8") as fh:
+                attempts.append(efftriage.attempts(fh.read())[0])
+        size = sum(len(a) for a in attempts)
+        windows = sum(a.count("[ERR]") for a in attempts)
+        print(f"{len(runs)} runs of {args.size / 1e6:.1f} MB; first attempts {size / 1e6:.1f} MB, "
+              f"{windows} [ERR] windows")
+        results = {}
+        for label, windows_of in (("before", before), ("after", after)):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results[label] = [windows_of(a) for a in attempts]
+                seconds = time.perf_counter() - started
+                best = seconds if best is None else min(best, seconds)
+            print(f"  {label:7} {best:7.2f} s  {size / best / 1e6:7.1f} MB/s")
+        assert results["before"] == results["after"], "findings differ"
+
+        started = time.perf_counter()
+        for batch in runs.values():
+            efftriage.triage(batch)
+        print(f"  triage() end to end, all runs: {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
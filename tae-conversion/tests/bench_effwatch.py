@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark effwatch's request-to-done time with fake tools (effwatch_tests.py),
+before and after the event-driven daemon.
+
+- before: the polling shell loop, as of the commit before effwatch.py was added
+  (taken from git), with its default POLL=4;
+- after: effwatch.py --watch auto (inotify here), and --watch poll with the same
+  4s rescan for comparison.
+
+Two workloads: --requests instant test runs queued one after another (each
+waits for the previous done file, as a conversion session does), and one burst
+of a 2s device run, four 1s bug requests and a git status.
+
+    python tae-conversion/tests/bench_effwatch.py --requests 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+from effwatch_tests import FAKE_EFFLOOP, FAKE_PY  # noqa: E402
+
+
+def old_script(dest):
+    """effwatch.sh as it was before effwatch.py existed."""
+    added = subprocess.run(["git", "-C", ROOT, "log", "--diff-filter=A", "--format=%H", "--", "tools/effwatch.py"],
+                           capture_output=True, text=True, check=True).stdout.split()
+    rev = f"{added[-1]}^" if added else "HEAD"
+    text = subprocess.run(["git", "-C", ROOT, "show", f"{rev}:./tools/effwatch.sh"],
+                          capture_output=True, text=True, check=True).stdout
+    path = os.path.join(dest, "effwatch.sh")
+    with open(path, "w") as fh:
+        fh.write(text)
+    os.chmod(path, 0o755)
+    return path
+
+
+def tools_dir(root):
+    tools = os.path.join(root, "tools")
+    os.makedirs(tools)
+    for kind in ("git", "bug"):
+        with open(os.path.join(tools, f"eff{kind}.py"), "w") as fh:
+            fh.write(FAKE_PY % {"kind": kind})
+    with open(os.path.join(tools, "effloop.sh"), "w") as fh:
+        # MACH_ARGS is the only per-request env a test run gets: "sleep=2" makes this run take 2s.
+        fh.write(FAKE_EFFLOOP.replace('sleep "${FAKE_SLEEP:-0}"', 'm="${MACH_ARGS:-sleep=0}"; sleep "${m#sleep=}"'))
+    os.chmod(os.path.join(tools, "effloop.sh"), 0o755)
+    shutil.copy(os.path.join(ROOT, "tools", "effwatch.py"), tools)
+    return tools
+
+
+def submit(queue, rid, body):
+    tmp = os.path.join(queue, f".{rid}.tmp")
+    with open(tmp, "w") as fh:
+        json.dump({"id": rid, **body}, fh)
+    os.rename(tmp, os.path.join(queue, f"{rid}.request.json"))
+
+
+def wait_done(queue, rids):
+    while not all(os.path.exists(os.path.join(queue, f"{rid}.done.json")) for rid in rids):
+        time.sleep(0.01)
+
+
+def measure(command, root, tools, requests):
+    runs = os.path.join(root, "conversion-runs")
+    queue = os.path.join(runs, "_queue")
+    shutil.rmtree(runs, ignore_errors=True)
+    os.makedirs(queue)
+    env = dict(os.environ, RUNS=runs, POLL="4", FAKE_SLEEP="0")
+    proc = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(1)   # let it reach its first wait
+        sequential = []
+        for n in range(requests):
+            started = time.perf_counter()
+            submit(queue, f"s{n}", {"test_class": "HomeTest", "batch": f"s{n}"})
+            wait_done(queue, [f"s{n}"])
+            sequential.append(time.perf_counter() - started)
+        burst_requests = {"d": {"test_class": "HomeTest", "batch": "burst", "mach_args": "sleep=2"},
+                          "g": {"git": "status"}, **{f"b{k}": {"bug": "read", "sleep": 1} for k in range(4)}}
+        time.sleep(0.5)
+        started = time.perf_counter()
+        for rid, body in burst_requests.items():
+            submit(queue, rid, body)
+        wait_done(queue, list(burst_requests))
+        burst = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait()
+    return sequential, burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10, help="Sequential test-run requests (default: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="effwatch-bench-") as root:
+        tools = tools_dir(root)
+        old = old_script(tools)
+        modes = [
+            ("before: effwatch.sh, POLL=4", [old]),
+            ("after: effwatch.py, auto", [sys.executable, os.path.join(tools, "effwatch.py")]),
+            ("after: effwatch.py, poll 4s", [sys.executable, os.path.join(tools, "effwatch.py"), "--watch", "poll"]),
+        ]
+        print(f"{args.requests} sequential instant test runs; then a burst of 1 device (2s) + 4 bug (1s) + 1 git")
+        for name, command in modes:
+            sequential, burst = measure(command, root, tools, args.requests)
+            print(f"  {name:30} request→done mean {sum(sequential) / len(sequential):6.2f} s, "
+                  f"max {max(sequential):5.2f} s; burst {burst:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for effbuild's streaming log reader.
+
+BuildLog stands in for parse() over the whole log, so its answer is checked
+against parse() on synthetic --info logs (fake_gradle.py) cut into chunks of
+every awkward size, with CRLF and bare-CR line ends; then main() is checked to
+report the same from a file and from a pipe, and to print a diagnostic while
+the build that wrote it is still running.
+
+    python -m unittest discover -s tae-conversion/tests -p '*tests.py'
+"""
+
+import io
+import json
+import os
+import re
+import select
+import subprocess
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS = os.path.join(os.path.dirname(TESTS_DIR), "tools")
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, TOOLS)
+
+import effbuild  # noqa: E402
+from fake_gradle import gradle_log  # noqa: E402
+
+EFFBUILD = os.path.join(TOOLS, "effbuild.py")
+
+
+def _reference(data, keep):
+    diags, gradle_fail, verdict = effbuild.parse(io.TextIOWrapper(io.BytesIO(data), errors="ignore"))
+    warns = [d for d in diags if d[0] == "w"]
+    scoped = [d for d in warns if "ui/efficiency/" in d[1]]
+    return {"errors": [d for d in diags if d[0] == "e"], "warnings": warns[:keep], "warning_count": len(warns),
+            "scoped_warnings": scoped[:keep], "scoped_warning_count": len(scoped),
+            "gradle_fail": gradle_fail[:effbuild.KEEP_GRADLE_FAIL], "verdict": verdict,
+            "failing": re.findall(r"Task (:\S+)\s+FAILED", "\n".join(gradle_fail))}
+
+
+def _streamed(data, keep, size):
+    log = effbuild.BuildLog(keep)
+    for at in range(0, len(data), size):
+        log.feed(data[at:at + size])
+    log.close()
+    return {k: getattr(log, k) for k in ("errors", "warnings", "warning_count", "scoped_warnings",
+                                         "scoped_warning_count", "gradle_fail", "verdict", "failing")}
+
+
+class MatchesParse(unittest.TestCase):
+    def assertStreamsLikeParse(self, data, keep=40, sizes=(1, 7, 4096, 1 << 20)):
+        expected = _reference(data, keep)
+        for size in sizes:
+            with self.subTest(chunk=size):
+                self.assertEqual(_streamed(data, keep, size), expected)
+        return expected
+
+    def test_info_log_in_chunks_of_every_size(self):
+        data = b"".join(gradle_log(256 << 10, errors=9, warnings=120, seed=1))
+        got = self.assertStreamsLikeParse(data, sizes=(7, 333, 4096, 1 << 20))
+        self.assertEqual(len(got["errors"]), 9)
+        self.assertEqual((got["warning_count"], len(got["warnings"])), (120, 40))
+        self.assertEqual(got["verdict"], "FAILED")
+        self.assertIn(":app:compileDebugAndroidTestKotlin", got["failing"])
+
+    def test_diagnostics_spread_over_every_chunk_and_a_successful_build(self):
+        data = b"".join(gradle_log(128 << 10, errors=0, warnings=300, bursts=0, failed=False, seed=2))
+        got = self.assertStreamsLikeParse(data, keep=5, sizes=(5, 4096))
+        self.assertEqual(got["verdict"], "SUCCESSFUL")
+
+    def test_crlf_bare_cr_and_undecodable_bytes(self):
+        data = b"".join(gradle_log(64 << 10, errors=3, warnings=10, crlf=True, seed=3))
+        self.assertStreamsLikeParse(data, sizes=(1, 2, 3, 4096))
+        progress = (b"> Task :app:a\r> Task :app:b FAILED\r\n\xff\xfee: /x/ui/efficiency/A.kt:1:2 bad\r"
+                    b"* What went wrong:\rboom\r\rBUILD FAILED\r")
+        got = self.assertStreamsLikeParse(progress, sizes=(1, 2, 5, 100))
+        self.assertEqual(len(got["errors"]), 1)
+        self.assertEqual(got["gradle_fail"], ["> Task :app:b FAILED", "* What went wrong:", "boom"])
+
+    def test_what_went_wrong_lines_are_capped_but_failed_tasks_are_not(self):
+        data = "".join(f"> Task :app:t{n} FAILED\n" for n in range(50)).encode() + b"BUILD FAILED\n"
+        got = self.assertStreamsLikeParse(data)
+        self.assertEqual(len(got["gradle_fail"]), effbuild.KEEP_GRADLE_FAIL)
+        self.assertEqual(len(got["failing"]), 50)
+
+
+class Main(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effbuild-test-")
+        self.addCleanup(td.cleanup)
+        self.root = td.name
+        self.log = os.path.join(self.root, "build.log")
+        with open(self.log, "wb") as fh:
+            for chunk in gradle_log(512 << 10, errors=6, warnings=60, seed=4):
+                fh.write(chunk)
+
+    def run_main(self, *args, stdin=None):
+        return subprocess.run([sys.executable, EFFBUILD, *args], input=stdin, capture_output=True)
+
+    def test_file_and_pipe_report_alike(self):
+        for scope in ("all", "efficiency"):
+            args = ["--scope", scope, "--warnings", "--json"]
+            from_file = self.run_main(self.log, *args)
+            with open(self.log, "rb") as fh:
+                from_pipe = self.run_main(*args, stdin=fh.read())
+            self.assertEqual(from_file.returncode, 1)
+            self.assertEqual(from_file.stdout, from_pipe.stdout)
+            report = json.loads(from_file.stdout)
+            self.assertFalse(report["ok"])
+            self.assertEqual(report["error_count"], len(report["errors"]))
+
+    def test_stream_prints_a_diagnostic_while_the_build_runs(self):
+        proc = subprocess.Popen([sys.executable, EFFBUILD, "--stream"], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            proc.stdin.write(b"> Task :app:compileDebugKotlin\n"
+                             b"e: file:///src/ui/efficiency/tests/HomeTest.kt:3:9 Unresolved reference: on\n")
+            proc.stdin.flush()
+            ready, _, _ = select.select([proc.stderr], [], [], 10)
+            self.assertTrue(ready, "no diagnostic before the log ended")
+            self.assertIn(b"HomeTest.kt:3:9", proc.stderr.readline())
+            self.assertIsNone(proc.poll())
+            proc.stdin.write(b"BUILD FAILED in 1s\n")
+            proc.stdin.close()
+            self.assertIn("COMPILE FAILED", proc.stdout.read().decode())
+        finally:
+            proc.wait(10)
+            proc.stdout.close()
+            proc.stderr.close()
+        self.assertEqual(proc.returncode, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for effcheck's app source index (AppIndex) and its batch modes.
+
+The index replaces grep_app — a substring test re-reading every .kt file per
+needle — so every answer is checked against grep_app itself, including the
+shapes a token index gets wrong: an R.id name that is only a prefix of a real
+one, a literal next to another literal, an escaped quote. The on-disk cache is
+checked for the one way it can go wrong: serving an entry for a file that has
+since changed or gone. The batch modes (directories, --changed, --stdin) must
+give every file the verdict a one-file run gives it.
+
+    python -m unittest discover -s tae-conversion/tests -p '*tests.py'
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS = os.path.join(os.path.dirname(TESTS_DIR), "tools")
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, TOOLS)
+
+import effcheck  # noqa: E402
+from fake_fenix import write_app, write_efficiency  # noqa: E402
+
+TRICKY = '''class Tricky {
+    val a = listOf("first", "second")
+    val b = "say \\"quoted\\" please"
+    val c = view.findViewById(R.id.toolbar_menu_button)
+    val d = AR.id.not_really
+    val e = """raw "inner" raw"""
+}
+'''
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def _main(*args, stdin=None):
+    """(exit status, stdout) of effcheck.main() with *args*."""
+    argv, out, real_stdin = sys.argv, io.StringIO(), sys.stdin
+    sys.argv = ["effcheck.py", *args]
+    if stdin is not None:
+        sys.stdin = io.StringIO(stdin) if isinstance(stdin, str) else stdin
+    try:
+        with contextlib.redirect_stdout(out):
+            try:
+                effcheck.main()
+            except SystemExit as e:
+                return e.code, out.getvalue()
+    finally:
+        sys.argv, sys.stdin = argv, real_stdin
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", repo, "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                   check=True, capture_output=True, text=True)
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class AppIndexMatchesGrep(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effcheck-test-")
+        self.addCleanup(td.cleanup)
+        self.app, self.ids, self.tags = write_app(td.name, 40)
+        _write(os.path.join(self.app, "java", "Tricky.kt"), TRICKY)
+
+    def test_every_needle_answers_like_grep_app(self):
+        index = effcheck.AppIndex(self.app)
+        needles = ['"' + t + '"' for t in self.tags[:30]] + ["R.id." + i for i in self.ids[:30]]
+        needles += ['"first"', '"second"', '", "', '"quoted\\"', '"quoted"', '"inner"', '"raw "',
+                    "R.id.toolbar", "R.id.toolbar_menu_button", "R.id.toolbar_menu_button_x",
+                    "R.id.not_really", "R.id.not", '"missing.tag"', "R.id.missing_view", '""',
+                    "R.id.a.b", '"multi\nline"', "R.id."]
+        for needle in needles:
+            with self.subTest(needle=needle):
+                self.assertEqual(index.contains(needle), effcheck.grep_app(self.app, needle))
+
+    def test_where_names_the_file_and_line(self):
+        index = effcheck.AppIndex(self.app)
+        self.assertEqual(index.where("R.id.toolbar_menu_button"), [(os.path.join("java", "Tricky.kt"), 4)])
+        self.assertEqual(index.where('"second"'), [(os.path.join("java", "Tricky.kt"), 2)])
+        self.assertIsNone(index.where("R.id.a.b"))
+
+    def test_string_names_match_load_string_names(self):
+        index = effcheck.AppIndex(self.app)
+        self.assertTrue(index.string_names())
+        self.assertEqual(effcheck.load_string_names(self.app, index), effcheck.load_string_names(self.app))
+
+
+class AppIndexCache(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effcheck-test-")
+        self.addCleanup(td.cleanup)
+        self.app, self.ids, self.tags = write_app(td.name, 30)
+        self.cache = os.path.join(td.name, "cache")
+
+    def test_warm_cache_reads_nothing(self):
+        cold = effcheck.AppIndex(self.app, self.cache)
+        warm = effcheck.AppIndex(self.app, self.cache)
+        self.assertGreater(cold.parsed, 30)
+        self.assertEqual(warm.parsed, 0)
+        self.assertEqual(warm.literals, cold.literals)
+        self.assertEqual(warm.string_names(), cold.string_names())
+
+    def test_changed_and_deleted_files_are_reindexed(self):
+        effcheck.AppIndex(self.app, self.cache)
+        sources = sorted(os.path.join(d, f) for d, _, fs in os.walk(self.app) for f in fs if f.endswith(".kt"))
+        with open(sources[0], "a", encoding="utf-8") as fh:
+            fh.write('val added = "freshly.added.tag"\n')
+        _bump_mtime(sources[0])
+        with open(sources[1], encoding="utf-8") as fh:
+            gone = next(line for line in fh.read().splitlines() if "R.id." in line).split("R.id.")[1].rstrip(")")
+        os.remove(sources[1])
+
+        index = effcheck.AppIndex(self.app, self.cache)
+        self.assertEqual(index.parsed, 1)
+        self.assertTrue(index.contains('"freshly.added.tag"'))
+        self.assertFalse(index.contains("R.id." + gone))
+        self.assertEqual(index.contains("R.id." + gone), effcheck.grep_app(self.app, "R.id." + gone))
+
+    def test_cache_of_another_app_root_or_version_is_ignored(self):
+        index = effcheck.AppIndex(self.app, self.cache)
+        with open(index.cache_path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        data["version"] = effcheck.INDEX_VERSION + 1
+        with open(index.cache_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        self.assertGreater(effcheck.AppIndex(self.app, self.cache).parsed, 30)
+
+
+class MainVerdicts(unittest.TestCase):
+    def test_indexed_run_reports_what_the_grep_run_reports(self):
+        with tempfile.TemporaryDirectory(prefix="effcheck-test-") as root:
+            app, ids, tags = write_app(root, 60)
+            eff, paths = write_efficiency(root, ids, tags, 8)
+            strings = effcheck.load_string_names(app)
+            verbs = effcheck.basepage_verbs(eff)
+            index = effcheck.AppIndex(app)
+            for path in paths:
+                self.assertEqual(effcheck.check_file(path, strings, app, eff, verbs, {}, index),
+                                 effcheck.check_file(path, strings, app, eff, verbs, {}))
+
+            argv, out = sys.argv, io.StringIO()
+            sys.argv = ["effcheck.py", "--app-root", app, "--eff-root", eff, "--json",
+                        "--cache-dir", os.path.join(root, "cache"), *paths]
+            try:
+                with contextlib.redirect_stdout(out), self.assertRaises(SystemExit):
+                    effcheck.main()
+            finally:
+                sys.argv = argv
+            verdict = json.loads(out.getvalue())
+            self.assertEqual(verdict["app_strings"], len(strings))
+            self.assertTrue(any(f["warns"] for f in verdict["files"]))
+            self.assertTrue(os.listdir(os.path.join(root, "cache")))
+
+
+class BatchModes(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effcheck-test-")
+        self.addCleanup(td.cleanup)
+        self.root = td.name
+        self.app, ids, tags = write_app(self.root, 60)
+        self.eff, self.paths = write_efficiency(self.root, ids, tags, 12)
+        self.common = ["--app-root", self.app, "--eff-root", self.eff, "--cache-dir", os.path.join(self.root, "c")]
+
+    def one_by_one(self, paths):
+        out = {}
+        for path in paths:
+            status, text = _main(*self.common, "--json", path)
+            out[path] = json.loads(text)["files"][0]
+        return out
+
+    def test_directory_sweep_matches_one_file_runs(self):
+        status, text = _main(*self.common, "--jsonl", "-j", "4", os.path.join(self.eff, "tests"))
+        lines = [json.loads(line) for line in text.splitlines()]
+        results, done = lines[:-1], lines[-1]
+        self.assertEqual([r["path"] for r in results], sorted(self.paths))
+        expected = self.one_by_one(self.paths)
+        for r in results:
+            self.assertEqual(r, {"tool": "effcheck", **expected[r["path"]]})
+        self.assertTrue(done["done"])
+        self.assertEqual(done["files"], len(self.paths))
+        self.assertEqual(status, 1 if done["failed"] else 0)
+
+    def test_unreadable_file_fails_alone(self):
+        missing = os.path.join(self.eff, "tests", "GoneTest.kt")
+        status, text = _main(*self.common, "--jsonl", missing, self.paths[0])
+        results = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(results[0]["verdict"], "FAIL")
+        self.assertIn("READ", results[0]["fails"][0])
+        self.assertEqual(results[1]["path"], self.paths[0])
+        self.assertEqual(status, 1)
+
+    def test_changed_checks_only_what_git_reports(self):
+        _git(self.eff, "init", "-q")
+        _git(self.eff, "add", ".")
+        _git(self.eff, "commit", "-qm", "base")
+        with open(self.paths[2], "a", encoding="utf-8") as fh:
+            fh.write("// edited\n")
+        new = os.path.join(self.eff, "tests", "BrandNewTest.kt")
+        with open(new, "w", encoding="utf-8") as fh:
+            fh.write("class BrandNewTest : BaseTest() {}\n")
+        status, text = _main(*self.common, "--jsonl", "--changed")
+        paths = [json.loads(line).get("path") for line in text.splitlines()][:-1]
+        self.assertEqual([os.path.realpath(p) for p in paths],
+                         sorted(os.path.realpath(p) for p in (self.paths[2], new)))
+
+    def test_changed_since_a_rev_and_never_a_path(self):
+        _git(self.eff, "init", "-q")
+        _git(self.eff, "add", ".")
+        _git(self.eff, "commit", "-qm", "base")
+        _git(self.eff, "tag", "base")
+        with open(self.paths[1], "a", encoding="utf-8") as fh:
+            fh.write("// edited\n")
+        _git(self.eff, "commit", "-qam", "edit")
+        status, text = _main(*self.common, "--jsonl", "--changed-since", "base")
+        paths = [json.loads(line).get("path") for line in text.splitlines()][:-1]
+        self.assertEqual([os.path.realpath(p) for p in paths], [os.path.realpath(self.paths[1])])
+        # a directory after --changed is a directory to check, not a REV
+        status, text = _main(*self.common, "--jsonl", "--changed", os.path.dirname(self.paths[0]))
+        self.assertTrue(json.loads(text.splitlines()[-1])["done"])
+        self.assertGreater(len(text.splitlines()), 1)
+
+    def test_changed_outside_a_repo_is_an_error_not_a_clean_sweep(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            status, text = _main(*self.common, "--jsonl", "--changed")
+        self.assertEqual((status, text), (2, ""))
+        self.assertIn("--changed: git", err.getvalue())
+
+    def test_stdin_requests_see_app_edits(self):
+        tag = "added.after.startup"
+        path = os.path.join(self.eff, "tests", "TagTest.kt")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(f'val s = Selector(strategy = SelectorStrategy.COMPOSE_BY_TAG, value = "{tag}")\n')
+
+        # The edit lands between the two requests: readline() of the second request makes it.
+        class Requests(io.StringIO):
+            def __init__(self, app):
+                super().__init__(f"{path}\n{path}\n")
+                self.app, self.served = app, 0
+
+            def __next__(self):
+                line = super().__next__()
+                self.served += 1
+                if self.served == 2:
+                    with open(os.path.join(self.app, "java", "Late.kt"), "w", encoding="utf-8") as fh:
+                        fh.write(f'Modifier.testTag("{tag}")\n')
+                return line
+
+        status, text = _main(*self.common, "--stdin", stdin=Requests(self.app))
+        lines = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual([line.get("verdict") for line in lines], ["WARN", None, "PASS", None])
+        self.assertEqual(lines[3]["app_reindexed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
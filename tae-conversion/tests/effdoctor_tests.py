@@ -77,7 +77,8 @@ class DoctorCase(unittest.TestCase):
 
     def fake_sh(self, cmd):
         if cmd.startswith("ps "):
-            return "\n".join(f"  {pid} bash {path}" for pid, path, _ in self.watchers)
+            return "\n".join(f"  {pid} {'python3' if '.py' in path else 'bash'} {path}"
+                             for pid, path, _ in self.watchers)
         if cmd.startswith("lsof "):
             pid = cmd.split("-p ")[1].split()[0]
             for wpid, _, cwd in self.watchers:
@@ -153,6 +154,25 @@ class QueueResolutionTests(DoctorCase):
         self.assertTrue(self.levels(res, "WARN"))
         self.assertIn(alt_queue, self.text(res))
 
+    def test_python_watcher_is_resolved_from_its_runs_argument(self):
+        # effwatch.sh execs effwatch.py, so ps shows the python process. Its tools dir may be the
+        # symlink target (canonical) while --runs names the queue the launcher actually computed.
+        alt_root = os.path.join(self.root, "ui-test-modernization")
+        alt_queue = os.path.join(alt_root, "conversion-runs", "_queue")
+        os.makedirs(alt_queue)
+        self.watchers = [(4242, os.path.join(self.canon_tools, "effwatch.py") + " --runs "
+                          + os.path.join(alt_root, "conversion-runs"), self.root)]
+        w = self.check()["watchers"][0]
+        self.assertEqual(w["watching_queue"], alt_queue)
+        self.assertFalse(w["canonical"])
+
+    def test_python_watcher_relative_runs_resolves_against_the_watcher_cwd(self):
+        self.watchers = [(4242, "tools/effwatch.py --once --runs conversion-runs",
+                          os.path.join(self.root, "testops-tools", "tae-conversion"))]
+        res = self.check()
+        self.assertEqual(res["watchers"][0]["watching_queue"], self.canon_queue)
+        self.assertTrue(res["ok"], self.text(res))
+
 
 class WrongAnswerTests(DoctorCase):
     """Declining to answer beats answering wrongly: a queue path that does not
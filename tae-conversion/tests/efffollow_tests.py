@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for --follow: efffollow, and effverify/efftriage following a run.
+
+A writer thread replays a recorded corpus run the way effloop produces it:
+no report at first, then the trace a few lines at a time (cut mid-line and
+mid-character), then status.json, then the FAILURES header prepended. The
+follower must hand over each attempt while the writer is still writing, cut
+it where efftriage.attempts() starts it, read no byte twice, and end with the
+same verdict the tool gives on the finished batch.
+
+    python -m unittest discover -s tae-conversion/tests -p '*tests.py'
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS = os.path.join(os.path.dirname(TESTS_DIR), "tools")
+CORPUS = os.path.join(TESTS_DIR, "fixtures", "corpus")
+sys.path.insert(0, TOOLS)
+
+import efffollow  # noqa: E402
+import efftriage  # noqa: E402
+
+RULE = "=" * 78
+
+
+def recorded(name):
+    """(trace as effpretty wrote it, FAILURES header effloop prepended, status.json) of a corpus run."""
+    with open(os.path.join(CORPUS, name, "run-report.txt"), "rb") as fh:
+        text = fh.read()
+    with open(os.path.join(CORPUS, name, "status.json"), "rb") as fh:
+        status = fh.read()
+    marker = (RULE + "\n\n").encode()
+    if text.startswith(RULE.encode()) and marker in text:
+        header, body = text.split(marker, 1)
+        return body, header + marker, status
+    return text, b"", status
+
+
+class Writer(threading.Thread):
+    """Replay a recorded run into *batch* like effloop: *step* bytes every *tick* seconds."""
+
+    def __init__(self, batch, name, step=997, tick=0.002, delay=0.05):
+        super().__init__(daemon=True)
+        self.batch, self.step, self.tick, self.delay = batch, step, tick, delay
+        self.body, self.header, self.status = recorded(name)
+        self.written = 0
+
+    def run(self):
+        report = os.path.join(self.batch, "run-report.txt")
+        time.sleep(self.delay)                              # the build: no report yet
+        with open(report, "wb") as fh:
+            while self.written < len(self.body):
+                fh.write(self.body[self.written:self.written + self.step])
+                fh.flush()
+                self.written = min(len(self.body), self.written + self.step)
+                time.sleep(self.tick)
+        with open(os.path.join(self.batch, "status.json"), "wb") as fh:
+            fh.write(self.status)
+        if self.header:
+            with open(report, "wb") as fh:
+                fh.write(self.header + self.body)
+
+
+def _batch(test):
+    td = tempfile.TemporaryDirectory(prefix="efffollow-test-")
+    test.addCleanup(td.cleanup)
+    return td.name
+
+
+class FollowsTheWriter(unittest.TestCase):
+    def test_tail_reads_every_byte_once_across_the_header_prepend(self):
+        batch = _batch(self)
+        writer = Writer(batch, "T0-absence-assert", step=101)
+        tail, got = efffollow.Tail(os.path.join(batch, "run-report.txt")), []
+        writer.start()
+        while writer.is_alive():
+            got += tail.read()
+            time.sleep(0.001)
+        got += tail.read()
+        got.append(tail.rest())
+        self.assertTrue(writer.header)
+        self.assertEqual("".join(got), writer.body.decode("utf-8"))
+        self.assertEqual(tail.read_bytes, len(writer.body))
+
+    def test_attempts_close_while_the_run_is_still_being_written(self):
+        for name in ("T0-absence-assert", "T10-crash", "T2-selector-surface"):
+            with self.subTest(run=name):
+                batch = _batch(self)
+                writer = Writer(batch, name)
+                split, closed = efffollow.Attempts(), []
+                writer.start()
+                for line in efffollow.follow(batch, interval=0.001):
+                    self.assertIsNotNone(line)
+                    closed += [(att, writer.written) for att in split.feed(line)]
+                closed += [(att, writer.written) for att in split.close()]
+                writer.join()
+
+                whole = efftriage.attempts(writer.body.decode("utf-8"))
+                self.assertEqual(len(closed), len(whole))
+                for (att, _), full in zip(closed, whole):
+                    self.assertTrue(full.startswith(att.text))
+                self.assertLess(closed[0][1], len(writer.body), "first attempt only reported at the end")
+
+    def test_outcomes_of_a_retried_failure_and_a_crash(self):
+        def outcomes(name):
+            split, got = efffollow.Attempts(), []
+            for line in recorded(name)[0].decode("utf-8").splitlines(True):
+                got += split.feed(line)
+            return [(a.test, a.number, efffollow.outcome(a)) for a in got + split.close()]
+
+        self.assertEqual(outcomes("T0-absence-assert"), [("verifySponsoredShortcutsListTest", 1, "failed"),
+                                                         ("verifySponsoredShortcutsListTest", 2, "failed")])
+        crash = outcomes("T10-crash")
+        self.assertEqual(crash[0], ("scanQRCodeToOpenAWebpageTest", 1, "crashed"))
+        self.assertEqual({o for _, _, o in crash[1:]}, {"passed"})
+
+    def test_a_new_run_replacing_the_report_starts_over(self):
+        batch = _batch(self)
+        report = os.path.join(batch, "run-report.txt")
+        with open(report, "w") as fh:
+            fh.write("run started: 1 tests\nstarted: oldTest(a.B)\nRetryTestRule: Started try #1.\n")
+        lines = efffollow.follow(batch, interval=0.001)
+        self.assertEqual(next(lines), "run started: 1 tests\n")
+        self.assertEqual([next(lines), next(lines)][1], "RetryTestRule: Started try #1.\n")
+        with open(report, "w") as fh:
+            fh.write("run started: 1 tests\n")
+        self.assertEqual([next(lines), next(lines)], [None, "run started: 1 tests\n"])
+        with open(os.path.join(batch, "status.json"), "w") as fh:
+            fh.write("{}")
+        self.assertEqual(list(lines), [])
+
+
+class ToolsFollow(unittest.TestCase):
+    """--follow prints attempts before the run ends, then exactly what the tool says on the finished batch."""
+
+    def follow(self, tool, name, *args):
+        batch = _batch(self)
+        writer = Writer(batch, name, tick=0.02)
+        proc = subprocess.Popen([sys.executable, os.path.join(TOOLS, tool), batch, *args, "--follow"],
+                                stdout=subprocess.PIPE, text=True)
+        writer.start()
+        live = [proc.stdout.readline(), proc.stdout.readline()]
+        during = writer.is_alive()
+        out = "".join(live) + proc.stdout.read()
+        proc.wait(30)
+        proc.stdout.close()
+        writer.join()
+        after = subprocess.run([sys.executable, os.path.join(TOOLS, tool), batch, *args],
+                               capture_output=True, text=True)
+        self.assertTrue(during, f"{tool} printed nothing until the run was over")
+        self.assertTrue(out.endswith(after.stdout))
+        self.assertEqual(proc.returncode, after.returncode)
+        return out[:len(out) - len(after.stdout)]
+
+    def test_effverify(self):
+        live = self.follow("effverify.py", "T10-crash", "scanQRCodeToOpenAWebpageTest")
+        self.assertIn("✖ scanQRCodeToOpenAWebpageTest try #1: CRASHED", live)
+        self.assertIn("⚠ browserSearchBarItemsTest: SKIPPED", live)
+
+    def test_efftriage(self):
+        live = self.follow("efftriage.py", "T0-absence-assert")
+        self.assertIn("verifySponsoredShortcutsListTest try #1: failed", live)
+        self.assertIn("[T0] line 141", live)
+
+    def test_efftriage_json_is_one_object_per_attempt_then_the_triage(self):
+        out = self.follow("efftriage.py", "T10-crash", "--json")
+        events = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(events[0]["status"], "crashed")
+        self.assertEqual(events[0]["findings"][0]["rule"], "T10")
+        self.assertEqual(len(events), len(efftriage.attempts(recorded("T10-crash")[0].decode("utf-8"))))
+
+    def test_finished_batch_is_read_once_and_reported(self):
+        batch = os.path.join(_batch(self), "b")
+        shutil.copytree(os.path.join(CORPUS, "T0-absence-assert"), batch)
+        done = subprocess.run([sys.executable, os.path.join(TOOLS, "efftriage.py"), batch, "--follow"],
+                              capture_output=True, text=True, timeout=30)
+        self.assertIn("try #2: failed", done.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
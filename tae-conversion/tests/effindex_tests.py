@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the effindex conversion-state index.
+
+The index stands in for reconcile_conversion.parse_legacy/parse_efficiency and
+effnext.converted_in_tree, so every answer is checked against a fresh parse of
+the same tree (fake_fenix.write_ui: every annotation shape, CRLF files, a file
+with no class), and the incremental update is checked for the ways it can go
+stale: an edited, added or deleted file, and a file touched but not changed.
+
+    python -m unittest discover -s tae-conversion/tests -p '*tests.py'
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+
+import effindex  # noqa: E402
+import effnext  # noqa: E402
+import reconcile_conversion  # noqa: E402
+from fake_fenix import write_ui  # noqa: E402
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class IndexCase(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effindex-test-")
+        self.addCleanup(td.cleanup)
+        self.root = td.name
+        self.ui = write_ui(self.root, 40)
+        self.db = os.path.join(self.root, "cache", "index.sqlite")
+
+    def index(self):
+        index = effindex.ConversionIndex(self.ui, self.db)
+        self.addCleanup(index.close)
+        return index
+
+    def assertMatchesFreshParse(self, index):
+        self.assertEqual(index.legacy_tests(), reconcile_conversion.parse_legacy(self.ui))
+        self.assertEqual(index.efficiency_tests(), reconcile_conversion.parse_efficiency(self.ui))
+
+
+class MatchesFreshParse(IndexCase):
+    def test_legacy_and_efficiency_answers(self):
+        index = self.index()
+        rows = index.legacy_tests()
+        self.assertTrue(any(r["has_replacedBy"] for r in rows))
+        self.assertTrue(any(r["smoke"] and r["testrail"] for r in rows))
+        self.assertTrue(any(" " in r["Method"] for r in rows))
+        self.assertIn("NoClassHere", {r["Class"] for r in rows})
+        self.assertMatchesFreshParse(index)
+
+    def test_efficiency_funs_match_effnexts_fresh_parse(self):
+        # effnext's checkout root: the ui dir sits at the end of EFF_TESTS minus efficiency/tests.
+        repo = os.path.join(self.root, "repo")
+        ui = write_ui(os.path.join(repo, os.path.dirname(os.path.dirname(os.path.dirname(effnext.EFF_TESTS)))), 40)
+        self.assertEqual(os.path.join(ui, "efficiency", "tests"), os.path.join(repo, effnext.EFF_TESTS))
+        fresh = effnext.converted_in_tree(repo)
+        self.assertTrue(any(n.startswith("helper") for n in fresh))
+        self.assertEqual(effnext.converted_in_tree(repo, os.path.join(self.root, "cache")), fresh)
+        self.assertIsNone(effnext.converted_in_tree(os.path.join(self.root, "nowhere"), self.root))
+
+    def test_conversion_status_is_reconciles(self):
+        eff = reconcile_conversion.parse_efficiency(self.ui)
+        for r in self.index().conversion_status():
+            self.assertEqual(r["conv_name"], r["Method"] in eff)
+            self.assertEqual(r["converted"], r["has_replacedBy"] or r["conv_name"])
+
+
+class Incremental(IndexCase):
+    def test_warm_index_parses_nothing(self):
+        self.assertGreater(self.index().refresh(), 40)
+        self.assertEqual(self.index().refresh(), 0)
+
+    def test_edited_added_and_deleted_files(self):
+        self.index().refresh()
+        legacy = sorted(f for f in os.listdir(self.ui) if f.endswith(".kt"))
+        with open(os.path.join(self.ui, legacy[0]), "a", encoding="utf-8") as fh:
+            fh.write("class Late {\n    @SmokeTest\n    @Test\n    fun lateTest() {\n    }\n}\n")
+        _bump_mtime(os.path.join(self.ui, legacy[0]))
+        os.remove(os.path.join(self.ui, legacy[1]))
+        with open(os.path.join(self.ui, "efficiency", "tests", "Fresh.kt"), "w", encoding="utf-8") as fh:
+            fh.write("class Fresh {\n    @Test\n    fun freshTest() {\n    }\n}\n")
+
+        index = self.index()
+        self.assertEqual(index.refresh(), 2)
+        self.assertIn("lateTest", {r["Method"] for r in index.legacy_tests()})
+        self.assertIn("freshTest", index.efficiency_tests())
+        self.assertMatchesFreshParse(index)
+
+    def test_touched_but_unchanged_file_is_not_reparsed(self):
+        self.index().refresh()
+        _bump_mtime(os.path.join(self.ui, sorted(os.listdir(self.ui))[0]))
+        index = self.index()
+        self.assertEqual(index.refresh(), 0)
+        self.assertMatchesFreshParse(index)
+
+    def test_index_of_another_version_or_not_a_database_is_rebuilt(self):
+        self.index().refresh()
+        with sqlite3.connect(self.db) as db:
+            db.execute("UPDATE meta SET value = 'old' WHERE key = 'version'")
+        self.assertGreater(self.index().refresh(), 40)
+        with open(self.db, "w") as fh:
+            fh.write("not a database")
+        index = self.index()
+        self.assertGreater(index.refresh(), 40)
+        self.assertMatchesFreshParse(index)
+
+
+class ReconcileMain(IndexCase):
+    def run_main(self, *args):
+        argv, out = sys.argv, io.StringIO()
+        sys.argv = ["reconcile_conversion.py", "--ui-dir", self.ui, *args]
+        try:
+            with contextlib.redirect_stdout(out):
+                reconcile_conversion.main()
+        finally:
+            sys.argv = argv
+        return out.getvalue()
+
+    def test_indexed_report_is_the_fresh_report(self):
+        old = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self.root, "xdg")
+        self.addCleanup(lambda: os.environ.pop("XDG_CACHE_HOME") if old is None
+                        else os.environ.__setitem__("XDG_CACHE_HOME", old))
+        outputs = []
+        for n, args in enumerate((["--no-index"], [], [])):
+            csv_path = os.path.join(self.root, f"out{n}.csv")
+            text = self.run_main(*args, "--out-csv", csv_path).replace(csv_path, "CSV")
+            with open(csv_path, encoding="utf-8") as fh:
+                outputs.append((text, fh.read()))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+        self.assertTrue(os.listdir(os.path.join(self.root, "xdg", "eff")))
+
+
+if __name__ == "__main__":
+    unittest.main()
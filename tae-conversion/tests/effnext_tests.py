@@ -19,13 +19,16 @@ import os
 import subprocess
 import sys
 import tempfile
+import time
 import unittest
 
 TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
 TOOLS = os.path.join(os.path.dirname(TESTS_DIR), "tools")
+sys.path.insert(0, TESTS_DIR)
 sys.path.insert(0, TOOLS)
 
 import effnext  # noqa: E402
+from fake_branches import write_branches  # noqa: E402
 
 
 def _git(repo, *args):
@@ -94,6 +97,37 @@ class OtherBranchCheck(unittest.TestCase):
         self.assertIn("__unchecked__", hits)
 
     def test_per_ref_failure_is_surfaced_not_swallowed(self):
+        real = effnext.subprocess.Popen
+
+        def boom(*a, **k):
+            if a and a[0][:3] == ["git", "cat-file", "--batch"]:
+                raise OSError("git cat-file unavailable")
+            return real(*a, **k)
+
+        effnext.subprocess.Popen = boom
+        try:
+            hits = effnext.converted_on_other_branches(self.tmp, {"pendingReviewTest"})
+        finally:
+            effnext.subprocess.Popen = real
+        self.assertEqual(hits["__unchecked__"], ["feature", "main"])
+        self.assertNotIn("pendingReviewTest", hits)
+
+    def test_hung_git_is_killed_and_surfaced(self):
+        scanner = effnext.BranchScanner(self.tmp, timeout=0.2)
+        real = scanner._object
+
+        def slow(sha):
+            real(sha)
+            time.sleep(0.5)              # the watchdog kills git meanwhile; the next read fails
+            return real(sha)
+
+        scanner._object = slow
+        tree = scanner.tree_ids(["feature"])["feature"]
+        with self.assertRaises(RuntimeError):
+            scanner.names(tree)
+        scanner.close()
+
+    def test_per_ref_failure_of_the_grep_reference_is_surfaced(self):
         real = effnext.subprocess.run
 
         def boom(*a, **k):
@@ -103,12 +137,57 @@ class OtherBranchCheck(unittest.TestCase):
 
         effnext.subprocess.run = boom
         try:
-            hits = effnext.converted_on_other_branches(self.tmp, {"pendingReviewTest"})
+            hits = effnext.grep_other_branches(self.tmp, {"pendingReviewTest"})
         finally:
             effnext.subprocess.run = real
         self.assertIn("__unchecked__", hits)
         self.assertNotIn("pendingReviewTest", hits)
 
 
+class BranchScannerMatchesGrep(unittest.TestCase):
+    """The object-store scan must answer exactly what one `git grep` per branch answers."""
+
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effnext-test-")
+        self.addCleanup(td.cleanup)
+        self.repo, self.cache = os.path.join(td.name, "repo"), os.path.join(td.name, "cache")
+        self.methods = write_branches(self.repo, branches=12, files=15)
+
+    def test_every_branch_answers_like_git_grep(self):
+        self.assertEqual(effnext.converted_on_other_branches(self.repo, self.methods, self.cache),
+                         effnext.grep_other_branches(self.repo, self.methods))
+
+    def test_identical_trees_are_read_once_and_a_warm_cache_reads_nothing(self):
+        cold = effnext.BranchScanner(self.repo, self.cache)
+        trees = cold.tree_ids(effnext._local_branches(self.repo))
+        for tree in trees.values():
+            if tree:
+                cold.names(tree)
+        cold.close()
+        cold.save()
+        distinct = {t for t in trees.values() if t}
+        self.assertLess(len(distinct), len(trees))
+        self.assertLess(cold.read, len(trees) * 15)
+
+        warm = effnext.BranchScanner(self.repo, self.cache)
+        self.assertEqual(sorted(warm.names(t) for t in distinct), sorted(cold.names(t) for t in distinct))
+        self.assertEqual(warm.read, 0)
+
+    def test_a_new_branch_reads_only_what_changed(self):
+        effnext.converted_on_other_branches(self.repo, self.methods, self.cache)
+        _git(self.repo, "checkout", "-q", "-b", "late", "main")
+        with open(os.path.join(self.repo, effnext.EFF_TESTS, "Late.kt"), "w") as fh:
+            fh.write("class Late { fun lateTest() {} }\n")
+        _git(self.repo, "add", "-A")
+        _git(self.repo, "commit", "-qm", "late")
+        _git(self.repo, "checkout", "-q", "main")
+        scanner = effnext.BranchScanner(self.repo, self.cache)
+        self.assertIn("lateTest", scanner.names(scanner.tree_ids(["late"])["late"]))
+        self.assertEqual(scanner.read, 2)          # the changed tree and the new blob
+        scanner.close()
+        self.assertEqual(effnext.converted_on_other_branches(self.repo, self.methods | {"lateTest"}, self.cache),
+                         effnext.grep_other_branches(self.repo, self.methods | {"lateTest"}))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -24,6 +24,7 @@ unversioned and unrunnable in CI.
 
 import json
 import os
+import random
 import subprocess
 import sys
 import tempfile
@@ -33,9 +34,11 @@ TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
 TOOL_ROOT = os.path.dirname(TESTS_DIR)
 TOOLS = os.path.join(TOOL_ROOT, "tools")
 CORPUS = os.path.join(TESTS_DIR, "fixtures", "corpus")
+sys.path.insert(0, TESTS_DIR)
 sys.path.insert(0, TOOLS)
 
 import efftriage  # noqa: E402
+from fake_runs import write_runs  # noqa: E402
 
 with open(os.path.join(CORPUS, "labels.json")) as _fh:
     LABELS = json.load(_fh)
@@ -162,6 +165,68 @@ class RuleInventoryTests(unittest.TestCase):
         self.assertEqual(len(ids), len(set(ids)))
 
 
+def reference_windows(attempt):
+    """The plain reading RuleEngine.windows() must reproduce: every rule re-run on every window's text."""
+    return [(lineno, next((r for r in efftriage.RULES if r[4](window)), None))
+            for lineno, window in efftriage.failure_windows(attempt)]
+
+
+class RuleEngineTests(unittest.TestCase):
+    """The compiled engine is an optimisation, so it must be invisible: same windows, same rule for each."""
+
+    # Lines random attempts are made of: the text of every rule's patterns, near misses, and the line
+    # breaks splitlines() honours but `.` would walk across.
+    LINE_KINDS = [
+        "    [ERR] ✖ 'HomePage' not visible yet (12.0 ms)", "        [ERR] ✖ 'X' not found after 5000ms",
+        "[ERR] ✖ Enter text failed for 'Toolbar'", "[ERR] ✖ Click on 'Menu' failed", "[ERR] ✖ Click failed",
+        "    [CMD] ➤ Checking if 'HomePage' is already visible...", "'Page' already loaded",
+        "[OK] ✔ 'Field' found (0.0 ms)", "'Tile' still present after 5000ms", "appeared before 300ms elapsed",
+        "was expected to disappear but is still visible", "Failed to click UiObject",
+        "but found '3' nodes", "expected 1, found 2", "expected 1, found 1",
+        "non-application window(s) present", "type=APPLICATION [active, focused]",
+        "type=APPLICATION [active,", " focused]", "type=SYSTEM [focused]", "Long clicked 'Row'",
+        "Navigation path found from 'BrowserPage' to 'HomePage':", "Step 1: EnterText(url)", "New tab",
+        "No 'Top site' found containing text 'Sponsored'", "No 'x' containing text",
+        "Navigation to 'SettingsPage' failed", "[ERR] ✖ 'Switch' is not checked", "[ERR] ✖ 'Row' is selected",
+        "missing required elements: [anchor]", "Native app verification failed for 'pkg'",
+        "External app assertion failed for 'pkg'", "10-19 12:00:00.000  1234  5678 D chromium: frame",
+        "", "[ERR] a\rNo 'x' b\r containing text", "[ERR] ✖ 'A\x0bB' is not\x0c checked",
+    ]
+
+    def assert_same_windows(self, attempt, name):
+        got = [(n, r and r[0]) for n, r in efftriage.ENGINE.windows(attempt)]
+        want = [(n, r and r[0]) for n, r in reference_windows(attempt)]
+        self.assertEqual(got, want, name)
+
+    def test_matches_reference_on_the_corpus(self):
+        for name in LABELS:
+            with self.subTest(run=name):
+                with open(os.path.join(CORPUS, name, "run-report.txt"), encoding="utf-8") as fh:
+                    for attempt in efftriage.attempts(fh.read()):
+                        self.assert_same_windows(attempt, name)
+
+    def test_matches_reference_on_random_attempts(self):
+        rng = random.Random(0)
+        for n in range(1500):
+            lines = [rng.choice(self.LINE_KINDS) for _ in range(rng.randrange(1, 200))]
+            self.assert_same_windows("\n".join(lines), f"random attempt {n}")
+
+    def test_synthetic_runs_match_golden_triage(self):
+        # fixtures/triage_golden.json was produced by the per-window lambdas before the engine replaced them.
+        with open(os.path.join(TESTS_DIR, "fixtures", "triage_golden.json")) as fh:
+            golden = json.load(fh)
+        got = {}
+        with tempfile.TemporaryDirectory(prefix="efftriage-test-") as d:
+            for seed in range(4):
+                for name, batch in write_runs(os.path.join(d, str(seed)), size=300_000, seed=seed).items():
+                    res = efftriage.triage(batch)
+                    got[f"{name}@{seed}"] = [f"{f['rule']}:{f['line']}" for f in res["findings"]]
+                    if seed == 0:
+                        with open(os.path.join(batch, "run-report.txt"), encoding="utf-8") as fh:
+                            self.assert_same_windows(efftriage.attempts(fh.read())[0], name)
+        self.assertEqual(got, golden)
+
+
 class SyntheticBatch:
     """Builds throwaway batch dirs; shapes the real corpus happens not to contain."""
 
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Tests for the effwatch queue daemon.
+
+No device, no repo, no Bugzilla: each case points a Watcher at a tools dir of
+fake effloop.sh / effgit.py / effbug.py that log when they start and stop and
+what they were given. The done files must carry the fields the shell watcher
+wrote, plus the request-to-start timing; the whitelists must refuse what they
+refused; and the lanes must overlap where they are allowed to (bug requests,
+read-only git) and never where they are not (two device runs, a checkout
+under a build).
+
+    python -m unittest discover -s tae-conversion/tests -p '*tests.py'
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+
+import effwatch  # noqa: E402
+
+FAKE_PY = '''import json, os, sys, time
+log = os.path.join(os.environ["RUNS"], "calls.log")
+req = json.load(open(sys.argv[1]))
+with open(log, "a") as fh: fh.write(json.dumps(["start", "%(kind)s", req["id"], time.time()]) + "\\n")
+time.sleep(float(req.get("sleep", 0)))
+open(sys.argv[2], "w").write("report\\n")
+with open(log, "a") as fh: fh.write(json.dumps(["end", "%(kind)s", req["id"], time.time()]) + "\\n")
+sys.exit(int(req.get("exit", 0)))
+'''
+
+FAKE_EFFLOOP = '''#!/usr/bin/env bash
+log="$RUNS/calls.log"
+printf '["start","device","%s %s %s",%s]\\n' "$1" "$2" "${MACH_ARGS:-}" "$(date +%s.%N)" >> "$log"
+sleep "${FAKE_SLEEP:-0}"
+printf '["end","device","%s %s %s",%s]\\n' "$1" "$2" "${MACH_ARGS:-}" "$(date +%s.%N)" >> "$log"
+exit 3
+'''
+
+
+class WatcherCase(unittest.TestCase):
+    def setUp(self):
+        td = tempfile.TemporaryDirectory(prefix="effwatch-test-")
+        self.addCleanup(td.cleanup)
+        self.tools = os.path.join(td.name, "tools")
+        self.runs = os.path.join(td.name, "conversion-runs")
+        self.queue = os.path.join(self.runs, "_queue")
+        os.makedirs(self.tools)
+        os.makedirs(self.queue)
+        for kind in ("git", "bug"):
+            with open(os.path.join(self.tools, f"eff{kind}.py"), "w") as fh:
+                fh.write(FAKE_PY % {"kind": kind})
+        effloop = os.path.join(self.tools, "effloop.sh")
+        with open(effloop, "w") as fh:
+            fh.write(FAKE_EFFLOOP)
+        os.chmod(effloop, 0o755)
+        self.env = dict(os.environ, FAKE_SLEEP="0")
+
+    def watcher(self, **kw):
+        w = effwatch.Watcher(self.runs, tools=self.tools, env=self.env, log=lambda m: None, **kw)
+        self.addCleanup(w.shutdown)
+        return w
+
+    def request(self, rid, body, age=0.0):
+        path = os.path.join(self.queue, f"{rid}.request.json")
+        with open(path, "w") as fh:
+            fh.write(body if isinstance(body, str) else json.dumps({"id": rid, **body}))
+        if age:
+            t = time.time() - age
+            os.utime(path, (t, t))
+        return path
+
+    def drain(self, **kw):
+        effwatch.watch(self.watcher(**kw), poll=0.05, kind="poll", once=True)
+
+    def done(self, rid):
+        with open(os.path.join(self.queue, f"{rid}.done.json")) as fh:
+            return json.load(fh)
+
+    def calls(self):
+        """{(kind, what): (start, end)} from the fake tools' log."""
+        spans = {}
+        with open(os.path.join(self.runs, "calls.log")) as fh:
+            for event, kind, what, t in (json.loads(line) for line in fh):
+                spans.setdefault((kind, what), [None, None])[event == "end"] = t
+        return spans
+
+
+class ProtocolTests(WatcherCase):
+    def test_test_run_done_file_keeps_the_shell_fields_and_adds_timing(self):
+        self.request("r1", {"test_class": "org.mozilla.fenix.ui.efficiency.tests.HomeTest#x", "batch": "b-1"})
+        self.drain()
+        done = self.done("r1")
+        self.assertEqual({k: done[k] for k in ("id", "test", "batch", "effloop_exit", "reports")},
+                         {"id": "r1", "test": "org.mozilla.fenix.ui.efficiency.tests.HomeTest#x",
+                          "batch": "b-1", "effloop_exit": 3, "reports": "conversion-runs/b-1"})
+        self.assertGreaterEqual(done["latency_s"], 0)
+        self.assertLessEqual(done["queued"], done["started"])
+        self.assertIn("ts", done)
+        self.assertEqual(sorted(os.listdir(self.queue)), ["r1.done.json"])
+
+    def test_git_and_bug_done_files(self):
+        self.request("g", {"git": "status", "exit": 1})
+        self.request("b", {"bug": "read"})
+        self.drain()
+        g, b = self.done("g"), self.done("b")
+        self.assertEqual((g["kind"], g["action"], g["exit"], g["report"]),
+                         ("git", "status", 1, "conversion-runs/_git/g.git-report.txt"))
+        self.assertEqual((b["kind"], b["action"], b["exit"], b["result"]),
+                         ("bug", "read", 0, "conversion-runs/_bug/b.bug-result.json"))
+        self.assertTrue(os.path.isfile(os.path.join(self.runs, "_git", "g.git-report.txt")))
+
+    def test_whitelists(self):
+        self.request("cls", {"test_class": "Home; rm -rf /"})
+        self.request("args", {"test_class": "HomeTest", "mach_args": "--x $(id)"})
+        self.request("batch", {"test_class": "HomeTest", "batch": "../up", "mach_args": "--flag=a/b"})
+        self.drain()
+        self.assertEqual(self.done("cls")["error"], "invalid test_class")
+        self.assertEqual(self.done("args")["error"], "invalid mach_args")
+        self.assertEqual(self.done("batch")["batch"], "adhoc")
+        self.assertEqual(list(self.calls()), [("device", "HomeTest adhoc --flag=a/b")])
+
+    def test_unparsable_request_waits_while_fresh_then_is_answered(self):
+        self.request("half", '{"test_class": "Hom')
+        w = self.watcher(settle=30)
+        self.assertEqual(w.scan(), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.queue, "half.request.json")))
+        self.request("half", '{"test_class": "Hom', age=60)
+        self.drain(settle=30)
+        self.assertIn("invalid request json", self.done("half")["error"])
+
+    def test_shutdown_puts_unstarted_requests_back(self):
+        self.env["FAKE_SLEEP"] = "0.5"
+        for rid in ("first", "second"):
+            self.request(rid, {"test_class": "HomeTest", "batch": rid})
+        w = self.watcher()
+        w.scan()
+        time.sleep(0.1)
+        w.shutdown()
+        self.assertTrue(os.path.exists(os.path.join(self.queue, "first.done.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.queue, "second.request.json")))
+        self.assertFalse([f for f in os.listdir(self.queue) if f.endswith(".claimed")])
+
+
+class LaneTests(WatcherCase):
+    def overlap(self, a, b):
+        return a[0] < b[1] and b[0] < a[1]
+
+    def test_device_runs_are_serialised_and_bug_requests_overlap(self):
+        self.env["FAKE_SLEEP"] = "0.3"
+        for rid in ("d1", "d2"):
+            self.request(rid, {"test_class": "HomeTest", "batch": rid})
+        for rid in ("b1", "b2", "b3"):
+            self.request(rid, {"bug": "read", "sleep": 0.3})
+        self.drain()
+        spans = self.calls()
+        self.assertFalse(self.overlap(spans["device", "HomeTest d1 "], spans["device", "HomeTest d2 "]))
+        self.assertTrue(self.overlap(spans["bug", "b1"], spans["bug", "b3"]))
+        self.assertTrue(self.overlap(spans["bug", "b1"], spans["device", "HomeTest d1 "]))
+
+    def test_read_only_git_runs_beside_a_build_and_a_checkout_waits_for_it(self):
+        self.env["FAKE_SLEEP"] = "0.4"
+        self.request("d", {"test_class": "HomeTest", "batch": "d"}, age=2)
+        self.request("s", {"git": "status", "sleep": 0.05}, age=1)
+        self.request("n", {"git": "new-branch", "name": "x"})
+        self.drain()
+        spans = self.calls()
+        device = spans["device", "HomeTest d "]
+        self.assertTrue(self.overlap(spans["git", "s"], device))
+        self.assertGreaterEqual(spans["git", "n"][0], device[1])
+
+
+class EventTests(WatcherCase):
+    def test_inotify_wakes_on_a_new_request_long_before_the_timeout(self):
+        try:
+            w = effwatch.InotifyWait(self.queue)
+        except (OSError, AttributeError):
+            self.skipTest("no inotify here")
+        self.addCleanup(w.close)
+        threading.Timer(0.1, self.request, ("r", {"test_class": "HomeTest"})).start()
+        started = time.monotonic()
+        w.wait(10)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_auto_falls_back_to_something_that_waits(self):
+        w = effwatch.waiter(self.queue)
+        self.addCleanup(w.close)
+        self.assertIn(w.kind, ("inotify", "kqueue", "poll"))
+        self.assertEqual(effwatch.waiter(self.queue, "poll").kind, "poll")
+
+
+if __name__ == "__main__":
+    unittest.main()
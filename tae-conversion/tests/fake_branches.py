@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""A synthetic git repo with many local branches over the efficiency tests
+package, for equivalence tests and benchmarks of effnext's other-branch check.
+Seeded, so a repo is reproducible.
+
+main carries *files* converted test files, some in a subdirectory, plus the
+shapes a grep and an object reader could disagree on: a binary file that
+contains `fun`, a non-Kotlin file, a signature split over two lines. Each
+branch then does what real branches do to that directory: nothing (a fix
+elsewhere in the tree), add a conversion, edit one, or delete the directory.
+Half of them share their tree with another branch. A backup/* branch carries
+a conversion that must never be reported.
+
+    methods = write_branches(root, branches=40, files=300)   # names worth asking about
+"""
+
+import os
+import random
+import subprocess
+
+EFF_TESTS = "mobile/android/fenix/app/src/androidTest/java/org/mozilla/fenix/ui/efficiency/tests"
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data if isinstance(data, bytes) else data.encode())
+
+
+def _test_file(rng, cls, methods):
+    body = [f"class {cls} : BaseTest() {{"]
+    for m in methods:
+        body += ["    @Test", f"    fun {m}() {{", f"        on.{rng.choice(('home', 'settings', 'tabs'))}"
+                 ".navigateToPage()", "    }", ""]
+    return "\n".join(body) + "}\n"
+
+
+def write_branches(root, branches=40, files=60, seed=0):
+    rng = random.Random(seed)
+    tests = os.path.join(root, EFF_TESTS)
+    os.makedirs(tests)
+    _git(root, "init", "-q", "-b", "main")
+    _git(root, "config", "user.email", "t@example.com")
+    _git(root, "config", "user.name", "t")
+    methods = set()
+    for n in range(files):
+        names = [f"case{n}_{k}Test" for k in range(rng.randrange(1, 6))]
+        methods.update(names)
+        sub = "compose" if n % 7 == 0 else ""
+        _write(os.path.join(tests, sub, f"Case{n}Test.kt"), _test_file(rng, f"Case{n}Test", names))
+    _write(os.path.join(tests, "golden.bin"), b"\x00\x01fun binaryOnlyTest() {}\n")
+    _write(os.path.join(tests, "NOTES.md"), "fun notesOnlyTest( is mentioned here\n")
+    _write(os.path.join(tests, "Split.kt"), "fun\nsplitSignatureTest() {}\nfun   spacedTest  () {}\n")
+    _write(os.path.join(root, "README"), "fenix\n")
+    methods.update({"binaryOnlyTest", "notesOnlyTest", "splitSignatureTest", "spacedTest", "neverWrittenTest"})
+    _git(root, "add", "-A")
+    _git(root, "commit", "-qm", "base")
+
+    for b in range(branches):
+        _git(root, "checkout", "-q", "-b", f"branch{b}", f"branch{b - 1}" if b and b % 2 == 0 else "main")
+        kind = rng.choice(("elsewhere", "elsewhere", "add", "edit", "delete") if b > 2 else ("elsewhere",))
+        if kind == "elsewhere":
+            _write(os.path.join(root, "README"), f"fenix {b}\n")
+        elif kind == "add":
+            name = f"branch{b}OnlyTest"
+            methods.add(name)
+            _write(os.path.join(tests, f"Branch{b}Test.kt"), _test_file(rng, f"Branch{b}Test", [name]))
+        elif kind == "edit":
+            n = rng.randrange(files)
+            name = f"edited{b}Test"
+            methods.add(name)
+            path = os.path.join(tests, "compose" if n % 7 == 0 else "", f"Case{n}Test.kt")
+            _write(path, _test_file(rng, f"Case{n}Test", [name]))
+        else:
+            subprocess.run(["git", "rm", "-rqf", "--ignore-unmatch", EFF_TESTS], cwd=root, check=True, capture_output=True)
+        _git(root, "add", "-A")
+        _git(root, "commit", "-qm", f"{kind} {b}", "--allow-empty")
+
+    _git(root, "checkout", "-q", "-b", "backup/rejected", "main")
+    _write(os.path.join(tests, "Rejected.kt"), _test_file(rng, "Rejected", ["rejectedFakerTest"]))
+    methods.add("rejectedFakerTest")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-qm", "rejected")
+    _git(root, "checkout", "-q", "main")
+    return methods
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""A synthetic Fenix app/src/main and ui/efficiency tree, for offline tests and
+benchmarks of effcheck. Seeded, so a run is reproducible.
+
+    write_app(root, 5000)              # <root>/app/src/main: .kt sources + res/values
+    write_efficiency(root, app, 20)    # <root>/ui/efficiency: BasePage + converted tests
+    write_ui(root, 120)                # <root>/ui: legacy test classes + ui/efficiency/tests
+"""
+
+import os
+import random
+
+VERBS = ("mozClick", "mozVerifyElementsByGroup", "mozEnterText", "mozWaitForElement")
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def write_app(root, count, seed=0):
+    """*count* Kotlin sources under <root>/app/src/main, each with a few R.id
+    references, testTag literals and string resources. Returns (app_root, ids,
+    tags): the R.id names and testTag literals that exist, for tests to refer to."""
+    rng = random.Random(seed)
+    app = os.path.join(root, "app", "src", "main")
+    ids, tags, strings = [], [], []
+    for n in range(count):
+        pkg = ("browser", "settings", "home", "tabstray", "library")[n % 5]
+        body = []
+        for k in range(rng.randrange(2, 8)):
+            name = f"{pkg}_view_{n}_{k}"
+            ids.append(name)
+            body.append(f"        val v{k} = view.findViewById<View>(R.id.{name})")
+        for k in range(rng.randrange(1, 4)):
+            tag = f"{pkg}.item.{n}.{k}"
+            tags.append(tag)
+            body.append(f'        Modifier.testTag("{tag}").semantics {{ testTagsAsResourceId = true }}')
+        for k in range(rng.randrange(0, 3)):
+            strings.append(f"{pkg}_label_{n}_{k}")
+            body.append(f"        text = stringResource(R.string.{strings[-1]})")
+        body += [f'        Log.d("Feature{n}", "bound " + count + " rows")'] * rng.randrange(0, 4)
+        body += ["        // filler: layout and state plumbing"] * rng.randrange(20, 120)
+        _write(os.path.join(app, "java", "org", "mozilla", "fenix", pkg, f"Feature{n}Fragment.kt"),
+               f"package org.mozilla.fenix.{pkg}\n\nclass Feature{n}Fragment : Fragment() {{\n"
+               "    override fun onViewCreated(view: View) {\n" + "\n".join(body) + "\n    }\n}\n")
+    for i in range(0, len(strings), 400):
+        _write(os.path.join(app, "res", "values", f"strings_{i // 400}.xml"),
+               "<resources>\n" + "".join(f'    <string name="{s}">{s}</string>\n' for s in strings[i:i + 400])
+               + "</resources>\n")
+    return app, ids, tags
+
+
+def write_efficiency(root, app_ids, app_tags, count, seed=0):
+    """*count* converted tests (and their page objects) under <root>/ui/efficiency,
+    each referring to a dozen real ids/tags and a few that do not exist. Returns
+    (eff_root, paths)."""
+    rng = random.Random(seed)
+    eff = os.path.join(root, "ui", "efficiency")
+    _write(os.path.join(eff, "helpers", "BasePage.kt"),
+           "abstract class BasePage {\n" + "".join(f"    fun {v}() {{}}\n" for v in VERBS) + "}\n")
+    paths = []
+    for n in range(count):
+        selectors = []
+        for k in range(12):
+            if rng.random() < 0.5:
+                value = rng.choice(app_ids) if rng.random() < 0.85 else f"missing_view_{n}_{k}"
+                strategy = "ESPRESSO_BY_ID"
+            else:
+                value = rng.choice(app_tags) if rng.random() < 0.85 else f"missing.tag.{n}.{k}"
+                strategy = "COMPOSE_BY_TAG"
+            selectors.append(f'        Selector(strategy = SelectorStrategy.{strategy}, value = "{value}"),')
+        path = os.path.join(eff, "tests", f"Converted{n}Test.kt")
+        _write(path, f"class Converted{n}Test : BaseTest() {{\n    val selectors = listOf(\n"
+               + "\n".join(selectors) + "\n    )\n\n    @Test\n    fun converted{n}() {{\n"
+               f"        on.home.{VERBS[n % len(VERBS)]}()\n    }}\n}}\n")
+        paths.append(path)
+    return eff, paths
+
+
+LEGACY_SHAPES = (
+    "    @Test\n    fun {m}() {{\n{body}    }}\n",
+    "    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/{tr}\n    @SmokeTest\n"
+    "    @Test\n    fun {m}() {{\n{body}    }}\n",
+    "    @Ignore(\"Disabled: https://bugzilla.mozilla.org/show_bug.cgi?id={tr}\")\n    @Test\n"
+    "    fun {m}() {{\n{body}    }}\n",
+    "    @Test\n    @TestMeta(\n        replacedBy = [\n"
+    "            \"org.mozilla.fenix.ui.efficiency.tests.{cls}Converted#{m}\",\n        ],\n    )\n"
+    "    fun {m}() {{\n{body}    }}\n",
+    "    /**\n     * Not a test: a helper.\n     */\n    fun {m}() {{\n    }}\n",
+    "    @Test\n    fun `{m} with spaces`() {{\n{body}    }}\n",
+)
+ROBOT_LINES = (
+    "        homeScreen {\n            verifyHomeScreen()\n        }.openThreeDotMenu {\n",
+    "            verifySettingsButton()\n",
+    "        }.openSettings {\n            verifySettingsToolbar()\n        }\n",
+    "        navigationToolbar {\n        }.enterURLAndEnterToBrowser(defaultWebPage.url) {\n",
+    "            verifyPageContent(defaultWebPage.content)\n        }\n",
+    "        mDevice.waitForIdle()\n",
+)
+
+
+def write_ui(root, count, seed=0):
+    """*count* legacy test classes under <root>/ui (every annotation shape reconcile_conversion reads:
+    @SmokeTest, @Ignore, multi-line replacedBy, TestRail links, backticked names, helpers that are not
+    tests), and efficiency tests under <root>/ui/efficiency/tests converting about a third of them by name.
+    Returns ui_dir."""
+    rng = random.Random(seed)
+    ui = os.path.join(root, "ui")
+    for n in range(count):
+        cls = f"Legacy{n}Test"
+        body, converted = [], []
+        for k in range(rng.randrange(3, 12)):
+            m = f"legacy{n}_{k}Test"
+            lines = "".join(rng.choice(ROBOT_LINES) for _ in range(rng.randrange(4, 16)))
+            body.append(rng.choice(LEGACY_SHAPES).format(m=m, cls=cls, tr=1000 + n * 20 + k, body=lines))
+            if rng.random() < 0.3:
+                converted.append(m)
+        text = f"package org.mozilla.fenix.ui\n\nclass {cls} : TestSetup() {{\n" + "\n".join(body) + "}\n"
+        _write(os.path.join(ui, f"{cls}.kt"), text.replace("\n", "\r\n") if n % 17 == 0 else text)
+        if converted:
+            _write(os.path.join(ui, "efficiency", "tests", f"{cls}Converted.kt"),
+                   f"class {cls}Converted : BaseTest() {{\n"
+                   + "".join(f"    @Test\n    fun {m}() {{\n    }}\n\n    private fun helper{m}() {{}}\n"
+                             for m in converted) + "}\n")
+    _write(os.path.join(ui, "NoClassHere.kt"), "@Test\nfun topLevelTest() {\n}\n")
+    return ui
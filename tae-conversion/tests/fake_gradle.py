@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Synthetic `gradlew --info` logs, for equivalence tests and benchmarks of
+effbuild. Seeded, so a log is reproducible.
+
+A log is --info noise (task headers, up-to-date checks, class-path lines,
+"Skipping" lines, blank lines) with Kotlin diagnostics of both formats mixed
+in, in and out of ui/efficiency, plus the lines a reader could trip on: "e:"
+and "w:" lines that are not diagnostics, "FAILED" inside a non-task line, a
+failed task, an "* What went wrong:" block, and the BUILD verdict. As kotlinc
+does, diagnostics come in *bursts* (one per compile task); bursts=0 spreads
+them over the whole log instead.
+
+    for chunk in gradle_log(size=500 << 20, errors=30, warnings=5000):
+        sink.write(chunk)              # bytes, about 1 MB each
+"""
+
+import random
+
+ROOT = "/home/u/firefox/mobile/android/fenix/app/src"
+NOISE = (
+    "> Task :app:{mod}{n} UP-TO-DATE",
+    "Skipping task ':app:{mod}{n}' as it is up-to-date.",
+    "Caching disabled for task ':app:{mod}{n}' because: Build cache is disabled",
+    "Resolve mutations for :app:{mod}{n} (Thread[Execution worker Thread {n},5,main]) started.",
+    "file or directory '{root}/main/java/org/mozilla/fenix/{mod}{n}', not found",
+    "Custom actions are attached to task ':app:{mod}{n}'.",
+    "    classpath: {root}/../build/intermediates/{mod}/{n}/classes.jar",
+    "",
+)
+TRAPS = (
+    "Tests FAILED to be skipped here are not a task line ({n})",
+    "e: this line only looks like a diagnostic ({n})",
+    "w: neither does this one ({n})",
+    "> Task :app:{mod}{n} FAILED",
+)
+MODS = ("compileDebugKotlin", "mergeDebugResources", "processDebugManifest", "kaptDebugKotlin", "dexBuilderDebug")
+
+
+def diagnostic(rng, level):
+    where = rng.choice(("androidTest/java/org/mozilla/fenix/ui/efficiency/tests",
+                        "androidTest/java/org/mozilla/fenix/ui", "main/java/org/mozilla/fenix/home"))
+    path, line, col = f"{ROOT}/{where}/Case{rng.randrange(300)}Test.kt", rng.randrange(1, 900), rng.randrange(1, 80)
+    msg = rng.choice(("Unresolved reference: navigateToPage", "Type mismatch: inferred type is Int? but Int was expected",
+                      "Parameter 'x' is never used", "'getter for tabs: Tabs' is deprecated."))
+    if rng.random() < 0.5:
+        return f"{level}: file://{path}:{line}:{col} {msg}"
+    return f"{level}: {path}: ({line}, {col}): {msg}"
+
+
+def gradle_log(size=4 << 20, errors=12, warnings=200, bursts=6, traps=40, failed=True, crlf=False, seed=0,
+               chunk=1 << 20):
+    """Yield about *size* bytes of log in *chunk*-sized pieces, ending with the verdict."""
+    rng = random.Random(seed)
+    nl = "\r\n" if crlf else "\n"
+    lines = max(size // 110, 1)
+    levels = ["e"] * errors + ["w"] * warnings
+    rng.shuffle(levels)
+    if bursts:
+        starts = sorted(rng.randrange(lines) for _ in range(bursts))
+        at = [starts[i * bursts // len(levels)] + i for i in range(len(levels))]
+    else:
+        at = rng.sample(range(lines), len(levels))
+    events = dict(zip(at, levels))
+    events.update({rng.randrange(lines): "trap" for _ in range(traps)})
+    buf, pending, held, n = [], 0, 0, 0
+    while held + pending < size:
+        if events.get(n) == "trap":
+            del events[n]
+            line = rng.choice(TRAPS).format(mod=rng.choice(MODS), n=n)
+        elif n in events:
+            line = diagnostic(rng, events.pop(n))
+        else:
+            line = rng.choice(NOISE).format(mod=rng.choice(MODS), n=n, root=ROOT)
+        buf.append(line + nl)
+        pending += len(line) + len(nl)
+        n += 1
+        if pending >= chunk:
+            yield "".join(buf).encode()
+            held, buf, pending = held + pending, [], 0
+    buf += [diagnostic(rng, level) + nl for level in sorted(events.values()) if level != "trap"]
+    if failed:
+        buf += [f"> Task :app:compileDebugAndroidTestKotlin FAILED{nl}", nl, f"FAILURE: Build failed with an exception.{nl}",
+                nl, f"* What went wrong:{nl}", f"Execution failed for task ':app:compileDebugAndroidTestKotlin'.{nl}",
+                f"> A failure occurred while executing KotlinCompileDaemon{nl}", nl, f"* Try:{nl}", nl,
+                f"BUILD FAILED in 4m 12s{nl}"]
+    else:
+        buf.append(f"BUILD SUCCESSFUL in 3m 2s{nl}")
+    yield "".join(buf).encode()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Synthetic, logcat-sized run batches built from the labelled corpus, for
+equivalence tests and benchmarks of efftriage. Seeded, so a run is reproducible
+and its triage can be pinned in a golden file.
+
+Each synthetic run is a real corpus run with logcat noise spliced between its
+lines until it reaches the requested size, and with harness lines lifted from
+the other corpus runs (their [ERR], nav-polling, "already visible" and
+exception lines) mixed into the noise, including the long bursts of "not
+visible yet" / "not found" polling a stuck navigation produces. Failure
+windows therefore overlap heavily and several rules compete for each one. The
+status.json is the source run's.
+
+    write_runs(dest, size=3_000_000)   # {name: batch dir}, one per failing corpus run
+"""
+
+import json
+import os
+import random
+import shutil
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "corpus")
+
+TAGS = ("ActivityManager", "chromium", "GeckoSession", "WindowManager", "InputMethodManager",
+        "OpenGLRenderer", "TestRunner", "Gecko", "ViewRootImpl", "SurfaceFlinger")
+
+
+def _read(path):
+    with open(path, encoding="utf-8", errors="ignore") as fh:
+        return fh.read()
+
+
+def source_runs():
+    """Corpus runs that reach the window rules: failed, with a trace."""
+    with open(os.path.join(CORPUS, "labels.json")) as fh:
+        labels = json.load(fh)
+    return sorted(name for name, label in labels.items()
+                  if label["outcome"] != "pass" and _read(os.path.join(CORPUS, name, "run-report.txt")).count("\n") > 20)
+
+
+def harness_lines():
+    """Trace lines of every corpus run that rules key on, minus attempt and crash markers."""
+    pool = set()
+    for name in source_runs():
+        for line in _read(os.path.join(CORPUS, name, "run-report.txt")).splitlines():
+            if "[" in line and "Started try #" not in line and not line.startswith("CRASH:"):
+                pool.add(line)
+    return sorted(pool)
+
+
+def noise_line(rng, n):
+    return (f"10-19 12:{n // 6000 % 60:02d}:{n // 100 % 60:02d}.{n % 1000:03d}  {rng.randrange(1000, 32000):5d} "
+            f"{rng.randrange(1000, 32000):5d} {rng.choice('VDIWE')} {rng.choice(TAGS)}: "
+            + " ".join(rng.choice(("frame", "bound", "layout", "tick", "dispatch", "surface", "focus", "drawn",
+                                   "skipped", "view", "input", "0x7f0a", "ms", "done"))
+                       for _ in range(rng.randrange(4, 18))))
+
+
+def synthetic_report(name, size, seed=0, harness_rate=0.02, burst_rate=0.002):
+    rng = random.Random(f"{name}:{seed}")
+    pool = harness_lines()
+    errs = [line for line in pool if "[ERR]" in line]
+    source = _read(os.path.join(CORPUS, name, "run-report.txt")).splitlines()
+    per_line = max(0, size // max(1, len(source)) // 110)
+    out, n, total = [], 0, 0
+    for line in source:
+        out.append(line)
+        total += len(line) + 1
+        for _ in range(rng.randrange(0, 2 * per_line + 1) if total < size else 0):
+            if rng.random() < burst_rate:
+                polled = rng.choice(errs)
+                burst = [polled if k % 2 else noise_line(rng, n + k) for k in range(rng.randrange(20, 200))]
+            else:
+                burst = [rng.choice(pool) if rng.random() < harness_rate else noise_line(rng, n)]
+            n += len(burst)
+            out += burst
+            total += sum(len(extra) + 1 for extra in burst)
+    return "\n".join(out) + "\n"
+
+
+def write_runs(dest, size=3_000_000, seed=0):
+    """One synthetic batch dir under *dest* per source run; {name: batch dir}."""
+    runs = {}
+    for name in source_runs():
+        batch = os.path.join(dest, name)
+        os.makedirs(batch, exist_ok=True)
+        with open(os.path.join(batch, "run-report.txt"), "w", encoding="utf-8") as fh:
+            fh.write(synthetic_report(name, size, seed))
+        shutil.copy(os.path.join(CORPUS, name, "status.json"), os.path.join(batch, "status.json"))
+        runs[name] = batch
+    return runs
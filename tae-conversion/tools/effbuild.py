@@ -10,7 +10,12 @@ Usage:
   ./gradlew :app:assembleFenixDebugAndroidTest 2>&1 | python3 effbuild.py
   python3 effbuild.py build.log --out build-report.txt --scope efficiency
 Exit code: 0 = build succeeded (no errors), 1 = errors / build failed.
-Options: --scope efficiency (only errors under ui/efficiency), --warnings (include w:), --max N.
+Options: --scope efficiency (only errors under ui/efficiency), --warnings (include w:), --max N,
+         --stream (also print each diagnostic to stderr the moment it is read, while the build runs).
+
+The log is read incrementally (BuildLog), so a --info log of hundreds of MB — or a pipe from a build that is
+still running — is never held in memory: only the errors, the first --max warnings and the first lines of
+the Gradle failure are kept. Stretches with nothing of interest are skipped without being split into lines.
 """
 import os
 import sys, re, argparse, json
@@ -20,6 +25,8 @@ E1 = re.compile(r'^(e|w):\s+(?:file://)?(/[^:]+\.kts?):(\d+):(\d+):?\s*(.*)$')
 E2 = re.compile(r'^(e|w):\s+(?:file://)?(/[^:]+\.kts?):\s*\((\d+),\s*(\d+)\):\s*(.*)$')
 
 def parse(lines):
+    """The whole log at once: (diagnostics, Gradle failure lines, verdict). BuildLog is the streaming reading
+    main() uses; this stays as its reference."""
     diags = []            # (level, path, line, col, msg)
     gradle_fail = []      # "What went wrong" block
     verdict = None        # "SUCCESSFUL" | "FAILED"
@@ -42,6 +49,114 @@ def parse(lines):
             gradle_fail.append(s)
     return diags, gradle_fail, verdict
 
+TASK_FAILED = re.compile(r"> Task .*(FAILED)$")
+# Where the lines line() can act on start, or end ("FAILED\n"): everything else is --info noise.
+STARTS = re.compile(r"\n(?:[ew]:|BUILD |\* What went wrong:)")
+KEEP_GRADLE_FAIL = 20
+
+
+class BuildLog:
+    """parse(), incrementally and in bounded memory: feed() it bytes as they arrive, then close().
+
+    Keeps every error (they are the report), the first *keep* warnings overall and under ui/efficiency
+    with both counts, the first KEEP_GRADLE_FAIL "What went wrong"/failed-task lines, and the failed task
+    names. *on_diag(diag)* is called for each diagnostic as it is read.
+    """
+
+    def __init__(self, keep=40, on_diag=None):
+        self.keep, self.on_diag = keep, on_diag
+        self.errors, self.warnings, self.scoped_warnings = [], [], []
+        self.warning_count = self.scoped_warning_count = 0
+        self.gradle_fail, self.failing = [], []
+        self.verdict, self.grabbing, self.tail = None, False, b""
+
+    def feed(self, data):
+        data = self.tail + data
+        # A trailing "\r" may be half of a "\r\n", so it waits for the next chunk.
+        cut = max(data.rfind(b"\n"), data.rfind(b"\r", 0, len(data) - 1))
+        if cut < 0:
+            self.tail = data
+            return
+        block, self.tail = data[:cut + 1], data[cut + 1:]
+        self._lines(block)
+
+    def close(self):
+        if self.tail:
+            self._lines(self.tail + b"\n")
+            self.tail = b""
+        return self
+
+    def _lines(self, block):
+        # Universal newlines, as a text-mode open() reads the log.
+        text = "\n" + block.decode("utf-8", errors="ignore")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        # Find the candidate lines in one pass rather than splitting and testing every line.
+        starts = {m.start() + 1 for m in STARTS.finditer(text)}
+        i = text.find("FAILED\n")
+        while i >= 0:
+            starts.add(text.rfind("\n", 0, i) + 1)
+            i = text.find("FAILED\n", i + 1)
+        if self.grabbing:                            # a "What went wrong" block goes on from the last block
+            starts.add(1)
+        pos = 1
+        for start in sorted(starts):
+            if start < pos:
+                continue
+            pos = start
+            while pos < len(text):
+                nl = text.index("\n", pos)
+                self.line(text[pos:nl])
+                pos = nl + 1
+                if not self.grabbing:
+                    break
+
+    def line(self, s):
+        """One line, without its newline. The same reading as parse()."""
+        if s[:2] in ("e:", "w:"):
+            m = E1.match(s) or E2.match(s)
+            if m:
+                d = (m.group(1), m.group(2), int(m.group(3)), int(m.group(4)), m.group(5).strip())
+                if d[0] == "e":
+                    self.errors.append(d)
+                else:
+                    self.warning_count += 1
+                    if len(self.warnings) < self.keep:
+                        self.warnings.append(d)
+                    if "ui/efficiency/" in d[1]:
+                        self.scoped_warning_count += 1
+                        if len(self.scoped_warnings) < self.keep:
+                            self.scoped_warnings.append(d)
+                if self.on_diag:
+                    self.on_diag(d)
+                return
+        if s.startswith("BUILD SUCCESSFUL"): self.verdict = "SUCCESSFUL"
+        elif s.startswith("BUILD FAILED"): self.verdict = "FAILED"
+        if s.startswith("* What went wrong:"): self.grabbing = True; self._fail(s); return
+        if self.grabbing:
+            if s.startswith("* Try:") or s.startswith("BUILD ") or s.strip() == "":
+                self.grabbing = False
+            else:
+                self._fail(s)
+        if s.endswith("FAILED") and TASK_FAILED.search(s):
+            self._fail(s)
+
+    def _fail(self, s):
+        self.failing += re.findall(r"Task (:\S+)\s+FAILED", s)
+        if len(self.gradle_fail) < KEEP_GRADLE_FAIL:
+            self.gradle_fail.append(s)
+
+
+def read_log(f, log, chunk=1 << 20):
+    """Feed binary file/pipe *f* to *log* as data arrives (read1: a pipe is not waited on to fill a chunk)."""
+    read = getattr(f, "read1", f.read)
+    while True:
+        data = read(chunk)
+        if not data:
+            return log.close()
+        log.feed(data)
+
+
 def short(path, scope):
     i = path.find("ui/efficiency/")
     return path[i:] if i >= 0 else path
@@ -69,18 +184,30 @@ def main():
     ap.add_argument("--out"); ap.add_argument("--scope", choices=["all", "efficiency"], default="all")
     ap.add_argument("--warnings", action="store_true"); ap.add_argument("--max", type=int, default=40)
     ap.add_argument("--json", action="store_true", help="emit a structured JSON verdict on stdout")
+    ap.add_argument("--stream", action="store_true",
+                    help="print each diagnostic to stderr as soon as it is read (the report is unchanged)")
     a = ap.parse_args()
-    lines = open(a.logfile, errors="ignore") if a.logfile else sys.stdin
-    diags, gradle_fail, verdict = parse(list(lines))
 
-    errs = [d for d in diags if d[0] == "e"]
-    warns = [d for d in diags if d[0] == "w"]
+    def stream(d):
+        if d[0] == "e" or (a.warnings and (a.scope == "all" or "ui/efficiency/" in d[1])):
+            sys.stderr.write(f"{d[0]}: {short(d[1], a.scope)}:{d[2]}:{d[3]}  {d[4]}\n")
+            sys.stderr.flush()
+
+    log = BuildLog(a.max, stream if a.stream else None)
+    if a.logfile:
+        with open(a.logfile, "rb") as f:
+            read_log(f, log)
+    else:
+        read_log(sys.stdin.buffer, log)
+    gradle_fail, verdict, failing = log.gradle_fail, log.verdict, log.failing
+
+    errs = log.errors
+    warns, warn_count = log.warnings, log.warning_count
     if a.scope == "efficiency":
         errs = [d for d in errs if "ui/efficiency/" in d[1]] or errs  # keep all if none in-scope (a dep broke)
-        warns = [d for d in warns if "ui/efficiency/" in d[1]]
+        warns, warn_count = log.scoped_warnings, log.scoped_warning_count
 
     # Classify honestly: compile error vs test-task failure vs build-infra failure vs inconclusive.
-    failing = re.findall(r"Task (:\S+)\s+FAILED", "\n".join(gradle_fail))
     is_test = any(re.search(r"connected|androidtest|test$", t, re.I) for t in failing)
     if errs:
         head = f"❌ COMPILE FAILED — {len(errs)} Kotlin error(s)"; compiled = False
@@ -94,7 +221,7 @@ def main():
     else:
         head = "⚠ INCONCLUSIVE — no 'BUILD SUCCESSFUL' seen (toolchain/config? check raw-run.log)"; compiled = False
     if a.warnings and warns:
-        head += f"  [{len(warns)} warning(s)]"
+        head += f"  [{warn_count} warning(s)]"
     out = [head]
     if errs:
         out.append("")
@@ -119,7 +246,7 @@ def main():
             "tool": "effbuild", "ok": compiled, "verdict": head,
             "errors": [{"path": short(p, a.scope), "line": l, "col": c, "msg": msg}
                        for (_lvl, p, l, c, msg) in errs],
-            "error_count": len(errs), "warning_count": len(warns),
+            "error_count": len(errs), "warning_count": warn_count,
             "failing_tasks": failing,
             "gradle_failure": [g.strip() for g in gradle_fail[:20]] if (not errs and gradle_fail) else [],
         }))
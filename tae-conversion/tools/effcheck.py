@@ -17,26 +17,195 @@ Checks:
 
 Usage:
   effcheck.py --app-root <fenix>/app/src/main --eff-root <...>/ui/efficiency FILE.kt [FILE.kt ...]
+  effcheck.py ... --jsonl DIR [--changed | --changed-since REV]   # a sweep: every .kt under DIR / changed
+  effcheck.py ... --stdin                          # stay up; one request (files/dirs) per stdin line
 Exit code is non-zero if any FAIL. WARN never fails the run.
+
+The app sources are indexed once per run (quoted literals, R.id names, string resources) instead of re-read
+per ID/TAG lookup. The index is kept in --cache-dir (default $XDG_CACHE_HOME/eff, i.e. ~/.cache/eff) and
+re-parsed only for files whose mtime or size changed; --no-cache builds it in memory. Many files are checked
+in one process, --jobs at a time, against that one index: a 50-class sweep is one warm scan, not 50 cold
+starts. --jsonl streams one verdict per file (then a `"done": true` summary line), which is also what --stdin
+answers with per request.
 """
-import os, re, sys, glob, argparse, json
+import os, re, sys, glob, argparse, json, bisect, hashlib, subprocess, concurrent.futures
+
+
+STRINGS_GLOBS = (("res", "**", "strings*.xml"), ("res", "values*", "*.xml"))
+INDEX_VERSION = 1
+
+
+def _cache_dir():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "eff")
+
+
+def _string_files(app_root):
+    return sorted(set(f for g in STRINGS_GLOBS
+                      for f in glob.glob(os.path.join(app_root, *g), recursive=True)))
+
+
+def _parse_strings(txt):
+    return sorted(set(re.findall(r'<string[^>]*\bname="([^"]+)"', txt)))
+
+
+def _parse_source(txt):
+    """{quoted literal: [lines]}, {R.id name: [lines]} of one .kt file.
+
+    A literal is whatever lies between two consecutive `"` on a line, which is exactly the set of `"X"`
+    substrings grep_app would find (X quote-free, single-line) — including the `, ` between two literals, and
+    the odd segment of an escaped or raw string. R.id names are matched without a leading \\b for the same
+    reason: grep_app is a substring test, and the index must answer it identically.
+    """
+    literals, ids = {}, {}
+    for n, line in enumerate(txt.split("\n"), 1):
+        if '"' in line:
+            for seg in line.split('"')[1:-1]:
+                literals.setdefault(seg, []).append(n)
+        if "R.id." in line:
+            for name in re.findall(r"R\.id\.([A-Za-z0-9_]+)", line):
+                ids.setdefault(name, []).append(n)
+    return literals, ids
+
+
+class AppIndex:
+    """Identifier index of the app sources: quoted literal / R.id name -> [(file, line)].
+
+    Built once per run and shared by every checked file; persisted under --cache-dir keyed on the app root,
+    and re-parsed per file only where (mtime, size) changed, so a warm run stats the tree instead of reading
+    it. Answers grep_app's questions (`"X"` and `R.id.X` substring presence) without touching the sources.
+    """
+
+    def __init__(self, app_root, cache_dir=None):
+        self.app_root = os.path.abspath(app_root)
+        self.cache_path = None
+        if cache_dir:
+            key = hashlib.sha1(self.app_root.encode()).hexdigest()[:12]
+            self.cache_path = os.path.join(cache_dir, f"effcheck-index-{key}.json")
+        self.sources, self.strings = {}, {}
+        self.refresh()
+
+    def refresh(self):
+        """Bring the index up to date with the tree: re-parse changed files, drop deleted ones.
+
+        The first call starts from the on-disk cache, later ones (effcheck --stdin, between requests) from the
+        entries already in memory, so a long-lived checker sees edits to the app without re-reading all of it.
+        """
+        self.parsed = 0  # files (re)read by this refresh; 0 on a warm cache with nothing changed
+        cached = {"sources": self.sources, "strings": self.strings} if self.sources else self._load()
+        self.sources = self._refresh(cached.get("sources", {}), glob.glob(
+            os.path.join(self.app_root, "**", "*.kt"), recursive=True), self._read_source)
+        self.strings = self._refresh(cached.get("strings", {}), _string_files(self.app_root), self._read_strings)
+        changed = self.parsed or len(self.sources) != len(cached.get("sources", {})) \
+            or len(self.strings) != len(cached.get("strings", {}))
+        if changed:
+            self._save()
+        elif hasattr(self, "literals"):
+            return
+        self.literals, self.ids = {}, {}
+        for rel, entry in self.sources.items():
+            for seg, lines in entry["literals"].items():
+                self.literals.setdefault(seg, []).extend((rel, n) for n in lines)
+            for name, lines in entry["ids"].items():
+                self.ids.setdefault(name, []).extend((rel, n) for n in lines)
+        self.id_names = sorted(self.ids)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("version") == INDEX_VERSION and data.get("app_root") == self.app_root:
+                return data
+        except (TypeError, OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"version": INDEX_VERSION, "app_root": self.app_root,
+                           "sources": self.sources, "strings": self.strings}, fh)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:  # a read-only cache only costs speed
+            print(f"effcheck: index not cached ({e})", file=sys.stderr)
+
+    def _refresh(self, cached, paths, read):
+        out = {}
+        for f in paths:
+            rel = os.path.relpath(f, self.app_root)
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            entry = cached.get(rel)
+            if not entry or entry["mtime"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                try:
+                    entry = dict(read(f), mtime=st.st_mtime_ns, size=st.st_size)
+                except Exception:
+                    continue
+                self.parsed += 1
+            out[rel] = entry
+        return out
+
+    @staticmethod
+    def _read_source(f):
+        literals, ids = _parse_source(_read(f, errors="ignore"))
+        return {"literals": literals, "ids": ids}
+
+    @staticmethod
+    def _read_strings(f):
+        return {"names": _parse_strings(_read(f))}
 
-def load_string_names(app_root):
+    def string_names(self):
+        return {n for entry in self.strings.values() for n in entry["names"]}
+
+    def where(self, needle):
+        """[(file, line)] for a `"X"` or `R.id.X` needle; None for any other shape (not indexed)."""
+        if len(needle) > 2 and needle[0] == needle[-1] == '"' and '"' not in needle[1:-1] \
+                and "\n" not in needle:
+            return self.literals.get(needle[1:-1], [])
+        if needle.startswith("R.id.") and re.fullmatch(r"[A-Za-z0-9_]+", needle[5:]):
+            # substring semantics: R.id.foo is present in a file that only has R.id.foo_bar
+            prefix, hits = needle[5:], []
+            for name in self.id_names[bisect.bisect_left(self.id_names, prefix):]:
+                if not name.startswith(prefix):
+                    break
+                hits += self.ids[name]
+            return hits
+        return None
+
+    def contains(self, needle):
+        hits = self.where(needle)
+        return grep_app(self.app_root, needle) if hits is None else bool(hits)
+
+
+def _read(path, errors=None):
+    with open(path, encoding="utf-8", errors=errors) as fh:
+        return fh.read()
+
+
+def load_string_names(app_root, index=None):
+    if index is not None:
+        return index.string_names()
     names = set()
     for f in glob.glob(os.path.join(app_root, "res", "**", "strings*.xml"), recursive=True) + \
              glob.glob(os.path.join(app_root, "res", "values*", "*.xml"), recursive=True):
         try:
-            for m in re.findall(r'<string[^>]*\bname="([^"]+)"', open(f, encoding="utf-8").read()):
+            for m in re.findall(r'<string[^>]*\bname="([^"]+)"', _read(f)):
                 names.add(m)
         except Exception:
             pass
     return names
 
 def grep_app(app_root, needle):
-    # cheap fixed-string presence check across app source (kt/xml)
+    # cheap fixed-string presence check across app source (kt/xml). Re-reads the tree per needle: main() asks
+    # an AppIndex instead, and this stays as the reference it must agree with.
     for f in glob.glob(os.path.join(app_root, "**", "*.kt"), recursive=True):
         try:
-            if needle in open(f, encoding="utf-8", errors="ignore").read():
+            if needle in _read(f, errors="ignore"):
                 return True
         except Exception:
             pass
@@ -45,7 +214,7 @@ def grep_app(app_root, needle):
 def basepage_verbs(eff_root):
     bp = os.path.join(eff_root, "helpers", "BasePage.kt")
     try:
-        return set(re.findall(r"fun (moz[A-Za-z0-9_]+)", open(bp, encoding="utf-8").read()))
+        return set(re.findall(r"fun (moz[A-Za-z0-9_]+)", _read(bp)))
     except Exception:
         return set()
 
@@ -55,8 +224,9 @@ def _strip_comments(txt):
     return re.sub(r"//[^\n]*", "", txt)
 
 
-def check_file(path, strings, app_root, eff_root, verbs, tag_cache):
-    txt = open(path, encoding="utf-8").read()
+def check_file(path, strings, app_root, eff_root, verbs, tag_cache, index=None):
+    found = index.contains if index is not None else (lambda needle: grep_app(app_root, needle))
+    txt = _read(path)
     p = path.replace("\\", "/")
     is_page = re.search(r"(^|/)pageObjects/", p) is not None
     is_test = re.search(r"(^|/)tests/", p) is not None
@@ -92,12 +262,12 @@ def check_file(path, strings, app_root, eff_root, verbs, tag_cache):
             add("FAIL", f"RES  R.string.{name} not found in app res")
     # ID: espresso ids (value passed to toResourceId → R.id name)
     for m in re.findall(r"ESPRESSO_BY_ID[^)]*?value\s*=\s*\"([^\"]+)\"", txt):
-        if not grep_app(app_root, '"' + m + '"') and not grep_app(app_root, "R.id." + m):
+        if not found('"' + m + '"') and not found("R.id." + m):
             add("WARN", f"ID   R.id/{m} not obviously present in app source (verify by hand)")
     # TAG: compose tags — best effort
     for m in re.findall(r"COMPOSE_BY_TAG[^)]*?value\s*=\s*\"([^\"]+)\"", txt):
         if m not in tag_cache:
-            tag_cache[m] = grep_app(app_root, '"' + m + '"')
+            tag_cache[m] = found('"' + m + '"')
         if not tag_cache[m]:
             add("WARN", f"TAG  literal testTag \"{m}\" not found in app source (verify it's the real tag)")
     # TEXT rule
@@ -155,7 +325,7 @@ def check_file(path, strings, app_root, eff_root, verbs, tag_cache):
         if cat:
             cat_path = os.path.join(eff_root, "selectors", cat.group(1) + ".kt")
             if os.path.isfile(cat_path):
-                if "requiredForPage" not in open(cat_path, encoding="utf-8").read():
+                if "requiredForPage" not in _read(cat_path):
                     add("FAIL", f"ANCHOR {cat.group(1)} has no \"requiredForPage\" selector — "
                                 "the page has no arrival check, so navigateToPage() cannot fail (gotcha B1)")
             else:
@@ -181,43 +351,154 @@ def _tae_version():
         return "unknown"
 
 
+def expand_paths(paths):
+    """Files as given; a directory stands for every .kt file under it (sorted, hidden dirs skipped)."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(glob.glob(os.path.join(p, "**", "*.kt"), recursive=True))
+        else:
+            out.append(p)
+    return out
+
+
+def changed_files(eff_root, rev="HEAD"):
+    """.kt files under eff_root that differ from `rev` (committed since, staged or not) or are untracked.
+
+    Raises RuntimeError when git cannot answer, so a sweep never reports "nothing changed" for a check that
+    never ran (the effnext other-branch lesson).
+    """
+    def git(*args):
+        r = subprocess.run(["git", "-C", eff_root, *args], capture_output=True, text=True, timeout=120)
+        if r.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)}: {r.stderr.strip() or r.returncode}")
+        return r.stdout.splitlines()
+    top = git("rev-parse", "--show-toplevel")[0]
+    rel = git("diff", "--name-only", "--diff-filter=d", rev, "--", ".") \
+        + git("ls-files", "--others", "--exclude-standard", "--full-name", "--", ".")
+    return sorted(set(os.path.join(top, f) for f in rel if f.endswith(".kt")))
+
+
+def file_result(path, rs):
+    fails = [m for l, m in rs if l == "FAIL"]
+    warns = [m for l, m in rs if l == "WARN"]
+    infos = [m for l, m in rs if l == "INFO"]
+    verdict = "FAIL" if fails else ("WARN" if warns else "PASS")
+    return {"file": os.path.basename(path), "path": path, "verdict": verdict,
+            "fails": fails, "warns": warns, "infos": infos}
+
+
+def check_files(paths, strings, app_root, eff_root, verbs, index, jobs=1, tag_cache=None):
+    """file_result() per path, in order, checked `jobs` at a time against the one shared index.
+
+    The tag cache is shared too; two threads racing on the same tag only look it up twice. A file that cannot
+    be read is a FAIL of its own instead of ending the batch.
+    """
+    tag_cache = {} if tag_cache is None else tag_cache
+
+    def one(path):
+        try:
+            return file_result(path, check_file(path, strings, app_root, eff_root, verbs, tag_cache, index))
+        except (OSError, UnicodeDecodeError) as e:
+            return file_result(path, [("FAIL", f"READ cannot read {path}: {e}")])
+    if jobs <= 1:
+        yield from map(one, paths)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as ex:
+        yield from ex.map(one, paths)
+
+
+def _print_text(fo):
+    print(f"[{fo['verdict']}] {fo['file']}")
+    for m in fo["fails"]: print("   ✖", m)
+    for m in fo["warns"]: print("   ⚠", m)
+    for m in fo["infos"]: print("   ·", m)
+    if fo["verdict"] == "PASS": print("   ✓ statically clean")
+    print()
+
+
+def _serve(a, index, jobs):
+    """--stdin: one request per line (files/dirs, space-separated), one JSON line per file, then a `done` line.
+
+    The indexes stay warm between requests; each request first refreshes them, which re-reads only the app
+    sources and BasePage that changed since the previous one.
+    """
+    any_fail = False
+    for line in sys.stdin:
+        paths = expand_paths(line.split())
+        if not paths:
+            continue
+        index.refresh()
+        strings, verbs, n_fail = index.string_names(), basepage_verbs(a.eff_root), 0
+        for fo in check_files(paths, strings, a.app_root, a.eff_root, verbs, index, jobs):
+            n_fail += fo["verdict"] == "FAIL"
+            print(json.dumps({"tool": "effcheck", **fo}), flush=True)
+        print(json.dumps({"tool": "effcheck", "done": True, "ok": not n_fail, "files": len(paths),
+                          "failed": n_fail, "app_reindexed": index.parsed}), flush=True)
+        any_fail = any_fail or bool(n_fail)
+    return any_fail
+
+
 def main():
     if "--version" in sys.argv[1:]:
         print(f"{os.path.basename(__file__)} \u2014 tae-conversion {_tae_version()}")
         sys.exit(0)
     ap = argparse.ArgumentParser()
-    ap.add_argument("files", nargs="+")
+    ap.add_argument("files", nargs="*", help=".kt files, or directories to check every .kt file under")
     ap.add_argument("--app-root", required=True, help="path to <fenix>/app/src/main")
     ap.add_argument("--eff-root", required=True, help="path to .../ui/efficiency")
     ap.add_argument("--json", action="store_true", help="emit a structured JSON verdict instead of text")
+    ap.add_argument("--jsonl", action="store_true",
+                    help="emit one JSON line per file as it is checked, then a summary line")
+    since = ap.add_mutually_exclusive_group()
+    since.add_argument("--changed", action="store_const", const="HEAD", dest="since",
+                       help="also check the .kt files under --eff-root that differ from HEAD or are untracked")
+    since.add_argument("--changed-since", metavar="REV", dest="since",
+                       help="the same against REV (a commit, branch or tag) instead of HEAD")
+    ap.add_argument("--stdin", action="store_true",
+                    help="stay up: read file/dir lists from stdin, one request per line, answer in JSON lines")
+    ap.add_argument("-j", "--jobs", type=int, default=min(8, os.cpu_count() or 1),
+                    help="files checked concurrently (default: min(8, CPUs))")
+    ap.add_argument("--cache-dir", default=_cache_dir(),
+                    help="where the app source index is kept between runs (default: $XDG_CACHE_HOME/eff)")
+    ap.add_argument("--no-cache", action="store_true", help="build the index in memory only")
     a = ap.parse_args()
-    strings = load_string_names(a.app_root)
+    files = expand_paths(a.files)
+    if a.since:
+        try:
+            files += [f for f in changed_files(a.eff_root, a.since) if f not in files]
+        except (RuntimeError, OSError, subprocess.SubprocessError) as e:
+            ap.error(f"--changed: {e}")
+    if not files and not a.stdin:
+        if a.since:  # nothing changed is a clean sweep, not a usage error
+            print(json.dumps({"tool": "effcheck", "ok": True, "files": []}) if a.json or a.jsonl
+                  else "effcheck — no changed .kt files")
+            sys.exit(0)
+        ap.error("no files to check (give files/directories, --changed or --stdin)")
+    index = AppIndex(a.app_root, None if a.no_cache else a.cache_dir)
+    if a.stdin:
+        sys.exit(1 if _serve(a, index, a.jobs) else 0)
+    strings = load_string_names(a.app_root, index)
     verbs = basepage_verbs(a.eff_root)
-    tag_cache = {}
-    files_out, any_fail = [], False
-    for f in a.files:
-        rs = check_file(f, strings, a.app_root, a.eff_root, verbs, tag_cache)
-        fails = [m for l, m in rs if l == "FAIL"]
-        warns = [m for l, m in rs if l == "WARN"]
-        infos = [m for l, m in rs if l == "INFO"]
-        verdict = "FAIL" if fails else ("WARN" if warns else "PASS")
-        any_fail = any_fail or bool(fails)
-        files_out.append({"file": os.path.basename(f), "path": f, "verdict": verdict,
-                          "fails": fails, "warns": warns, "infos": infos})
-    if a.json:
-        print(json.dumps({"tool": "effcheck", "ok": not any_fail,
+    files_out, n_fail = [], 0
+    if not a.json and not a.jsonl:
+        print(f"effcheck — {len(strings)} app strings, {len(verbs)} BasePage verbs loaded\n")
+    for fo in check_files(files, strings, a.app_root, a.eff_root, verbs, index, a.jobs):
+        n_fail += fo["verdict"] == "FAIL"
+        if a.jsonl:
+            print(json.dumps({"tool": "effcheck", **fo}), flush=True)
+        elif a.json:
+            files_out.append(fo)
+        else:
+            _print_text(fo)
+    if a.jsonl:
+        print(json.dumps({"tool": "effcheck", "done": True, "ok": not n_fail, "files": len(files),
+                          "failed": n_fail, "app_strings": len(strings), "basepage_verbs": len(verbs)}))
+    elif a.json:
+        print(json.dumps({"tool": "effcheck", "ok": not n_fail,
                           "app_strings": len(strings), "basepage_verbs": len(verbs),
                           "files": files_out}))
-    else:
-        print(f"effcheck — {len(strings)} app strings, {len(verbs)} BasePage verbs loaded\n")
-        for fo in files_out:
-            print(f"[{fo['verdict']}] {fo['file']}")
-            for m in fo["fails"]: print("   ✖", m)
-            for m in fo["warns"]: print("   ⚠", m)
-            for m in fo["infos"]: print("   ·", m)
-            if fo["verdict"] == "PASS": print("   ✓ statically clean")
-            print()
-    sys.exit(1 if any_fail else 0)
+    sys.exit(1 if n_fail else 0)
 
 if __name__ == "__main__":
     main()
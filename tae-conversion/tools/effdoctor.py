@@ -5,8 +5,9 @@ effdoctor — read-only preflight. Run it at the START of a session, before queu
 Slice 1: the TOOLCHAIN MAP. The eff* tools exist once but are reachable from two checkouts
 (`testops-tools/tae-conversion/tools` and `ui-test-modernization/tools`, where the entries are
 symlinks into the former). `effwatch.sh` computes its queue from `dirname $0`, which does NOT resolve
-symlinks — so the queue it watches is a function of the path it was LAUNCHED from, while the tools
-themselves are identical either way. Drop a request in the other checkout's queue and it sits there
+symlinks (and hands it to effwatch.py as --runs, which is what `ps` then shows) — so the queue it
+watches is a function of the path it was LAUNCHED from, while the tools themselves are identical
+either way. Drop a request in the other checkout's queue and it sits there
 forever: nothing consumes it, no error is printed, and the run simply never happens.
 
 That has now bitten us more than once, so this prints where the live watcher is actually listening
@@ -79,7 +80,7 @@ def check():
     # --- live effwatch processes, and the queue each one is really watching
     ps = sh("ps -eo pid,command")
     for line in ps.splitlines():
-        m = re.search(r"^\s*(\d+)\s+.*?(\S*effwatch\.sh)", line)
+        m = re.search(r"^\s*(\d+)\s+.*?(\S*effwatch\.(?:sh|py))", line)
         if not m:
             continue
         pid, path = m.group(1), m.group(2)
@@ -97,6 +98,10 @@ def check():
             tools_dir = None
 
         q = queue_for(tools_dir) if tools_dir else None
+        # effwatch.sh execs effwatch.py with an explicit --runs, so the live process usually names its queue.
+        runs = re.search(r"effwatch\.py\s.*?--runs[= ](\S+)", line)
+        if runs and (os.path.isabs(runs.group(1)) or cwd):
+            q = os.path.join(os.path.normpath(os.path.join(cwd or "/", runs.group(1))), "_queue")
         w = {"pid": pid, "launched_from": path, "proc_cwd": cwd, "watching_queue": q,
              "exists": bool(q) and os.path.isdir(q),
              "canonical": bool(q) and os.path.realpath(q) == os.path.realpath(out["canonical_queue"])}
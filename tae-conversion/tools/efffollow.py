@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+efffollow — follow a batch's run-report.txt while effloop writes it, one test attempt at a time.
+
+effverify and efftriage read a finished report, so a long device run had to end before either said anything,
+and asking again meant re-reading the whole file. With --follow they use this instead:
+  - Tail reads only the bytes appended since its last read. It tolerates the FAILURES header effloop
+    prepends at the end (it finds its place again) and reports any other rewrite as Rewritten.
+  - Attempts splits the lines at the `RetryTestRule: Started try #` markers efftriage.attempts() splits at,
+    and hands each attempt over the moment it closes: at the next try marker, the test's `failed:` line,
+    the next `started:` line, or the end of the run block. An attempt is the start of the matching
+    efftriage.attempts() entry, cut where its test stopped running.
+  - follow() yields lines until the run is over, which is when effloop writes status.json (it removes the
+    previous run's at start). The callers stop early on Ctrl-C and report on what they have.
+No byte of the report is read twice. Stdlib only.
+
+Usage (a look at the attempts as they close):
+  efffollow.py <batchdir> [--interval SECONDS]
+"""
+import argparse, collections, os, re, sys, time
+
+TRY_RE = re.compile(r"RetryTestRule: Started try #(\d+)")
+CRASH_RE = re.compile(r"^CRASH:", re.M)
+MARK_RE = re.compile(r"^(started|failed|ignored):\s*([A-Za-z0-9_]+)\s*\(")
+HEAD = 256                      # bytes of the report that identify it across effloop's header prepend
+HEADER_MAX = 1 << 20            # how far into a rewritten report to look for them
+
+Attempt = collections.namedtuple("Attempt", "test number text end")
+Attempt.__doc__ = """One attempt: its test, try number, text (from its marker, as efftriage.attempts() cuts it)
+and what ended it: "retry" (a later try of the same test began — this one failed), "failed", "started",
+"finished", "run" (the next run block began with no `run finished:`, as after a crash), "next" or "eof"."""
+
+
+class Rewritten(Exception):
+    """The file being followed was replaced, truncated or removed: it is no longer the one being read."""
+
+
+class Tail:
+    """The complete lines appended to *path* since the last read()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.base = self.offset = 0         # where the followed content starts, and how far it has been read
+        self.head, self.partial, self.ident, self.read_bytes = b"", b"", None, 0
+
+    def read(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            if self.offset:
+                raise Rewritten(self.path) from None
+            return []
+        with f:
+            st = os.fstat(f.fileno())
+            if self.offset:
+                if (st.st_dev, st.st_ino) != self.ident:
+                    raise Rewritten(self.path)
+                f.seek(self.base)
+                if f.read(len(self.head)) != self.head:
+                    self._refind(f)
+            self.ident = (st.st_dev, st.st_ino)
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        self.read_bytes += len(data)
+        if len(self.head) < HEAD:
+            self.head = (self.head + data)[:HEAD]
+        data = self.partial + data
+        cut = data.rfind(b"\n") + 1
+        self.partial = data[cut:]
+        return data[:cut].decode("utf-8", errors="ignore").splitlines(True)
+
+    def _refind(self, f):
+        # effloop rewrites a failed run's report as FAILURES header + the same body: find the body again.
+        f.seek(0)
+        at = f.read(HEADER_MAX).find(self.head)
+        if at < 0 or f.seek(0, os.SEEK_END) < at + (self.offset - self.base):
+            raise Rewritten(self.path)
+        self.offset += at - self.base
+        self.base = at
+
+    def rest(self):
+        """The last line, if the file does not end with a newline."""
+        rest, self.partial = self.partial, b""
+        return rest.decode("utf-8", errors="ignore")
+
+
+class Attempts:
+    """Split report lines into test attempts incrementally: feed() returns the attempts each line closes."""
+
+    def __init__(self):
+        self.test, self.number, self.lines = None, 0, None
+
+    def feed(self, line):
+        m = TRY_RE.search(line)
+        if m:
+            number = int(m.group(1))
+            closed = self._close("retry" if number > self.number else "next")
+            self.number, self.lines = number, [line]
+            return closed
+        if line.startswith("run started:"):
+            return self._next_test("run", None)
+        if line.startswith("run finished:"):
+            return self._next_test("finished", None)
+        mark = MARK_RE.match(line)
+        if mark and mark.group(1) == "started":
+            return self._next_test("started", mark.group(2))
+        if self.lines is not None:
+            self.lines.append(line)
+            if mark and mark.group(1) == "failed":
+                return self._close("failed")
+        return []
+
+    def close(self):
+        return self._close("eof")
+
+    def _next_test(self, end, test):
+        closed = self._close(end)
+        self.test, self.number = test, 0
+        return closed
+
+    def _close(self, end):
+        if self.lines is None:
+            return []
+        closed = Attempt(self.test, self.number, "".join(self.lines), end)
+        self.lines = None
+        return [closed]
+
+
+def outcome(att):
+    """How an attempt went, as far as its trace says: crashed, failed, passed, or unknown (no verdict in it)."""
+    if CRASH_RE.search(att.text):
+        return "crashed"
+    if att.end in ("retry", "failed"):
+        return "failed"
+    return "passed" if att.end == "finished" else "unknown"
+
+
+def follow(batch, interval=0.5, settle=5):
+    """Yield each line of *batch*/run-report.txt as it is written, until the run is over.
+
+    Yields None when the report was replaced by a new run's: whatever the caller keeps should start over.
+    status.json is checked before each read, so the lines written before it are always read.
+    """
+    report, status = os.path.join(batch, "run-report.txt"), os.path.join(batch, "status.json")
+    tail, retries = Tail(report), 0
+    while True:
+        done = os.path.exists(status)
+        try:
+            lines = tail.read()
+        except Rewritten:
+            if not done:
+                tail = Tail(report)
+                yield None
+            elif retries < settle:              # effloop is mid-rewrite: wait for it to finish
+                retries += 1
+                time.sleep(interval)
+            else:
+                return
+            continue
+        yield from lines
+        if done and not lines:
+            break
+        if not lines:
+            time.sleep(interval)
+    rest = tail.rest()
+    if rest:
+        yield rest
+
+
+def _tae_version():
+    """Version of the whole tae-conversion toolchain (tools + docs are stamped together).
+
+    realpath, not __file__: these tools are commonly invoked through symlinks from another checkout's
+    tools/ dir, and an unresolved path would look for VERSION in the wrong repo and report "unknown"
+    exactly where a staleness check matters most.
+    """
+    p = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "VERSION")
+    try:
+        return open(p).read().strip()
+    except OSError:
+        return "unknown"
+
+
+def main():
+    if "--version" in sys.argv[1:]:
+        print(f"{os.path.basename(__file__)} — tae-conversion {_tae_version()}")
+        sys.exit(0)
+    ap = argparse.ArgumentParser(description="Print each test attempt of a run as it closes.")
+    ap.add_argument("batch")
+    ap.add_argument("--interval", type=float, default=0.5, help="seconds between reads (default 0.5)")
+    a = ap.parse_args()
+    split = Attempts()
+
+    def show(closed):
+        for att in closed:
+            print(f"{att.test or '?'} try #{att.number}: {outcome(att)} ({att.end}, {att.text.count(chr(10))} lines)",
+                  flush=True)
+
+    try:
+        for line in follow(a.batch, a.interval):
+            if line is None:
+                print("— run-report.txt was replaced by a new run; following it from the top", flush=True)
+                split = Attempts()
+                continue
+            show(split.feed(line))
+    except KeyboardInterrupt:
+        pass
+    show(split.close())
+
+
+if __name__ == "__main__":
+    main()
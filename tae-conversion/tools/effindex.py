@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+effindex — the conversion state of a Fenix androidTest ui/ dir, kept in SQLite and updated per file.
+
+reconcile_conversion and effnext both answer "what is converted" by reading the whole UI test tree and
+regex-parsing every file, on every call. This keeps what they extract — legacy @Test methods with their
+@SmokeTest/@Ignore/replacedBy/TestRail annotations, and the efficiency suite's `fun` and @Test names — in
+one SQLite file per ui/ dir, and re-parses only files whose mtime or size changed AND whose content hash
+differs (a checkout that rewrites a file unchanged costs a read, not a parse). Deleted files drop out.
+
+The per-file parsers below ARE the tools' parsers (reconcile_conversion.parse_legacy/parse_efficiency and
+effnext.converted_in_tree call them file by file), so an indexed answer and a fresh parse cannot drift.
+
+Default location: $XDG_CACHE_HOME/eff/effindex-<hash of the ui dir>.sqlite (~/.cache/eff). Pass
+db_path=":memory:" for a throwaway index. Stdlib only.
+
+Usage (a look at what is indexed):
+  effindex.py --ui-dir <FENIX_UI_DIR> [--json]
+"""
+import glob, hashlib, json, os, re, sqlite3, sys
+
+INDEX_VERSION = 1
+FUN_RE = re.compile(r'\bfun\s+(`[^`]+`|[A-Za-z_]\w*)\s*\(')
+FUN_NAME_RE = re.compile(r"\bfun\s+([A-Za-z0-9_]+)\s*\(")     # effnext's in-tree check
+CLASS_RE = re.compile(r'\bclass\s+(\w+)')
+TESTRAIL_RE = re.compile(r"cases/view/(\d+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,              -- relative to the ui dir
+    kind TEXT NOT NULL,                 -- legacy | efficiency
+    mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS legacy_tests (
+    path TEXT NOT NULL, ord INTEGER NOT NULL, class TEXT NOT NULL, method TEXT NOT NULL,
+    smoke INTEGER NOT NULL, ignored INTEGER NOT NULL, has_replaced_by INTEGER NOT NULL,
+    replaced_by_target TEXT NOT NULL, testrail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS legacy_tests_path ON legacy_tests (path, ord);
+CREATE INDEX IF NOT EXISTS legacy_tests_method ON legacy_tests (method);
+CREATE TABLE IF NOT EXISTS efficiency_names (
+    path TEXT NOT NULL, name TEXT NOT NULL,
+    kind TEXT NOT NULL                  -- test: an @Test method | fun: any `fun name(`
+);
+CREATE INDEX IF NOT EXISTS efficiency_names_path ON efficiency_names (path);
+CREATE INDEX IF NOT EXISTS efficiency_names_kind ON efficiency_names (kind, name);
+"""
+
+# kind -> (glob under the ui dir, child tables)
+KINDS = {
+    "legacy": ("*.kt", ("legacy_tests",)),
+    "efficiency": (os.path.join("efficiency", "tests", "*.kt"), ("efficiency_names",)),
+}
+
+
+def _cache_dir():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "eff")
+
+
+def read_text(data, errors="replace"):
+    """*data* as open(path, encoding="utf-8", errors=errors).read() would return it (newlines included)."""
+    return data.decode("utf-8", errors=errors).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def legacy_tests_in(text, path):
+    """Legacy @Test methods in one file, in order: Class, Method, smoke, ignored, has_replacedBy,
+    replacedBy_target, testrail (the TestRail case id from a cases/view/<id> link above it, or "")."""
+    rows = []
+    lines = text.split("\n")
+    cls = None
+    for l in lines:
+        m = CLASS_RE.search(l)
+        if m:
+            cls = m.group(1); break
+    if not cls:
+        cls = os.path.basename(path)[:-3]
+    n = len(lines); i = 0
+    while i < n:
+        mfun = FUN_RE.search(lines[i])
+        if mfun:
+            # gather contiguous annotation/comment block above (balanced parens/brackets)
+            j = i - 1; block = []; running = 0
+            while j >= 0:
+                raw = lines[j]; t = raw.strip()
+                bal = raw.count("(") + raw.count("[") - raw.count(")") - raw.count("]")
+                is_ann = t.startswith("@") or t.startswith("//") or t.startswith("*") or t.startswith("/*") or t.endswith("*/")
+                if is_ann or running != 0 or bal != 0:
+                    block.insert(0, raw); running += bal; j -= 1; continue
+                break
+            blk = "\n".join(block)
+            if "@Test" in blk:
+                method = mfun.group(1).strip("`")
+                rb = re.search(r'replacedBy\s*=\s*\[(.*?)\]', blk, re.DOTALL)
+                rb_target = ""
+                if rb:
+                    mt = re.search(r'efficiency\.tests\.[A-Za-z0-9_]+#[A-Za-z0-9_]+', rb.group(1))
+                    rb_target = mt.group(0) if mt else rb.group(1).strip().strip('"')
+                tr = TESTRAIL_RE.search(blk)
+                rows.append({
+                    "Class": cls, "Method": method,
+                    "smoke": "@SmokeTest" in blk,
+                    "ignored": "@Ignore" in blk,
+                    "has_replacedBy": bool(rb),
+                    "replacedBy_target": rb_target,
+                    "testrail": tr.group(1) if tr else "",
+                })
+        i += 1
+    return rows
+
+
+def efficiency_tests_in(text):
+    """@Test method names in one efficiency test file: the first `fun` within 6 lines of each @Test."""
+    names = set()
+    lines = text.split("\n")
+    for i, l in enumerate(lines):
+        if "@Test" in l:
+            for k in range(i, min(i + 6, len(lines))):
+                m = FUN_RE.search(lines[k])
+                if m:
+                    names.add(m.group(1).strip("`")); break
+    return names
+
+
+def fun_names_in(text):
+    """Every `fun <name>(` in one file."""
+    return set(FUN_NAME_RE.findall(text))
+
+
+def default_db_path(ui_dir, cache_dir=None):
+    """One index per ui dir (symlinks resolved), under *cache_dir* (default $XDG_CACHE_HOME/eff)."""
+    key = hashlib.sha1(os.path.realpath(ui_dir).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir or _cache_dir(), f"effindex-{key}.sqlite")
+
+
+class ConversionIndex:
+    def __init__(self, ui_dir, db_path=None):
+        self.ui_dir = os.path.abspath(ui_dir)
+        if db_path is None:
+            db_path = default_db_path(ui_dir)
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path, timeout=30)
+        try:
+            version = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError:
+            version = None
+        if version != (str(INDEX_VERSION),):
+            try:
+                self._reset()
+            except sqlite3.DatabaseError:                     # not a database at all: start a new file
+                self.db.close()
+                os.remove(db_path)
+                self.db = sqlite3.connect(db_path, timeout=30)
+                self._reset()
+        self.parsed = 0                                       # files (re)parsed by the last refresh
+        self.fresh = set()                                    # kinds refreshed on this connection
+
+    def _reset(self):
+        with self.db:
+            for (name,) in self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                self.db.execute(f"DROP TABLE {name}")
+            self.db.executescript(SCHEMA)
+            self.db.execute("INSERT INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self, kinds=tuple(KINDS)):
+        """Bring *kinds* up to date with the disk. Returns the number of files re-parsed."""
+        self.parsed = 0
+        with self.db:
+            for kind in kinds:
+                pattern, tables = KINDS[kind]
+                known = {p: (m, s, h) for p, m, s, h in self.db.execute(
+                    "SELECT path, mtime_ns, size, sha1 FROM files WHERE kind = ?", (kind,))}
+                seen = set()
+                for path in glob.glob(os.path.join(self.ui_dir, pattern)):
+                    rel = os.path.relpath(path, self.ui_dir)
+                    seen.add(rel)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        seen.discard(rel)
+                        continue
+                    old = known.get(rel)
+                    if old and old[:2] == (st.st_mtime_ns, st.st_size):
+                        continue
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    sha1 = hashlib.sha1(data).hexdigest()
+                    self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                    (rel, kind, st.st_mtime_ns, st.st_size, sha1))
+                    if old and old[2] == sha1:
+                        continue                              # touched, not changed
+                    for table in tables:
+                        self.db.execute(f"DELETE FROM {table} WHERE path = ?", (rel,))
+                    getattr(self, f"_index_{kind}")(rel, data)
+                    self.parsed += 1
+                for rel in set(known) - seen:
+                    self.db.execute("DELETE FROM files WHERE path = ?", (rel,))
+                    for table in tables:
+                        self.db.execute(f"DELETE FROM {table} WHERE path = ?", (rel,))
+                self.fresh.add(kind)
+        return self.parsed
+
+    def _index_legacy(self, rel, data):
+        rows = legacy_tests_in(read_text(data), rel)
+        self.db.executemany(
+            "INSERT INTO legacy_tests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(rel, n, r["Class"], r["Method"], r["smoke"], r["ignored"], r["has_replacedBy"],
+              r["replacedBy_target"], r["testrail"]) for n, r in enumerate(rows)])
+
+    def _index_efficiency(self, rel, data):
+        tests = efficiency_tests_in(read_text(data))
+        funs = fun_names_in(read_text(data, "ignore"))
+        self.db.executemany("INSERT INTO efficiency_names VALUES (?, ?, ?)",
+                            [(rel, n, "test") for n in sorted(tests)] + [(rel, n, "fun") for n in sorted(funs)])
+
+    def _ensure(self, kind):
+        if kind not in self.fresh:
+            self.refresh((kind,))
+
+    def legacy_tests(self):
+        """What reconcile_conversion.parse_legacy returns: rows in file order, then source order."""
+        self._ensure("legacy")
+        return [{"Class": c, "Method": m, "smoke": bool(s), "ignored": bool(i), "has_replacedBy": bool(r),
+                 "replacedBy_target": t, "testrail": tr}
+                for c, m, s, i, r, t, tr in self.db.execute(
+                    "SELECT class, method, smoke, ignored, has_replaced_by, replaced_by_target, testrail "
+                    "FROM legacy_tests ORDER BY path, ord")]
+
+    def efficiency_tests(self):
+        """What reconcile_conversion.parse_efficiency returns: @Test method names in the efficiency suite."""
+        self._ensure("efficiency")
+        return {n for (n,) in self.db.execute("SELECT DISTINCT name FROM efficiency_names WHERE kind = 'test'")}
+
+    def efficiency_funs(self):
+        """What effnext.converted_in_tree returns: every `fun <name>(` in the efficiency tests package."""
+        self._ensure("efficiency")
+        return {n for (n,) in self.db.execute("SELECT DISTINCT name FROM efficiency_names WHERE kind = 'fun'")}
+
+    def conversion_status(self):
+        """Legacy rows with conv_name (name exists as an efficiency @Test) and converted (that, or replacedBy)."""
+        eff = self.efficiency_tests()
+        rows = self.legacy_tests()
+        for r in rows:
+            r["conv_name"] = r["Method"] in eff
+            r["converted"] = r["has_replacedBy"] or r["conv_name"]
+        return rows
+
+
+def _tae_version():
+    """Version of the whole tae-conversion toolchain (tools + docs are stamped together).
+
+    realpath, not __file__: these tools are commonly invoked through symlinks from another checkout's
+    tools/ dir, and an unresolved path would look for VERSION in the wrong repo and report "unknown"
+    exactly where a staleness check matters most.
+    """
+    p = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "VERSION")
+    try:
+        return open(p).read().strip()
+    except OSError:
+        return "unknown"
+
+
+def main():
+    if "--version" in sys.argv[1:]:
+        print(f"{os.path.basename(__file__)} — tae-conversion {_tae_version()}")
+        sys.exit(0)
+    import argparse
+    ap = argparse.ArgumentParser(description="conversion-state index of a Fenix androidTest ui/ dir")
+    ap.add_argument("--ui-dir", required=True)
+    ap.add_argument("--db", default=None, help="index file (default: $XDG_CACHE_HOME/eff/effindex-<hash>.sqlite)")
+    ap.add_argument("--json", action="store_true")
+    a = ap.parse_args()
+    if not os.path.isdir(a.ui_dir):
+        sys.exit(f"UI dir not found: {a.ui_dir}")
+    index = ConversionIndex(a.ui_dir, a.db)
+    parsed = index.refresh()
+    rows = index.conversion_status()
+    out = {"tool": "effindex", "ui_dir": index.ui_dir, "db": index.db_path, "reparsed": parsed,
+           "legacy_tests": len(rows), "converted": sum(r["converted"] for r in rows),
+           "with_testrail": sum(bool(r["testrail"]) for r in rows),
+           "efficiency_tests": len(index.efficiency_tests())}
+    print(json.dumps(out) if a.json else "\n".join(f"{k}: {v}" for k, v in out.items() if k != "tool"))
+
+
+if __name__ == "__main__":
+    main()
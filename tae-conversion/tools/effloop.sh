@@ -49,6 +49,11 @@ case "$TEST_CLASS" in *.*) FQCLASS="$TEST_CLASS" ;; *) FQCLASS="$TESTS_PKG.$TEST
 OUT="$OUT_ROOT/$BATCH"; mkdir -p "$OUT"
 cd "$REPO" || { echo "REPO not found: $REPO"; exit 2; }
 [ -f "$EFFPRETTY" ] || { echo "effpretty.py not found at: $EFFPRETTY (set EFFPRETTY or REPO)"; exit 2; }
+# A reused batch name still holds the last run's trace and verdict. Clear them so nothing reads them as this
+# run's: `effverify/efftriage --follow` wait for run-report.txt to appear and stop when status.json does.
+# Only past the checks above: from here on every path writes status.json, so a follower is never left
+# waiting for a run that exited before it began.
+rm -f "$OUT/run-report.txt" "$OUT/status.json"
 
 # Anything in RESULTS_DIR older than this is from a PREVIOUS run — never report it as this run's result.
 RUN_START=$(date +%s)
@@ -74,7 +79,7 @@ PRETTY_PID=$!
 ./mach gradle "$MACH_TASK" $MACH_ARGS \
     -Pandroid.testInstrumentationRunnerArguments.class="$FQCLASS" 2>&1 \
     | tee "$OUT/raw-run.log" \
-    | python3 "$TOOLS/effbuild.py" --scope efficiency --out "$OUT/build-report.txt"
+    | python3 "$TOOLS/effbuild.py" --scope efficiency --stream --out "$OUT/build-report.txt"
 COMPILE_OK=${PIPESTATUS[2]}        # effbuild exit: 0 = compiled clean, 1 = compile errors/inconclusive
 
 sleep 2            # let the device's final lines drain into the stream before detaching
@@ -11,7 +11,10 @@ The next candidate = first pool entry that is neither marked Converted nor skipp
 converted_rows.csv is a fast snapshot and can lag reality (the campaign notes warn the "Converted" column is
 not authoritative), so by default effnext also greps the efficiency tests package for `fun <method>(` and
 drops anything already present in-tree. Point it at a checkout with --repo or $REPO; pass --no-tree-check to
-turn the grep off (it is skipped automatically when the checkout cannot be found).
+turn the grep off (it is skipped automatically when the checkout cannot be found). The picks are also looked
+up on the other local branches (advisory, see converted_on_other_branches). Both are cached in
+$XDG_CACHE_HOME/eff (default ~/.cache/eff): the checkout's efficiency tests in the effindex index, re-parsed
+only where a file changed, and each branch's tree by hash. --no-cache skips both.
 
 Skipping: a candidate you do not want — too complex for who is picking it up, blocked on a harness gap,
 deliberately deferred — should be recorded rather than mentally stepped over, so the next caller (and the
@@ -25,7 +28,9 @@ Usage:
   effnext.py --include-skipped                   # ignore the skiplist for this call
 Exit 0 always (unless files are missing, or --skip/--unskip names something not in the pool).
 """
-import csv, datetime, json, os, re, subprocess, sys
+import csv, datetime, hashlib, json, os, re, subprocess, sys, threading
+
+import effindex
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 ROOT = os.path.dirname(HERE)
@@ -96,22 +101,181 @@ def write_skips(skips):
             f.write(f"{fq}\t{skips[fq]}\t{existing_dates.get(fq, today)}\n")
 
 
-def converted_in_tree(repo):
-    """Method names with a `fun <name>(` in the efficiency tests package. Empty set if the repo isn't there."""
+def converted_in_tree(repo, cache_dir=None):
+    """Method names with a `fun <name>(` in the efficiency tests package. None if the repo isn't there.
+
+    With *cache_dir*, read from the effindex index kept there (only files changed since the last call are
+    parsed); without, every file is parsed afresh.
+    """
     tests_dir = os.path.join(repo, EFF_TESTS)
     if not os.path.isdir(tests_dir):
         return None
+    if cache_dir:
+        ui_dir = os.path.dirname(os.path.dirname(tests_dir))
+        index = effindex.ConversionIndex(ui_dir, effindex.default_db_path(ui_dir, cache_dir))
+        try:
+            return index.efficiency_funs()
+        finally:
+            index.close()
     names = set()
-    pattern = re.compile(r"\bfun\s+([A-Za-z0-9_]+)\s*\(")
     for entry in os.listdir(tests_dir):
         if not entry.endswith(".kt"):
             continue
         with open(os.path.join(tests_dir, entry), encoding="utf-8", errors="ignore") as f:
-            names.update(pattern.findall(f.read()))
+            names.update(effindex.fun_names_in(f.read()))
     return names
 
 
-def converted_on_other_branches(repo, methods):
+FUN_GREP = re.compile(rb"fun +[A-Za-z0-9_]+ *\(")         # the `git grep -E` pattern, line by line
+FUN_NAME = re.compile(r"\bfun\s+([A-Za-z0-9_]+)\s*\(")
+BRANCH_CACHE_VERSION = 1
+BRANCH_CACHE_MAX = 20000                                  # tree + blob entries kept between runs
+
+
+def _cache_dir():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "eff")
+
+
+def _local_branches(repo):
+    refs = subprocess.run(
+        ["git", "for-each-ref", "--format=%(refname:short)", "refs/heads/"],
+        cwd=repo, capture_output=True, text=True, timeout=30,
+    ).stdout.split()
+    # backup/* is excluded: those are snapshots of states we deliberately moved away from.
+    return [ref for ref in refs if not ref.startswith("backup/")]
+
+
+def blob_fun_names(data):
+    """`fun <name>(` names in one file, as `git grep -h -E` + FUN_NAME read it: matching lines only, and
+    nothing from a binary file (git prints "Binary file … matches" there, which names nothing)."""
+    if b"\0" in data[:8000]:
+        return set()
+    lines = [line for line in data.split(b"\n") if FUN_GREP.search(line)]
+    return set(FUN_NAME.findall(b"\n".join(lines).decode("utf-8", errors="ignore")))
+
+
+class BranchScanner:
+    """`fun` names in the efficiency tests tree of each local branch, read from the object store.
+
+    Branches mostly share that directory byte for byte, and a changed one mostly shares its files. So the
+    directory's tree object is resolved for every branch in one `git cat-file --batch-check`, each distinct
+    tree is read once, and within it only blobs not seen before are read, all through one long-lived
+    `git cat-file --batch`. Names per tree and per blob are kept in *cache_dir* between runs (objects are
+    immutable, so an entry never goes stale); a tree seen on an earlier run costs nothing.
+    """
+
+    def __init__(self, repo, cache_dir=None, timeout=120):
+        self.repo, self.timeout = repo, timeout
+        self.cache_path = None
+        if cache_dir:
+            key = hashlib.sha1(os.path.realpath(repo).encode()).hexdigest()[:12]
+            self.cache_path = os.path.join(cache_dir, f"effnext-branches-{key}.json")
+        self.trees, self.blobs = self._load()
+        self.dirty = False
+        self.read = 0                                    # objects read from git this run
+        self.proc, self.expired = None, False
+
+    def _load(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == BRANCH_CACHE_VERSION:
+                return data["trees"], data["blobs"]
+        except (OSError, TypeError, ValueError, KeyError):
+            pass
+        return {}, {}
+
+    def save(self):
+        if not (self.cache_path and self.dirty):
+            return
+        # Oldest first in insertion order; keep the newest entries within the cap.
+        trees = dict(list(self.trees.items())[-BRANCH_CACHE_MAX // 4:])
+        blobs = dict(list(self.blobs.items())[-BRANCH_CACHE_MAX:])
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": BRANCH_CACHE_VERSION, "trees": trees, "blobs": blobs}, f)
+        os.replace(tmp, self.cache_path)
+
+    def tree_ids(self, refs):
+        """{ref: tree hash of EFF_TESTS on it, or None where the directory does not exist}."""
+        out = subprocess.run(["git", "cat-file", "--batch-check"], cwd=self.repo, capture_output=True,
+                             input="".join(f"{ref}:{EFF_TESTS}\n" for ref in refs), text=True,
+                             timeout=self.timeout, check=True).stdout.splitlines()
+        if len(out) != len(refs):
+            raise RuntimeError("git cat-file --batch-check answered %d of %d refs" % (len(out), len(refs)))
+        ids = {}
+        for ref, line in zip(refs, out):
+            parts = line.split()
+            ids[ref] = parts[0] if len(parts) == 3 and parts[1] == "tree" else None
+        return ids
+
+    def _object(self, sha):
+        if self.expired:
+            raise RuntimeError(f"git cat-file --batch: no answer within {self.timeout}s")
+        if self.proc is None:
+            self.proc = subprocess.Popen(["git", "cat-file", "--batch"], cwd=self.repo,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.proc.stdin.write(sha.encode() + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            raise RuntimeError(f"git cat-file --batch: no object {sha}")
+        data = self.proc.stdout.read(int(header[2]) + 1)
+        if len(data) != int(header[2]) + 1:
+            raise RuntimeError("git cat-file --batch: short read")
+        self.read += 1
+        return data[:-1]
+
+    def names(self, tree):
+        """Sorted `fun` names under *tree*, recursively. Raises if git fails or takes over *timeout* seconds."""
+        if tree in self.trees:
+            self.trees[tree] = self.trees.pop(tree)      # most recently used last
+            return self.trees[tree]
+        # A hung git must fail this branch, not hang effnext: kill it, and the pending read raises. The
+        # budget is per tree, as it was per `git grep <ref>`.
+        self.expired = False
+        watchdog = threading.Timer(self.timeout, self._expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            return self._names(tree)
+        finally:
+            watchdog.cancel()
+
+    def _expire(self):
+        self.expired = True
+        self.close()
+
+    def _names(self, tree):
+        if tree in self.trees:
+            self.trees[tree] = self.trees.pop(tree)      # most recently used last
+            return self.trees[tree]
+        data, found, i = self._object(tree), set(), 0
+        while i < len(data):
+            sp, nul = data.index(b" ", i), data.index(b"\0", i)
+            mode, sha = data[i:sp], data[nul + 1:nul + 21].hex()
+            i = nul + 21
+            if mode == b"40000":
+                found.update(self._names(sha))
+            elif mode.startswith(b"100"):                # regular files; not symlinks or submodules
+                if sha not in self.blobs:
+                    self.blobs[sha] = sorted(blob_fun_names(self._object(sha)))
+                found.update(self.blobs[sha])
+        self.trees[tree] = sorted(found)
+        self.dirty = True
+        return self.trees[tree]
+
+    def close(self):
+        proc, self.proc = self.proc, None
+        if proc:
+            proc.kill()
+            proc.wait()
+            proc.stdin.close()
+            proc.stdout.close()
+
+
+def converted_on_other_branches(repo, methods, cache_dir=None):
     """Which local branches already have `fun <method>(` in the efficiency tests package, per method.
 
     ADVISORY ONLY — deliberately not folded into the filter above. Branches carry work in three different
@@ -120,23 +284,56 @@ def converted_on_other_branches(repo, methods):
     outstanding tests from the pool. Filtering stays on the checkout; other branches only produce a warning,
     which is enough to stop you re-converting something you have already sent for review from another branch.
 
-    backup/* is excluded: those are snapshots of states we deliberately moved away from.
+    Read through BranchScanner (one pass over the distinct trees, cached in *cache_dir* across runs) rather
+    than one `git grep <ref>` per branch, which could take well over 30 seconds per ref cold on
+    mozilla-central. grep_other_branches is that per-ref reading, kept as the reference.
     """
     if not os.path.isdir(os.path.join(repo, ".git")) or not methods:
         return {}
     try:
-        refs = subprocess.run(
-            ["git", "for-each-ref", "--format=%(refname:short)", "refs/heads/"],
-            cwd=repo, capture_output=True, text=True, timeout=30,
-        ).stdout.split()
+        refs = _local_branches(repo)
     except Exception:
         # Not silent: an unlistable ref set must not read as "no other branch has it". That swallowed a
         # NameError once and reported a clean result while checking nothing at all.
         return {"__unchecked__": ["<could not list local branches>"]}
+    scanner = BranchScanner(repo, cache_dir)
     hits, unchecked = {}, []
-    for ref in refs:
-        if ref.startswith("backup/"):
+    try:
+        trees = scanner.tree_ids(refs)
+    except Exception:
+        trees, unchecked = {}, list(refs)
+    for ref, tree in trees.items():
+        if tree is None:
+            continue                                     # no efficiency tests dir on that branch
+        try:
+            found = scanner.names(tree)
+        except Exception:
+            # A failed or timed-out read is surfaced like a failed `git grep` was: never as "not found".
+            unchecked.append(ref)
+            scanner.close()
             continue
+        for m in sorted(methods.intersection(found)):
+            hits.setdefault(m, []).append(ref)
+    scanner.close()
+    try:
+        scanner.save()
+    except OSError:
+        pass                                             # a cache that cannot be written is only slower
+    if unchecked:
+        hits["__unchecked__"] = unchecked
+    return hits
+
+
+def grep_other_branches(repo, methods):
+    """converted_on_other_branches as one `git grep` per branch. The reference for tests and the benchmark."""
+    if not os.path.isdir(os.path.join(repo, ".git")) or not methods:
+        return {}
+    try:
+        refs = _local_branches(repo)
+    except Exception:
+        return {"__unchecked__": ["<could not list local branches>"]}
+    hits, unchecked = {}, []
+    for ref in refs:
         try:
             out = subprocess.run(
                 ["git", "grep", "-h", "-E", "fun +[A-Za-z0-9_]+ *\\(", ref, "--", EFF_TESTS],
@@ -148,7 +345,7 @@ def converted_on_other_branches(repo, methods):
         except Exception:
             unchecked.append(ref)
             continue
-        found = set(re.findall(r"\bfun\s+([A-Za-z0-9_]+)\s*\(", out))
+        found = set(FUN_NAME.findall(out))
         for m in methods & found:
             hits.setdefault(m, []).append(ref)
     if unchecked:
@@ -235,7 +432,8 @@ def main():
         write_skips(skips)
 
     done = load_done()
-    in_tree = converted_in_tree(repo) if tree_check else None
+    cache_dir = None if "--no-cache" in args else _cache_dir()
+    in_tree = converted_in_tree(repo, cache_dir) if tree_check else None
 
     pending, already_in_tree = [], 0
     for (c, m, fq) in pool:
@@ -248,7 +446,7 @@ def main():
             continue
         pending.append((c, m, fq))
     picks = pending[:n]
-    elsewhere = converted_on_other_branches(repo, {m for (_, m, _) in picks}) if tree_check else {}
+    elsewhere = converted_on_other_branches(repo, {m for (_, m, _) in picks}, cache_dir) if tree_check else {}
     unchecked_branches = elsewhere.pop("__unchecked__", [])
 
     payload = {
@@ -19,7 +19,9 @@ Two standing rules for anyone adding a rule, learned by breaking them:
 Read-only: it never touches the tree or the device, so it is safe to run on every failure.
 
 Usage:
-  efftriage.py <batchdir> [--json]
+  efftriage.py <batchdir> [--json] [--follow]
+     --follow: while effloop is still running, triage each failed attempt the moment it ends (efffollow.py),
+     then give the usual triage once the run is over (or on Ctrl-C). With --json, one object per attempt.
 
 Two rules of triage are built in, because they are the ones people get wrong:
   1. Read the FIRST attempt's first failure, not the reported one. A failed attempt leaves state
@@ -28,7 +30,72 @@ Two rules of triage are built in, because they are the ones people get wrong:
   2. status.json is authoritative for pass/fail; the trace explains WHY (lesson G5). A green
      effverify next to a non-zero effloop_exit means believe the exit code (gotcha A37).
 """
-import json, os, re, sys
+import bisect, json, os, re, sys
+import efffollow
+
+
+# Rule conditions. Each is callable on a text (the plain reading: does the condition hold for this window),
+# and also evaluable against a RuleEngine scan by line range, which is how triage() applies RULES: the attempt
+# is scanned once and every window is answered from the recorded match lines, instead of re-running every
+# regex over every 85-line window (they overlap, so the same text was scanned dozens of times).
+class Pattern:
+    """`regex` (or the literal `text`) matches somewhere. LINE-LOCAL unless spans_lines: the pattern cannot
+    match a newline (no DOTALL, no \\s, no negated class without \\n), so it holds for a window exactly when it
+    matches one of the window's lines. Get this wrong and the engine and the plain reading disagree."""
+
+    def __init__(self, regex, literal=False, spans_lines=False):
+        self.regex = re.compile(re.escape(regex) if literal else regex)
+        self.spans_lines = spans_lines
+
+    def __call__(self, text):
+        return self.regex.search(text) is not None
+
+    def atoms(self):
+        return [self]
+
+    def holds(self, scan, lo, hi):
+        return scan.found(self, lo, hi)
+
+
+class _Compound:
+    def __init__(self, *conds):
+        self.conds = conds
+
+    def atoms(self):
+        return [a for c in self.conds for a in c.atoms()]
+
+
+class AllOf(_Compound):
+    def __call__(self, text):
+        return all(c(text) for c in self.conds)
+
+    def holds(self, scan, lo, hi):
+        return all(c.holds(scan, lo, hi) for c in self.conds)
+
+
+class AnyOf(_Compound):
+    def __call__(self, text):
+        return any(c(text) for c in self.conds)
+
+    def holds(self, scan, lo, hi):
+        return any(c.holds(scan, lo, hi) for c in self.conds)
+
+
+class Not(_Compound):
+    def __call__(self, text):
+        return not self.conds[0](text)
+
+    def holds(self, scan, lo, hi):
+        return not self.conds[0].holds(scan, lo, hi)
+
+
+def has(regex, spans_lines=False):
+    return Pattern(regex, spans_lines=spans_lines)
+
+
+def text(s):
+    return Pattern(s, literal=True)
+
 
 # (id, gotcha, one-line cause, what to do) keyed off patterns seen in real run reports.
 # Ordered most-specific first: the first rule that matches a failure window wins the headline.
@@ -42,8 +109,8 @@ RULES = [
         "with COMPOSE_ON_ALL_NODES_BY_TAG_WITH_CHILD_TEXT_ON_FIRST.",
         # match the TRACE phrasing (what mozWaitUntilAbsent / mozVerifyElementStaysAbsent log), not the
         # thrown-exception wording — the latter only appears in the FAILURES header and the stack.
-        lambda w: re.search(r"still present after \d+ms|appeared before \d+ms elapsed", w)
-        or "was expected to disappear but is still visible" in w,
+        AnyOf(has(r"still present after \d+ms"), has(r"appeared before \d+ms elapsed"),
+              text("was expected to disappear but is still visible")),
     ),
     (
         "T1", "A39",
@@ -51,7 +118,7 @@ RULES = [
         "The run reported arrival on a page it never reached, so a later step failed instead. After a "
         "query submit use mozWaitUntilAbsent(TOOLBAR_IN_EDIT_MODE) before the next hop; when backing "
         "out, anchor on something genuinely occluded (MAIN_MENU_BUTTON), not HOMEPAGE_VIEW.",
-        lambda w: re.search(r"already (visible|loaded)", w) and re.search(r"\[ERR\].*(Enter text failed|Click .* failed)", w),
+        AllOf(has(r"already (visible|loaded)"), has(r"\[ERR\].*(Enter text failed|Click .* failed)")),
     ),
     (
         "T2", "A22/A27",
@@ -59,7 +126,7 @@ RULES = [
         "clickAndSync reports a slow-but-successful click as a failure (a dialog dismissal, a toolbar "
         "swap that staled the node). Use mozClickIfPresent, or a UiObject2 strategy "
         "(UIAUTOMATOR2_BY_TEXT / UIAUTOMATOR2_BY_RAW_RES).",
-        lambda w: "Failed to click UiObject" in w,
+        text("Failed to click UiObject"),
     ),
     (
         "T3", "mozEnterText locate",
@@ -67,7 +134,7 @@ RULES = [
         "'found (0.0 ms)' is not evidence: mozGetElement returns the lazy SemanticsNodeInteraction "
         "without asserting. Only mozVerify / mozWaitUntilAbsent do a real assertExists + "
         "assertIsDisplayed. Put an explicit mozVerify before typing.",
-        lambda w: re.search(r"found \(0\.0 ms\)", w) and "Enter text failed" in w,
+        AllOf(has(r"found \(0\.0 ms\)"), text("Enter text failed")),
     ),
     (
         "T4", "A41",
@@ -80,8 +147,7 @@ RULES = [
         # "Can't retrieve node at index '0'" are Compose's ZERO-match messages, which say nothing about
         # ambiguity -- they appear in T1-arrival-timeout, T7-multi and T2-selector-surface, so matching them
         # here would confidently misdiagnose three labelled runs as A41 if T4 were ever ordered earlier.
-        lambda w: re.search(r"but found '[2-9]\d*' nodes", w)
-        or re.search(r"expected 1, found [2-9]", w),
+        AnyOf(has(r"but found '[2-9]\d*' nodes"), has(r"expected 1, found [2-9]")),
     ),
     (
         "T5", "A9/F1",
@@ -92,8 +158,9 @@ RULES = [
         # The status bar is itself a SYSTEM window, so the "non-application window(s) present" warning
         # appears in nearly every dump and this rule used to fire on almost any not-found. Require that
         # the app does NOT hold focus: if an APPLICATION window is active+focused, nothing is masking it.
-        lambda w: "non-application window(s) present" in w and "not found" in w
-        and not re.search(r"type=APPLICATION \[[^\]]*focused", w),
+        # `[^\]]*` crosses newlines, so that pattern is evaluated on the window text itself.
+        AllOf(text("non-application window(s) present"), text("not found"),
+              Not(has(r"type=APPLICATION \[[^\]]*focused", spans_lines=True))),
     ),
     (
         "T6", "A40",
@@ -101,7 +168,7 @@ RULES = [
         "UiObject.longClick() is not held long enough for some View rows, so the row treats it as a "
         "click. Select the row with an ESPRESSO_* strategy so mozLongClick goes through Espresso's "
         "longClick(), which honours the platform long-press timeout.",
-        lambda w: "Long clicked" in w and re.search(r"\[ERR\]", w),
+        AllOf(text("Long clicked"), text("[ERR]")),
     ),
     (
         "T7", "A29/A30",
@@ -109,8 +176,8 @@ RULES = [
         "findPath started from the page the tracker still believed you were on. A SearchBar->anything "
         "path TYPES A URL; a Browser->Home path clicks 'New tab'. Re-anchor with an explicit "
         "navigateToPage on the page you are actually on before the next hop.",
-        lambda w: re.search(r"Navigation path found from '(SearchBarComponent|BrowserPage)'", w)
-        and re.search(r"EnterText|New tab", w),
+        AllOf(has(r"Navigation path found from '(SearchBarComponent|BrowserPage)'"),
+              AnyOf(text("EnterText"), text("New tab"))),
     ),
     (
         "T8", "A3/A42",
@@ -119,7 +186,7 @@ RULES = [
         "a caption on a child is invisible to a tag-scoped text query. Conversely a bare text match can "
         "hit an unrelated surface (the Pocket sponsored story owns its own 'Sponsored' label). Assert "
         "the text node directly, or scope to the container with a tag+child-text strategy.",
-        lambda w: re.search(r"No '.*' (found )?containing text", w),
+        has(r"No '.*' (found )?containing text"),
     ),
     (
         "T9", "A6",
@@ -133,8 +200,8 @@ RULES = [
         # "Navigation to 'X' failed" is emitted only when the step dies with an exception (BasePage.kt:191).
         # The second branch is the weak one — any window pairing a nav poll with a timed-out locate — so it
         # stays last.
-        lambda w: re.search(r"Navigation to '.*' failed", w)
-        or (re.search(r"not visible yet", w) and re.search(r"\[ERR\].*not found after \d+ms", w)),
+        AnyOf(has(r"Navigation to '.*' failed"),
+              AllOf(text("not visible yet"), has(r"\[ERR\].*not found after \d+ms"))),
     ),
     (
         "T14", "A46",
@@ -157,7 +224,7 @@ RULES = [
         # BOTH state words: A46's whole point is that the state is `selected` rather than `checked`, so its
         # own recommended fix (mozVerifyElementIsSelected) emits "is not selected" -- which this rule could
         # not see until 2026-08-13, meaning the gotcha silently stopped applying the moment you followed it.
-        lambda w: re.search(r"\[ERR\][^\n]*' is (?:not )?(?:checked|selected)", w),
+        has(r"\[ERR\][^\n]*' is (?:not )?(?:checked|selected)"),
     ),
     # LAST on purpose, and deliberately narrow. An earlier, looser version of this rule keyed on
     # "not found", which appears in almost every failing trace, and it stole the diagnosis from six
@@ -172,8 +239,7 @@ RULES = [
         "with the destination's own title, or a generic control like Navigate up. mozIsOnPageNow() then "
         "reports arrival before any click happens. Pick an anchor that exists ONLY on the destination "
         "(and needs no scrolling); read the [uiautomator] block to confirm which screen you were on.",
-        lambda w: re.search(r"already (?:visible|loaded)", w)
-        and "missing required elements" in w,
+        AllOf(has(r"already (?:visible|loaded)"), text("missing required elements")),
     ),
     (
         "T15", "A48",
@@ -188,7 +254,7 @@ RULES = [
         "SystemSettingsPage.grantAllPendingSystemPermissions(). Beware the legacy twin: "
         "AppAndSystemHelper.assertExternalAppOpens swallows its AssertionFailedError, so the LEGACY test "
         "passes in exactly this stuck state and gives you no baseline to trust.",
-        lambda w: re.search(r"(?:Native app verification|External app assertion) failed for", w),
+        AnyOf(text("Native app verification failed for"), text("External app assertion failed for")),
     ),
 ]
 
@@ -215,7 +281,7 @@ REPORT_RULES = [
         "first suspect: a StrictMode penaltyDeath turns any local failure into an opaque crash, so the "
         "real cause is usually a normal failure that could not report itself. Cross-check effverify — "
         "crash-mode is where `outcome: pass` is itself the lie (A37/MTE-5822).",
-        lambda m: re.search(r"Test instrumentation process crashed", m),
+        text("Test instrumentation process crashed"),
     ),
     (
         "T17", "K13",
@@ -226,7 +292,7 @@ REPORT_RULES = [
         "not expect it to call. Find the method in the stack frame directly under the exception and "
         "override it too. Note this can fail the test AFTER all its assertions have passed, during "
         "teardown, which makes it read as an unrelated flake.",
-        lambda m: re.search(r"uniffiCloneHandle\(\) called on NoHandle", m),
+        text("uniffiCloneHandle() called on NoHandle"),
     ),
     (
         "T18", "A6/A45/B7",
@@ -238,7 +304,7 @@ REPORT_RULES = [
         "a View toolbar over Compose content, so the toolbar title resolves and the section header does "
         "not. Then rule out A45: an anchor that also matches the page you came FROM reports arrival early, "
         "and a destination row on the parent screen (same title text) is the classic case.",
-        lambda m: re.search(r"Failed to navigate to \w+", m),
+        has(r"Failed to navigate to \w+"),
     ),
     (
         "T19", "A56",
@@ -252,7 +318,7 @@ REPORT_RULES = [
         "— and (b) an explicit on.home.navigateToPage() hop in the test, the harness equivalent of legacy's "
         "exitMenu(). Registering the edge without the hop is not enough: findPath only searches from the "
         "CURRENT tracked page.",
-        lambda m: re.search(r"No navigation path found from '[^']+' to '[^']+'", m),
+        has(r"No navigation path found from '[^']+' to '[^']+'", spans_lines=True),
     ),
 ]
 
@@ -274,7 +340,8 @@ def attempts(report):
 
 def failure_windows(attempt, before=60, after=25):
     """Text around each [ERR] line — rules match on the window, not the bare line, because the cause
-    is usually in the preceding steps rather than the failing one."""
+    is usually in the preceding steps rather than the failing one. triage() gets the same windows from
+    RuleEngine.windows() without building them; this is the plain reading it is tested against."""
     lines = attempt.splitlines()
     out = []
     for i, l in enumerate(lines):
@@ -283,6 +350,68 @@ def failure_windows(attempt, before=60, after=25):
     return out
 
 
+class _Scan:
+    """One attempt, scanned: the lines each line-local pattern matches, by pattern."""
+
+    def __init__(self, lines, hits):
+        self.lines, self.hits = lines, hits
+
+    def found(self, pattern, lo, hi):
+        if pattern.spans_lines:  # rare, and only reached when the rest of its rule already holds
+            return pattern("\n".join(self.lines[lo:hi]))
+        h = self.hits.get(pattern.regex.pattern, ())
+        i = bisect.bisect_left(h, lo)
+        return i < len(h) and h[i] < hi
+
+
+class RuleEngine:
+    """RULES compiled once, each distinct pattern scanned over the attempt ONCE.
+
+    scan() records the lines every line-local pattern matches; windows() then answers each failure window from
+    those records by line range, keeping the rule order, so it returns exactly what failure_windows() + the
+    first matching rule would, without re-scanning the overlapping windows.
+
+    One pass per pattern rather than one pass of a single alternation of all of them: CPython's re only skips
+    ahead on a pattern's literal prefix, which an alternation of two dozen patterns does not have, so the
+    combined scan measured about 2.5x slower than the separate ones. For the same reason the rules split
+    top-level alternatives into separate patterns (AnyOf) instead of writing `a|b`.
+    """
+
+    MARKER = text("[ERR]")
+
+    def __init__(self, rules):
+        self.rules = rules
+        atoms = {a.regex.pattern: a for r in rules for a in r[4].atoms()}
+        atoms[self.MARKER.regex.pattern] = self.MARKER
+        self.local = [a for a in atoms.values() if not a.spans_lines]
+
+    def scan(self, attempt):
+        lines = attempt.splitlines()
+        # Matched on the lines re-joined with \n, as failure_windows() joins them: splitlines() also breaks on
+        # \r, \v, \x1c..., which `.` would otherwise walk across in the raw text.
+        joined = "\n".join(lines)
+        hits = {}
+        for a in self.local:
+            found, line, pos = [], 0, 0
+            for m in a.regex.finditer(joined):
+                line += joined.count("\n", pos, m.start())
+                pos = m.start()
+                if not found or found[-1] != line:
+                    found.append(line)
+            hits[a.regex.pattern] = found
+        return _Scan(lines, hits)
+
+    def windows(self, attempt, before=60, after=25):
+        """(line number, first matching rule or None) for each [ERR] line, as failure_windows() numbers them."""
+        scan = self.scan(attempt)
+        for i in scan.hits.get(self.MARKER.regex.pattern, []):
+            lo, hi = max(0, i - before), i + after
+            yield i + 1, next((r for r in self.rules if r[4].holds(scan, lo, hi)), None)
+
+
+ENGINE = RuleEngine(RULES)
+
+
 def triage(batch):
     report, status_raw = read(os.path.join(batch, "run-report.txt")), read(os.path.join(batch, "status.json"))
     # Every key main() reads is initialised here: an early return below must not be able to
@@ -413,26 +542,18 @@ def triage(batch):
     primary = "\n".join(f.get("message", "") for f in (status.get("failed") or []))
     if primary:
         for rid, gotcha, cause, fix, match in REPORT_RULES:
-            try:
-                hit = match(primary)
-            except re.error:
-                hit = False
-            if hit:
+            if match(primary):
                 res["findings"].append(
                     {"rule": rid, "gotcha": gotcha, "line": 0, "cause": cause, "fix": fix}
                 )
 
-    for lineno, window in failure_windows(atts[0]) if atts else []:
-        for rid, gotcha, cause, fix, match in RULES:
-            try:
-                hit = match(window)
-            except re.error:
-                hit = False
-            if hit:
-                res["findings"].append(
-                    {"rule": rid, "gotcha": gotcha, "line": lineno, "cause": cause, "fix": fix}
-                )
-                break  # most-specific rule wins for this failure
+    # most-specific rule wins for each failure window
+    for lineno, rule in ENGINE.windows(atts[0]) if atts else []:
+        if rule:
+            rid, gotcha, cause, fix, _ = rule
+            res["findings"].append(
+                {"rule": rid, "gotcha": gotcha, "line": lineno, "cause": cause, "fix": fix}
+            )
 
     # de-dup repeated identical diagnoses, keeping the earliest occurrence
     seen, uniq = set(), []
@@ -444,6 +565,52 @@ def triage(batch):
     return res
 
 
+def follow_run(batch, as_json):
+    """--follow: triage each attempt that failed the moment it ends, until the run is over.
+
+    The window rules run on the attempt alone, once. The report-level rules, the notes and the first-attempt
+    diagnosis need status.json, so they are triage()'s, given once the run is over.
+    """
+    def say(event):
+        if as_json:
+            print(json.dumps({"tool": "efftriage", **event}), flush=True)
+        elif event["event"] == "replaced":
+            print("  — run-report.txt was replaced by a new run; following it from the top", flush=True)
+        else:
+            print(f"  ▸ {event['test'] or '?'} try #{event['try']}: {event['status']}"
+                  + ("" if event["findings"] or event["status"] == "passed" else " — no rule matched"), flush=True)
+            for f in event["findings"]:
+                print(f"      [{f['rule']}] line {f['line']} — gotcha {f['gotcha']}: {f['cause']}", flush=True)
+
+    def attempts(closed):
+        for att in closed:
+            status, findings = efffollow.outcome(att), []
+            if status == "crashed":
+                findings.append({"rule": "T10", "gotcha": "A37", "line": 0,
+                                 "cause": "the test CRASHED (uncaught exception), it did not fail an assertion"})
+            if status != "passed":           # a passing attempt's [ERR] lines are non-fatal; see triage()
+                seen = {f["rule"] for f in findings}
+                for lineno, rule in ENGINE.windows(att.text):
+                    if rule and rule[0] not in seen:
+                        seen.add(rule[0])
+                        findings.append({"rule": rule[0], "gotcha": rule[1], "line": lineno, "cause": rule[2]})
+            say({"event": "attempt", "test": att.test, "try": att.number, "status": status, "findings": findings})
+
+    if not as_json:
+        print(f"efftriage --follow — {batch}", flush=True)
+    split = efffollow.Attempts()
+    try:
+        for line in efffollow.follow(batch):
+            if line is None:
+                split = efffollow.Attempts()
+                say({"event": "replaced"})
+                continue
+            attempts(split.feed(line))
+    except KeyboardInterrupt:
+        pass
+    attempts(split.close())
+
+
 def _tae_version():
     """Version of the whole tae-conversion toolchain (tools + docs are stamped together).
 
@@ -462,11 +629,13 @@ def main():
     if "--version" in sys.argv[1:]:
         print(f"{os.path.basename(__file__)} \u2014 tae-conversion {_tae_version()}")
         sys.exit(0)
-    args = [a for a in sys.argv[1:] if a != "--json"]
+    args = [a for a in sys.argv[1:] if a not in ("--json", "--follow")]
     as_json = "--json" in sys.argv[1:]
     if not args:
-        print("usage: efftriage.py <batchdir> [--json]")
+        print("usage: efftriage.py <batchdir> [--json] [--follow]")
         sys.exit(2)
+    if "--follow" in sys.argv[1:]:
+        follow_run(args[0], as_json)
     res = triage(args[0])
 
     if as_json:
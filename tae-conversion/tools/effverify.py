@@ -10,11 +10,14 @@ failed. This confirms each EXPECTED test actually executed and passed:
   - and (cross-check) is not marked SKIPPED/FAILED in the raw gradle log.
 
 Usage:
-  effverify.py <batchdir> <TestNameA> [TestNameB ...]
+  effverify.py [--json] [--follow] <batchdir> <TestNameA> [TestNameB ...]
      <batchdir> holds run-report.txt (+ optionally raw-run.log). Test names are the bare method names.
+     --follow: while effloop is still running, say how each attempt of each test went the moment it ends
+     (efffollow.py), then give the verdict below once the run is over (or on Ctrl-C, on what ran so far).
 Exit 0 only if every expected test is confirmed PASSED; non-zero otherwise.
 """
 import os, re, sys, json
+import efffollow
 
 def _tae_version():
     """Version of the whole tae-conversion toolchain (tools + docs are stamped together).
@@ -30,16 +33,67 @@ def _tae_version():
         return "unknown"
 
 
+def follow_run(batch, as_json):
+    """--follow: one line per test attempt as it ends, and per skipped test, until the run is over.
+
+    Live and per attempt only: whether a test is DONE still needs every block, the FAILURES header and the
+    raw log, so that verdict is main()'s, given once the run is over.
+    """
+    labels = {"passed": "✔ {t} try #{n}: passed", "failed": "✖ {t} try #{n}: FAILED",
+              "crashed": "✖ {t} try #{n}: CRASHED (uncaught exception)",
+              "unknown": "? {t} try #{n}: ended with no verdict"}
+
+    def say(event):
+        if as_json:
+            print(json.dumps({"tool": "effverify", **event}), flush=True)
+        elif event["event"] == "skipped":
+            print(f"  ⚠ {event['test']}: SKIPPED/ignored — NOT a pass", flush=True)
+        elif event["event"] == "replaced":
+            print("  — run-report.txt was replaced by a new run; following it from the top", flush=True)
+        else:
+            line = labels[event["status"]].format(t=event["test"] or "?", n=event["try"])
+            if event["status"] == "failed" and event["retried"]:
+                line += " — retrying"
+            elif event["status"] == "passed" and event["try"] > 1:
+                line += " on a retry — flaky, NOT clean-done"
+            print("  " + line, flush=True)
+
+    def attempts(closed):
+        for att in closed:
+            say({"event": "attempt", "test": att.test, "try": att.number, "status": efffollow.outcome(att),
+                 "retried": att.end == "retry"})
+
+    if not as_json:
+        print(f"effverify --follow — {batch}", flush=True)
+    split = efffollow.Attempts()
+    try:
+        for line in efffollow.follow(batch):
+            if line is None:
+                split = efffollow.Attempts()
+                say({"event": "replaced"})
+                continue
+            mark = efffollow.MARK_RE.match(line)
+            if mark and mark.group(1) == "ignored":
+                say({"event": "skipped", "test": mark.group(2)})
+            attempts(split.feed(line))
+    except KeyboardInterrupt:
+        pass
+    attempts(split.close())
+
+
 def main():
     if "--version" in sys.argv[1:]:
         print(f"{os.path.basename(__file__)} \u2014 tae-conversion {_tae_version()}")
         sys.exit(0)
     args = sys.argv[1:]
     as_json = "--json" in args
-    args = [a for a in args if a != "--json"]
+    live = "--follow" in args
+    args = [a for a in args if a not in ("--json", "--follow")]
     if len(args) < 2:
-        print("usage: effverify.py [--json] <batchdir> <TestName> [TestName ...]"); sys.exit(2)
+        print("usage: effverify.py [--json] [--follow] <batchdir> <TestName> [TestName ...]"); sys.exit(2)
     batch, expected = args[0], args[1:]
+    if live:
+        follow_run(batch, as_json)
     rr = os.path.join(batch, "run-report.txt")
     raw = os.path.join(batch, "raw-run.log")
     if not os.path.isfile(rr):
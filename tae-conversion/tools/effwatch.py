@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+effwatch — the queue daemon that closes the conversion loop. Run it ONCE on YOUR machine (effwatch.sh
+launches it); leave it running with the device/emulator attached.
+
+Same protocol, same whitelists as the shell loop it replaces:
+  Claude writes  conversion-runs/_queue/<id>.request.json
+    { "test_class": "...", "batch": "...", "mach_args": "...?" }   → effloop.sh on YOUR toolchain + device
+    { "git": "<action>", ... }                                      → effgit.py  (report in _git/)
+    { "bug": "<action>", ... }                                      → effbug.py  (report in _bug/)
+  effwatch claims it (rename to <id>.claimed — idempotent if two watchers), runs it, then writes
+           conversion-runs/_queue/<id>.done.json   and removes the claim.
+  It only ever runs those fixed commands with whitelisted values; it never executes text from a request.
+
+What changed from the shell loop, and why:
+  - It reacts to a new request immediately: inotify on Linux, kqueue on macOS, else a --poll sleep. The
+    shell loop woke every POLL (4) seconds and forked a python3 per request FIELD it read, so a request
+    waited up to 4s per hop before anything ran. The queue is still rescanned every --poll seconds, so a
+    missed event costs latency, never a request.
+  - Each request is parsed once. A file that is not (yet) valid JSON is left alone while it is fresh —
+    the writer may still be writing it — and answered with an error once it is --settle seconds old.
+  - Lanes. Device runs are serialised (one device; two gradle builds on it read as flakiness, MTE-5768).
+    Bug requests (network only) run concurrently, up to --bug-jobs at a time. Git requests run one at a
+    time (one repo), alongside everything else when they only read (status/log/diff); any other git
+    action waits for the device lane to be idle, because a checkout/rebase under a running build changes
+    the sources it is compiling.
+  - Every done file records when the request was queued (its mtime), when it started, and the
+    difference: "latency_s", request-to-start.
+
+Usage:  effwatch.py [--runs DIR] [--poll 4] [--watch auto|inotify|kqueue|poll] [--once]
+Stop:   Ctrl-C. Requests claimed but not started are put back in the queue.
+"""
+import argparse, concurrent.futures, ctypes, ctypes.util, datetime, glob, json, os, re, select, subprocess, \
+    sys, threading, time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))   # NOT realpath: the queue follows the launch path
+CLASS_RE = re.compile(r"^[A-Za-z0-9_.#]+$")          # FQN and #method targeting
+BATCH_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+MACH_ARGS_RE = re.compile(r"^[A-Za-z0-9 ._=:/-]+$")  # never shell metacharacters; passed as env MACH_ARGS
+READ_ONLY_GIT = {"status", "log", "diff"}
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _ts(t):
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class PollWait:
+    """Fallback: nothing to watch with, so just sleep the timeout."""
+    kind = "poll"
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+class InotifyWait:
+    """Linux. Wakes when a file is finished in, or moved into, the queue directory."""
+    kind = "inotify"
+    IN_CLOSE_WRITE, IN_MOVED_TO = 0x008, 0x080
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0 or libc.inotify_add_watch(
+                self.fd, os.fsencode(path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            raise OSError(ctypes.get_errno(), "inotify unavailable")
+
+    def wait(self, timeout):
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 65536):   # drain; the queue is rescanned, events carry nothing we need
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class KqueueWait:
+    """macOS/BSD. Wakes when the queue directory's entries change."""
+    kind = "kqueue"
+
+    def __init__(self, path):
+        self.dir_fd = os.open(path, os.O_RDONLY)
+        self.kq = select.kqueue()
+        self.event = select.kevent(self.dir_fd, filter=select.KQ_FILTER_VNODE,
+                                   flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR, fflags=select.KQ_NOTE_WRITE)
+
+    def wait(self, timeout):
+        self.kq.control([self.event], 1, timeout)
+
+    def close(self):
+        self.kq.close()
+        os.close(self.dir_fd)
+
+
+def waiter(path, kind="auto"):
+    """The best way available to wait for the queue to change, falling back to polling."""
+    kinds = {"inotify": [InotifyWait], "kqueue": [KqueueWait], "poll": []}.get(kind, [InotifyWait, KqueueWait])
+    for cls in kinds:
+        try:
+            return cls(path)
+        except (OSError, AttributeError):   # AttributeError: no inotify symbol / no select.kqueue here
+            continue
+    return PollWait()
+
+
+class Watcher:
+    def __init__(self, runs, tools=TOOLS, bug_jobs=4, settle=2.0, env=None, log=print):
+        self.runs, self.tools, self.settle = runs, tools, settle
+        self.queue = os.path.join(runs, "_queue")
+        self.env = dict(os.environ if env is None else env, RUNS=runs)
+        self.log = log
+        self.device = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="device")
+        self.git = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="git")
+        self.bug = concurrent.futures.ThreadPoolExecutor(bug_jobs, thread_name_prefix="bug")
+        self.repo_lock = threading.Lock()   # device runs, and git actions that touch the working tree
+        self.pending = {}                   # id -> (future, claimed path)
+        self.lock = threading.Lock()
+
+    # ── queue ───────────────────────────────────────────────────────────────
+    def scan(self):
+        """Claim and dispatch every request in the queue. Returns how many are still settling."""
+        settling = 0
+        for path in sorted(glob.glob(os.path.join(self.queue, "*.request.json")), key=_mtime):
+            rid = os.path.basename(path)[:-len(".request.json")]
+            try:
+                queued = _mtime(path)
+                with open(path, encoding="utf-8") as fh:
+                    req = json.load(fh)
+                if not isinstance(req, dict):
+                    raise ValueError("not a JSON object")
+            except FileNotFoundError:
+                continue                     # another watcher claimed it
+            except ValueError as e:
+                if time.time() - queued < self.settle:
+                    settling += 1            # possibly still being written; look again shortly
+                    continue
+                req = {"_error": f"invalid request json: {e}"}
+            claimed = os.path.join(self.queue, rid + ".claimed")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            self.dispatch(rid, req, claimed, queued)
+        return settling
+
+    def dispatch(self, rid, req, claimed, queued):
+        if req.get("git"):
+            lane, run = self.git, self.run_git
+        elif req.get("bug"):
+            lane, run = self.bug, self.run_bug
+        else:
+            lane, run = self.device, self.run_test
+        with self.lock:
+            future = lane.submit(self._run, run, rid, req, claimed, queued)
+            self.pending[rid] = (future, claimed)
+        future.add_done_callback(lambda _: self._forget(rid))
+
+    def _forget(self, rid):
+        with self.lock:
+            self.pending.pop(rid, None)
+
+    def _run(self, run, rid, req, claimed, queued):
+        started = _now()
+        timing = {"queued": _ts(datetime.datetime.fromtimestamp(queued, datetime.timezone.utc)),
+                  "started": _ts(started), "latency_s": round(max(0.0, started.timestamp() - queued), 3)}
+        try:
+            if "_error" in req:
+                done = {"id": rid, "error": req["_error"]}
+            else:
+                done = run(rid, req, claimed)
+        except Exception as e:   # a crashed dispatcher must still answer, or the requester waits forever
+            done = {"id": rid, "error": f"effwatch: {type(e).__name__}: {e}"}
+        done.update(timing, ts=_ts(_now()))
+        self._write_done(rid, done)
+        try:
+            os.remove(claimed)
+        except OSError:
+            pass
+        self.log(f"effwatch: [{rid}] done → {rid}.done.json ({timing['latency_s']}s to start)")
+        return done
+
+    def _write_done(self, rid, done):
+        tmp = os.path.join(self.queue, f".{rid}.done.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(done) + "\n")
+        os.replace(tmp, os.path.join(self.queue, rid + ".done.json"))   # never observed half-written
+
+    # ── request kinds ───────────────────────────────────────────────────────
+    def run_git(self, rid, req, claimed):
+        action = str(req["git"])
+        os.makedirs(os.path.join(self.runs, "_git"), exist_ok=True)
+        self.log(f"effwatch: [{rid}] git: {action}")
+        cmd = [sys.executable, os.path.join(self.tools, "effgit.py"), claimed,
+               os.path.join(self.runs, "_git", f"{rid}.git-report.txt")]
+        if action in READ_ONLY_GIT:
+            code = subprocess.run(cmd, env=self.env).returncode
+        else:
+            with self.repo_lock:
+                code = subprocess.run(cmd, env=self.env).returncode
+        return {"id": rid, "kind": "git", "action": action, "exit": code,
+                "report": f"conversion-runs/_git/{rid}.git-report.txt"}
+
+    def run_bug(self, rid, req, claimed):
+        action = str(req["bug"])
+        os.makedirs(os.path.join(self.runs, "_bug"), exist_ok=True)
+        self.log(f"effwatch: [{rid}] bug: {action}")
+        code = subprocess.run([sys.executable, os.path.join(self.tools, "effbug.py"), claimed,
+                               os.path.join(self.runs, "_bug", f"{rid}.bug-report.txt")], env=self.env).returncode
+        return {"id": rid, "kind": "bug", "action": action, "exit": code,
+                "report": f"conversion-runs/_bug/{rid}.bug-report.txt",
+                "result": f"conversion-runs/_bug/{rid}.bug-result.json"}
+
+    def run_test(self, rid, req, claimed):
+        cls, batch, mach_args = (str(req.get(k) or "") for k in ("test_class", "batch", "mach_args"))
+        if not CLASS_RE.match(cls):
+            return {"id": rid, "error": "invalid test_class"}
+        batch = batch if BATCH_RE.match(batch) else "adhoc"
+        if mach_args and not MACH_ARGS_RE.match(mach_args):
+            return {"id": rid, "error": "invalid mach_args"}
+        env = dict(self.env, MACH_ARGS=mach_args) if mach_args else self.env
+        self.log(f"effwatch: [{rid}] running {cls} (batch={batch})…")
+        with self.repo_lock:
+            code = subprocess.run([os.path.join(self.tools, "effloop.sh"), cls, batch], env=env).returncode
+        return {"id": rid, "test": cls, "batch": batch, "effloop_exit": code, "reports": f"conversion-runs/{batch}"}
+
+    # ── lifecycle ───────────────────────────────────────────────────────────
+    def idle(self):
+        with self.lock:
+            return not self.pending
+
+    def shutdown(self, wait=True):
+        """Stop the lanes. Requests claimed but not yet started go back in the queue."""
+        with self.lock:
+            pending = list(self.pending.items())
+        for rid, (future, claimed) in pending:
+            if future.cancel():
+                try:
+                    os.rename(claimed, os.path.join(self.queue, rid + ".request.json"))
+                except OSError:
+                    pass
+        for lane in (self.device, self.git, self.bug):
+            lane.shutdown(wait=wait)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+def watch(watcher, poll=4.0, kind="auto", once=False):
+    """Scan, then wait for the queue to change (or --poll seconds), forever; --once returns when idle."""
+    os.makedirs(watcher.queue, exist_ok=True)
+    w = waiter(watcher.queue, kind)
+    watcher.log(f"effwatch: watching {watcher.queue} ({w.kind}, rescan every {poll:g}s). Leave running. "
+                "Ctrl-C to stop.")
+    try:
+        while True:
+            settling = watcher.scan()
+            if once and not settling and watcher.idle():
+                return
+            w.wait(min(poll, 0.2) if settling or once else poll)
+    finally:
+        w.close()
+
+
+def _tae_version():
+    """Version of the whole tae-conversion toolchain (tools + docs are stamped together).
+
+    realpath, not __file__: these tools are commonly invoked through symlinks from another checkout's
+    tools/ dir, and an unresolved path would look for VERSION in the wrong repo and report "unknown"
+    exactly where a staleness check matters most.
+    """
+    p = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "VERSION")
+    try:
+        return open(p).read().strip()
+    except OSError:
+        return "unknown"
+
+
+def main():
+    if "--version" in sys.argv[1:]:
+        print(f"{os.path.basename(__file__)} — tae-conversion {_tae_version()}")
+        sys.exit(0)
+    ap = argparse.ArgumentParser(description="queue daemon: runs queued effloop/effgit/effbug requests")
+    ap.add_argument("--runs", default=os.environ.get("RUNS") or os.path.join(os.path.dirname(TOOLS), "conversion-runs"),
+                    help="conversion-runs dir; the queue is its _queue/ (default: next to this tools/ dir)")
+    ap.add_argument("--poll", type=float, default=float(os.environ.get("POLL", 4)),
+                    help="rescan interval in seconds, and the wait when no event source exists (default: 4)")
+    ap.add_argument("--watch", choices=("auto", "inotify", "kqueue", "poll"), default="auto")
+    ap.add_argument("--bug-jobs", type=int, default=4, help="bug requests run at once (default: 4)")
+    ap.add_argument("--settle", type=float, default=2.0,
+                    help="seconds an unparsable request is given to finish being written (default: 2)")
+    ap.add_argument("--once", action="store_true", help="drain the queue, wait for the work, exit")
+    a = ap.parse_args()
+    watcher = Watcher(os.path.abspath(a.runs), bug_jobs=a.bug_jobs, settle=a.settle,
+                      log=lambda m: print(m, flush=True))
+    try:
+        watch(watcher, a.poll, a.watch, a.once)
+        watcher.shutdown()
+    except KeyboardInterrupt:
+        print("effwatch: stopping; requests not yet started go back in the queue", flush=True)
+        watcher.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
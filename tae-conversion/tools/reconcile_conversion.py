@@ -25,8 +25,13 @@ USAGE:
   detail_ab.tsv = TAB-separated "Class<TAB>Method" rows in the exact order they appear in
   the Detail tab (row 2 downward), fetched via the Sheets connector each run so alignment
   is always against live sheet order (never positional guessing).
+
+  The parse results are kept in the effindex SQLite index ($XDG_CACHE_HOME/eff), so a re-run
+  re-parses only the files that changed; --no-index parses everything afresh.
 """
-import os, re, glob, csv, json, argparse, sys
+import os, glob, csv, json, argparse, sys
+
+from effindex import ConversionIndex, efficiency_tests_in, legacy_tests_in
 
 def find_ui_dir():
     for base in ("/sessions",):
@@ -35,60 +40,22 @@ def find_ui_dir():
     return None
 
 def parse_legacy(ui_dir):
-    """Return ordered list of dicts: Class, Method, smoke, ignored, has_replacedBy, replacedBy_target."""
+    """Return ordered list of dicts: Class, Method, smoke, ignored, has_replacedBy, replacedBy_target, testrail.
+
+    A fresh parse of every file; main() asks the effindex index instead, which re-parses only what changed."""
     rows = []
     for path in sorted(glob.glob(os.path.join(ui_dir, "*.kt"))):
-        lines = open(path, encoding="utf-8", errors="replace").read().split("\n")
-        cls = None
-        for l in lines:
-            m = re.search(r'\bclass\s+(\w+)', l)
-            if m:
-                cls = m.group(1); break
-        if not cls:
-            cls = os.path.basename(path)[:-3]
-        n = len(lines); i = 0
-        while i < n:
-            mfun = re.search(r'\bfun\s+(`[^`]+`|[A-Za-z_]\w*)\s*\(', lines[i])
-            if mfun:
-                # gather contiguous annotation/comment block above (balanced parens/brackets)
-                j = i - 1; block = []; running = 0
-                while j >= 0:
-                    raw = lines[j]; t = raw.strip()
-                    bal = raw.count("(") + raw.count("[") - raw.count(")") - raw.count("]")
-                    is_ann = t.startswith("@") or t.startswith("//") or t.startswith("*") or t.startswith("/*") or t.endswith("*/")
-                    if is_ann or running != 0 or bal != 0:
-                        block.insert(0, raw); running += bal; j -= 1; continue
-                    break
-                blk = "\n".join(block)
-                if "@Test" in blk:
-                    method = mfun.group(1).strip("`")
-                    rb = re.search(r'replacedBy\s*=\s*\[(.*?)\]', blk, re.DOTALL)
-                    rb_target = ""
-                    if rb:
-                        mt = re.search(r'efficiency\.tests\.[A-Za-z0-9_]+#[A-Za-z0-9_]+', rb.group(1))
-                        rb_target = mt.group(0) if mt else rb.group(1).strip().strip('"')
-                    rows.append({
-                        "Class": cls, "Method": method,
-                        "smoke": "@SmokeTest" in blk,
-                        "ignored": "@Ignore" in blk,
-                        "has_replacedBy": bool(rb),
-                        "replacedBy_target": rb_target,
-                    })
-            i += 1
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            rows += legacy_tests_in(fh.read(), path)
     return rows
 
 def parse_efficiency(ui_dir):
-    """Return set of @Test method names in the efficiency suite."""
+    """Return set of @Test method names in the efficiency suite (a fresh parse, like parse_legacy)."""
     eff_dir = os.path.join(ui_dir, "efficiency", "tests")
     names = set()
     for path in glob.glob(os.path.join(eff_dir, "*.kt")):
-        lines = open(path, encoding="utf-8", errors="replace").read().split("\n")
-        for i, l in enumerate(lines):
-            if "@Test" in l:
-                for k in range(i, min(i + 6, len(lines))):
-                    m = re.search(r'\bfun\s+(`[^`]+`|[A-Za-z_]\w*)\s*\(', lines[k])
-                    if m:
-                        names.add(m.group(1).strip("`")); break
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            names |= efficiency_tests_in(fh.read())
     return names
 
 def _tae_version():
@@ -114,18 +81,25 @@ def main():
     ap.add_argument("--sheet-tsv", default=None, help="TSV Class<TAB>Method in Detail-tab order")
     ap.add_argument("--out-json", default=None)
     ap.add_argument("--out-csv", default=None)
+    ap.add_argument("--no-index", action="store_true",
+                    help="parse every file afresh instead of using the effindex index in $XDG_CACHE_HOME/eff")
     args = ap.parse_args()
 
     ui_dir = args.ui_dir or find_ui_dir()
     if not ui_dir or not os.path.isdir(ui_dir):
         sys.exit(f"UI dir not found: {ui_dir}")
 
-    legacy = parse_legacy(ui_dir)
-    eff_names = parse_efficiency(ui_dir)
-
-    for r in legacy:
-        r["conv_name"] = r["Method"] in eff_names
-        r["converted"] = r["has_replacedBy"] or r["conv_name"]
+    if args.no_index:
+        legacy = parse_legacy(ui_dir)
+        eff_names = parse_efficiency(ui_dir)
+        for r in legacy:
+            r["conv_name"] = r["Method"] in eff_names
+            r["converted"] = r["has_replacedBy"] or r["conv_name"]
+    else:
+        index = ConversionIndex(ui_dir)
+        legacy = index.conversion_status()
+        eff_names = index.efficiency_tests()
+        index.close()
 
     # stats
     tot = len(legacy)
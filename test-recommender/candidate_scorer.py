@@ -13,6 +13,8 @@ Score components (additive):
   +50   exact match (Automated Test Name references a file changed in this release)
   +30   the test's section maps to a touched module in the top quartile of LOC
   +20   the test's section maps to a module that has any risk signal attached
+  +10   the test's section maps to a module touched in N of the last K releases
+        (needs the release-history store; see release_history.py)
   +10   automation status is manual-only ("Unsuitable" or "Untriaged")
   -20   automation status is "Completed" (CI already covers it)
 
@@ -21,7 +23,9 @@ Ties are broken deterministically by test ID to keep output stable.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from release_history import HOTSPOT_MIN_RELEASES
 
 
 # =============================================================================
@@ -36,6 +40,7 @@ class ScoringContext:
     high_loc_modules: set[str]                    # top-quartile of touched modules
     sections_with_risk: set[str]                  # section_top names with an associated risk
     section_to_touched_modules: dict[str, set[str]]  # section_top → set of touched module paths
+    recurring_modules: set[str] = field(default_factory=set)  # touched modules that also changed in recent releases
 
 
 # =============================================================================
@@ -59,6 +64,7 @@ def build_scoring_context(
     module_changes: dict,           # module_path → ModuleChange
     risks: list,                    # RiskSignal list
     mapping: dict,                  # the section_to_module_mapping YAML content
+    module_history: dict | None = None,   # module_path → prior releases touching it (release_history)
 ) -> ScoringContext:
     """Compute the lookup structures used by score_candidate.
 
@@ -96,11 +102,16 @@ def build_scoring_context(
             if any(loc.startswith(tm.rstrip("/") + "/") or loc == tm for tm in touched_modules):
                 sections_with_risk.add(section_name)
 
+    # Modules that keep changing: touched now and in N of the last K releases.
+    recurring_modules = {m for m, n in (module_history or {}).items()
+                         if m in module_changes and n >= HOTSPOT_MIN_RELEASES}
+
     return ScoringContext(
         exact_match_ids=exact_match_ids,
         high_loc_modules=high_loc_modules,
         sections_with_risk=sections_with_risk,
         section_to_touched_modules=section_to_touched,
+        recurring_modules=recurring_modules,
     )
 
 
@@ -112,6 +123,7 @@ def build_scoring_context(
 SCORE_EXACT_MATCH = 50
 SCORE_HIGH_LOC_MODULE = 30
 SCORE_RISK_ASSOCIATION = 20
+SCORE_RECURRING_MODULE = 10
 SCORE_MANUAL_ONLY = 10
 SCORE_CI_COMPLETED = -20
 
@@ -134,6 +146,9 @@ def score_candidate(tc, ctx: ScoringContext) -> int:
     if tc.section_top in ctx.sections_with_risk:
         score += SCORE_RISK_ASSOCIATION
 
+    if touched and any(m in ctx.recurring_modules for m in touched):
+        score += SCORE_RECURRING_MODULE
+
     if tc.automation in ("Unsuitable", "Untriaged"):
         score += SCORE_MANUAL_ONLY
     elif tc.automation == "Completed":
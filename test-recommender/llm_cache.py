@@ -0,0 +1,161 @@
+"""
+Local response cache for the LLM rerank and synthesize stages.
+
+Anthropic's prompt cache is ephemeral (5 minutes) and only discounts input
+tokens — every run still pays for a full generation, and two runs over the
+same tag pair return different rankings (~55% Jaccard overlap between runs,
+see metrics_baseline.md). Re-running the same release for a dry run, a
+report-format tweak or a CI retry should not do either.
+
+This module stores each LLM response on disk, keyed by a SHA-256 of
+everything that determines the output:
+
+  - stage ("rerank" / "synthesize")
+  - model name
+  - rendered system prompt
+  - user payload (the candidate / release JSON)
+  - output schema and generation parameters (effort, temperature, ...)
+
+Any change to one of those produces a new key, so editing a prompt or
+switching model never returns a stale answer.
+
+Modes (RECOMMEND_LLM_CACHE env var or --llm-cache):
+  on       read from the cache, call the API on a miss and store the result (default)
+  off      never read or write the cache
+  refresh  always call the API and overwrite the stored entry
+  replay   read only; a miss never calls the API and falls back to the
+           deterministic path. Works without ANTHROPIC_API_KEY, so tests
+           and offline report iterations are fully reproducible.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+CACHE_MODES = ("on", "off", "refresh", "replay")
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".llm_cache"
+
+# Bump when the on-disk entry layout changes; old entries are then ignored.
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CacheStats:
+    """Counters surfaced in the verbose log at the end of a run."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    by_stage: dict[str, list[str]] = field(default_factory=dict)   # stage → ["hit" / "miss" / "write", ...]
+
+    def record(self, stage: str, outcome: str) -> None:
+        if outcome == "hit":
+            self.hits += 1
+        elif outcome == "miss":
+            self.misses += 1
+        else:
+            self.writes += 1
+        self.by_stage.setdefault(stage, []).append(outcome)
+
+    def summary_line(self) -> str:
+        stages = ", ".join(f"{s}={'+'.join(r)}" for s, r in self.by_stage.items()) or "no lookups"
+        return f"hits={self.hits} misses={self.misses} writes={self.writes} ({stages})"
+
+
+def cache_key(stage: str, model: str, system: str, user_text: str, params: Optional[dict] = None) -> str:
+    """Stable hash of every input that determines an LLM response.
+
+    `params` holds the schema and generation settings; it is serialised with
+    sorted keys so dict ordering never changes the key."""
+    material = json.dumps(
+        {
+            "v": CACHE_FORMAT_VERSION,
+            "stage": stage,
+            "model": model,
+            "system": system,
+            "user": user_text,
+            "params": params or {},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed store of LLM responses, one JSON file per entry
+    under `<cache_dir>/<stage>/<key>.json`. Safe to share between the
+    threads of a sharded rerank: entries are distinct files and the stats
+    are updated under a lock."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, mode: str = "on") -> None:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"unknown LLM cache mode {mode!r} (expected one of {', '.join(CACHE_MODES)})")
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.mode = mode
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, mode: Optional[str] = None, cache_dir: Optional[Path] = None) -> "ResponseCache":
+        """Build from explicit values, falling back to RECOMMEND_LLM_CACHE and
+        RECOMMEND_LLM_CACHE_DIR."""
+        mode = mode or os.environ.get("RECOMMEND_LLM_CACHE", "on")
+        env_dir = os.environ.get("RECOMMEND_LLM_CACHE_DIR")
+        return cls(cache_dir or (Path(env_dir) if env_dir else None), mode=mode)
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.cache_dir / stage / f"{key}.json"
+
+    def get(self, stage: str, key: str) -> Optional[dict]:
+        """Return the stored response payload, or None on a miss. Always a
+        miss in `off` and `refresh` modes. Unreadable entries count as misses."""
+        if self.mode in ("off", "refresh"):
+            if self.mode == "refresh":
+                self._record(stage, "miss")
+            return None
+        path = self._path(stage, key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            entry = None
+        if not entry or entry.get("version") != CACHE_FORMAT_VERSION:
+            self._record(stage, "miss")
+            return None
+        self._record(stage, "hit")
+        return entry["response"]
+
+    def put(self, stage: str, key: str, model: str, response: dict) -> None:
+        """Store a response. No-op in `off` and `replay` modes. Written via a
+        temp file + rename so a killed run never leaves a truncated entry."""
+        if self.mode in ("off", "replay"):
+            return
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "stage": stage,
+            "model": model,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": response,
+        }
+        tmp = path.with_suffix(f".json.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        self._record(stage, "write")
+
+    def _record(self, stage: str, outcome: str) -> None:
+        with self._lock:
+            self.stats.record(stage, outcome)
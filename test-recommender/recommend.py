@@ -16,11 +16,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import math
 import os
 import re
 import subprocess
 import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
@@ -39,6 +42,13 @@ from candidate_scorer import (
     build_scoring_context,
     pre_filter_candidates,
 )
+from llm_cache import CACHE_MODES, ResponseCache, cache_key
+from release_history import (
+    DEFAULT_HISTORY_PATH,
+    HOTSPOT_MIN_RELEASES,
+    HOTSPOT_WINDOW,
+    ReleaseHistory,
+)
 
 try:
     import anthropic
@@ -358,9 +368,14 @@ def patch_added_lines(patch: str) -> str:
     return "\n".join(out)
 
 
-def detect_risks(prs: list[PR], file_changes: list[FileChange]) -> list[RiskSignal]:
+def detect_risks(prs: list[PR], file_changes: list[FileChange],
+                 file_history: Optional[dict[str, int]] = None) -> list[RiskSignal]:
     """Compute deterministic risk signals from PR-level and file-level heuristics.
 
+    `file_history` (path → releases among the last HOTSPOT_WINDOW that
+    touched it, from ReleaseHistory.file_touch_counts) adds a `hotspot`
+    signal for product files that keep changing release after release.
+
     NOTE: RiskSignal.location has an undocumented-but-load-bearing contract
     used by candidate_scorer.build_scoring_context. It must be either:
       - "PR #N"           → PR-level, skipped by the scorer's section mapping
@@ -400,6 +415,18 @@ def detect_risks(prs: list[PR], file_changes: list[FileChange]) -> list[RiskSign
                 risks.append(RiskSignal("error_handling", "low", fc.path,
                                         f"error-handling changes ({fc.additions} added lines)"))
 
+    # History-aware signal: files touched again after changing in N of the
+    # last K releases. Medium, not high — churn alone should not bump the
+    # budget, but it should attract the section-risk score boost.
+    if file_history:
+        for fc in file_changes:
+            if is_noise_path(fc.path) or is_test_path(fc.path):
+                continue
+            n = file_history.get(fc.path, 0)
+            if n >= HOTSPOT_MIN_RELEASES:
+                risks.append(RiskSignal("hotspot", "medium", fc.path,
+                                        f"also touched in {n} of the last {HOTSPOT_WINDOW} releases"))
+
     # Release-level signals (deps + nimbus)
     touched_paths = {fc.path for fc in file_changes}
     for dep in DEPENDENCY_PATHS:
@@ -823,17 +850,15 @@ def _drift_for_prompt(analysis: Analysis) -> list[dict]:
     return [{"kind": d.kind, "item": d.item, "detail": d.detail} for d in analysis.drift]
 
 
-def _deterministic_rerank(analysis: Analysis) -> list[RankedTest]:
-    """Fallback when LLM unavailable. Rough heuristic ordering by sub_suite and
-    automation status — not a substitute for the LLM, but better than nothing.
-    Respects the release-specific budget ceiling."""
-    candidates, _ = _candidates_for_prompt(analysis)
+def _rank_deterministically(candidates: list[TestCase], cap: int) -> list[RankedTest]:
+    """Rough heuristic ordering by sub_suite and automation status, truncated
+    to `cap`. Shared by the whole-pool fallback and the per-shard fallback."""
     # Smoke & Sanity is filtered out upstream in _candidates_for_prompt.
     suite_order = {"Functional": 0, "Special Case": 1}
     auto_order = {"Unsuitable": 0, "Untriaged": 1, "Suitable": 2, "Disabled": 3, "Completed": 4}
-    candidates.sort(key=lambda tc: (suite_order.get(tc.sub_suite, 9), auto_order.get(tc.automation, 9)))
+    candidates = sorted(candidates, key=lambda tc: (suite_order.get(tc.sub_suite, 9), auto_order.get(tc.automation, 9)))
     out: list[RankedTest] = []
-    for tc in candidates[:analysis.budget.final_hi]:
+    for tc in candidates[:cap]:
         # crude priority: manual-only = P1 (must be run by humans), automated = P2
         if tc.automation in ("Unsuitable", "Untriaged"):
             prio = "P1"
@@ -844,16 +869,35 @@ def _deterministic_rerank(analysis: Analysis) -> list[RankedTest]:
     return out
 
 
-def llm_rerank(analysis: Analysis) -> tuple[list[RankedTest], str]:
-    """Call the configured rerank model (LLM_MODEL_RERANK) to prioritize
-    candidates. Returns (ranked, notes). Falls back to deterministic ranker
-    on any failure. Uses analysis.budget to size the request."""
-    if not _llm_available():
-        return _deterministic_rerank(analysis), ""
+def _deterministic_rerank(analysis: Analysis) -> list[RankedTest]:
+    """Fallback when LLM unavailable. Rough heuristic ordering by sub_suite and
+    automation status — not a substitute for the LLM, but better than nothing.
+    Respects the release-specific budget ceiling."""
+    candidates, _ = _candidates_for_prompt(analysis)
+    return _rank_deterministically(candidates, analysis.budget.final_hi)
 
-    candidates, compact = _candidates_for_prompt(analysis)
-    if not compact:
-        return [], ""
+
+@dataclass
+class _RerankResult:
+    """One rerank request's outcome. `usage` is all zeros on a cache hit."""
+    ranked: list[RankedTest]
+    notes: str
+    usage: dict[str, int]
+    seconds: float
+
+
+def _rerank_request(analysis: Analysis, candidates: list[TestCase], compact: list[dict],
+                    budget_lo: int, budget_hi: int, cache: Optional[ResponseCache] = None,
+                    shard: Optional[dict] = None) -> Optional[_RerankResult]:
+    """Send one rerank request for `compact` and parse the answer. Returns
+    None on any failure (API error, non-JSON, replay miss) so the caller can
+    fall back to the deterministic ranker for exactly the candidates it sent.
+
+    `shard` (index / of / sections) is added to the payload when the pool is
+    split across several requests, so the model knows it only sees a slice."""
+    started = time.monotonic()
+    label = "rerank" if shard is None else f"rerank shard {shard['index']}/{shard['of']}"
+    replay = cache is not None and cache.replay
 
     user_payload = {
         "release": {"from": analysis.from_tag, "to": analysis.to_tag},
@@ -862,8 +906,17 @@ def llm_rerank(analysis: Analysis) -> tuple[list[RankedTest], str]:
         "drift": _drift_for_prompt(analysis),
         "candidates": compact,
     }
+    instruction = "Rank the candidates for this release. Use the rubric in the system prompt.\n\n"
+    if shard is not None:
+        user_payload["shard"] = shard
+        instruction = (
+            "Rank the candidates for this release. Use the rubric in the system prompt.\n"
+            f"This request covers shard {shard['index']} of {shard['of']}: only the candidates from the sections "
+            "listed under `shard.sections`. Other sections are ranked separately; the budget in the system "
+            "prompt is this shard's share of the release budget.\n\n"
+        )
     user_text = (
-        "Rank the candidates for this release. Use the rubric in the system prompt.\n\n"
+        instruction +
         "## Release data (JSON)\n"
         f"```json\n{json.dumps(user_payload, separators=(',', ':'))}\n```"
     )
@@ -882,8 +935,8 @@ def llm_rerank(analysis: Analysis) -> tuple[list[RankedTest], str]:
     # `{budget_hi}` placeholders come from Phase 2. Everything else in the
     # prompt is stable, so the cached prefix is still hit.
     prompt_rendered = SYSTEM_PROMPT_RERANK.format(
-        budget_lo=analysis.budget.final_lo,
-        budget_hi=analysis.budget.final_hi,
+        budget_lo=budget_lo,
+        budget_hi=budget_hi,
     )
 
     kwargs: dict = {
@@ -902,30 +955,57 @@ def llm_rerank(analysis: Analysis) -> tuple[list[RankedTest], str]:
     if "sonnet-5" not in model_lc and "opus-4-8" not in model_lc:
         kwargs["temperature"] = 0
 
-    try:
-        # max_retries=6 so the SDK rides out 30k-TPM rolling-window resets (~60s).
-        client = anthropic.Anthropic(max_retries=6)
-        response = client.messages.create(**kwargs)
-    except anthropic.APIStatusError as e:
-        sys.stderr.write(f"[recommend] LLM rerank failed ({e.status_code}): {e.message}\n")
-        return _deterministic_rerank(analysis), ""
-    except Exception as e:
-        sys.stderr.write(f"[recommend] LLM rerank failed: {e}\n")
-        return _deterministic_rerank(analysis), ""
+    # The key covers everything sent except the cache_control marker:
+    # generation params and the schema live in `kwargs`, the prompt and the
+    # payload are hashed verbatim.
+    key = ""
+    parsed: Optional[dict] = None
+    usage = {"input": 0, "cache_write": 0, "cache_read": 0, "output": 0}
+    if cache is not None:
+        key = cache_key(
+            "rerank", LLM_MODEL_RERANK, prompt_rendered, user_text,
+            {k: v for k, v in kwargs.items() if k not in ("model", "system", "messages")},
+        )
+        parsed = cache.get("rerank", key)
+        if parsed is None and replay:
+            sys.stderr.write(f"[recommend] LLM {label}: no cached response in replay mode — using deterministic ranker\n")
+            return None
 
-    sys.stderr.write(
-        f"[recommend]   rerank usage: input={response.usage.input_tokens} "
-        f"cache_write={response.usage.cache_creation_input_tokens} "
-        f"cache_read={response.usage.cache_read_input_tokens} "
-        f"output={response.usage.output_tokens}\n"
-    )
+    if parsed is None:
+        try:
+            # max_retries=6 so the SDK rides out 30k-TPM rolling-window resets (~60s).
+            client = anthropic.Anthropic(max_retries=6)
+            response = client.messages.create(**kwargs)
+        except anthropic.APIStatusError as e:
+            sys.stderr.write(f"[recommend] LLM {label} failed ({e.status_code}): {e.message}\n")
+            return None
+        except Exception as e:
+            sys.stderr.write(f"[recommend] LLM {label} failed: {e}\n")
+            return None
+
+        usage = {
+            "input": response.usage.input_tokens,
+            "cache_write": response.usage.cache_creation_input_tokens or 0,
+            "cache_read": response.usage.cache_read_input_tokens or 0,
+            "output": response.usage.output_tokens,
+        }
+        sys.stderr.write(
+            f"[recommend]   {label} usage: input={usage['input']} "
+            f"cache_write={usage['cache_write']} "
+            f"cache_read={usage['cache_read']} "
+            f"output={usage['output']}\n"
+        )
 
-    text = next((b.text for b in response.content if b.type == "text"), "")
-    try:
-        parsed = json.loads(text)
-    except json.JSONDecodeError as e:
-        sys.stderr.write(f"[recommend] LLM rerank returned non-JSON: {e}\n")
-        return _deterministic_rerank(analysis), ""
+        text = next((b.text for b in response.content if b.type == "text"), "")
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError as e:
+            sys.stderr.write(f"[recommend] LLM {label} returned non-JSON: {e}\n")
+            return None
+        # Only well-formed responses are stored, so a replay can never
+        # reproduce a parse failure.
+        if cache is not None:
+            cache.put("rerank", key, LLM_MODEL_RERANK, parsed)
 
     valid_ids = {tc.id for tc in candidates}
     ranked: list[RankedTest] = []
@@ -940,22 +1020,148 @@ def llm_rerank(analysis: Analysis) -> tuple[list[RankedTest], str]:
     # at most `budget_hi`, but some models (notably Haiku 4.5) do not respect
     # the instruction reliably. Enforce it here so downstream consumers can
     # trust the length regardless of model.
-    hard_cap = analysis.budget.final_hi
-    if len(ranked) > hard_cap:
+    if len(ranked) > budget_hi:
         sys.stderr.write(
-            f"[recommend] rerank returned {len(ranked)} tests, over the budget "
-            f"ceiling {hard_cap}. Trimming to first {hard_cap} (order preserved).\n"
+            f"[recommend] {label} returned {len(ranked)} tests, over the budget "
+            f"ceiling {budget_hi}. Trimming to first {budget_hi} (order preserved).\n"
         )
-        ranked = ranked[:hard_cap]
+        ranked = ranked[:budget_hi]
+
+    return _RerankResult(ranked=ranked, notes=parsed.get("notes", ""), usage=usage,
+                         seconds=time.monotonic() - started)
+
+
+# Sharded rerank (opt-in). A major release sends up to budget_hi × 4 ≈ 640
+# candidates in one request, which is one long generation. Splitting the pool
+# by TestRail section into N shards and ranking them concurrently trades a
+# little repeated context (module/risk/drift summaries go to every shard) for
+# N shorter generations in parallel. 0 or 1 keeps the single-request path.
+RERANK_SHARDS = int(os.environ.get("RECOMMEND_RERANK_SHARDS", "0"))
+RERANK_PARALLELISM = int(os.environ.get("RECOMMEND_RERANK_PARALLELISM", "4"))
+
+PRIORITY_ORDER = {"P0": 0, "P1": 1, "P2": 2}
+
+
+def _shard_candidates(compact: list[dict], n_shards: int) -> list[list[int]]:
+    """Partition candidate indices into at most `n_shards` groups without
+    splitting a section across shards.
+
+    Sections are placed largest first onto the currently smallest shard
+    (ties: lower shard index, then section name), so the split is balanced
+    and identical for identical input. Indices inside a shard keep the
+    pre-filter's score order."""
+    by_section: dict[str, list[int]] = defaultdict(list)
+    for i, c in enumerate(compact):
+        by_section[c["section"]].append(i)
+
+    shards: list[list[int]] = [[] for _ in range(min(n_shards, len(by_section)))]
+    for section in sorted(by_section, key=lambda s: (-len(by_section[s]), s)):
+        target = min(range(len(shards)), key=lambda j: (len(shards[j]), j))
+        shards[target].extend(by_section[section])
+    return [sorted(shard) for shard in shards if shard]
+
+
+def _shard_budget(lo: int, hi: int, shard_size: int, total: int) -> tuple[int, int]:
+    """Split the release budget proportionally to the shard's candidate count.
+    Ceiling on `hi` so rounding never starves a shard; the merged list is
+    capped at the release `hi` afterwards."""
+    share = shard_size / total
+    shard_hi = max(1, min(shard_size, math.ceil(hi * share)))
+    shard_lo = max(1, min(shard_hi, round(lo * share)))
+    return shard_lo, shard_hi
+
+
+def _sharded_rerank(analysis: Analysis, candidates: list[TestCase], compact: list[dict], n_shards: int,
+                    cache: Optional[ResponseCache] = None,
+                    parallelism: int = RERANK_PARALLELISM) -> tuple[list[RankedTest], str]:
+    """Rerank the pool as concurrent per-section shards and merge.
+
+    A failed shard falls back to the deterministic ranker for its own
+    candidates only; the other shards keep their LLM ranking. The merge is
+    independent of completion order: priority first, then the pre-filter
+    `score`, then test ID."""
+    started = time.monotonic()
+    shards = _shard_candidates(compact, n_shards)
+    lo, hi = analysis.budget.final_lo, analysis.budget.final_hi
+
+    def run(index: int, members: list[int]) -> tuple[list[RankedTest], str, Optional[_RerankResult]]:
+        shard_candidates = [candidates[i] for i in members]
+        shard_compact = [compact[i] for i in members]
+        shard_lo, shard_hi = _shard_budget(lo, hi, len(members), len(compact))
+        sections = sorted({c["section"] for c in shard_compact})
+        result = _rerank_request(
+            analysis, shard_candidates, shard_compact, shard_lo, shard_hi, cache,
+            shard={"index": index + 1, "of": len(shards), "sections": sections},
+        )
+        if result is None:
+            return _rank_deterministically(shard_candidates, shard_hi), "", None
+        notes = f"[{', '.join(sections)}] {result.notes}" if result.notes else ""
+        return result.ranked, notes, result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(shards)))) as pool:
+        outcomes = list(pool.map(lambda pair: run(*pair), enumerate(shards)))
+
+    score_of = {c["id"]: c["score"] for c in compact}
+    merged = [r for ranked, _, _ in outcomes for r in ranked]
+    merged.sort(key=lambda r: (PRIORITY_ORDER[r.priority], -score_of.get(r.test_id, 0), r.test_id))
+    if len(merged) > hi:
+        merged = merged[:hi]
+
+    results = [res for _, _, res in outcomes if res is not None]
+    totals = {k: sum(res.usage[k] for res in results) for k in ("input", "cache_write", "cache_read", "output")}
+    sys.stderr.write(
+        f"[recommend]   rerank shards: {len(shards)} (sizes {'/'.join(str(len(s)) for s in shards)}), "
+        f"parallelism={min(parallelism, len(shards))}, "
+        f"{len(shards) - len(results)} fell back, "
+        f"wall={time.monotonic() - started:.1f}s "
+        f"slowest={max((res.seconds for res in results), default=0.0):.1f}s "
+        f"sum={sum(res.seconds for res in results):.1f}s, "
+        f"input={totals['input']} cache_write={totals['cache_write']} "
+        f"cache_read={totals['cache_read']} output={totals['output']}\n"
+    )
+    notes = "\n".join(n for _, n, _ in outcomes if n)
+    return merged, notes
+
+
+def llm_rerank(analysis: Analysis, cache: Optional[ResponseCache] = None,
+               shards: Optional[int] = None) -> tuple[list[RankedTest], str]:
+    """Call the configured rerank model (LLM_MODEL_RERANK) to prioritize
+    candidates. Returns (ranked, notes). Falls back to deterministic ranker
+    on any failure. Uses analysis.budget to size the request.
+
+    With a `cache`, an identical request (same model, prompt, candidates and
+    schema) returns the stored ranking without calling the API. In replay
+    mode the API is never called, so no key is needed.
+
+    `shards` > 1 (default: RECOMMEND_RERANK_SHARDS) splits the pool by
+    section into concurrent requests; see _sharded_rerank."""
+    replay = cache is not None and cache.replay
+    if not _llm_available() and not replay:
+        return _deterministic_rerank(analysis), ""
+
+    candidates, compact = _candidates_for_prompt(analysis)
+    if not compact:
+        return [], ""
 
-    return ranked, parsed.get("notes", "")
+    n_shards = RERANK_SHARDS if shards is None else shards
+    if n_shards > 1 and len({c["section"] for c in compact}) > 1:
+        return _sharded_rerank(analysis, candidates, compact, n_shards, cache)
 
+    result = _rerank_request(analysis, candidates, compact,
+                             analysis.budget.final_lo, analysis.budget.final_hi, cache)
+    if result is None:
+        return _rank_deterministically(candidates, analysis.budget.final_hi), ""
+    return result.ranked, result.notes
 
-def llm_synthesize(analysis: Analysis, ranked: list[RankedTest], notes: str, test_index: dict[str, TestCase]) -> str:
+
+def llm_synthesize(analysis: Analysis, ranked: list[RankedTest], notes: str, test_index: dict[str, TestCase],
+                   cache: Optional[ResponseCache] = None) -> str:
     """Call the configured synthesize model (LLM_MODEL_SYNTHESIZE) to write
     the full Markdown report. Falls back to deterministic Markdown if LLM is
-    unavailable or fails."""
-    if not _llm_available():
+    unavailable or fails. Only the LLM-written body is cached; the header is
+    rebuilt on every run."""
+    replay = cache is not None and cache.replay
+    if not _llm_available() and not replay:
         return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
 
     # Enrich ranked tests with title/section/automation so the LLM has full context.
@@ -1006,36 +1212,54 @@ def llm_synthesize(analysis: Analysis, ranked: list[RankedTest], notes: str, tes
         f"```json\n{json.dumps(user_payload, separators=(',', ':'))}\n```"
     )
 
-    try:
-        client = anthropic.Anthropic(max_retries=6)
-        with client.messages.stream(
-            model=LLM_MODEL_SYNTHESIZE,
-            max_tokens=16000,
-            thinking={"type": "disabled"},
-            output_config={"effort": "medium"},
-            system=[{
-                "type": "text",
-                "text": SYSTEM_PROMPT_SYNTHESIZE,
-                "cache_control": {"type": "ephemeral"},
-            }],
-            messages=[{"role": "user", "content": user_text}],
-        ) as stream:
-            final = stream.get_final_message()
-    except anthropic.APIStatusError as e:
-        sys.stderr.write(f"[recommend] LLM synthesize failed ({e.status_code}): {e.message}\n")
-        return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
-    except Exception as e:
-        sys.stderr.write(f"[recommend] LLM synthesize failed: {e}\n")
-        return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
+    params: dict = {
+        "max_tokens": 16000,
+        "thinking": {"type": "disabled"},
+        "output_config": {"effort": "medium"},
+    }
 
-    sys.stderr.write(
-        f"[recommend]   synth usage: input={final.usage.input_tokens} "
-        f"cache_write={final.usage.cache_creation_input_tokens} "
-        f"cache_read={final.usage.cache_read_input_tokens} "
-        f"output={final.usage.output_tokens}\n"
-    )
+    key = ""
+    cached: Optional[dict] = None
+    if cache is not None:
+        key = cache_key("synthesize", LLM_MODEL_SYNTHESIZE, SYSTEM_PROMPT_SYNTHESIZE, user_text, params)
+        cached = cache.get("synthesize", key)
+        if cached is None and replay:
+            sys.stderr.write("[recommend] LLM synthesize: no cached response in replay mode — using deterministic writer\n")
+            return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
+
+    if cached is not None:
+        body = cached["body"]
+    else:
+        try:
+            client = anthropic.Anthropic(max_retries=6)
+            with client.messages.stream(
+                model=LLM_MODEL_SYNTHESIZE,
+                system=[{
+                    "type": "text",
+                    "text": SYSTEM_PROMPT_SYNTHESIZE,
+                    "cache_control": {"type": "ephemeral"},
+                }],
+                messages=[{"role": "user", "content": user_text}],
+                **params,
+            ) as stream:
+                final = stream.get_final_message()
+        except anthropic.APIStatusError as e:
+            sys.stderr.write(f"[recommend] LLM synthesize failed ({e.status_code}): {e.message}\n")
+            return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
+        except Exception as e:
+            sys.stderr.write(f"[recommend] LLM synthesize failed: {e}\n")
+            return render_deterministic_report(analysis, [test_index[r.test_id] for r in ranked if r.test_id in test_index])
+
+        sys.stderr.write(
+            f"[recommend]   synth usage: input={final.usage.input_tokens} "
+            f"cache_write={final.usage.cache_creation_input_tokens} "
+            f"cache_read={final.usage.cache_read_input_tokens} "
+            f"output={final.usage.output_tokens}\n"
+        )
 
-    body = next((b.text for b in final.content if b.type == "text"), "").strip()
+        body = next((b.text for b in final.content if b.type == "text"), "").strip()
+        if cache is not None and body:
+            cache.put("synthesize", key, LLM_MODEL_SYNTHESIZE, {"body": body})
 
     # Prepend the drift warning + budget line (both deterministic, must
     # always be visible regardless of LLM output).
@@ -1154,11 +1378,17 @@ def render_deterministic_report(analysis: Analysis, ranked_tests: list[TestCase]
 # =============================================================================
 
 
-def run_pipeline(from_tag: str, to_tag: str, testrail_path: Path, mapping_path: Path, output_path: Path, verbose: bool = False) -> None:
+def run_pipeline(from_tag: str, to_tag: str, testrail_path: Path, mapping_path: Path, output_path: Path, verbose: bool = False,
+                 cache: Optional[ResponseCache] = None, rerank_shards: Optional[int] = None,
+                 history_path: Optional[Path] = DEFAULT_HISTORY_PATH) -> None:
     def vlog(msg: str) -> None:
         if verbose:
             print(f"[recommend] {msg}", file=sys.stderr)
 
+    if cache is None:
+        cache = ResponseCache.from_env()
+    vlog(f"LLM response cache: mode={cache.mode} dir={cache.cache_dir}")
+
     vlog("loading mapping + testrail export …")
     mapping = load_mapping(mapping_path)
     tests = load_testrail(testrail_path)
@@ -1187,13 +1417,21 @@ def run_pipeline(from_tag: str, to_tag: str, testrail_path: Path, mapping_path:
     drift = detect_drift(file_changes, tests, mapping)
     vlog(f"  {len(drift)} drift findings")
 
+    history = ReleaseHistory(history_path) if history_path else None
+    file_history: dict[str, int] = {}
+    if history:
+        file_history = history.file_touch_counts([fc.path for fc in file_changes], to_tag)
+        vlog(f"release history: {len(history.releases_before(to_tag))} prior releases in window, "
+             f"{len(file_history)} of this release's files touched before")
+
     vlog("computing risk heuristics …")
-    risks = detect_risks(kept_prs, file_changes)
+    risks = detect_risks(kept_prs, file_changes, file_history)
     vlog(f"  {len(risks)} risk signals ({sum(1 for r in risks if r.severity=='high')} high)")
 
     vlog("grouping files by module …")
     module_changes, unclassified = group_by_module(file_changes, kept_prs, mapping)
     vlog(f"  {len(module_changes)} modules touched, {len(unclassified)} unclassified files")
+    module_history = history.module_touch_counts(module_changes.keys(), to_tag) if history else {}
 
     vlog("matching tests (exact, by automated test name) …")
     exact = exact_match_by_test_file(file_changes, tests)
@@ -1220,9 +1458,10 @@ def run_pipeline(from_tag: str, to_tag: str, testrail_path: Path, mapping_path:
          f"(bump=+{budget.bump}: {budget.bump_reasons or 'none'})")
 
     vlog("building scoring context (Phase 3 pre-filter) …")
-    scoring_context = build_scoring_context(exact, module_changes, risks, mapping)
+    scoring_context = build_scoring_context(exact, module_changes, risks, mapping, module_history)
     vlog(f"  {len(scoring_context.high_loc_modules)} high-LOC modules, "
-         f"{len(scoring_context.sections_with_risk)} sections with risk signal")
+         f"{len(scoring_context.sections_with_risk)} sections with risk signal, "
+         f"{len(scoring_context.recurring_modules)} recurring modules")
 
     analysis = Analysis(
         from_tag=from_tag, to_tag=to_tag,
@@ -1243,18 +1482,28 @@ def run_pipeline(from_tag: str, to_tag: str, testrail_path: Path, mapping_path:
     vlog(f"pre-filter: {raw_pool_size} candidates → top {min(top_k, raw_pool_size)} (budget_hi × 4 = {top_k})")
 
     vlog("LLM rerank …")
-    ranked, rerank_notes = llm_rerank(analysis)
+    rerank_started = time.monotonic()
+    ranked, rerank_notes = llm_rerank(analysis, cache, shards=rerank_shards)
+    vlog(f"  rerank took {time.monotonic() - rerank_started:.1f}s")
     vlog(f"  {len(ranked)} tests ranked (P0={sum(1 for r in ranked if r.priority=='P0')}, "
          f"P1={sum(1 for r in ranked if r.priority=='P1')}, "
          f"P2={sum(1 for r in ranked if r.priority=='P2')})")
 
     vlog("LLM synthesize …")
     test_index = {tc.id: tc for tc in tests}
-    report = llm_synthesize(analysis, ranked, rerank_notes, test_index)
+    report = llm_synthesize(analysis, ranked, rerank_notes, test_index, cache)
+    if cache.mode != "off":
+        vlog(f"LLM response cache: {cache.stats.summary_line()}")
 
     output_path.write_text(report)
     print(f"wrote {output_path}  ({len(report)} chars)")
 
+    if history:
+        module_of = {fc.path: m for m, mc in module_changes.items() for fc in mc.files}
+        history.record_release(from_tag, to_tag, file_changes, kept_prs, risks, ranked, module_of=module_of.get)
+        vlog(f"recorded release in {history.path} ({history.release_count()} release pairs stored)")
+        history.close()
+
 
 def main() -> None:
     p = argparse.ArgumentParser(description="Firefox iOS Test Recommender")
@@ -1264,10 +1513,23 @@ def main() -> None:
     p.add_argument("--mapping", required=True, type=Path, help="Path to section_to_module_mapping.yaml")
     p.add_argument("--output", type=Path, default=None, help="Output Markdown path (default: release_report_<to_tag>.md)")
     p.add_argument("--verbose", "-v", action="store_true")
+    p.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH,
+                   help="Release-history SQLite database (default: release_history.sqlite next to this script)")
+    p.add_argument("--no-history", action="store_true",
+                   help="Neither read nor record release history for this run")
+    p.add_argument("--rerank-shards", type=int, default=None,
+                   help="Split the rerank pool by section into N concurrent requests "
+                        "(default: $RECOMMEND_RERANK_SHARDS or 0 = single request)")
+    p.add_argument("--llm-cache", choices=CACHE_MODES, default=None,
+                   help="LLM response cache mode (default: $RECOMMEND_LLM_CACHE or 'on')")
+    p.add_argument("--llm-cache-dir", type=Path, default=None,
+                   help="LLM response cache directory (default: $RECOMMEND_LLM_CACHE_DIR or .llm_cache/)")
     args = p.parse_args()
 
     output = args.output or Path(f"release_report_{args.to_tag}.md")
-    run_pipeline(args.from_tag, args.to_tag, args.testrail, args.mapping, output, verbose=args.verbose)
+    cache = ResponseCache.from_env(mode=args.llm_cache, cache_dir=args.llm_cache_dir)
+    run_pipeline(args.from_tag, args.to_tag, args.testrail, args.mapping, output, verbose=args.verbose, cache=cache,
+                 rerank_shards=args.rerank_shards, history_path=None if args.no_history else args.history)
 
 
 if __name__ == "__main__":
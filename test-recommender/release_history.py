@@ -0,0 +1,367 @@
+"""
+Release-history store for the test recommender.
+
+Every recommend.py run used to start from scratch: which files and modules
+a release touched, which PRs and risk signals it had and which tests were
+ranked were thrown away with the process. That makes "hotspot" a
+single-release notion — a file changed in five consecutive releases looks
+exactly like a file changed once.
+
+This module keeps that history in a local SQLite database (stdlib only, one
+file, gitignored) with one row per release pair and indexed child tables:
+
+  releases       from_tag, to_tag, release type, sortable version key
+  file_changes   path, module, additions, deletions        (indexed on path, module)
+  prs            number, title, author, additions, deletions
+  risks          kind, severity, location, detail          (indexed on location)
+  ranked_tests   test ID, priority, reason, rank           (indexed on test ID)
+
+recommend.py queries it for two history-aware signals — a `hotspot` risk
+for files touched in N of the last K releases, and a scorer boost for
+sections whose modules keep being touched — and records every run. The
+`ingest` command backfills past tag pairs from a local firefox-ios clone:
+
+    python3 release_history.py ingest --repo ~/src/firefox-ios \\
+        --tags firefox-v148.0 firefox-v149.0 firefox-v150.0 firefox-v151.0
+
+Like candidate_scorer, the store only needs plain attributes (`.path`,
+`.number`, `.kind`, ...) from the records it is given, so it has no
+reverse dependency on recommend.py; only `ingest` imports it, lazily.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from budget_calculator import BRANCH_RE, TAG_RE, detect_release_type
+
+
+DEFAULT_HISTORY_PATH = Path(__file__).resolve().parent / "release_history.sqlite"
+
+# History-aware signal thresholds: "touched in at least N of the last K
+# releases". K=6 is roughly a quarter of minor releases; N=3 means the file
+# or module changed in half of them.
+HOTSPOT_WINDOW = 6
+HOTSPOT_MIN_RELEASES = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    id           INTEGER PRIMARY KEY,
+    from_tag     TEXT NOT NULL,
+    to_tag       TEXT NOT NULL,
+    release_type TEXT NOT NULL,
+    version_key  TEXT,                 -- zero-padded, sorts like the version; NULL if unparseable
+    source       TEXT NOT NULL,        -- "recommend" | "ingest"
+    recorded_at  REAL NOT NULL,
+    UNIQUE (from_tag, to_tag)
+);
+CREATE INDEX IF NOT EXISTS releases_version ON releases (version_key);
+
+CREATE TABLE IF NOT EXISTS file_changes (
+    release_id INTEGER NOT NULL REFERENCES releases (id) ON DELETE CASCADE,
+    path       TEXT NOT NULL,
+    module     TEXT,
+    additions  INTEGER NOT NULL,
+    deletions  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_changes_path ON file_changes (path, release_id);
+CREATE INDEX IF NOT EXISTS file_changes_module ON file_changes (module, release_id);
+
+CREATE TABLE IF NOT EXISTS prs (
+    release_id INTEGER NOT NULL REFERENCES releases (id) ON DELETE CASCADE,
+    number     INTEGER NOT NULL,
+    title      TEXT NOT NULL,
+    author     TEXT NOT NULL,
+    additions  INTEGER NOT NULL,
+    deletions  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prs_release ON prs (release_id);
+
+CREATE TABLE IF NOT EXISTS risks (
+    release_id INTEGER NOT NULL REFERENCES releases (id) ON DELETE CASCADE,
+    kind       TEXT NOT NULL,
+    severity   TEXT NOT NULL,
+    location   TEXT NOT NULL,
+    detail     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS risks_location ON risks (location, release_id);
+
+CREATE TABLE IF NOT EXISTS ranked_tests (
+    release_id INTEGER NOT NULL REFERENCES releases (id) ON DELETE CASCADE,
+    test_id    TEXT NOT NULL,
+    priority   TEXT NOT NULL,
+    reason     TEXT NOT NULL,
+    rank       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranked_tests_test ON ranked_tests (test_id, release_id);
+"""
+
+
+def version_key(tag: str) -> Optional[str]:
+    """Sortable key for a firefox-vX.Y[.Z] tag or release/vX.Y[.Z] branch:
+    `v151.2` → "00151.00002.00000". None if the tag is unparseable."""
+    m = TAG_RE.match(tag.strip()) or BRANCH_RE.match(tag.strip())
+    if not m:
+        return None
+    parts = [int(x) if x is not None else 0 for x in m.groups()]
+    return ".".join(f"{p:05d}" for p in parts)
+
+
+class ReleaseHistory:
+    """Handle on the history database. Use as a context manager or call
+    close() — recommend.py opens it once per run."""
+
+    def __init__(self, path: Path = DEFAULT_HISTORY_PATH) -> None:
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "ReleaseHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def record_release(
+        self,
+        from_tag: str,
+        to_tag: str,
+        file_changes: Iterable,             # FileChange-like: path, additions, deletions
+        prs: Iterable = (),                 # PR-like: number, title, author, additions, deletions
+        risks: Iterable = (),               # RiskSignal-like: kind, severity, location, detail
+        ranked: Iterable = (),              # RankedTest-like: test_id, priority, reason
+        module_of: Optional[Callable[[str], Optional[str]]] = None,
+        source: str = "recommend",
+    ) -> int:
+        """Store (or replace) one release pair. Re-running the same pair —
+        a dry run, a CI retry — overwrites the previous row instead of
+        counting the release twice. Returns the release row ID."""
+        module_of = module_of or (lambda _path: None)
+        with self.conn:
+            self.conn.execute("DELETE FROM releases WHERE from_tag = ? AND to_tag = ?", (from_tag, to_tag))
+            cur = self.conn.execute(
+                "INSERT INTO releases (from_tag, to_tag, release_type, version_key, source, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (from_tag, to_tag, detect_release_type(from_tag, to_tag), version_key(to_tag), source, time.time()),
+            )
+            rid = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO file_changes (release_id, path, module, additions, deletions) VALUES (?, ?, ?, ?, ?)",
+                [(rid, fc.path, module_of(fc.path), fc.additions, fc.deletions) for fc in file_changes],
+            )
+            self.conn.executemany(
+                "INSERT INTO prs (release_id, number, title, author, additions, deletions) VALUES (?, ?, ?, ?, ?, ?)",
+                [(rid, p.number, p.title, p.author, p.additions, p.deletions) for p in prs],
+            )
+            self.conn.executemany(
+                "INSERT INTO risks (release_id, kind, severity, location, detail) VALUES (?, ?, ?, ?, ?)",
+                [(rid, r.kind, r.severity, r.location, r.detail) for r in risks],
+            )
+            self.conn.executemany(
+                "INSERT INTO ranked_tests (release_id, test_id, priority, reason, rank) VALUES (?, ?, ?, ?, ?)",
+                [(rid, r.test_id, r.priority, r.reason, i) for i, r in enumerate(ranked)],
+            )
+        return rid
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def releases_before(self, to_tag: str, k: int = HOTSPOT_WINDOW) -> list[int]:
+        """IDs of the `k` most recent stored releases strictly older than
+        `to_tag` (by version; by record time when the tag is unparseable)."""
+        key = version_key(to_tag)
+        if key is None:
+            rows = self.conn.execute(
+                "SELECT id FROM releases WHERE to_tag != ? ORDER BY recorded_at DESC LIMIT ?", (to_tag, k),
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT id FROM releases WHERE version_key < ? ORDER BY version_key DESC, recorded_at DESC LIMIT ?",
+                (key, k),
+            )
+        return [r[0] for r in rows]
+
+    def _touch_counts(self, column: str, values: Iterable[str], release_ids: list[int]) -> dict[str, int]:
+        values = sorted(set(values))
+        if not values or not release_ids:
+            return {}
+        counts: dict[str, int] = {}
+        rid_marks = ",".join("?" * len(release_ids))
+        # Chunked to stay under SQLite's bound-parameter limit on big majors.
+        for i in range(0, len(values), 500):
+            chunk = values[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT {column}, COUNT(DISTINCT release_id) FROM file_changes "
+                f"WHERE {column} IN ({','.join('?' * len(chunk))}) AND release_id IN ({rid_marks}) "
+                f"GROUP BY {column}",
+                (*chunk, *release_ids),
+            )
+            counts.update({value: n for value, n in rows})
+        return counts
+
+    def file_touch_counts(self, paths: Iterable[str], to_tag: str, k: int = HOTSPOT_WINDOW) -> dict[str, int]:
+        """path → number of the last `k` releases before `to_tag` that touched it.
+        Paths never touched are absent."""
+        return self._touch_counts("path", paths, self.releases_before(to_tag, k))
+
+    def module_touch_counts(self, modules: Iterable[str], to_tag: str, k: int = HOTSPOT_WINDOW) -> dict[str, int]:
+        """module → number of the last `k` releases before `to_tag` that
+        touched any file in it."""
+        return self._touch_counts("module", modules, self.releases_before(to_tag, k))
+
+    def release_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM releases").fetchone()[0]
+
+
+# =============================================================================
+# Backfill from a local clone
+# =============================================================================
+
+
+DIFF_FILE_RE = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+
+
+def _git(repo: Path, *args: str) -> str:
+    out = subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {out.stderr.strip()}")
+    return out.stdout
+
+
+def _git_file_changes(repo: Path, from_tag: str, to_tag: str, file_change_cls):
+    """All files changed between two tags, with per-file `-U0` patches so the
+    content risk heuristics have the same input as the compare API gives."""
+    changes = {}
+    for line in _git(repo, "diff", "--numstat", "--no-renames", f"{from_tag}...{to_tag}").splitlines():
+        adds, dels, path = line.split("\t", 2)
+        # Binary files report "-"; they carry no LOC for budget purposes.
+        changes[path] = file_change_cls(path=path, additions=int(adds) if adds != "-" else 0,
+                                        deletions=int(dels) if dels != "-" else 0)
+
+    current, buf = None, []
+    for line in _git(repo, "diff", "-U0", "--no-renames", f"{from_tag}...{to_tag}").splitlines():
+        m = DIFF_FILE_RE.match(line)
+        if m:
+            if current in changes:
+                changes[current].patch = "\n".join(buf)[:8000]
+            current, buf = m.group(2), []
+        else:
+            buf.append(line)
+    if current in changes:
+        changes[current].patch = "\n".join(buf)[:8000]
+    return list(changes.values())
+
+
+def _git_commits(repo: Path, from_tag: str, to_tag: str):
+    """Commits in from..to as git_pr_extractor.GitCommit, with per-commit LOC."""
+    from git_pr_extractor import GitCommit
+
+    commits: list[GitCommit] = []
+    log = _git(repo, "log", "--no-merges", "--numstat", "--format=%x1e%H%x1f%s%x1f%an%x1f%ae", f"{from_tag}..{to_tag}")
+    for record in log.split("\x1e")[1:]:
+        header, _, stats = record.partition("\n")
+        sha, subject, name, email = header.split("\x1f")
+        adds = dels = 0
+        for line in stats.splitlines():
+            parts = line.split("\t")
+            if len(parts) == 3:
+                adds += int(parts[0]) if parts[0] != "-" else 0
+                dels += int(parts[1]) if parts[1] != "-" else 0
+        commits.append(GitCommit(sha=sha, subject=subject, author_name=name, author_email=email,
+                                 additions=adds, deletions=dels))
+    return commits
+
+
+def ingest_pair(history: ReleaseHistory, repo: Path, from_tag: str, to_tag: str, mapping: dict) -> int:
+    """Backfill one tag pair from a local clone: files, PRs resolved from
+    commit subjects (no API fallback — unattributed commits are dropped),
+    the same deterministic risk heuristics and module classification as a
+    live run. Ranked tests are unknown for backfilled releases."""
+    import recommend
+    from git_pr_extractor import build_prs_from_git
+
+    file_changes = _git_file_changes(repo, from_tag, to_tag, recommend.FileChange)
+    extracted = build_prs_from_git(_git_commits(repo, from_tag, to_tag), recommend.REPO,
+                                   api_fetcher=lambda _path: [])
+    prs = [recommend.PR(number=p.number, title=p.title, author=p.author,
+                        additions=p.additions, deletions=p.deletions) for p in extracted.prs]
+    kept = [p for p in prs if not recommend.is_low_impact_pr(p)]
+    risks = recommend.detect_risks(kept, file_changes)
+    modules, _ = recommend.group_by_module(file_changes, kept, mapping)
+    module_of = {fc.path: m for m, mc in modules.items() for fc in mc.files}
+    return history.record_release(from_tag, to_tag, file_changes, kept, risks,
+                                  module_of=module_of.get, source="ingest")
+
+
+def _tags_matching(repo: Path, pattern: str) -> list[str]:
+    """Tags matching a glob, oldest version first; unparseable tags dropped."""
+    tags = [t for t in _git(repo, "tag", "--list", pattern).split() if version_key(t)]
+    return sorted(tags, key=version_key)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Release-history store for the test recommender")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    ing = sub.add_parser("ingest", help="Backfill consecutive tag pairs from a local firefox-ios clone")
+    ing.add_argument("--repo", required=True, type=Path, help="Path to a local firefox-ios clone (tags fetched)")
+    tags = ing.add_mutually_exclusive_group(required=True)
+    tags.add_argument("--tags", nargs="+", help="Tags in release order; each consecutive pair is ingested")
+    tags.add_argument("--tag-pattern", help="Glob for `git tag --list`, e.g. 'firefox-v15*'; sorted by version")
+    ing.add_argument("--mapping", type=Path, default=Path(__file__).resolve().parent / "section_to_module_mapping.yaml")
+    ing.add_argument("--history", type=Path, default=DEFAULT_HISTORY_PATH, help="History database path")
+
+    sub.add_parser("stats", help="Print stored release pairs").add_argument(
+        "--history", type=Path, default=DEFAULT_HISTORY_PATH)
+
+    args = p.parse_args()
+
+    if args.command == "stats":
+        with ReleaseHistory(args.history) as history:
+            for row in history.conn.execute(
+                "SELECT r.from_tag, r.to_tag, r.release_type, r.source, "
+                "(SELECT COUNT(*) FROM file_changes f WHERE f.release_id = r.id), "
+                "(SELECT COUNT(*) FROM prs p WHERE p.release_id = r.id), "
+                "(SELECT COUNT(*) FROM ranked_tests t WHERE t.release_id = r.id) "
+                "FROM releases r ORDER BY r.version_key, r.recorded_at"
+            ):
+                print("{} → {}  {:<5}  {:<9}  files={} prs={} ranked={}".format(*row))
+        return
+
+    import yaml
+
+    mapping = yaml.safe_load(args.mapping.read_text())
+    tag_list = args.tags if args.tags else _tags_matching(args.repo, args.tag_pattern)
+    if len(tag_list) < 2:
+        sys.exit("need at least two tags to form a release pair")
+    with ReleaseHistory(args.history) as history:
+        for from_tag, to_tag in zip(tag_list, tag_list[1:]):
+            started = time.monotonic()
+            try:
+                rid = ingest_pair(history, args.repo, from_tag, to_tag, mapping)
+            except RuntimeError as e:
+                sys.stderr.write(f"[history] skipped {from_tag} → {to_tag}: {e}\n")
+                continue
+            n_files = history.conn.execute("SELECT COUNT(*) FROM file_changes WHERE release_id = ?", (rid,)).fetchone()[0]
+            print(f"[history] {from_tag} → {to_tag}: {n_files} files ({time.monotonic() - started:.1f}s)")
+        print(f"[history] {history.release_count()} release pairs stored in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
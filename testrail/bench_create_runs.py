@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark creating the iOS milestone test runs against a local fake TestRail.
+
+Mirrors testrail_main_ios.py: Smoke and Full Functional runs for two
+devices, split into parts of at most 250 cases, every case set to Passed.
+
+- before: one (run, device) pair after another; each part is add_run,
+  then get_tests for the run, then one add_results with every test;
+- after: create_device_test_runs, pairs in parallel, each part is add_run
+  then add_results_for_cases with the case IDs already in hand.
+
+    python testrail/bench_create_runs.py --smoke 300 --functional 900 --latency 0.1
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(script_directory)
+sys.path.append(os.path.join(script_directory, "tests"))
+
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail_api import TestRail  # noqa: E402
+
+DEVICES = ["iPhone 17 (iOS 26.3.1)", "iPad mini (6th generation) (iOS 26.3.1)"]
+
+
+def create_sequentially(testrail, runs):
+    """The previous flow: per device and run, add_run + get_tests + add_results."""
+    for device in DEVICES:
+        for name, case_ids in runs.items():
+            for start in range(0, len(case_ids), 250):
+                run = testrail.client.send_post("add_run/14", {
+                    "name": f"{name} - {device}", "milestone_id": 1, "suite_id": 1,
+                    "include_all": False, "case_ids": case_ids[start:start + 250],
+                })
+                tests = testrail.client.send_get(f"get_tests/{run['id']}")["tests"]
+                testrail.client.send_post(f"add_results/{run['id']}", {
+                    "results": [{"test_id": t["id"], "status_id": 1} for t in tests]
+                })
+
+
+def create_in_parallel(testrail, runs):
+    testrail.create_device_test_runs(
+        project_id=14, suite_id=1, release_version_id="145.3", milestone_id=1,
+        devices=DEVICES, runs=runs,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--smoke", type=int, default=300, help="Smoke cases (default: 300)")
+    parser.add_argument("--functional", type=int, default=900,
+                        help="Functional cases (default: 900)")
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Server time per request in seconds (default: 0.1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    args = parser.parse_args()
+
+    runs = {
+        "Smoke Tests Suite": list(range(1, args.smoke + 1)),
+        "Full Functional Tests Suite": list(range(10_001, 10_001 + args.functional)),
+    }
+    parts = sum(-(-len(ids) // 250) for ids in runs.values()) * len(DEVICES)
+    print(f"{len(DEVICES)} devices, {args.smoke} smoke + {args.functional} functional cases "
+          f"({parts} runs), {args.latency * 1000:.0f} ms per request; best of {args.repeat}")
+    for name, create in (("sequential (before)", create_sequentially),
+                         ("parallel, bulk", create_in_parallel)):
+        best = None
+        for _ in range(args.repeat):
+            with FakeTestRail(latency=args.latency) as server:
+                testrail = TestRail(server.url, "bench@example.com", "key")
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    create(testrail, runs)
+                total = time.perf_counter() - started
+            if best is None or total < best[0]:
+                best = (total, len(server.requests))
+        total, n_requests = best
+        print(f"  {name:20} {total * 1000:7.0f} ms  {n_requests:3} requests")
+
+
+if __name__ == "__main__":
+    main()
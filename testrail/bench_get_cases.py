@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark a full-suite get_cases crawl against a local fake TestRail.
+
+Compares the previous client (a fresh requests.get per page, so a new
+connection each time) with the shared APIClient (one keep-alive session,
+pages walked with iter_pages). The fake server in tests/fake_testrail.py
+adds --latency to every request and --connect-latency to every new
+connection, standing in for the server time and the TCP + TLS handshake of
+a real TestRail instance.
+
+    python testrail/bench_get_cases.py --cases 5000 --latency 0.02 --connect-latency 0.05
+"""
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(script_directory)
+sys.path.append(os.path.join(script_directory, "tests"))
+
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail_conn import APIClient  # noqa: E402
+
+USER, PASSWORD = "bench@example.com", "key"
+
+
+def crawl_per_request(url, uri):
+    """The crawl as the tools did it before: requests.get with a freshly
+    encoded Authorization header per page, stepping offset by hand."""
+    timings, cases, offset = [], [], 0
+    while True:
+        started = time.perf_counter()
+        auth = base64.b64encode(f"{USER}:{PASSWORD}".encode()).decode()
+        response = requests.get(
+            f"{url}/index.php?/api/v2/{uri}&limit=250&offset={offset}",
+            headers={"Authorization": "Basic " + auth, "Content-Type": "application/json"},
+        )
+        page = response.json()["cases"]
+        timings.append(time.perf_counter() - started)
+        cases += page
+        if len(page) < 250:
+            return cases, timings
+        offset += len(page)
+
+
+def crawl_shared_client(url, uri):
+    client = APIClient(url)
+    client.user, client.password = USER, PASSWORD
+    timings, cases = [], []
+    pages = client.iter_pages(uri, "cases")
+    while True:
+        started = time.perf_counter()
+        page = next(pages, None)
+        if page is None:
+            return cases, timings
+        timings.append(time.perf_counter() - started)
+        cases += page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=5000, help="Cases in the suite")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Server time per request in seconds (default: 0.02)")
+    parser.add_argument("--connect-latency", type=float, default=0.05,
+                        help="Cost of each new connection in seconds (default: 0.05)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    args = parser.parse_args()
+
+    suite = [{"id": i, "suite_id": 1, "title": f"Case {i}", "custom_steps_separated": []}
+             for i in range(1, args.cases + 1)]
+    uri = "get_cases/1&suite_id=1"
+    print(f"{args.cases:,} cases, {args.latency * 1000:.0f} ms per request, "
+          f"{args.connect_latency * 1000:.0f} ms per new connection; best of {args.repeat}")
+    print(f"  {'':20} {'total':>9} {'requests':>9} {'conns':>6} {'mean':>9} {'p95':>9}")
+    for name, crawl in (("per-request (before)", crawl_per_request),
+                        ("shared client", crawl_shared_client)):
+        best = None
+        for _ in range(args.repeat):
+            with FakeTestRail({"cases": suite}, latency=args.latency,
+                              connect_latency=args.connect_latency) as server:
+                started = time.perf_counter()
+                cases, timings = crawl(server.url, uri)
+                total = time.perf_counter() - started
+            assert len(cases) == args.cases, len(cases)
+            if best is None or total < best[0]:
+                best = (total, timings, len(server.requests), server.connections)
+        total, timings, n_requests, connections = best
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        print(f"  {name:20} {total * 1000:7.0f}ms {n_requests:9} {connections:6} "
+              f"{statistics.mean(timings) * 1000:7.1f}ms {p95 * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
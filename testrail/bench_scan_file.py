@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark scan_file of testrail_scan_missing_urls.py in lines per second.
+
+- before: the previous scan, is_linked() scanning upward from every test
+  function over its annotations and comments;
+- after: scan_file, with every line classified once by link_verdicts().
+
+Corpora: the synthetic UI tests of tests/fake_searchfox.py; the same with
+every test converted (a KDoc block and a multi-line @Converted annotation
+above it); the converted tests whose annotation notes enumerate steps
+("1) ... 2) ...", one unbalanced parenthesis, so every upward scan runs to
+the top of the file), also as files ten times larger; and an iOS-style
+Swift suite.
+
+    python testrail/bench_scan_file.py --files 300 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(script_directory)
+sys.path.append(os.path.join(script_directory, "tests"))
+
+import testrail_scan_missing_urls as scanner  # noqa: E402
+from fake_searchfox import kotlin_tree  # noqa: E402
+
+DOMAIN = "mozilla.testrail.io"
+
+
+def scan_per_function(content, test_func_re, platform):
+    """The previous scan_file loop: is_linked() for every test function."""
+    lines = content.splitlines()
+    found, missing = 0, 0
+    pending_test_annotation = False
+    for i, line in enumerate(lines):
+        if platform == "android" and scanner.KOTLIN_TEST_ANNOTATION_RE.match(line):
+            pending_test_annotation = True
+            continue
+        if not test_func_re.match(line):
+            if pending_test_annotation and line.strip() and not line.strip().startswith("//"):
+                pending_test_annotation = False
+            continue
+        if platform == "android" and not pending_test_annotation:
+            continue
+        found += 1
+        missing += not scanner.is_linked(lines, i, DOMAIN, platform)
+        pending_test_annotation = False
+    return found, missing
+
+
+def scan_forward(content, test_func_re, platform):
+    sf_file = scanner.SearchfoxFile(name="Bench.kt", url="", content=content)
+    found, missing = scanner.scan_file(sf_file, DOMAIN, False, test_func_re, set(), platform)
+    return found, len(missing)
+
+
+def converted(content, rng, notes=None):
+    """Every test of a synthetic file converted: KDoc and @Converted above it."""
+    out = []
+    for line in content.splitlines():
+        if line.strip() == "@Test":
+            out += ["    /**", *[f"     * Step {n}: verify the converted flow" for n in range(rng.randrange(4, 12))],
+                    "     */", "    @Converted(", "        replacedBy = [",
+                    *[f'            "EfficiencyTest.verify{n}",' for n in range(rng.randrange(1, 6))],
+                    "        ],", "        bug = 1985432,", '        since = "2026-05-01",',
+                    *([f'        notes = "{notes}",'] if notes else []), "    )",
+                    "    @SmokeTest"]
+        out.append(line)
+    return "\n".join(out) + "\n"
+
+
+def swift_suite(count, rng):
+    tests = []
+    for n in range(count * 8):
+        link = f"    // https://mozilla.testrail.io/index.php?/cases/view/{n}\n" if rng.random() < 0.9 else ""
+        smoke = "    // Smoke TAE\n" if rng.random() < 0.2 else ""
+        tests.append(f"{link}{smoke}    func testFeature{n}() {{\n        navigator.goto(BrowserTab)\n"
+                     f"        waitForExistence(app.buttons[\"Feature{n}\"])\n    }}\n")
+    return "class FeatureTests: BaseTestCase {\n" + "\n".join(tests) + "}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=300, help="Files per corpus (default: 300)")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N (default: 5)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ui_tests = list(kotlin_tree("ui", args.files).values())
+    corpora = [
+        ("Kotlin UI tests", ui_tests, scanner.KOTLIN_TEST_FUNC_RE, "android"),
+        ("Kotlin, converted", [converted(c, rng) for c in ui_tests], scanner.KOTLIN_TEST_FUNC_RE, "android"),
+        ("Kotlin, converted, notes", [converted(c, rng, "1) open the menu") for c in ui_tests],
+         scanner.KOTLIN_TEST_FUNC_RE, "android"),
+        ("Kotlin, converted, notes, 10x files",
+         [converted("".join(ui_tests[i:i + 10]), rng, "1) open the menu") for i in range(0, len(ui_tests), 10)],
+         scanner.KOTLIN_TEST_FUNC_RE, "android"),
+        ("Swift XCUITests", [swift_suite(1, rng) for _ in range(args.files)],
+         scanner.SWIFT_TEST_FUNC_RE, "ios"),
+    ]
+    for name, files, test_func_re, platform in corpora:
+        lines = sum(content.count("\n") for content in files)
+        results = {}
+        print(f"{name}: {len(files)} files, {lines:,} lines")
+        for label, scan in (("before", scan_per_function), ("after", scan_forward)):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                counts = [scan(content, test_func_re, platform) for content in files]
+                seconds = time.perf_counter() - started
+                best = seconds if best is None else min(best, seconds)
+            results[label] = counts
+            print(f"  {label:7} {lines / best:12,.0f} lines/s  ({best * 1000:.1f} ms)")
+        assert results["before"] == results["after"], "scans disagree"
+
+
+if __name__ == "__main__":
+    main()
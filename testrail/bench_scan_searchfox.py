@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Benchmark the file sources of testrail_scan_missing_urls.py on a synthetic
+tree of Android UI tests.
+
+The fake in tests/fake_searchfox.py serves the searchfox listing and the
+raw files, adding --latency to every request and --connect-latency to every
+new connection (standing in for the TCP + TLS handshake to GitHub). The
+same tree is written to a local git checkout.
+
+- serial: the previous fetch, a fresh requests.get per file;
+- fetcher, cold: SearchfoxFetcher with --jobs downloads and an empty cache;
+- fetcher, warm: the same with the cache of the cold run, nothing changed;
+- checkout: the files read from the working tree (--checkout);
+- git archive: the files read from a revision (--checkout --revision).
+
+Every mode is scanned, and the number of tests missing a link is printed
+to show they agree. A warm cache still costs a round trip per file (a
+conditional GET answered 304); it saves the bytes.
+
+    python testrail/bench_scan_searchfox.py --files 1000 --latency 0.03 --connect-latency 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(script_directory)
+sys.path.append(os.path.join(script_directory, "tests"))
+
+import testrail_scan_missing_urls as scanner  # noqa: E402
+from fake_searchfox import FakeSearchfox, kotlin_tree  # noqa: E402
+
+UI = "mobile/android/fenix/app/src/androidTest/java/org/mozilla/fenix/ui"
+
+
+def fetch_serially(base_url, raw_base):
+    """The previous fetch: the listing, then requests.get per file."""
+    response = requests.get(base_url, timeout=30)
+    response.raise_for_status()
+    filenames = sorted(set(
+        m.group(1) for m in re.finditer(r'<a[^>]*href="[^"]*?/([^/"]+Test\.kt)"', response.text)
+    ))
+    files = []
+    for filename in filenames:
+        file_url = f"{raw_base}/{scanner.searchfox_source_path(base_url)}/{filename}"
+        response = requests.get(file_url, timeout=30)
+        response.raise_for_status()
+        files.append(scanner.SearchfoxFile(name=filename, url=file_url, content=response.text))
+    return files
+
+
+def missing_links(files):
+    missing = 0
+    for sf_file in files:
+        _, found = scanner.scan_file(
+            sf_file, "mozilla.testrail.io", False, scanner.KOTLIN_TEST_FUNC_RE,
+            scanner.ANDROID_IGNORED_DIRS, "android",
+        )
+        missing += len(found)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000, help="Kotlin files (default: 1000)")
+    parser.add_argument("--jobs", type=int, default=scanner.DEFAULT_JOBS,
+                        help=f"Concurrent downloads (default: {scanner.DEFAULT_JOBS})")
+    parser.add_argument("--latency", type=float, default=0.03,
+                        help="Server time per request in seconds (default: 0.03)")
+    parser.add_argument("--connect-latency", type=float, default=0.05,
+                        help="Setup time per new connection in seconds (default: 0.05)")
+    args = parser.parse_args()
+
+    tree = kotlin_tree(UI, args.files)
+    with tempfile.TemporaryDirectory() as tmp:
+        checkout, cache_dir = Path(tmp, "checkout"), Path(tmp, "cache")
+        for name, content in tree.items():
+            (checkout / name).parent.mkdir(parents=True, exist_ok=True)
+            (checkout / name).write_text(content)
+        git = ["git", "-C", str(checkout), "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+        subprocess.run([*git, "init", "-q"], check=True)
+        subprocess.run([*git, "add", "."], check=True)
+        subprocess.run([*git, "commit", "-q", "-m", "tree"], check=True)
+        searchfox_url = f"https://searchfox.org/firefox-main/source/{UI}"
+
+        with FakeSearchfox(tree, latency=args.latency, connect_latency=args.connect_latency) as server:
+            url = server.source_url(UI)
+
+            def fetcher(**kwargs):
+                return scanner.get_searchfox_files(url, "*Test.kt", scanner.SearchfoxFetcher(
+                    jobs=args.jobs, raw_base=server.raw_base, **kwargs))
+
+            modes = [
+                ("serial (before)", lambda: fetch_serially(url, server.raw_base)),
+                (f"fetcher, cold, {args.jobs} jobs", lambda: fetcher(cache_dir=cache_dir)),
+                (f"fetcher, warm, {args.jobs} jobs", lambda: fetcher(cache_dir=cache_dir)),
+                ("checkout", lambda: scanner.get_checkout_files(
+                    checkout, searchfox_url, "*Test.kt", recurse=False)),
+                ("git archive", lambda: scanner.get_checkout_files(
+                    checkout, searchfox_url, "*Test.kt", recurse=False, revision="HEAD")),
+            ]
+            print(f"{args.files} Kotlin files, {args.latency * 1000:.0f} ms per request, "
+                  f"{args.connect_latency * 1000:.0f} ms per connection")
+            for name, files in modes:
+                requests_before, connections_before = len(server.requests), server.connections
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fetched = list(files())
+                seconds = time.perf_counter() - started
+                print(f"  {name:24} {seconds:7.2f} s  {len(fetched):5} files  "
+                      f"{len(server.requests) - requests_before:5} requests  "
+                      f"{sum(r[2] for r in server.requests[requests_before:]):>10,} B  "
+                      f"{server.connections - connections_before:5} connections  "
+                      f"{missing_links(fetched):4} missing links")
+
+
+if __name__ == "__main__":
+    main()
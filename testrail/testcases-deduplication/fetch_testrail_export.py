@@ -16,11 +16,16 @@ import os
 import sys
 
 import pandas as pd
-import requests
-from requests.auth import HTTPBasicAuth
 
+# The TestRail client (testrail_conn.py) is shared with the tools in the repo's testrail/ directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
-def testrail_client() -> tuple[str, HTTPBasicAuth]:
+from testrail_conn import APIClient  # noqa: E402
+
+REQUEST_TIMEOUT = 30  # seconds
+
+
+def testrail_client() -> APIClient:
     host = os.environ.get("TESTRAIL_HOST", "").strip().rstrip("/")
     username = os.environ.get("TESTRAIL_USERNAME", "")
     password = os.environ.get("TESTRAIL_PASSWORD", "")
@@ -29,62 +34,32 @@ def testrail_client() -> tuple[str, HTTPBasicAuth]:
         print("Error: TESTRAIL_HOST, TESTRAIL_USERNAME and TESTRAIL_PASSWORD must be set.")
         sys.exit(1)
 
-    base_url = f"{host}/index.php?/api/v2"
-    return base_url, HTTPBasicAuth(username, password)
+    client = APIClient(host, timeout=REQUEST_TIMEOUT)
+    client.user = username
+    client.password = password
+    return client
 
 
-REQUEST_TIMEOUT = 30  # seconds
-
+def _uri(endpoint: str, project_id: str, suite_id: str = None) -> str:
+    return f"{endpoint}/{project_id}" + (f"&suite_id={suite_id}" if suite_id else "")
 
-def api_get(base_url: str, auth: HTTPBasicAuth, endpoint: str, params: dict = None) -> dict:
-    url = f"{base_url}/{endpoint}"
-    resp = requests.get(url, auth=auth, params=params or {}, timeout=REQUEST_TIMEOUT)
-    resp.raise_for_status()
-    return resp.json()
 
-
-def fetch_cases(base_url: str, auth: HTTPBasicAuth, project_id: str, suite_id: str = None) -> list[dict]:
+def fetch_cases(client: APIClient, project_id: str, suite_id: str = None) -> list[dict]:
     """Fetch all test cases for a project (paginated, 250 per page)."""
-    cases = []
-    offset = 0
-    limit = 250
-
-    while True:
-        params = {"limit": limit, "offset": offset}
-        if suite_id:
-            params["suite_id"] = suite_id
+    return [
+        case
+        for page in client.iter_pages(_uri("get_cases", project_id, suite_id), "cases")
+        for case in page
+    ]
 
-        data = api_get(base_url, auth, f"get_cases/{project_id}", params)
-        batch = data.get("cases", [])
-        cases.extend(batch)
 
-        if len(batch) < limit:
-            break
-        offset += len(batch)  # advance by page size, not cumulative total
-
-    return cases
-
-
-def fetch_sections(base_url: str, auth: HTTPBasicAuth, project_id: str, suite_id: str = None) -> dict[int, str]:
+def fetch_sections(client: APIClient, project_id: str, suite_id: str = None) -> dict[int, str]:
     """Return a mapping of section_id → section name (paginated, 250 per page)."""
-    sections = []
-    offset = 0
-    limit = 250
-
-    while True:
-        params = {"limit": limit, "offset": offset}
-        if suite_id:
-            params["suite_id"] = suite_id
-
-        data = api_get(base_url, auth, f"get_sections/{project_id}", params)
-        batch = data.get("sections", [])
-        sections.extend(batch)
-
-        if len(batch) < limit:
-            break
-        offset += len(batch)
-
-    return {s["id"]: s["name"] for s in sections}
+    return {
+        s["id"]: s["name"]
+        for page in client.iter_pages(_uri("get_sections", project_id, suite_id), "sections")
+        for s in page
+    }
 
 
 def format_steps(steps_list: list[dict], field: str) -> str:
@@ -120,10 +95,10 @@ def main():
     parser.add_argument("--output", default="testrail_export.xlsx", help="Output xlsx file path")
     args = parser.parse_args()
 
-    base_url, auth = testrail_client()
+    client = testrail_client()
 
     print(f"Fetching test cases for project {args.project_id}...")
-    cases = fetch_cases(base_url, auth, args.project_id, args.suite_id)
+    cases = fetch_cases(client, args.project_id, args.suite_id)
     print(f"Fetched {len(cases)} test cases")
 
     if not cases:
@@ -131,7 +106,7 @@ def main():
         sys.exit(1)
 
     print("Fetching section names...")
-    sections = fetch_sections(base_url, auth, args.project_id, args.suite_id)
+    sections = fetch_sections(client, args.project_id, args.suite_id)
 
     build_xlsx(cases, sections, args.output)
 
@@ -13,8 +13,11 @@ Key Components:
   - create_milestone: Create a new milestone in a TestRail project.
   - create_milestone_and_test_runs: Create a milestone and associated test runs for multiple devices in a project.
   - create_test_run: Create a test run within a TestRail project.
+  - create_device_test_runs: Create the test runs of several suites for several devices in parallel.
+  - select_case_ids: Evaluate several case filter sets against one cached fetch of a suite.
   - does_milestone_exist: Check if a milestone already exists in a TestRail project.
   - update_test_cases_to_passed: Update the status of test cases to 'passed' in a test run.
+  - add_results_for_cases: Set the status of test cases in a test run by case ID, in chunks.
 - Private Methods: Utility methods for internal use to fetch test cases, update test run results, and retrieve milestones.
 - Retry Mechanism: A method to retry API calls with a specified number of attempts and delay, improving reliability in case of intermittent network issues.
 
@@ -27,22 +30,49 @@ import json
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Ensure the directory containing this script is in Python's search path
 script_directory = os.path.dirname(os.path.abspath(__file__))
 if script_directory not in sys.path:
     sys.path.append(script_directory)
 
+from testrail_cases import CaseTable
 from testrail_conn import APIClient
 
+# Results per add_results_for_cases request
+RESULTS_CHUNK_SIZE = 250
+# How long a suite saved in case_cache_dir is reused: about one release job
+CASE_CACHE_MAX_AGE = 3 * 60 * 60  # seconds
+
 
 class TestRail:
-    def __init__(self, host, username, password):
+    def __init__(
+        self,
+        host,
+        username,
+        password,
+        case_cache_dir=None,
+        case_cache_max_age=CASE_CACHE_MAX_AGE,
+    ):
+        """
+        Args:
+            host (str): The TestRail URL.
+            username (str): TestRail user.
+            password (str): TestRail password or API key.
+            case_cache_dir (str): Optional directory where fetched suites are
+                saved, so later TestRail instances (e.g. the next step of the
+                same release job) reuse them instead of crawling the suite.
+            case_cache_max_age (int): Seconds a saved suite stays valid.
+        """
         if not all([host, username, password]):
             raise ValueError("TestRail host, username, and password must be provided.")
         self.client = APIClient(host)
         self.client.user = username
         self.client.password = password
+        self.case_cache_dir = case_cache_dir
+        self.case_cache_max_age = case_cache_max_age
+        self._case_tables = {}
 
     # Public Methods
 
@@ -87,19 +117,10 @@ class TestRail:
         if not all([project_id, milestone_name]):
             raise ValueError("Project ID and milestone name must be provided.")
 
-        limit = 250
-        offset = 0
-
-        while True:
-            # Fetch the milestones page by page, with a limit and offset
-            milestones = self._get_milestones(project_id, limit, offset).get(
-                "milestones", []
-            )
-
-            # If there are no more milestones, return False
-            if not milestones:
-                return False
-
+        # Pages are fetched lazily, so a match stops the walk early
+        for milestones in self.client.iter_pages(
+            f"get_milestones/{project_id}", "milestones"
+        ):
             # Check if the milestone exists in the last 'num_of_milestones' milestones
             if any(
                 milestone_name == milestone["name"]
@@ -107,12 +128,7 @@ class TestRail:
             ):
                 return True
 
-            # If there are more milestones, increment the offset to fetch the next page
-            offset += limit
-
-            # If the number of milestones returned is less than the limit, it's the last page
-            if len(milestones) < limit:
-                return False
+        return False
 
     def update_test_run_tests(self, test_run_id, test_status):
         if not all([test_run_id, test_status]):
@@ -124,12 +140,98 @@ class TestRail:
             ]
         }
         return self.client.send_post(f"add_results/{test_run_id}", data)
+
+    def add_results_for_cases(
+        self, test_run_id, case_ids, test_status, chunk_size=RESULTS_CHUNK_SIZE
+    ):
+        """
+        Set the status of the given cases in a test run, addressing them by
+        case ID so the run's tests do not have to be fetched first.
+
+        Args:
+            test_run_id (int): ID of the test run.
+            case_ids (list): IDs of the test cases in the run to update.
+            test_status (int): Status to set on each case (e.g. 1 = Passed).
+            chunk_size (int): Results per request (default: 250).
+
+        Returns:
+            list: The results created, in case order.
+        """
+        if not all([test_run_id, test_status]):
+            raise ValueError("Test run ID and test status must be provided.")
+        results = []
+        for start in range(0, len(case_ids), chunk_size):
+            data = {
+                "results": [
+                    {"case_id": case_id, "status_id": test_status}
+                    for case_id in case_ids[start:start + chunk_size]
+                ]
+            }
+            results.extend(
+                self.client.send_post(f"add_results_for_cases/{test_run_id}", data)
+            )
+        return results
     
     def get_case_ids_by_multiple_custom_fields(self, project_id, suite_id, filters):
         filtered_cases = self._get_test_cases_by_multiple_custom_fields(
             project_id, suite_id, filters
         )
         return [case["id"] for case in filtered_cases]
+
+    def select_case_ids(self, project_id, suite_id, filter_sets):
+        """
+        Evaluate several filter sets against one fetch of the suite.
+
+        Args:
+            project_id (int): ID of the project.
+            suite_id (int): ID of the test suite.
+            filter_sets (dict): Name -> filters, each in the format of
+                get_case_ids_by_multiple_custom_fields (field -> value, or
+                field -> callable that returns True for accepted values).
+
+        Returns:
+            dict: Name -> IDs of the matching test cases, in suite order.
+        """
+        if not all([project_id, suite_id, filter_sets]):
+            raise ValueError("Project ID, suite ID and filter sets must be provided.")
+        table = self.get_case_table(project_id, suite_id)
+        return {name: table.select_ids(filters) for name, filters in filter_sets.items()}
+
+    def get_case_table(self, project_id, suite_id, refresh=False):
+        """
+        The suite's test cases as a CaseTable, fetched at most once per
+        TestRail instance (and, with case_cache_dir, once per
+        case_cache_max_age across instances).
+
+        Args:
+            project_id (int): ID of the project.
+            suite_id (int): ID of the test suite.
+            refresh (bool): Fetch the suite again even if it is cached.
+
+        Returns:
+            CaseTable: The suite's test cases.
+        """
+        if not all([project_id, suite_id]):
+            raise ValueError("Project ID and suite ID must be provided.")
+        key = (str(project_id), str(suite_id))
+        table = None if refresh else self._case_tables.get(key)
+        if table is not None:
+            return table
+
+        cache_path = None
+        if self.case_cache_dir:
+            cache_path = os.path.join(
+                self.case_cache_dir, f"testrail_cases_{project_id}_{suite_id}.json"
+            )
+            if not refresh:
+                table = CaseTable.load(cache_path, self.case_cache_max_age)
+        if table is None:
+            table = CaseTable(self._get_test_cases_with_pagination(project_id, suite_id))
+            if cache_path:
+                os.makedirs(self.case_cache_dir, exist_ok=True)
+                table.save(cache_path)
+        self._case_tables[key] = table
+        return table
     
     def create_paginated_test_runs(
         self,
@@ -141,7 +243,8 @@ class TestRail:
         device_name,
         case_ids,
         status_id=1,  # default to Passed
-        max_cases_per_run=250
+        max_cases_per_run=250,
+        results_chunk_size=RESULTS_CHUNK_SIZE,
     ):
         """
         Crete one or more test runs if the number of test cases is greater than 250 
@@ -156,6 +259,10 @@ class TestRail:
             case_ids (list): List of the IDs of the test cases to include in the test run.
             status_id (int): Result to apply by default to the test cases (default: 1 = Passed).
             max_cases_per_run (int): Límit for the test cases for each run (default: 250).
+            results_chunk_size (int): Results per add_results_for_cases request (default: 250).
+
+        Returns:
+            list: The test runs created.
         """
         def chunk_case_ids(case_ids, size):
             for i in range(0, len(case_ids), size):
@@ -164,7 +271,9 @@ class TestRail:
         total_cases = len(case_ids)
         if total_cases == 0:
             print(f"No test cases provided for {device_name}. No test runs created.")
-            return
+            return []
+
+        test_runs = []
 
         for index, chunk in enumerate(chunk_case_ids(case_ids, max_cases_per_run)):
             if not chunk:
@@ -188,7 +297,56 @@ class TestRail:
             })
 
             # Update all tests in the run with the given status
-            self.update_test_run_tests(test_run["id"], status_id)
+            self.add_results_for_cases(test_run["id"], chunk, status_id, results_chunk_size)
+            test_runs.append(test_run)
+
+        return test_runs
+
+    def create_device_test_runs(
+        self,
+        project_id,
+        suite_id,
+        release_version_id,
+        milestone_id,
+        devices,
+        runs,
+        max_workers=4,
+        **kwargs,
+    ):
+        """
+        Create the paginated test runs of every run for every device, with
+        up to max_workers (run, device) pairs in flight at once.
+
+        Args:
+            project_id (int): ID of the project.
+            suite_id (int): ID of the test suite.
+            release_version_id (str): Release version (used in multi-part run names).
+            milestone_id (int): ID of the milestone.
+            devices (list): Device names.
+            runs (dict): Base run name -> list of test case IDs.
+            max_workers (int): Pairs created in parallel (default: 4).
+            **kwargs: Passed on to create_paginated_test_runs.
+
+        Returns:
+            dict: (base run name, device name) -> list of test runs created.
+        """
+        pairs = [(name, device) for device in devices for name in runs]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                (name, device): executor.submit(
+                    self.create_paginated_test_runs,
+                    project_id=project_id,
+                    suite_id=suite_id,
+                    release_version_id=release_version_id,
+                    milestone_id=milestone_id,
+                    base_run_name=name,
+                    device_name=device,
+                    case_ids=runs[name],
+                    **kwargs,
+                )
+                for name, device in pairs
+            }
+        return {pair: future.result() for pair, future in futures.items()}
 
     # Private Methods
 
@@ -203,26 +361,7 @@ class TestRail:
         if not all([project_id, suite_id]):
             raise ValueError("Project ID and suite ID must be provided.")
 
-        all_cases = []
-        limit = 250
-        offset = 0
-
-        while True:
-            endpoint = f"get_cases/{project_id}&suite_id={suite_id}&limit={limit}&offset={offset}"
-            response = self.client.send_get(endpoint)
-
-            if "cases" not in response:
-                break
-
-            cases = response["cases"]
-            all_cases.extend(cases)
-
-            if len(cases) < limit:
-                break  # Last page
-
-            offset += limit
-
-        return all_cases
+        return self._get_all(f"get_cases/{project_id}&suite_id={suite_id}", "cases")
 
     def _get_milestone(self, milestone_id):
         if not milestone_id:
@@ -251,7 +390,7 @@ class TestRail:
     def _get_tests(self, test_run_id):
         if not test_run_id:
             raise ValueError("Test run ID must be provided.")
-        return self.client.send_get(f"get_tests/{test_run_id}")["tests"]
+        return self._get_all(f"get_tests/{test_run_id}", "tests")
 
     def _get_test_run(self, test_run_id):
         if not test_run_id:
@@ -261,12 +400,16 @@ class TestRail:
     def _get_test_runs(self, project_id):
         if not project_id:
             raise ValueError("Project ID must be provided.")
-        return self.client.send_get(f"get_runs/{project_id}")["runs"]
+        return self._get_all(f"get_runs/{project_id}", "runs")
 
     def _get_test_run_results(self, test_run_id):
         if not test_run_id:
             raise ValueError("Test run ID must be provided.")
-        return self.client.send_get(f"get_results_for_run/{test_run_id}")["results"]
+        return self._get_all(f"get_results_for_run/{test_run_id}", "results")
+
+    def _get_all(self, uri, key):
+        """All items of a paginated collection, e.g. ("get_tests/1", "tests")."""
+        return [item for page in self.client.iter_pages(uri, key) for item in page]
 
     def _retry_api_call(self, api_call, *args, max_retries=3, delay=5):
         if not all([api_call, args]):
@@ -291,20 +434,7 @@ class TestRail:
         if not all([project_id, suite_id, filters]):
             raise ValueError("Project ID, suite ID and filters must be provided.")
 
-        all_cases = self._get_test_cases_with_pagination(project_id, suite_id)
-
-        def satisfies_all(case):
-            for field, condition in filters.items():
-                value = case.get(field)
-                if callable(condition):
-                    if not condition(value):
-                        return False
-                else:
-                    if value != condition:
-                        return False
-            return True
-
-        return [case for case in all_cases if satisfies_all(case)]
+        return self.get_case_table(project_id, suite_id).select(filters)
 
     def _delete_milestone(self, milestone_id):
         if not milestone_id:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+An in-memory table of a TestRail suite's test cases, for evaluating many
+filter sets against one fetch of the suite.
+
+A filter set maps a case field to either a value the field must equal or a
+callable the field's value must satisfy (the format of
+TestRail.get_case_ids_by_multiple_custom_fields). Each field used in a
+filter is indexed once, by value; a condition is then evaluated once per
+distinct value of its field rather than once per case, and the filters of
+a set are intersected.
+
+The table can be saved to and loaded from a JSON file, so the jobs of one
+release can share a single fetch of the suite.
+"""
+
+import json
+import os
+import time
+
+
+def _key(value):
+    """A hashable index key for a field value (multi-select fields are lists)."""
+    if isinstance(value, list):
+        return tuple(_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key(v)) for k, v in value.items()))
+    return value
+
+
+class CaseTable:
+    def __init__(self, cases, fetched_at=None):
+        self.cases = cases
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.cases)
+
+    def _index(self, field):
+        """field -> {value key: (a value, positions of the cases with it)}"""
+        index = self._indexes.get(field)
+        if index is None:
+            index = {}
+            for position, case in enumerate(self.cases):
+                value = case.get(field)
+                entry = index.get(_key(value))
+                if entry is None:
+                    index[_key(value)] = (value, [position])
+                else:
+                    entry[1].append(position)
+            self._indexes[field] = index
+        return index
+
+    def _matching(self, field, condition):
+        index = self._index(field)
+        if callable(condition):
+            return {
+                position
+                for value, positions in index.values()
+                if condition(value)
+                for position in positions
+            }
+        entry = index.get(_key(condition))
+        return set(entry[1]) if entry else set()
+
+    def select(self, filters):
+        """The cases satisfying every filter, in suite order."""
+        positions = None
+        for field, condition in filters.items():
+            matching = self._matching(field, condition)
+            positions = matching if positions is None else positions & matching
+            if not positions:
+                return []
+        if positions is None:
+            return list(self.cases)
+        return [self.cases[p] for p in sorted(positions)]
+
+    def select_ids(self, filters):
+        return [case["id"] for case in self.select(filters)]
+
+    def save(self, path):
+        """Write the table to *path* atomically."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"fetched_at": self.fetched_at, "cases": self.cases}, f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, max_age):
+        """The table saved at *path*, or None if there is none or it is
+        older than *max_age* seconds."""
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - saved.get("fetched_at", 0) > max_age:
+            return None
+        return cls(saved["cases"], saved["fetched_at"])
@@ -16,21 +16,68 @@ http://docs.gurock.com/testrail-api2/start
 http://docs.gurock.com/testrail-api2/accessing
 
 Copyright Gurock Software GmbH. See license.md for details.
+
+This is the one client shared by the TestRail tools in this repository
+(testrail/, backup-tools/, testcases-deduplication/ and
+mobile-ai-toolkit/). Compared with the upstream binding it keeps a pooled
+keep-alive session per client, applies a timeout to every request, retries
+rate-limited and transient failures (honouring Retry-After), and can walk
+paginated endpoints lazily with iter_pages(). A client may be shared by
+several threads; a rate-limit response pauses all of them.
 """
 
 import base64
 import json
+import threading
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+MAX_BACKOFF = 60  # seconds
+PAGE_LIMIT = 250  # TestRail's maximum page size
+
+# Retried for every method: TestRail has not processed the request.
+NOT_PROCESSED_STATUSES = {429}
+# Retried for GET only: a POST may already have been applied.
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+API_PREFIX = "/api/v2/"
 
 
 class APIClient:
-    def __init__(self, base_url):
+    def __init__(
+        self,
+        base_url,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
+        """
+        Args:
+            base_url: The TestRail URL, e.g. https://example.testrail.io.
+            timeout: Seconds to wait for the server on each request.
+            max_retries: Retries after a rate-limited or transient failure.
+            pool_size: Keep-alive connections kept open to the server; raise
+                it when more threads share this client.
+        """
         self.user = ""
         self.password = ""
         if not base_url.endswith("/"):
             base_url += "/"
         self.__url = base_url + "index.php?/api/v2/"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.__auth = (None, None)
+        self.__pause_until = 0.0
+        self.__pause_lock = threading.Lock()
 
     def send_get(self, uri, filepath=None):
         """Issue a GET request (read) against the API.
@@ -59,37 +106,91 @@ class APIClient:
         """
         return self.__send_request("POST", uri, data)
 
+    def iter_pages(self, uri, key, limit=PAGE_LIMIT):
+        """Lazily walk a paginated GET endpoint, one page at a time.
+
+        Follows the ``_links.next`` URI of paginated responses (TestRail 6.7
+        and later) and falls back to stepping ``offset`` by *limit* until a
+        short page. A server that returns the bare list is a single page.
+        Nothing is fetched until the caller asks for the next page, so a
+        caller that stops early saves the remaining requests.
+
+        Args:
+            uri: The API method and its filters, e.g. get_cases/1&suite_id=2.
+            key: The collection in the paginated response, e.g. "cases".
+            limit: Page size requested from the server.
+
+        Yields:
+            The list of items on each page.
+        """
+        offset = 0
+        next_uri = f"{uri}&limit={limit}&offset={offset}"
+        while next_uri:
+            response = self.send_get(next_uri)
+            if isinstance(response, list):
+                yield response
+                return
+            page = response.get(key, [])
+            if page:
+                yield page
+            links = response.get("_links")
+            if links is not None:
+                next_uri = links.get("next")
+                if next_uri and next_uri.startswith(API_PREFIX):
+                    next_uri = next_uri[len(API_PREFIX):]
+            elif len(page) < limit:
+                next_uri = None
+            else:
+                offset += len(page)
+                next_uri = f"{uri}&limit={limit}&offset={offset}"
+
+    def __auth_header(self):
+        # Encoded once per credential pair, not on every request
+        credentials, header = self.__auth
+        if credentials != (self.user, self.password):
+            token = base64.b64encode(
+                bytes("%s:%s" % (self.user, self.password), "utf-8")
+            ).decode("ascii")
+            header = "Basic " + token
+            self.__auth = ((self.user, self.password), header)
+        return header
+
     def __send_request(self, method, uri, data):
         url = self.__url + uri
+        headers = {"Authorization": self.__auth_header()}
 
-        auth = str(
-            base64.b64encode(bytes("%s:%s" % (self.user, self.password), "utf-8")),
-            "ascii",
-        ).strip()
-        headers = {"Authorization": "Basic " + auth}
-
-        if method == "POST":
-            if uri[:14] == "add_attachment":  # add_attachment API method
-                files = {"attachment": (open(data, "rb"))}
-                response = requests.post(url, headers=headers, files=files)
-                files["attachment"].close()
+        attempt = 0
+        while True:
+            self.__wait_for_pause()
+            try:
+                response = self.__send_once(method, url, uri, data, headers)
+            except (requests.ConnectionError, requests.Timeout):
+                if method != "GET" or attempt >= self.max_retries:
+                    raise
+                delay = None
             else:
-                headers["Content-Type"] = "application/json"
-                payload = bytes(json.dumps(data), "utf-8")
-                response = requests.post(url, headers=headers, data=payload)
-        else:
-            headers["Content-Type"] = "application/json"
-            response = requests.get(url, headers=headers)
+                retryable = response.status_code in NOT_PROCESSED_STATUSES or (
+                    method == "GET" and response.status_code in TRANSIENT_STATUSES
+                )
+                if not retryable or attempt >= self.max_retries:
+                    break
+                delay = _retry_after(response)
+                if response.status_code in NOT_PROCESSED_STATUSES:
+                    # Rate limited: every thread using this client waits
+                    self.__pause(delay if delay is not None else min(2**attempt, MAX_BACKOFF))
+                    attempt += 1
+                    continue
+            time.sleep(delay if delay is not None else min(2**attempt, MAX_BACKOFF))
+            attempt += 1
 
         if response.status_code > 201:
             try:
                 error = response.json()
-            except (
-                requests.exceptions.HTTPError
-            ):  # response.content not formatted as JSON
+            except ValueError:  # response.content not formatted as JSON
                 error = str(response.content)
             raise APIError(
-                "TestRail API returned HTTP %s (%s)" % (response.status_code, error)
+                "TestRail API returned HTTP %s (%s)" % (response.status_code, error),
+                response.status_code,
             )
         else:
             if uri[:15] == "get_attachment/":  # Expecting file, not JSON
@@ -101,9 +202,48 @@ class APIClient:
             else:
                 try:
                     return response.json()
-                except requests.exceptions.HTTPError:
+                except ValueError:
                     return {}
 
+    def __pause(self, seconds):
+        with self.__pause_lock:
+            self.__pause_until = max(self.__pause_until, time.monotonic() + seconds)
+
+    def __wait_for_pause(self):
+        while True:
+            remaining = self.__pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def __send_once(self, method, url, uri, data, headers):
+        if method == "POST":
+            if uri[:14] == "add_attachment":  # add_attachment API method
+                with open(data, "rb") as attachment:
+                    return self.session.post(
+                        url,
+                        headers=headers,
+                        files={"attachment": attachment},
+                        timeout=self.timeout,
+                    )
+            headers = {**headers, "Content-Type": "application/json"}
+            payload = bytes(json.dumps(data), "utf-8")
+            return self.session.post(
+                url, headers=headers, data=payload, timeout=self.timeout
+            )
+        headers = {**headers, "Content-Type": "application/json"}
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+
+def _retry_after(response):
+    """Seconds from a numeric Retry-After header, capped at MAX_BACKOFF."""
+    try:
+        return min(max(0.0, float(response.headers["Retry-After"])), MAX_BACKOFF)
+    except (KeyError, ValueError):
+        return None
+
 
 class APIError(Exception):
-    pass
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
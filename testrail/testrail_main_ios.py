@@ -51,7 +51,11 @@ def main():
     # Load TestRail credentials
     credentials = load_testrail_credentials(".testrail_credentials.json")
     testrail = TestRail(
-        credentials["host"], credentials["username"], credentials["password"]
+        credentials["host"],
+        credentials["username"],
+        credentials["password"],
+        # Optional: lets re-runs of the same release job reuse the fetched suite
+        case_cache_dir=os.environ.get("TESTRAIL_CASE_CACHE_DIR"),
     )
 
     # Read task environment variables
@@ -114,12 +118,6 @@ def main():
             "custom_sub_test_suites": lambda v: set(v or []) == {1, 2} # Suite Functional & Smoke&Sanity
         }
 
-        smoke_case_ids = testrail.get_case_ids_by_multiple_custom_fields(
-            testrail_project_id,
-            testrail_test_suite_id,
-            smoke_filters
-        )
-
         # Filters for Full Functional Tests Suite (Functional only)
         functional_filters = {
             "custom_automation_status": 4, # Automation = Completed
@@ -127,11 +125,14 @@ def main():
             "custom_sub_test_suites": lambda v: set(v or []) == {1} # Suite Functional only
         }
 
-        functional_case_ids = testrail.get_case_ids_by_multiple_custom_fields(
+        # Both filter sets are evaluated against a single fetch of the suite
+        case_ids = testrail.select_case_ids(
             testrail_project_id,
             testrail_test_suite_id,
-            functional_filters
+            {"smoke": smoke_filters, "functional": functional_filters},
         )
+        smoke_case_ids = case_ids["smoke"]
+        functional_case_ids = case_ids["functional"]
 
         milestone = testrail.create_milestone(
             testrail_project_id, milestone_name, milestone_description
@@ -141,28 +142,19 @@ def main():
         with open(os.path.join(script_dir, "milestone_id.txt"), "w") as f:
             f.write(str(milestone["id"]))
 
-        for device in devices:
-            # Create Smoke Tests Suite test runs     
-            testrail.create_paginated_test_runs(
-                project_id=testrail_project_id,
-                suite_id=testrail_test_suite_id,
-                release_version_id = release_version,
-                milestone_id=milestone["id"],
-                base_run_name="Smoke Tests Suite",
-                device_name=device,
-                case_ids=smoke_case_ids
-            )
-
-            # Create Full Functional Tests Suite test runs
-            testrail.create_paginated_test_runs(
-                project_id=testrail_project_id,
-                suite_id=testrail_test_suite_id,
-                release_version_id = release_version,
-                milestone_id=milestone["id"],
-                base_run_name="Full Functional Tests Suite",
-                device_name=device,
-                case_ids=functional_case_ids
-            )
+        # Create the Smoke Tests Suite and Full Functional Tests Suite test
+        # runs for every device in parallel
+        testrail.create_device_test_runs(
+            project_id=testrail_project_id,
+            suite_id=testrail_test_suite_id,
+            release_version_id=release_version,
+            milestone_id=milestone["id"],
+            devices=devices,
+            runs={
+                "Smoke Tests Suite": smoke_case_ids,
+                "Full Functional Tests Suite": functional_case_ids,
+            },
+        )
 
         if build_number and build_number > 1:
             slack_release_version = f"{release_version} build {build_number}"
@@ -2,12 +2,22 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
+import json
+import os
 import re
+import subprocess
 import sys
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from fnmatch import fnmatch
 from pathlib import Path
 from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Iterator
 
 # Swift: func testName()
@@ -37,6 +47,11 @@ IOS_IGNORED_FILES = {
 # Directories to ignore entirely (Android)
 ANDROID_IGNORED_DIRS = set()
 
+# Searchfox has no raw file access; files are downloaded from the GitHub mirror
+GITHUB_RAW_BASE = "https://raw.githubusercontent.com/mozilla-firefox/firefox/main"
+REQUEST_TIMEOUT = 30  # seconds
+DEFAULT_JOBS = 8  # files downloaded at a time
+
 
 @dataclass(frozen=True)
 class SearchfoxFile:
@@ -88,15 +103,138 @@ def parse_searchfox_url(url: str) -> tuple[str, str, str]:
     return repo, source_or_raw, path
 
 
-def get_searchfox_file_list(base_url: str, file_pattern: str) -> list[str]:
+def searchfox_source_path(base_url: str) -> str:
+    """
+    The repository path of a searchfox source URL
+    Example: https://searchfox.org/firefox-main/source/mobile/android/fenix/...
+    Returns: mobile/android/fenix/...
+    """
+    if "/source/" not in base_url:
+        raise ValueError(f"Cannot parse searchfox URL: {base_url}")
+    return base_url.split("/source/", 1)[1].strip("/")
+
+
+class SearchfoxFetcher:
+    """
+    Downloads searchfox pages and files over one pooled session, up to
+    `jobs` files at a time.
+
+    With a `cache_dir`, every download is kept on disk: the text under the
+    SHA-256 of its content (blobs/), and per URL the ETag and content hash
+    (urls/). The next run sends the ETag as If-None-Match and reads the
+    text from the cache when the server answers 304 Not Modified, so
+    unchanged files are not downloaded again.
+    """
+
+    def __init__(
+        self,
+        jobs: int = DEFAULT_JOBS,
+        cache_dir: str | Path | None = None,
+        raw_base: str = GITHUB_RAW_BASE,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.jobs = jobs
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.raw_base = raw_base
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=jobs)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Statistics, for the summary
+        self.downloaded = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> str:
+        """The text at `url`, from the cache if the server says it is unchanged"""
+        entry = self._cache_entry(url)
+        headers = {"If-None-Match": entry["etag"]} if entry else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry:
+            content = self._read_blob(entry["sha256"])
+            if content is not None:
+                with self._lock:
+                    self.not_modified += 1
+                return content
+            # The blob is gone; download the file again
+            response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        with self._lock:
+            self.downloaded += 1
+        content = response.text
+        if self.cache_dir and response.headers.get("ETag"):
+            self._store(url, response.headers["ETag"], content)
+        return content
+
+    def file_url(self, base_url: str, filename: str) -> str:
+        return f"{self.raw_base}/{searchfox_source_path(base_url)}/{filename}"
+
+    def fetch_file(self, base_url: str, filename: str) -> SearchfoxFile:
+        file_url = self.file_url(base_url, filename)
+        return SearchfoxFile(name=filename, url=file_url, content=self.get(file_url))
+
+    def fetch_files(self, base_url: str, filenames: list[str]) -> Iterator[SearchfoxFile]:
+        """Yield the files in `filenames` order, downloading `jobs` at a time;
+        files that fail to download are reported and skipped"""
+        def fetch(filename):
+            try:
+                return self.fetch_file(base_url, filename)
+            except Exception as e:
+                print(f"Warning: Failed to fetch {filename}: {e}", file=sys.stderr)
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for sf_file in executor.map(fetch, filenames):
+                if sf_file is not None:
+                    yield sf_file
+
+    # Disk cache
+
+    def _cache_path(self, kind: str, key: str) -> Path:
+        return self.cache_dir / kind / key[:2] / key
+
+    def _cache_entry(self, url: str) -> dict | None:
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(url.encode()).hexdigest()
+        try:
+            return json.loads(self._cache_path("urls", key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _read_blob(self, digest: str) -> str | None:
+        try:
+            return self._cache_path("blobs", digest).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def _store(self, url: str, etag: str, content: str) -> None:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self._cache_path("blobs", digest)
+        if not blob.exists():
+            _write_atomic(blob, data)
+        key = hashlib.sha256(url.encode()).hexdigest()
+        entry = {"url": url, "etag": etag, "sha256": digest}
+        _write_atomic(self._cache_path("urls", key), json.dumps(entry).encode())
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def get_searchfox_file_list(
+    base_url: str, file_pattern: str, fetcher: SearchfoxFetcher | None = None
+) -> list[str]:
     """
     Fetch list of files from searchfox directory page
     Returns list of filenames matching the pattern
     """
-    response = requests.get(base_url, timeout=30)
-    response.raise_for_status()
-
-    html = response.text
+    html = (fetcher or SearchfoxFetcher()).get(base_url)
 
     # Extract filenames from searchfox HTML
     # Searchfox structure: <a href="/path/to/file.kt">file.kt</a>
@@ -123,50 +261,76 @@ def get_searchfox_file_list(base_url: str, file_pattern: str) -> list[str]:
     return sorted(set(filenames))
 
 
-def fetch_searchfox_file(base_url: str, filename: str) -> SearchfoxFile:
+def fetch_searchfox_file(
+    base_url: str, filename: str, fetcher: SearchfoxFetcher | None = None
+) -> SearchfoxFile:
     """
     Fetch a single file from searchfox
     Uses GitHub mirror since searchfox doesn't have direct raw file access
     """
-    # Extract path from searchfox URL
-    # Example: https://searchfox.org/firefox-main/source/mobile/android/fenix/...
-    # We need to extract the path after /source/
-
-    if "/source/" in base_url:
-        path = base_url.split("/source/", 1)[1]
-    else:
-        raise ValueError(f"Cannot parse searchfox URL: {base_url}")
-
-    # Construct GitHub raw URL
-    # GitHub mirror: https://raw.githubusercontent.com/mozilla-firefox/firefox/main/{path}
-    github_raw_base = "https://raw.githubusercontent.com/mozilla-firefox/firefox/main"
-    file_url = f"{github_raw_base}/{path}/{filename}"
-
-    response = requests.get(file_url, timeout=30)
-    response.raise_for_status()
-
-    return SearchfoxFile(
-        name=filename,
-        url=file_url,
-        content=response.text
-    )
+    return (fetcher or SearchfoxFetcher()).fetch_file(base_url, filename)
 
 
-def get_searchfox_files(base_url: str, file_pattern: str) -> Iterator[SearchfoxFile]:
+def get_searchfox_files(
+    base_url: str, file_pattern: str, fetcher: SearchfoxFetcher | None = None
+) -> Iterator[SearchfoxFile]:
     """
     Generator that yields SearchfoxFile objects from a searchfox directory
     """
+    fetcher = fetcher or SearchfoxFetcher()
     print(f"Fetching file list from searchfox: {base_url}")
-    filenames = get_searchfox_file_list(base_url, file_pattern)
+    filenames = get_searchfox_file_list(base_url, file_pattern, fetcher)
     print(f"Found {len(filenames)} files matching pattern '{file_pattern}'")
 
-    for filename in filenames:
-        try:
-            print(f"Downloading: {filename}")
-            yield fetch_searchfox_file(base_url, filename)
-        except Exception as e:
-            print(f"Warning: Failed to fetch {filename}: {e}", file=sys.stderr)
-            continue
+    for sf_file in fetcher.fetch_files(base_url, filenames):
+        print(f"Downloading: {sf_file.name}")
+        yield sf_file
+
+
+def get_checkout_files(
+    checkout: str | Path,
+    base_url: str,
+    file_pattern: str,
+    recurse: bool = False,
+    revision: str | None = None,
+) -> Iterator[SearchfoxFile]:
+    """
+    Generator that yields the files a searchfox URL points at from a local
+    mozilla-central checkout instead of the network: from the working tree,
+    or with `revision` from that revision's tree via `git archive` (which
+    also works on a bare or blobless clone). Like the searchfox listing, only
+    the directory's direct children unless `recurse` is set.
+    """
+    path = searchfox_source_path(base_url)
+    if revision is None:
+        root = Path(checkout) / path
+        if not root.is_dir():
+            raise FileNotFoundError(f"{root} does not exist")
+        for f in sorted(root.rglob(file_pattern) if recurse else root.glob(file_pattern)):
+            yield SearchfoxFile(
+                name=f.relative_to(root).as_posix(),
+                url=str(f),
+                content=f.read_text(encoding="utf-8", errors="replace"),
+            )
+        return
+
+    archive = subprocess.run(
+        ["git", "-C", str(checkout), "archive", "--format=tar", revision, "--", path],
+        capture_output=True,
+        check=True,
+    ).stdout
+    files = []
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        for member in tar:
+            name = member.name[len(path) + 1:]
+            if not member.isfile() or not fnmatch(name.rsplit("/", 1)[-1], file_pattern):
+                continue
+            if not recurse and "/" in name:
+                continue
+            content = tar.extractfile(member).read().decode("utf-8", errors="replace")
+            files.append(SearchfoxFile(name=name, url=f"{revision}:{member.name}", content=content))
+    # In the order of the working tree scan
+    yield from sorted(files, key=lambda sf_file: sf_file.path)
 
 
 # ===============================
@@ -319,6 +483,64 @@ def is_linked(lines: list[str], func_idx: int, testrail_domain: str | None, plat
         return False
 
 
+def link_verdicts(lines: list[str], testrail_domain: str | None, platform: str) -> list[bool]:
+    """
+    For every line, whether a test function on it would be linked: the
+    verdict of is_linked() for each line, in one forward pass.
+
+    is_linked() scans upward from each function. Here every line is
+    classified once and the verdict an upward scan would reach from it is
+    recorded, both outside and inside a block comment, derived from the
+    verdicts of the line above. Reaching the `)` line closing a multi-line
+    annotation (`@Converted(...)`), the scan continues from the nearest line
+    above where the parentheses balance, found on a stack of running paren
+    balances, so an unbalanced annotation costs no rescan of the file.
+    """
+    android = platform == "android"
+    verdicts = []
+    outside_at = []  # verdict of a scan arriving at each line outside a block comment
+    outside = inside = False  # ... at the line above, outside and inside a block comment
+    previous_blank = True
+    # (balance, line): running count of "(" minus ")" after a line, increasing
+    # towards the current line; line -1 is the start of the file. The top
+    # entry stands for the line above, and its line is only filled in when
+    # a line with parentheses follows.
+    balance = opening = 0
+    balances = [(0, -1)]
+
+    for k, line in enumerate(lines):
+        verdicts.append(outside if android or not previous_blank else False)
+        s = line.strip()
+        previous_blank = not s
+        if android and ("(" in s or ")" in s):
+            balances[-1] = (balance, k - 1)
+            opening = balance
+            balance += s.count("(") - s.count(")")
+            while balances and balances[-1][0] > balance:
+                balances.pop()
+            balanced_line = balances[-1][1] if balances else -1
+            balances.append((balance, k))
+        if not s or (android and s[0] == "@"):
+            pass
+        elif "http" in s and is_testrail_url_line(s, testrail_domain):
+            outside = inside = True
+        elif s.endswith("*/"):
+            outside = inside
+        else:
+            if s.startswith("/*"):
+                inside = outside
+            if s.startswith("//"):
+                pass
+            elif android and s.endswith(")") and balance < opening:
+                # Closing a multi-line annotation: continue above its start
+                outside = outside_at[balanced_line] if balanced_line >= 0 else False
+            else:
+                outside = False
+        outside_at.append(outside)
+
+    return verdicts
+
+
 def should_ignore_file(path: Path, ignored_dirs: set, platform: str) -> bool:
     # Platform-specific ignore patterns
     if platform == "ios":
@@ -372,6 +594,7 @@ def scan_file(
 
     # For Kotlin, track if we're after a @Test annotation
     pending_test_annotation = False
+    linked_at = link_verdicts(lines, testrail_domain, platform)
 
     for i, line in enumerate(lines):
         # Check for Kotlin @Test annotation
@@ -393,11 +616,10 @@ def scan_file(
         found_tests += 1
         test_name = m.group(1)
 
+        linked = linked_at[i]
         prev1 = lines[i - 1].rstrip() if i > 0 else "<start of file>"
         prev2 = lines[i - 2].rstrip() if i > 1 else "<start of file>"
 
-        linked = is_linked(lines, i, testrail_domain, platform)
-
         if debug:
             verdict = "LINKED" if linked else "MISSING"
             print(f"[{verdict}] {path}:{i+1} {test_name}")
@@ -440,10 +662,37 @@ def main() -> int:
         default=None,
         help="TestRail domain to check for (default: mozilla.testrail.io for Android, any for iOS)",
     )
-    ap.add_argument("--no-recurse", action="store_true", help="Scan only the root directory, not subdirectories")
+    ap.add_argument(
+        "--no-recurse",
+        action="store_true",
+        help="Scan only the root directory, not subdirectories (local paths; a searchfox --root is never recursed)",
+    )
     ap.add_argument("--fail", action="store_true", help="Exit with error code if missing URLs found")
     ap.add_argument("--debug", action="store_true", help="Print debug information")
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Files downloaded at a time from a searchfox --root (default: {DEFAULT_JOBS})",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Keep files downloaded from searchfox here; later runs only download changed files",
+    )
+    ap.add_argument(
+        "--checkout",
+        default=None,
+        help="Read the files of a searchfox --root from this local mozilla-central checkout instead of the network",
+    )
+    ap.add_argument(
+        "--revision",
+        default=None,
+        help="With --checkout, read the files as of this git revision (via git archive) instead of the working tree",
+    )
     args = ap.parse_args()
+    if args.revision and not args.checkout:
+        ap.error("--revision requires --checkout")
 
     # Configure platform-specific settings
     if args.platform == "ios":
@@ -468,10 +717,23 @@ def main() -> int:
     all_missing: list[MissingLink] = []
     file_count = 0
 
+    fetcher = None
+    if is_searchfox and args.checkout:
+        source_type = f"checkout {args.revision}" if args.revision else "checkout"
+    else:
+        source_type = "searchfox" if is_searchfox else "local"
+
     if is_searchfox:
-        # Fetch files from searchfox
+        if args.checkout:
+            # Read the same files from a local checkout: the directory's
+            # direct children, as the searchfox listing has them
+            sf_files = get_checkout_files(args.checkout, args.root, file_pattern, revision=args.revision)
+        else:
+            # Fetch files from searchfox
+            fetcher = SearchfoxFetcher(jobs=args.jobs, cache_dir=args.cache_dir)
+            sf_files = get_searchfox_files(args.root, file_pattern, fetcher)
         try:
-            for sf_file in get_searchfox_files(args.root, file_pattern):
+            for sf_file in sf_files:
                 file_count += 1
                 found, missing = scan_file(
                     sf_file,
@@ -484,7 +746,7 @@ def main() -> int:
                 total_tests += found
                 all_missing.extend(missing)
         except Exception as e:
-            print(f"ERROR: Failed to fetch from searchfox: {e}", file=sys.stderr)
+            print(f"ERROR: Failed to fetch from {source_type}: {e}", file=sys.stderr)
             return 2
     else:
         # Scan local directory
@@ -503,8 +765,9 @@ def main() -> int:
             total_tests += found
             all_missing.extend(missing)
 
-    source_type = "searchfox" if is_searchfox else "local"
     print(f"\nScanned {file_count} {platform_name} files from {source_type}, found {total_tests} tests.")
+    if fetcher and fetcher.cache_dir:
+        print(f"Downloaded {fetcher.downloaded}, {fetcher.not_modified} unchanged since the last run (cache).")
 
     if not all_missing:
         print("✅ No missing TestRail URLs found.")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""A local fake of searchfox and its raw file mirror, for offline tests and
+benchmarks of testrail_scan_missing_urls.py.
+
+Serves a searchfox-style directory listing at ``/firefox-main/source/<dir>``
+and the raw files at ``/raw/<path>`` with an ETag, answering 304 to a
+matching ``If-None-Match``, over HTTP/1.1 keep-alive on 127.0.0.1.
+Per-request latency and a per-connection setup cost can be injected; every
+request and connection is logged for assertions.
+
+    with FakeSearchfox({"ui/LoginTest.kt": "..."}) as server:
+        files = get_searchfox_files(server.source_url("ui"), "*Test.kt",
+                                    SearchfoxFetcher(raw_base=server.raw_base))
+"""
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SOURCE_PREFIX = "/firefox-main/source/"
+RAW_PREFIX = "/raw/"
+
+
+def kotlin_tree(directory, count, seed=0):
+    """*count* synthetic Android UI test files under *directory*, a few
+    in a subdirectory, with some tests missing their TestRail link."""
+    rng = random.Random(seed)
+    files = {}
+    for n in range(count):
+        tests = []
+        for t in range(rng.randrange(3, 12)):
+            link = (f"    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/{n * 100 + t}\n"
+                    if rng.random() < 0.9 else "")
+            smoke = "    @SmokeTest\n" if rng.random() < 0.2 else ""
+            tests.append(f"{link}{smoke}    @Test\n    fun verifyFeature{t}() {{\n"
+                         f"        navigationToolbar {{\n        }}.enterURLAndEnterToBrowser(url) {{\n"
+                         f"            verifyPageContent(\"Page {t}\")\n        }}\n    }}\n")
+        subdirectory = "robots/" if n % 50 == 49 else ""
+        files[f"{directory}/{subdirectory}Feature{n}Test.kt"] = (
+            "package org.mozilla.fenix.ui\n\nimport org.junit.Test\n\n"
+            f"class Feature{n}Test : TestSetup() {{\n" + "\n".join(tests) + "}\n"
+        )
+    return files
+
+
+class FakeSearchfox:
+    """*files* maps a path ("dir/NameTest.kt") to the file's text."""
+
+    def __init__(self, files, latency=0.0, connect_latency=0.0):
+        self.files = files
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.requests = []  # (path, status, body bytes)
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self.raw_base = self.url + RAW_PREFIX.rstrip("/")
+
+    def source_url(self, directory):
+        return f"{self.url}{SOURCE_PREFIX}{directory}"
+
+    def __enter__(self):
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path, if_none_match):
+        """(status, headers, body) for one GET."""
+        if path.startswith(SOURCE_PREFIX):
+            directory = path[len(SOURCE_PREFIX):].strip("/") + "/"
+            entries = sorted({
+                name[len(directory):].split("/", 1)[0]
+                for name in self.files if name.startswith(directory)
+            })
+            if not entries:
+                return 404, {}, b"Not Found"
+            links = "".join(
+                f'<tr><td><a href="{SOURCE_PREFIX}{directory}{entry}">{entry}</a></td></tr>\n'
+                for entry in entries
+            )
+            return 200, {"Content-Type": "text/html"}, f"<table>\n{links}</table>".encode()
+        if path.startswith(RAW_PREFIX) and path[len(RAW_PREFIX):] in self.files:
+            body = self.files[path[len(RAW_PREFIX):]].encode()
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if if_none_match == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"Content-Type": "text/plain; charset=utf-8", "ETag": etag}, body
+        return 404, {}, b"Not Found"
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with fake.lock:
+                fake.connections += 1
+            time.sleep(fake.connect_latency)
+
+        def do_GET(self):
+            time.sleep(fake.latency)
+            status, headers, body = fake.respond(self.path, self.headers.get("If-None-Match"))
+            with fake.lock:
+                fake.requests.append((self.path, status, len(body)))
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""A local fake of the TestRail API v2 for offline tests and benchmarks.
+
+Serves paginated ``get_*`` collections from memory and echoes ``add_*``
+posts (``add_run`` also creates the run's tests, served by ``get_tests``)
+over HTTP/1.1 keep-alive on 127.0.0.1. Per-request latency, a
+per-connection setup cost (standing in for the TCP + TLS handshake a real
+server costs) and queued error responses can be injected; every request
+and connection is logged for assertions, and so is the most requests
+served at once.
+
+    with FakeTestRail({"cases": cases}) as server:
+        client = APIClient(server.url)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = "/api/v2/"
+
+
+class FakeTestRail:
+    """*collections* maps a collection name ("cases", "sections", ...) to
+    its items, served by ``get_<name>/<id>``; items with a ``suite_id`` are
+    filtered by the ``suite_id`` parameter, and ``updated_after`` keeps the
+    items with a later ``updated_on``. Items are grouped by suite once
+    (again whenever a collection's length changes), so large collections
+    stay cheap to page through.
+
+    *pagination* is "links" (TestRail 6.7+: ``_links.next``), "offset"
+    (a page dict without links) or "list" (the bare list, pre-6.7)."""
+
+    def __init__(self, collections=None, pagination="links", latency=0.0, connect_latency=0.0):
+        self.collections = collections or {}
+        self.pagination = pagination
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.failures = []  # (status, headers) returned by the next requests
+        self.requests = []  # (method, uri, connection number, Authorization)
+        self.posts = []  # (uri, payload)
+        self.runs = {}  # run id -> its tests, from add_run
+        self.connections = 0
+        self.in_flight = 0  # requests being served right now
+        self.most_in_flight = 0  # the most that have been served at once
+        self.lock = threading.Lock()
+        self._suites = {}  # collection name -> (length, {suite id: items})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def fail_next(self, status, headers=None, count=1):
+        with self.lock:
+            self.failures.extend([(status, headers or {})] * count)
+
+    def __enter__(self):
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, method, uri, body):
+        """(status, headers, payload) for one request."""
+        with self.lock:
+            if self.failures:
+                status, headers = self.failures.pop(0)
+                return status, headers, {"error": f"injected HTTP {status}"}
+        route, *pairs = uri.split("&")
+        params = dict(pair.split("=", 1) for pair in pairs if "=" in pair)
+        name = route.split("/", 1)[0]
+        if method == "POST":
+            return 200, {}, self._post(name, route, body or {})
+        key = name.removeprefix("get_")
+        if key == "tests":
+            items = self.runs.get(int(route.split("/")[1]), [])
+        elif key in self.collections:
+            items = self.collections[key]
+        else:
+            return 400, {}, {"error": f"Unknown method {name}"}
+        if "suite_id" in params:
+            items = self._in_suite(key, items, params["suite_id"])
+        if "updated_after" in params:
+            items = [i for i in items if i.get("updated_on", 0) > int(params["updated_after"])]
+        if self.pagination == "list":
+            return 200, {}, items
+        limit = min(int(params.get("limit", 250)), 250)
+        offset = int(params.get("offset", 0))
+        page = items[offset:offset + limit]
+        payload = {"offset": offset, "limit": limit, "size": len(page), key: page}
+        if self.pagination == "links":
+            following = None
+            if offset + limit < len(items):
+                base = "&".join(p for p in [route, *pairs]
+                                if not p.startswith(("limit=", "offset=")))
+                following = f"{API_PREFIX}{base}&limit={limit}&offset={offset + limit}"
+            payload["_links"] = {"next": following, "prev": None}
+        return 200, {}, payload
+
+    def _in_suite(self, key, items, suite_id):
+        """The items of one suite; items without a suite_id are in every suite."""
+        with self.lock:
+            length, suites = self._suites.get(key, (None, None))
+            if items is not self.collections.get(key):
+                suites = None  # a run's tests
+            elif length != len(items):
+                suites = {}
+                for item in items:
+                    if "suite_id" not in item:
+                        suites = None
+                        break
+                    suites.setdefault(str(item["suite_id"]), []).append(item)
+                self._suites[key] = (len(items), suites)
+        if suites is None:
+            return [i for i in items if str(i.get("suite_id", suite_id)) == suite_id]
+        return suites.get(suite_id, [])
+
+    def _post(self, name, route, body):
+        with self.lock:
+            self.posts.append((route, body))
+            if name.startswith("add_results"):
+                return [{"id": len(self.posts) * 1000 + i, **result}
+                        for i, result in enumerate(body.get("results", []))]
+            created = {"id": len(self.posts), **body}
+            if name == "add_run":
+                case_ids = body.get("case_ids") or [
+                    c["id"] for c in self.collections.get("cases", [])
+                    if str(c.get("suite_id")) == str(body.get("suite_id"))
+                ]
+                self.runs[created["id"]] = [
+                    {"id": created["id"] * 100_000 + i, "case_id": case_id,
+                     "run_id": created["id"]}
+                    for i, case_id in enumerate(case_ids)
+                ]
+            return created
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without this, keep-alive
+        # responses stall on Nagle + delayed ACK (~40 ms each)
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with fake.lock:
+                fake.connections += 1
+                self.connection_number = fake.connections
+            time.sleep(fake.connect_latency)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def _serve(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            uri = self.path.split("?", 1)[-1].removeprefix(API_PREFIX)
+            with fake.lock:
+                fake.requests.append(
+                    (method, uri, self.connection_number, self.headers.get("Authorization"))
+                )
+                fake.in_flight += 1
+                fake.most_in_flight = max(fake.most_in_flight, fake.in_flight)
+            try:
+                time.sleep(fake.latency)
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                status, headers, payload = fake.respond(method, uri, body)
+            finally:
+                with fake.lock:
+                    fake.in_flight -= 1
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
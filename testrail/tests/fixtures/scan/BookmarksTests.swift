@@ -0,0 +1,59 @@
+// This Source Code Form is subject to the terms of the Mozilla Public
+// License, v. 2.0. If a copy of the MPL was not distributed with this
+// file, You can obtain one at http://mozilla.org/MPL/2.0/
+
+import Common
+import XCTest
+
+class BookmarksTests: BaseTestCase {
+    override func setUp() {
+        super.setUp()
+    }
+
+    // https://mozilla.testrail.io/index.php?/cases/view/2306905
+    func testBookmarkingUI() {
+        navigator.openURL(url_1)
+        waitForTabsButton()
+    }
+
+    // https://mozilla.testrail.io/index.php?/cases/view/2306906
+    // Smoke TAE
+    func testAccessBookmarksFromContextMenu() {
+        addLaunchArgument(jsonFileName: "bookmarkOpenInNewTab")
+    }
+
+    // https://mozilla.testrail.io/index.php?/cases/view/2306909
+    /* Disabled on iPad
+       see issue 1234 */
+    func testAddBookmark() {
+    }
+
+    /**
+     Creates a bookmark from the share sheet.
+     https://mozilla.testrail.io/index.php?/cases/view/2306914
+     */
+    func testAddBookmarkFromShareSheet() {
+    }
+
+    func testNoLink() {
+    }
+
+    // Smoketest TAE
+    func testSmokeWithoutLink() {
+    }
+
+    // https://mozilla.testrail.io/index.php?/cases/view/2306910
+
+    func testLinkSeparatedByBlankLine() {
+    }
+
+    @MainActor
+    // https://mozilla.testrail.io/index.php?/cases/view/2306911
+    func testAttributeAboveComment() {
+    }
+
+    // https://mozilla.testrail.io/index.php?/cases/view/2306912
+    @MainActor
+    func testAttributeBelowComment() {
+    }
+}
@@ -0,0 +1,26 @@
+import XCTest
+
+class HistoryTests: BaseTestCase {
+    // https://mozilla.testrail.io/index.php?/cases/view/2306919
+    func testEmptyHistoryListFirstTime() {
+        navigator.nowAt(NewTabScreen)
+    }
+    /* https://mozilla.testrail.io/index.php?/cases/view/2306920 */
+    func testOpenHistoryFromBrowserContextMenuOptions() {
+    }
+    /*
+     * Bug 1456789: intermittent
+     */
+    // https://mozilla.testrail.io/index.php?/cases/view/2306921
+    func testClearHistoryFromSettings() {
+    }
+    let helper = 1
+    func testAfterCode() {
+    }
+    // Smoke TAE
+    /* older comment */
+    // https://mozilla.testrail.io/index.php?/cases/view/2306924
+    // Smoke TAE
+    func testMultipleComments() {
+    }
+}
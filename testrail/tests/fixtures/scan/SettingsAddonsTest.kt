@@ -0,0 +1,108 @@
+/* This Source Code Form is subject to the terms of the Mozilla Public
+ * License, v. 2.0. If a copy of the MPL was not distributed with this
+ * file, You can obtain one at http://mozilla.org/MPL/2.0/. */
+
+package org.mozilla.fenix.ui
+
+import androidx.compose.ui.test.junit4.AndroidComposeTestRule
+import org.junit.Rule
+import org.junit.Test
+import org.mozilla.fenix.customannotations.SmokeTest
+import org.mozilla.fenix.helpers.TestSetup
+
+/**
+ *  Tests for verifying the functionality of installing or removing addons
+ *
+ */
+class SettingsAddonsTest : TestSetup() {
+    @get:Rule
+    val composeTestRule =
+        AndroidComposeTestRuleWithConditions(
+            HomeActivityIntentTestRule.withDefaultSettingsOverrides(),
+        ) { it.activity }
+
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/875780
+    @Test
+    fun verifyAddonsListItemsTest() {
+        homeScreen {
+        }.openThreeDotMenu {
+        }.openAddonsManagerMenu {
+            verifyAddonsItems()
+        }
+    }
+
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/875781
+    @Converted(
+        replacedBy = [
+            "SettingsAddonsEfficiencyTest.verifyAddonsCanBeInstalled",
+        ],
+        bug = 1985432,
+        since = "2026-05-01",
+    )
+    @SmokeTest
+    @Test
+    fun installAddonFromMainMenuTest() {
+        addonsMenu {
+            installAddon("uBlock Origin", composeTestRule)
+        }
+    }
+
+    @Converted(replacedBy = ["SettingsAddonsEfficiencyTest.verifyUninstall"], bug = 1985433, since = "2026-05-01")
+    @Test
+    fun verifyAddonsCanBeUninstalledTest() {
+        addonsMenu {
+            removeAddon("uBlock Origin")
+        }
+    }
+
+    /**
+     * TestRail link: https://mozilla.testrail.io/index.php?/cases/view/561594
+     * Installs an addon in private browsing.
+     */
+    @Test
+    fun verifyPrivateBrowsingAddonTest() {
+        homeScreen {
+        }.togglePrivateBrowsingMode()
+    }
+
+    /* Block comment without a link */
+    // Bug 1812345 - flaky on API 30
+    @Ignore("Disabled, see bug 1812345")
+    @Test
+    fun verifyAddonsPermissionsTest() {
+        addonsMenu {
+            verifyPermissions(
+                listOf("Access your data", "Display notifications"),
+            )
+        }
+    }
+
+    @Test
+    fun verifyAddonIsEnabledTest() {
+        val addonName =
+            "Privacy Badger"
+        addonsMenu {
+            verifyAddonIsEnabled(addonName)
+        }
+    }
+
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/1160301
+    @SmokeTest
+    @Test
+    @SdkSuppress(
+        minSdkVersion = 30,
+    )
+    fun verifyAddonsCanBeUpdatedTest() {
+    }
+
+    // https://github.com/mozilla-mobile/fenix/issues/123 is not a TestRail link
+    @Test
+    fun verifyAddonsDetailsTest() {
+    }
+
+    @Test
+    @SmokeTest
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/875790
+    fun verifyAnnotationOrderTest() {
+    }
+}
@@ -0,0 +1,51 @@
+package org.mozilla.fenix.ui
+
+import org.junit.Test
+
+class TabbedBrowsingTest : TestSetup() {
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/903599
+    @Test
+    fun closeAllTabsTest() {
+        val defaultWebPage = TestAssetHelper.getGenericAsset(mockWebServer, 1)
+
+        navigationToolbar {
+        }.enterURLAndEnterToBrowser(defaultWebPage.url) {
+        }.openTabDrawer(composeTestRule) {
+            verifyExistingOpenTabs("Test_Page_1")
+        }
+    }
+
+    @Converted(
+        replacedBy = ["TabsEfficiencyTest.verifyCloseTab"], // moved
+        bug = 1991234,
+        since = "2026-06-12",
+    ) // closes @Converted
+    @Test
+    fun closeTabTest() {
+        homeScreen {
+        }
+    }
+
+    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/903604
+    @Suppress(
+        "DEPRECATION",
+    )
+    @Test
+    fun verifyTabTrayNotShowingStateHalfExpanded() {
+    }
+
+    fun helperNotATest() {
+        // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/1
+    }
+    @Test
+    fun testAfterHelper() {
+    }
+
+    /*
+     * TestRail link: https://mozilla.testrail.io/index.php?/cases/view/2
+     */
+
+    @Test
+    fun testAfterSpacedBlockComment() {
+    }
+}
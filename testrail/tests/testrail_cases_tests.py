@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Offline tests for case selection against a cached suite
+(testrail/testrail_cases.py and TestRail.select_case_ids), run against the
+local fake server in fake_testrail.py.
+
+    python -m unittest discover -s testrail/tests -p '*tests.py'
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail_api import TestRail  # noqa: E402
+from testrail_cases import CaseTable  # noqa: E402
+
+SMOKE = {
+    "custom_automation_status": 4,
+    "custom_automation_coverage": 3,
+    "custom_sub_test_suites": lambda v: set(v or []) == {1, 2},
+}
+FUNCTIONAL = {
+    "custom_automation_status": 4,
+    "custom_automation_coverage": 3,
+    "custom_sub_test_suites": lambda v: set(v or []) == {1},
+}
+
+
+def suite(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "id": i,
+        "suite_id": 1,
+        "custom_automation_status": rng.choice([1, 2, 4]),
+        "custom_automation_coverage": rng.choice([None, 1, 3]),
+        "custom_sub_test_suites": rng.choice([None, [], [1], [2, 1], [1, 2], [2]]),
+    } for i in range(1, n + 1)]
+
+
+def satisfies_all(case, filters):
+    """The per-case check the table replaces."""
+    for field, condition in filters.items():
+        value = case.get(field)
+        if callable(condition) and not condition(value):
+            return False
+        if not callable(condition) and value != condition:
+            return False
+    return True
+
+
+def get_cases_requests(server):
+    return sum(uri.startswith("get_cases/") for _, uri, *_ in server.requests)
+
+
+class CaseTableTests(unittest.TestCase):
+    def test_matches_per_case_filtering(self):
+        cases = suite(2000)
+        table = CaseTable(cases)
+        for filters in (SMOKE, FUNCTIONAL, {"custom_automation_status": 4}, {},
+                        {"custom_sub_test_suites": [1]}, {"custom_automation_status": 5}):
+            self.assertEqual(table.select(filters),
+                             [c for c in cases if satisfies_all(c, filters)])
+
+    def test_callable_runs_once_per_distinct_value(self):
+        calls = []
+        table = CaseTable(suite(1000))
+        table.select({"custom_sub_test_suites": lambda v: calls.append(v) or True})
+        self.assertEqual(len(calls), 6)
+
+    def test_saved_table_expires(self):
+        path = os.path.join(tempfile.mkdtemp(), "cases.json")
+        CaseTable(suite(10), fetched_at=time.time() - 100).save(path)
+        self.assertEqual(len(CaseTable.load(path, max_age=200)), 10)
+        self.assertIsNone(CaseTable.load(path, max_age=50))
+        self.assertIsNone(CaseTable.load(path + ".missing", max_age=200))
+
+
+class SelectCaseIdsTests(unittest.TestCase):
+    def test_filter_sets_share_one_fetch(self):
+        cases = suite(1200)
+        with FakeTestRail({"cases": cases}) as server:
+            testrail = TestRail(server.url, "user@example.com", "key")
+            selected = testrail.select_case_ids(1, 1, {"smoke": SMOKE, "functional": FUNCTIONAL})
+            testrail.get_case_ids_by_multiple_custom_fields(1, 1, SMOKE)
+        self.assertEqual(get_cases_requests(server), 5)  # 1200 cases, 250 per page
+        self.assertEqual(selected["smoke"],
+                         [c["id"] for c in cases if satisfies_all(c, SMOKE)])
+        self.assertEqual(selected["functional"],
+                         [c["id"] for c in cases if satisfies_all(c, FUNCTIONAL)])
+
+    def test_case_cache_dir_is_shared_between_instances(self):
+        cache_dir = os.path.join(tempfile.mkdtemp(), "cache")
+        with FakeTestRail({"cases": suite(300)}) as server:
+            for _ in range(2):
+                testrail = TestRail(server.url, "user@example.com", "key",
+                                    case_cache_dir=cache_dir)
+                first = testrail.select_case_ids(1, 1, {"smoke": SMOKE})
+            self.assertEqual(get_cases_requests(server), 2)
+            self.assertEqual(testrail.select_case_ids(1, 1, {"smoke": SMOKE}), first)
+
+            expired = TestRail(server.url, "user@example.com", "key",
+                               case_cache_dir=cache_dir, case_cache_max_age=0)
+            time.sleep(0.01)
+            expired.get_case_table(1, 1)
+            self.assertEqual(get_cases_requests(server), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Offline tests for the shared TestRail client (testrail/testrail_conn.py),
+run against the local fake server in fake_testrail.py.
+
+    python -m unittest discover -s testrail/tests -p '*tests.py'
+"""
+
+import base64
+import os
+import sys
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail_conn import APIClient, APIError  # noqa: E402
+
+
+def cases(n, suite_id=1):
+    return [{"id": i, "suite_id": suite_id, "title": f"Case {i}"} for i in range(1, n + 1)]
+
+
+def client_for(server, **kwargs):
+    client = APIClient(server.url, **kwargs)
+    client.user = "user@example.com"
+    client.password = "key"
+    return client
+
+
+class PaginationTests(unittest.TestCase):
+    def crawl(self, pagination, n=600):
+        with FakeTestRail({"cases": cases(n) + cases(5, suite_id=2)}, pagination) as server:
+            pages = list(client_for(server).iter_pages("get_cases/1&suite_id=1", "cases"))
+        return pages, server
+
+    def test_follows_next_links(self):
+        pages, server = self.crawl("links")
+        self.assertEqual([len(p) for p in pages], [250, 250, 100])
+        self.assertEqual([c["id"] for p in pages for c in p], list(range(1, 601)))
+        self.assertEqual(len(server.requests), 3)
+        self.assertTrue(server.requests[2][1].endswith("&suite_id=1&limit=250&offset=500"))
+
+    def test_steps_offset_without_links(self):
+        pages, server = self.crawl("offset", n=500)
+        self.assertEqual([len(p) for p in pages], [250, 250])
+        # A full last page needs one more (empty) request to prove it is the last
+        self.assertEqual(len(server.requests), 3)
+
+    def test_bare_list_is_one_page(self):
+        pages, server = self.crawl("list")
+        self.assertEqual([len(p) for p in pages], [600])
+        self.assertEqual(len(server.requests), 1)
+
+    def test_pages_are_fetched_lazily(self):
+        with FakeTestRail({"cases": cases(1000)}) as server:
+            pages = client_for(server).iter_pages("get_cases/1&suite_id=1", "cases")
+            self.assertEqual(server.requests, [])
+            next(pages)
+            self.assertEqual(len(server.requests), 1)
+
+
+class SessionTests(unittest.TestCase):
+    def test_requests_share_one_connection(self):
+        with FakeTestRail({"cases": cases(2000)}) as server:
+            client = client_for(server)
+            for _ in client.iter_pages("get_cases/1&suite_id=1", "cases"):
+                pass
+            client.send_post("add_case/1", {"title": "New"})
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.requests), 9)
+
+    def test_basic_auth(self):
+        with FakeTestRail({"projects": []}) as server:
+            client = client_for(server)
+            client.send_get("get_projects")
+            client.user = "other@example.com"
+            client.send_get("get_projects")
+        expected = [
+            "Basic " + base64.b64encode(f"{user}:key".encode()).decode()
+            for user in ("user@example.com", "other@example.com")
+        ]
+        self.assertEqual([r[3] for r in server.requests], expected)
+
+    def test_post_sends_json(self):
+        with FakeTestRail() as server:
+            result = client_for(server).send_post("add_run/1", {"name": "Run", "case_ids": [1]})
+        self.assertEqual(result, {"id": 1, "name": "Run", "case_ids": [1]})
+        self.assertEqual(server.posts, [("add_run/1", {"name": "Run", "case_ids": [1]})])
+
+
+class RetryTests(unittest.TestCase):
+    def test_rate_limit_honours_retry_after(self):
+        with FakeTestRail({"cases": cases(3)}) as server:
+            server.fail_next(429, {"Retry-After": "0.3"})
+            started = time.monotonic()
+            (page,) = client_for(server).iter_pages("get_cases/1&suite_id=1", "cases")
+            elapsed = time.monotonic() - started
+        self.assertEqual(len(page), 3)
+        self.assertEqual(len(server.requests), 2)
+        self.assertGreaterEqual(elapsed, 0.3)
+
+    def test_rate_limit_pauses_every_thread(self):
+        with FakeTestRail({"projects": []}, latency=0.05) as server:
+            client = client_for(server)
+            server.fail_next(429, {"Retry-After": "0.5"})
+            first = threading.Thread(target=client.send_get, args=("get_projects",))
+            first.start()
+            time.sleep(0.2)  # the first request has been rate limited by now
+            started = time.monotonic()
+            client.send_get("get_projects")
+            elapsed = time.monotonic() - started
+            first.join()
+        self.assertEqual(len(server.requests), 3)
+        self.assertGreaterEqual(elapsed, 0.3)
+
+    def test_rate_limited_post_is_retried(self):
+        with FakeTestRail() as server:
+            server.fail_next(429, {"Retry-After": "0"})
+            client_for(server).send_post("add_case/1", {"title": "New"})
+        self.assertEqual(len(server.posts), 1)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_server_error_on_get_is_retried(self):
+        with FakeTestRail({"projects": []}) as server:
+            server.fail_next(503, {"Retry-After": "0"}, count=2)
+            client_for(server).send_get("get_projects")
+        self.assertEqual(len(server.requests), 3)
+
+    def test_server_error_on_post_is_not_retried(self):
+        with FakeTestRail() as server:
+            server.fail_next(500)
+            with self.assertRaises(APIError) as raised:
+                client_for(server).send_post("add_case/1", {"title": "New"})
+        self.assertEqual(raised.exception.status_code, 500)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_gives_up_after_max_retries(self):
+        with FakeTestRail({"projects": []}) as server:
+            server.fail_next(429, {"Retry-After": "0"}, count=5)
+            with self.assertRaises(APIError) as raised:
+                client_for(server, max_retries=2).send_get("get_projects")
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with FakeTestRail() as server, self.assertRaises(APIError) as raised:
+            client_for(server).send_get("get_unknown/1")
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertIn("Unknown method", str(raised.exception))
+        self.assertEqual(len(server.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Offline tests for test run creation and bulk result posting in
+testrail/testrail_api.py, run against the local fake server in fake_testrail.py.
+
+    python -m unittest discover -s testrail/tests -p '*tests.py'
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from fake_testrail import FakeTestRail  # noqa: E402
+from testrail_api import TestRail  # noqa: E402
+from testrail_conn import APIError  # noqa: E402
+
+DEVICES = ["iPhone", "iPad"]
+
+
+def testrail_for(server):
+    return TestRail(server.url, "user@example.com", "key")
+
+
+def quietly(call, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return call(*args, **kwargs)
+
+
+class AddResultsForCasesTests(unittest.TestCase):
+    def test_results_are_posted_in_chunks(self):
+        with FakeTestRail() as server:
+            results = testrail_for(server).add_results_for_cases(
+                7, list(range(1, 601)), 1, chunk_size=250
+            )
+        self.assertEqual([len(body["results"]) for _, body in server.posts], [250, 250, 100])
+        self.assertEqual({uri for uri, _ in server.posts}, {"add_results_for_cases/7"})
+        self.assertEqual([r["case_id"] for r in results], list(range(1, 601)))
+        self.assertTrue(all(r["status_id"] == 1 for r in results))
+
+
+class CreateTestRunsTests(unittest.TestCase):
+    def test_paginated_runs_post_results_for_their_cases(self):
+        with FakeTestRail() as server:
+            runs = quietly(
+                testrail_for(server).create_paginated_test_runs,
+                project_id=14, suite_id=1, release_version_id="145.3", milestone_id=3,
+                base_run_name="Smoke", device_name="iPhone", case_ids=list(range(1, 601)),
+            )
+        self.assertEqual(len(runs), 3)
+        self.assertEqual(runs[0]["name"], "Smoke - 145.3 - iPhone (part 1)")
+        posted = [(uri.split("/")[0], body) for uri, body in server.posts]
+        self.assertEqual([name for name, _ in posted], ["add_run", "add_results_for_cases"] * 3)
+        for (_, run), (_, results) in zip(posted[::2], posted[1::2], strict=True):
+            self.assertEqual([r["case_id"] for r in results["results"]], run["case_ids"])
+        # The case IDs are already known, so the runs' tests are never fetched
+        self.assertFalse(any(uri.startswith("get_tests") for _, uri, *_ in server.requests))
+
+    def test_device_runs_are_created_in_parallel(self):
+        runs = {"Smoke": [1, 2, 3], "Functional": list(range(10, 20))}
+        # Each request is held for 0.1s, so runs created in parallel overlap on the server
+        with FakeTestRail(latency=0.1) as server:
+            created = quietly(
+                testrail_for(server).create_device_test_runs,
+                project_id=14, suite_id=1, release_version_id="145.3", milestone_id=3,
+                devices=DEVICES, runs=runs,
+            )
+        self.assertEqual(set(created), {(n, d) for n in runs for d in DEVICES})
+        self.assertEqual(created[("Functional", "iPad")][0]["name"], "Functional - iPad")
+        self.assertEqual(len(server.posts), 8)
+        self.assertGreater(server.most_in_flight, 1)
+
+    def test_device_run_errors_are_raised(self):
+        with FakeTestRail() as server:
+            server.fail_next(400)
+            with self.assertRaises(APIError):
+                quietly(
+                    testrail_for(server).create_device_test_runs,
+                    project_id=14, suite_id=1, release_version_id="145.3", milestone_id=3,
+                    devices=DEVICES, runs={"Smoke": [1, 2, 3]},
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Offline tests for testrail_scan_missing_urls.py: the single-pass
+link_verdicts against is_linked (on the files in fixtures/scan and on random
+files), the parallel, cached searchfox fetcher (against the local fake in
+fake_searchfox.py) and the local checkout and git archive modes.
+
+    python -m unittest discover -s testrail/tests -p '*tests.py'
+"""
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+import testrail_scan_missing_urls as scanner  # noqa: E402
+from fake_searchfox import FakeSearchfox, kotlin_tree  # noqa: E402
+
+UI = "mobile/android/fenix/ui"
+SEARCHFOX_URL = f"https://searchfox.org/firefox-main/source/{UI}"
+FIXTURES = Path(TESTS_DIR, "fixtures", "scan")
+DOMAIN = "mozilla.testrail.io"
+
+# Lines random files are made of: every kind of line is_linked treats apart
+LINE_KINDS = [
+    "", "    ", "    @Test", "    @SmokeTest", "    @Converted(", "    @Converted(bug = 1)",
+    '        replacedBy = ["A.b"],', "        bug = 1985432,", "    )", "    ) // closes", "))",
+    "(", "    // TestRail link: https://mozilla.testrail.io/index.php?/cases/view/1",
+    "    // https://github.com/mozilla-mobile/fenix/issues/1", "    // Smoke TAE",
+    "    /**", "    /*", "     * text", "     */", "    /* one line */",
+    "    /* https://mozilla.testrail.io/index.php?/cases/view/2 */",
+    "     * https://mozilla.testrail.io/index.php?/cases/view/3 (x)",
+    "    @Ignore(\"https://mozilla.testrail.io/index.php?/cases/view/4\")",
+    "    fun verifyThing() {", "    func testThing() {", "    }", "    val x = listOf(1,", "    let y = 2",
+]
+
+
+def quietly(files):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(files)
+
+
+def write_tree(root, files):
+    for name, content in files.items():
+        path = Path(root) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def run_main(*args):
+    output = io.StringIO()
+    argv = sys.argv
+    sys.argv = ["testrail_scan_missing_urls.py", *args]
+    try:
+        with contextlib.redirect_stdout(output):
+            status = scanner.main()
+    finally:
+        sys.argv = argv
+    return status, output.getvalue()
+
+
+class LinkVerdictsTests(unittest.TestCase):
+    def assert_matches_is_linked(self, lines, platform, name):
+        verdicts = scanner.link_verdicts(lines, DOMAIN, platform)
+        for i, verdict in enumerate(verdicts):
+            expected = scanner.is_linked(lines, i, DOMAIN, platform)
+            if verdict != expected:
+                self.fail(f"{name}:{i + 1} ({platform}): is_linked {expected}, link_verdicts {verdict}\n"
+                          + "\n".join(lines[max(0, i - 8):i + 1]))
+
+    def test_matches_is_linked_on_fixtures(self):
+        fixtures = sorted(FIXTURES.iterdir())
+        self.assertTrue(fixtures)
+        for path in fixtures:
+            lines = path.read_text().splitlines()
+            # Every line as if a test function followed, on both platforms
+            for platform in ("android", "ios"):
+                self.assert_matches_is_linked(lines, platform, path.name)
+
+    def test_matches_is_linked_on_random_files(self):
+        rng = random.Random(0)
+        for n in range(3000):
+            lines = [rng.choice(LINE_KINDS) for _ in range(rng.randrange(1, 40))]
+            for platform in ("android", "ios"):
+                self.assert_matches_is_linked(lines, platform, f"random file {n}")
+
+    def test_scan_file_reports_fixture_tests(self):
+        results = {}
+        for path in sorted(FIXTURES.iterdir()):
+            platform = "android" if path.suffix == ".kt" else "ios"
+            test_func_re = scanner.KOTLIN_TEST_FUNC_RE if platform == "android" else scanner.SWIFT_TEST_FUNC_RE
+            found, missing = scanner.scan_file(path, DOMAIN, False, test_func_re, set(), platform)
+            results[path.name] = (found, [item.test_name for item in missing])
+        self.assertEqual(results, {
+            "BookmarksTests.swift": (9, ["testNoLink", "testSmokeWithoutLink",
+                                         "testLinkSeparatedByBlankLine", "testAttributeBelowComment"]),
+            "HistoryTests.swift": (5, ["testAfterCode"]),
+            "SettingsAddonsTest.kt": (7, ["verifyAddonsCanBeUninstalledTest", "verifyAddonIsEnabledTest",
+                                          "verifyAddonsDetailsTest"]),
+            "TabbedBrowsingTest.kt": (5, ["closeTabTest", "testAfterHelper"]),
+        })
+
+
+class SearchfoxFetcherTests(unittest.TestCase):
+    def setUp(self):
+        self.files = kotlin_tree(UI, 60)
+        self.top_level = sorted(
+            name for name in self.files if "/" not in name[len(UI) + 1:]
+        )
+
+    def test_parallel_fetch_keeps_order_over_pooled_connections(self):
+        with FakeSearchfox(self.files, latency=0.01) as server:
+            fetcher = scanner.SearchfoxFetcher(jobs=4, raw_base=server.raw_base)
+            fetched = quietly(scanner.get_searchfox_files(server.source_url(UI), "*Test.kt", fetcher))
+        self.assertEqual([f"{UI}/{f.name}" for f in fetched], self.top_level)
+        self.assertEqual([f.content for f in fetched], [self.files[n] for n in self.top_level])
+        self.assertLessEqual(server.connections, 4)
+
+    def test_cache_skips_unchanged_files(self):
+        cache_dir = tempfile.mkdtemp()
+        with FakeSearchfox(self.files) as server:
+            url = server.source_url(UI)
+            first = quietly(scanner.get_searchfox_files(
+                url, "*Test.kt", scanner.SearchfoxFetcher(cache_dir=cache_dir, raw_base=server.raw_base)))
+
+            changed = self.top_level[3]
+            self.files[changed] += "// edited\n"
+            fetcher = scanner.SearchfoxFetcher(cache_dir=cache_dir, raw_base=server.raw_base)
+            second = quietly(scanner.get_searchfox_files(url, "*Test.kt", fetcher))
+        # The listing page has no ETag, so it is downloaded again
+        self.assertEqual(fetcher.downloaded, 2)
+        self.assertEqual(fetcher.not_modified, len(self.top_level) - 1)
+        self.assertEqual([f.content for f in second], [self.files[n] for n in self.top_level])
+        self.assertNotEqual(first[3].content, second[3].content)
+
+    def test_failed_files_are_skipped(self):
+        names = [name[len(UI) + 1:] for name in self.top_level]
+        with FakeSearchfox(self.files) as server:
+            fetcher = scanner.SearchfoxFetcher(raw_base=server.raw_base)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                fetched = list(fetcher.fetch_files(server.source_url(UI), ["GoneTest.kt", *names]))
+        self.assertEqual([f.name for f in fetched], names)
+        self.assertIn("Failed to fetch GoneTest.kt", stderr.getvalue())
+
+
+class CheckoutTests(unittest.TestCase):
+    def setUp(self):
+        self.checkout = tempfile.mkdtemp()
+        self.files = kotlin_tree(UI, 120)
+        write_tree(self.checkout, self.files)
+
+    def tearDown(self):
+        shutil.rmtree(self.checkout)
+
+    def test_checkout_matches_searchfox(self):
+        with FakeSearchfox(self.files) as server:
+            fetched = quietly(scanner.get_searchfox_files(
+                server.source_url(UI), "*Test.kt", scanner.SearchfoxFetcher(raw_base=server.raw_base)))
+        local = list(scanner.get_checkout_files(self.checkout, SEARCHFOX_URL, "*Test.kt"))
+        self.assertEqual([(f.name, f.content) for f in local], [(f.name, f.content) for f in fetched])
+
+        recursive = list(scanner.get_checkout_files(self.checkout, SEARCHFOX_URL, "*Test.kt", recurse=True))
+        self.assertEqual(len(recursive), 120)
+
+    @unittest.skipUnless(shutil.which("git"), "git is not installed")
+    def test_git_archive_reads_the_revision(self):
+        def git(*args):
+            return subprocess.run(
+                ["git", "-C", self.checkout, "-c", "user.name=t", "-c", "user.email=t@example.com",
+                 *args], capture_output=True, text=True, check=True).stdout.strip()
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "tree")
+        revision = git("rev-parse", "HEAD")
+        edited = Path(self.checkout, next(iter(self.files)))
+        edited.write_text("// uncommitted\n")
+
+        archived = list(scanner.get_checkout_files(
+            self.checkout, SEARCHFOX_URL, "*Test.kt", revision=revision))
+        working_tree = list(scanner.get_checkout_files(self.checkout, SEARCHFOX_URL, "*Test.kt"))
+        self.assertEqual([f.name for f in archived], [f.name for f in working_tree])
+        self.assertEqual([f.content for f in archived],
+                         [self.files[f"{UI}/{f.name}"] for f in archived])
+        self.assertNotEqual(archived[0].content, working_tree[0].content)
+
+    def test_main_reports_the_same_tests_from_checkout_and_local_root(self):
+        _, from_checkout = run_main(
+            "--platform", "android", "--root", SEARCHFOX_URL, "--checkout", self.checkout)
+        _, from_root = run_main(
+            "--platform", "android", "--root", str(Path(self.checkout, UI)), "--no-recurse")
+        missing = [line for line in from_checkout.splitlines() if line.startswith("- ")]
+        self.assertTrue(missing)
+        self.assertEqual(
+            missing,
+            [line.replace(str(Path(self.checkout, UI)) + "/", "")
+             for line in from_root.splitlines() if line.startswith("- ")],
+        )
+        self.assertIn("files from checkout", from_checkout)
+
+
+if __name__ == "__main__":
+    unittest.main()